@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+article_preview.py
+
+文章预览：服务端把 Markdown 渲染为 HTML，并按内容哈希缓存渲染结果。
+
+- 文件的 (路径, 大小, 修改时间) 未变时直接命中缓存，不再读取文件
+- 内容相同的文件（如同一篇文章在 posts/ 与 published/ 中）共用一份渲染结果
+- 长文章默认只渲染前 PREVIEW_CHARS 个字符，需要时再加载全文
+- 缓存按总字节数上限做 LRU 淘汰，指向被淘汰结果的文件记录一并删除
+
+用法:
+    cache = PreviewCache()
+    html, truncated = cache.render_file(Path("posts/xxx.md"))
+"""
+
+import hashlib
+import html
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # markdown-it-py 随 gradio 安装，单独使用本模块时可能没有
+    MarkdownIt = None
+
+try:
+    import markdown as markdown_lib
+except ImportError:
+    markdown_lib = None
+
+
+PREVIEW_CHARS = 20000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_md = MarkdownIt("commonmark", {"html": False}).enable("table") if MarkdownIt else None
+
+# 清理 HTML 时保留的标签与属性，其余标签去掉（文字保留），script/style 连同内容去掉
+ALLOWED_TAGS = {
+    "a", "b", "blockquote", "br", "code", "del", "em", "h1", "h2", "h3", "h4", "h5", "h6",
+    "hr", "i", "img", "li", "ol", "p", "pre", "s", "strong", "table", "tbody", "td", "th",
+    "thead", "tr", "ul",
+}
+ALLOWED_ATTRS = {"a": {"href", "title"}, "img": {"src", "alt", "title"}, "code": {"class"},
+                 "td": {"align"}, "th": {"align"}}
+DROP_CONTENT_TAGS = {"script", "style"}
+SAFE_URL_SCHEMES = ("http:", "https:", "mailto:", "#", "/", "./", "../")
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self._skip = 0
+
+    def _safe(self, tag, name, value):
+        if name not in ALLOWED_ATTRS.get(tag, ()) or value is None:
+            return False
+        if name in ("href", "src"):
+            url = value.strip().lower()
+            return url.startswith(SAFE_URL_SCHEMES) or ":" not in url.split("/", 1)[0]
+        return True
+
+    def _start(self, tag, attrs, close=""):
+        if tag in DROP_CONTENT_TAGS:
+            self._skip += not close
+            return
+        if self._skip or tag not in ALLOWED_TAGS:
+            return
+        kept = "".join(f' {k}="{html.escape(v)}"' for k, v in attrs if self._safe(tag, k, v))
+        self.out.append(f"<{tag}{kept}{close}>")
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, " /")
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif not self._skip and tag in ALLOWED_TAGS:
+            self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.out.append(html.escape(data, quote=False))
+
+
+def sanitize_html(rendered: str) -> str:
+    """只保留 ALLOWED_TAGS 中的标签和安全属性，去掉脚本与 javascript: 等链接"""
+    parser = _Sanitizer()
+    parser.feed(rendered)
+    parser.close()
+    return "".join(parser.out)
+
+
+def render_markdown(text: str) -> str:
+    """Markdown → HTML（不透传原始 HTML）"""
+    if _md is not None:
+        return _md.render(text)
+    if markdown_lib is not None:
+        # Python-Markdown 会透传原始 HTML：不预先转义（否则 > 引用失效、代码块中的 < & 被二次转义），渲染后清理
+        return sanitize_html(markdown_lib.markdown(text, extensions=["fenced_code", "tables"]))
+    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    return "\n".join(f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs)
+
+
+class PreviewCache:
+    """按内容哈希缓存的 Markdown 预览"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_bytes: 缓存的 HTML 总字节数上限，超过后淘汰最久未使用的条目
+        """
+        self.max_bytes = max_bytes
+        self._html: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        # (路径, 截断长度) → ((大小, 修改时间), 内容哈希, 是否截断)
+        self._by_stat: Dict[tuple, tuple] = {}
+        # 内容哈希 → 指向它的 _by_stat 键，淘汰渲染结果时一并删除
+        self._stat_keys: Dict[str, Set[tuple]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, digest: str) -> Optional[str]:
+        rendered = self._html.get(digest)
+        if rendered is not None:
+            self._html.move_to_end(digest)
+        return rendered
+
+    def _put(self, digest: str, rendered: str):
+        self._html[digest] = rendered
+        self._bytes += len(rendered)
+        while self._bytes > self.max_bytes and len(self._html) > 1:
+            old_digest, old = self._html.popitem(last=False)
+            self._bytes -= len(old)
+            for key in self._stat_keys.pop(old_digest, ()):
+                self._by_stat.pop(key, None)
+
+    def _remember(self, key: tuple, stamp: tuple, digest: str, truncated: bool):
+        previous = self._by_stat.get(key)
+        if previous and previous[1] != digest:
+            self._stat_keys.get(previous[1], set()).discard(key)
+        if digest not in self._html:  # 渲染结果已被淘汰，不留下无效记录
+            self._by_stat.pop(key, None)
+            return
+        self._by_stat[key] = (stamp, digest, truncated)
+        self._stat_keys.setdefault(digest, set()).add(key)
+
+    def render_text(self, text: str) -> str:
+        """渲染一段 Markdown（按内容哈希缓存）"""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            rendered = self._get(digest)
+            if rendered is not None:
+                self.hits += 1
+                return rendered
+        rendered = render_markdown(text)
+        with self._lock:
+            self.misses += 1
+            self._put(digest, rendered)
+        return rendered
+
+    def render_file(self, path: Path, limit: Optional[int] = PREVIEW_CHARS) -> Tuple[str, bool]:
+        """
+        渲染文件的前 limit 个字符（None 表示全文）
+
+        Returns:
+            (html, 是否被截断)
+        """
+        path = Path(path)
+        st = path.stat()
+        key = (str(path.resolve()), limit)
+        stamp = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            known = self._by_stat.get(key)
+            if known and known[0] == stamp:
+                rendered = self._get(known[1])
+                if rendered is not None:
+                    self.hits += 1
+                    return rendered, known[2]
+
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read(limit + 1) if limit else f.read()
+        truncated = bool(limit) and len(text) > limit
+        if truncated:
+            text = text[:limit]
+        rendered = self.render_text(text)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._remember(key, stamp, digest, truncated)
+        return rendered, truncated
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+article_search.py
+
+文章全文检索：把 CSDN posts/ 与 published/、公众号 done/、知乎 posts/ 中的 Markdown 建成 SQLite FTS5 索引。
+
+- 使用 FTS5 的 trigram 分词器，中文无需额外分词库即可做子串检索
+  （3 个字及以上的词走索引；1~2 个字的词退化为 LIKE 过滤）
+- 增量同步：只重新索引修改时间或大小变化的文件，已删除/移走的文件自动移出索引
+- 写入/移动文章的地方调用 update_path()（命令行脚本用 index_paths()）立即更新单个文件
+- 查询结果按 bm25 相关度排序，并返回带高亮的摘要
+
+用法:
+  python article_search.py sync
+  python article_search.py search "强化学习" [--source csdn] [--limit 20]
+  python article_search.py rebuild
+  python article_search.py stats
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+_HERE = Path(__file__).resolve().parent
+
+DEFAULT_DB_FILE = _HERE / "article_index.db"
+# 来源名称 → 目录
+DEFAULT_ROOTS: Dict[str, Path] = {
+    "csdn": _HERE / "posts",
+    "csdn_published": _HERE / "published",
+    "wechat": _HERE.parent / "weixin-auto" / "done",
+    "zhihu": _HERE.parent / "zhihu-blog-auto" / "posts",
+}
+# 同步节流：两次自动同步之间至少间隔的秒数
+SYNC_INTERVAL = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(title, body, tokenize='trigram');
+"""
+
+HEADING_RE = re.compile(r'^#\s+(.+?)\s*$', re.MULTILINE)
+FRONTMATTER_TITLE_RE = re.compile(r'\A---\s*\n(?:.*\n)*?title:\s*["\']?(.+?)["\']?\s*\n(?:.*\n)*?---', re.MULTILINE)
+
+
+def extract_title(text: str, fallback: str) -> str:
+    """标题优先取 front matter 的 title，其次是第一个一级标题，最后用文件名"""
+    m = FRONTMATTER_TITLE_RE.match(text)
+    if m:
+        return m.group(1).strip()
+    m = HEADING_RE.search(text[:2000])
+    if m:
+        return m.group(1).strip()
+    return fallback
+
+
+class ArticleIndex:
+    """基于 SQLite FTS5 的文章全文索引"""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_FILE, roots: Optional[Dict[str, Path]] = None):
+        """
+        Args:
+            db_path: 索引数据库文件
+            roots: 来源名称 → 目录，默认 CSDN（待发布/已发布）、公众号、知乎的文章目录
+        """
+        self.db_path = str(db_path)
+        self.roots = {name: Path(p) for name, p in (roots or DEFAULT_ROOTS).items()}
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    # ---------- 索引维护 ----------
+
+    def sync(self) -> Dict[str, int]:
+        """
+        增量同步所有目录
+
+        Returns:
+            {"added": n, "updated": n, "removed": n}
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        seen = {}
+        for source, root in self.roots.items():
+            if not root.is_dir():
+                continue
+            for entry in os.scandir(root):
+                if entry.is_file() and entry.name.endswith(".md"):
+                    st = entry.stat()
+                    seen[str(Path(entry.path).resolve())] = (source, st.st_mtime, st.st_size)
+
+        with self._lock:
+            existing = {
+                row["path"]: (row["id"], row["mtime"], row["size"])
+                for row in self._conn.execute("SELECT id, path, mtime, size FROM docs")
+            }
+            for path, (doc_id, _, _) in existing.items():
+                if path not in seen:
+                    self._delete(doc_id)
+                    stats["removed"] += 1
+            for path, (source, mtime, size) in seen.items():
+                old = existing.get(path)
+                if old and old[1] == mtime and old[2] == size:
+                    continue
+                if self._index_file(Path(path), source, mtime, size, old[0] if old else None):
+                    stats["updated" if old else "added"] += 1
+            self._conn.commit()
+            self._last_sync = time.monotonic()
+        return stats
+
+    def maybe_sync(self, interval: float = SYNC_INTERVAL):
+        """距上次同步超过 interval 秒时才同步（界面搜索前调用）"""
+        if time.monotonic() - self._last_sync >= interval:
+            self.sync()
+
+    def update_path(self, path: Path):
+        """
+        单个文件写入/删除/移走后立即更新索引，不必等下一次同步
+
+        不在任何来源目录下的文件只做删除处理（例如已被移出 posts/ 的旧路径）。
+        """
+        path = Path(path).resolve()
+        source = next((name for name, root in self.roots.items() if root.resolve() == path.parent), None)
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM docs WHERE path=?", (str(path),)).fetchone()
+            doc_id = row["id"] if row else None
+            if source and path.is_file() and path.suffix == ".md":
+                st = path.stat()
+                self._index_file(path, source, st.st_mtime, st.st_size, doc_id)
+            elif doc_id is not None:
+                self._delete(doc_id)
+            self._conn.commit()
+
+    def rebuild(self) -> Dict[str, int]:
+        """清空后重建索引"""
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("DELETE FROM docs_fts")
+            self._conn.commit()
+        return self.sync()
+
+    def _delete(self, doc_id: int):
+        self._conn.execute("DELETE FROM docs WHERE id=?", (doc_id,))
+        self._conn.execute("DELETE FROM docs_fts WHERE rowid=?", (doc_id,))
+
+    def _index_file(self, path: Path, source: str, mtime: float, size: int, doc_id: Optional[int]) -> bool:
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"读取 {path} 失败，跳过: {e}")
+            return False
+        title = extract_title(text, path.stem)
+        if doc_id is None:
+            cur = self._conn.execute(
+                "INSERT INTO docs (path, source, title, mtime, size) VALUES (?, ?, ?, ?, ?)",
+                (str(path), source, title, mtime, size)
+            )
+            doc_id = cur.lastrowid
+        else:
+            self._conn.execute(
+                "UPDATE docs SET source=?, title=?, mtime=?, size=? WHERE id=?",
+                (source, title, mtime, size, doc_id)
+            )
+            self._conn.execute("DELETE FROM docs_fts WHERE rowid=?", (doc_id,))
+        self._conn.execute("INSERT INTO docs_fts (rowid, title, body) VALUES (?, ?, ?)", (doc_id, title, text))
+        return True
+
+    # ---------- 查询 ----------
+
+    @staticmethod
+    def _build_query(query: str):
+        """
+        把用户输入拆成词：≥3 个字的词组成 FTS5 MATCH 表达式，其余词作为 LIKE 条件
+
+        trigram 分词器只能用索引匹配 3 个字符及以上的子串。
+        """
+        terms = [t for t in query.split() if t]
+        long_terms = [t for t in terms if len(t) >= 3]
+        short_terms = [t for t in terms if len(t) < 3]
+        match = " AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+        return match, short_terms
+
+    def search(self, query: str, limit: int = 20, source: Optional[str] = None) -> List[dict]:
+        """
+        全文检索
+
+        Args:
+            query: 关键词，空格分隔表示同时包含
+            limit: 最多返回条数
+            source: 只搜索某个来源（csdn / csdn_published / wechat / zhihu）
+
+        Returns:
+            [{path, source, title, snippet, mtime}]，按相关度排序
+        """
+        match, short_terms = self._build_query(query)
+        if not match and not short_terms:
+            return []
+
+        where, params = [], []
+        if match:
+            where.append("docs_fts MATCH ?")
+            params.append(match)
+        for t in short_terms:
+            escaped = t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("(docs_fts.title LIKE ? ESCAPE '\\' OR docs_fts.body LIKE ? ESCAPE '\\')")
+            params += [f"%{escaped}%"] * 2
+        if source:
+            where.append("docs.source = ?")
+            params.append(source)
+
+        # 只有短词时没有相关度可言：按 rowid 倒序（新文章在前），凑够 limit 条即可停止扫描
+        order = "bm25(docs_fts, 5.0, 1.0)" if match else "docs_fts.rowid DESC"
+        sql = f"""
+            SELECT docs.path, docs.source, docs.title, docs.mtime,
+                   snippet(docs_fts, 1, '**', '**', '…', 24) AS snippet
+            FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid
+            WHERE {' AND '.join(where)}
+            ORDER BY {order}
+            LIMIT ?
+        """
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """各来源的文章数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT source, COUNT(*) AS n FROM docs GROUP BY source").fetchall()
+        return {r["source"]: r["n"] for r in rows}
+
+
+def index_paths(*paths: Path, db_path: Path = DEFAULT_DB_FILE):
+    """
+    命令行脚本写入/移动文章后立即更新索引（Web UI 进程内改用共享的 ArticleIndex.update_path）
+
+    索引失败只打印提示，不影响文章本身的生成或发布。
+    """
+    try:
+        index = ArticleIndex(db_path)
+        try:
+            for path in paths:
+                index.update_path(path)
+        finally:
+            index.close()
+    except Exception as e:
+        print(f"⚠️ 更新文章索引失败（下次检索时自动同步）: {e}")
+
+
+def format_results(results: List[dict], elapsed_ms: Optional[float] = None) -> str:
+    """把检索结果格式化为 Markdown"""
+    if not results:
+        return "未找到相关文章"
+    head = f"找到 {len(results)} 篇"
+    if elapsed_ms is not None:
+        head += f"（{elapsed_ms:.1f} ms）"
+    lines = [f"### {head}\n"]
+    for i, r in enumerate(results, 1):
+        date = time.strftime("%Y-%m-%d", time.localtime(r["mtime"]))
+        snippet = r["snippet"].replace("\n", " ")
+        lines.append(f"{i}. **{r['title']}** `[{r['source']}]` {date}\n   > {snippet}\n   `{r['path']}`\n")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章全文检索（SQLite FTS5）")
+    parser.add_argument("--db", default=str(DEFAULT_DB_FILE), help="索引数据库文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("sync", help="增量同步索引")
+    sub.add_parser("rebuild", help="清空并重建索引")
+    sub.add_parser("stats", help="查看各来源文章数")
+    search_p = sub.add_parser("search", help="检索文章")
+    search_p.add_argument("query", help="关键词，空格分隔表示同时包含")
+    search_p.add_argument("--source", choices=sorted(DEFAULT_ROOTS), default=None, help="只搜索某个来源")
+    search_p.add_argument("--limit", type=int, default=20, help="最多返回条数，默认 20")
+
+    args = parser.parse_args()
+    index = ArticleIndex(Path(args.db))
+
+    if args.command in ("sync", "rebuild"):
+        start = time.monotonic()
+        stats = index.sync() if args.command == "sync" else index.rebuild()
+        print(f"新增 {stats['added']}，更新 {stats['updated']}，移除 {stats['removed']}"
+              f"（{(time.monotonic() - start) * 1000:.0f} ms）")
+    elif args.command == "stats":
+        for source, n in index.stats().items():
+            print(f"{source}: {n} 篇")
+    else:
+        index.sync()
+        start = time.monotonic()
+        results = index.search(args.query, limit=args.limit, source=args.source)
+        print(format_results(results, (time.monotonic() - start) * 1000))
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,7 @@ import sys
 from pathlib import Path
 from datetime import datetime
 from zhipu_content_generator import ZhipuContentGenerator
+from article_search import index_paths
 
 
 def read_keywords_from_file(keywords_file: Path) -> list:
@@ -219,7 +220,8 @@ def main():
                 
                 try:
                     article = generator.generate_article(title)
-                    generator.save_article_to_posts(title, article, posts_dir)
+                    saved_path = generator.save_article_to_posts(title, article, posts_dir)
+                    index_paths(saved_path)
                     success_count += 1
                     print(f"✓ 文章生成成功")
                 except Exception as e:
@@ -259,7 +261,8 @@ def main():
             print(f"{'='*60}\n")
             
             article = generator.generate_article(titles[0])
-            generator.save_article_to_posts(titles[0], article, posts_dir)
+            saved_path = generator.save_article_to_posts(titles[0], article, posts_dir)
+            index_paths(saved_path)
             
             print(f"\n✓ 示例文章已生成")
             print(f"posts目录现有: {count_files_in_directory(posts_dir, '.md')} 篇文章")
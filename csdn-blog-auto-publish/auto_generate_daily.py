@@ -15,6 +15,8 @@ from pathlib import Path
 from datetime import datetime
 from zhipu_news_search import ZhipuNewsSearcher
 from zhipu_content_generator import ZhipuContentGenerator
+from article_search import index_paths
+from scheduler import RunLock
 
 
 def count_files_in_directory(directory: Path, extension: str = ".md") -> int:
@@ -192,6 +194,12 @@ def main():
     today = datetime.now().strftime("%Y%m%d")
     titles_json = todo_dir / f"{today}_titles_info.json"
     
+    # 与 Web UI 的生成任务/定时任务共用运行锁，避免同时运行争抢 posts 目录名额
+    lock = RunLock()
+    if not lock.acquire("auto_generate_daily.py"):
+        print(f"\n错误: 另一个生成任务正在运行（{lock.holder()}），本次退出")
+        sys.exit(1)
+    
     try:
         print("\n" + "="*70)
         print("每日自动化技术博客生成系统")
@@ -301,7 +309,8 @@ def main():
                 )
                 
                 # 保存文章
-                generator.save_article_to_posts(title, article, posts_dir)
+                saved_path = generator.save_article_to_posts(title, article, posts_dir)
+                index_paths(saved_path)
                 success_count += 1
                 print(f"  ✓ 生成成功")
                 
@@ -337,6 +346,8 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        lock.release()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+browser_service.py
+
+常驻浏览器服务：启动一个长期运行的 Chromium，供所有发布工具通过 CDP 共用。
+
+- 浏览器只在服务启动时冷启动一次（约 1~3 秒），之后各工具直接连接
+- 启动时把各工具的登录状态文件（storage_state）合并进浏览器默认上下文，
+  cookies 按域名隔离，因此 CSDN / 知乎 / 小红书 / 公众号可以共用同一个上下文
+- 各工具设置环境变量 BROWSER_CDP_ENDPOINT 后，会连接该服务并新开标签页，
+  用完只关闭自己的标签页，不关闭浏览器
+
+说明：Playwright 通过 CDP 连接时只能可靠地拿到浏览器的默认上下文，
+其他客户端创建的上下文无法跨连接共享，因此这里用默认上下文承载所有站点。
+
+用法:
+  python browser_service.py start [--port 9222] [--headless]
+  python browser_service.py status
+  python browser_service.py stop
+  export BROWSER_CDP_ENDPOINT=http://127.0.0.1:9222
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+DEFAULT_PORT = 9222
+ENDPOINT_ENV = "BROWSER_CDP_ENDPOINT"
+SERVICE_DIR = Path.home() / ".cache" / "blog-browser-service"
+SERVICE_FILE = SERVICE_DIR / "service.json"
+USER_DATA_DIR = SERVICE_DIR / "profile"
+
+_HERE = Path(__file__).resolve().parent
+
+# 各工具的站点域名、登录状态文件与预热地址
+SITES: Dict[str, Dict[str, Path]] = {
+    "csdn": {
+        "domain": "csdn.net",
+        "storage": _HERE / "storage.json",
+        "url": "https://editor.csdn.net/md/?not_checkout=1",
+    },
+    "zhihu": {
+        "domain": "zhihu.com",
+        "storage": _HERE.parent / "zhihu-blog-auto" / "zhihu_state.json",
+        "url": "https://zhuanlan.zhihu.com/write",
+    },
+    "xhs": {
+        "domain": "xiaohongshu.com",
+        "storage": _HERE.parent / "xhs" / "xiaohongshu_auth.json",
+        "url": "https://www.xiaohongshu.com/explore",
+    },
+    "wechat": {
+        "domain": "weixin.qq.com",
+        "storage": _HERE.parent / "weixin-auto" / "wechat_state.json",
+        "url": "https://mp.weixin.qq.com/",
+    },
+}
+
+
+def get_endpoint() -> Optional[str]:
+    """返回已配置的浏览器服务地址（未配置时返回 None）"""
+    return os.environ.get(ENDPOINT_ENV) or None
+
+
+def read_service_info() -> Optional[dict]:
+    """读取正在运行的服务信息"""
+    if not SERVICE_FILE.exists():
+        return None
+    try:
+        return json.loads(SERVICE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def open_page(p, headless: bool = False, storage_state: Optional[Path] = None):
+    """
+    获取一个可用页面：已配置浏览器服务时连接共享浏览器并新开标签页，否则本地冷启动
+
+    Args:
+        p: sync_playwright() 返回的 Playwright 对象
+        headless: 本地启动时是否无头
+        storage_state: 本地启动时加载的登录状态文件（不存在则忽略）
+
+    Returns:
+        (context, page, shared)：shared 为 True 时用完只需关闭 page，不要关闭 context
+    """
+    endpoint = get_endpoint()
+    if endpoint:
+        try:
+            browser = p.chromium.connect_over_cdp(endpoint)
+            context = browser.contexts[0] if browser.contexts else browser.new_context()
+            print(f"已连接浏览器服务: {endpoint}")
+            return context, context.new_page(), True
+        except Exception as e:
+            print(f"连接浏览器服务 {endpoint} 失败，改为本地启动: {e}")
+
+    browser = p.chromium.launch(headless=headless)
+    if storage_state and Path(storage_state).exists():
+        print(f"加载 storage state: {storage_state}")
+        context = browser.new_context(storage_state=str(storage_state))
+    else:
+        context = browser.new_context()
+    return context, context.new_page(), False
+
+
+def _in_domain(host: str, domain: str) -> bool:
+    host = (host or "").lstrip(".").lower()
+    return host == domain or host.endswith("." + domain)
+
+
+def filter_storage_state(state: dict, domain: str) -> dict:
+    """只保留属于 domain（含子域名）的 cookies 和 localStorage 源"""
+    return {
+        "cookies": [c for c in state.get("cookies", []) if _in_domain(c.get("domain"), domain)],
+        "origins": [o for o in state.get("origins", []) if _in_domain(urlsplit(o.get("origin", "")).hostname, domain)],
+    }
+
+
+def save_storage_state(context, path: Path, domain: Optional[str] = None):
+    """
+    保存登录状态
+
+    共享浏览器的默认上下文里有所有站点的 cookies，传入 domain 时只保存本站点的部分，
+    避免把其他站点的登录状态写进本工具的状态文件。
+    """
+    if domain is None:
+        context.storage_state(path=str(path))
+        return
+    state = filter_storage_state(context.storage_state(), domain)
+    Path(path).write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def seed_storage_states(context, sites: Dict[str, Dict[str, Path]]):
+    """把各工具的 storage_state 文件合并到共享上下文（cookies + localStorage）"""
+    for name, site in sites.items():
+        storage = Path(site["storage"])
+        if not storage.exists():
+            print(f"  - {name}: 未找到登录状态文件 {storage}，跳过")
+            continue
+        try:
+            state = json.loads(storage.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"  - {name}: 读取 {storage} 失败: {e}")
+            continue
+
+        if site.get("domain"):
+            # 旧版本在共享模式下保存的状态文件可能混有其他站点的 cookies
+            state = filter_storage_state(state, site["domain"])
+        cookies = state.get("cookies", [])
+        if cookies:
+            context.add_cookies(cookies)
+
+        origins = state.get("origins", [])
+        for origin in origins:
+            items = origin.get("localStorage", [])
+            if not items:
+                continue
+            page = context.new_page()
+            try:
+                page.goto(origin["origin"], wait_until="domcontentloaded", timeout=30000)
+                page.evaluate(
+                    "(items) => { for (const it of items) localStorage.setItem(it.name, it.value); }",
+                    items
+                )
+            except Exception as e:
+                print(f"  - {name}: 写入 {origin['origin']} 的 localStorage 失败: {e}")
+            finally:
+                page.close()
+        print(f"  ✓ {name}: 已加载 {len(cookies)} 个 cookies，{len(origins)} 个源")
+
+
+def serve(port: int, headless: bool, warm: bool):
+    """启动并常驻浏览器，直到收到终止信号"""
+    from playwright.sync_api import sync_playwright
+
+    info = read_service_info()
+    if info and _pid_alive(info.get("pid", -1)):
+        print(f"浏览器服务已在运行: {info['endpoint']} (pid={info['pid']})")
+        return 1
+
+    SERVICE_DIR.mkdir(parents=True, exist_ok=True)
+    endpoint = f"http://127.0.0.1:{port}"
+    stop = {"flag": False}
+
+    def handle_signal(signum, frame):
+        stop["flag"] = True
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    with sync_playwright() as p:
+        start = time.monotonic()
+        context = p.chromium.launch_persistent_context(
+            str(USER_DATA_DIR),
+            headless=headless,
+            args=[f"--remote-debugging-port={port}"],
+            viewport={"width": 1920, "height": 1080},
+        )
+        print(f"Chromium 已启动，用时 {time.monotonic() - start:.2f} 秒")
+
+        print("加载各工具登录状态...")
+        seed_storage_states(context, SITES)
+
+        if warm:
+            # 预先打开各站点一次，填充 HTTP 缓存与连接
+            for name, site in SITES.items():
+                page = context.new_page()
+                try:
+                    page.goto(site["url"], wait_until="domcontentloaded", timeout=30000)
+                    print(f"  ✓ 已预热 {name}")
+                except Exception as e:
+                    print(f"  - 预热 {name} 失败: {e}")
+                finally:
+                    page.close()
+
+        SERVICE_FILE.write_text(json.dumps({
+            "endpoint": endpoint,
+            "pid": os.getpid(),
+            "started_at": time.time(),
+        }), encoding="utf-8")
+
+        print(f"\n浏览器服务已就绪: {endpoint}")
+        print(f"在其他终端执行: export {ENDPOINT_ENV}={endpoint}")
+
+        try:
+            # 保持一个空白页，避免最后一个标签页关闭后浏览器退出
+            keeper = context.new_page()
+            while not stop["flag"]:
+                if keeper.is_closed():
+                    keeper = context.new_page()
+                time.sleep(1)
+        finally:
+            try:
+                SERVICE_FILE.unlink()
+            except OSError:
+                pass
+            context.close()
+            print("浏览器服务已停止")
+    return 0
+
+
+def status() -> int:
+    info = read_service_info()
+    if not info or not _pid_alive(info.get("pid", -1)):
+        print("浏览器服务未运行")
+        return 1
+    uptime = (time.time() - info.get("started_at", time.time())) / 3600
+    print(f"浏览器服务运行中: {info['endpoint']} (pid={info['pid']}, 已运行 {uptime:.1f} 小时)")
+    return 0
+
+
+def stop_service() -> int:
+    info = read_service_info()
+    if not info or not _pid_alive(info.get("pid", -1)):
+        print("浏览器服务未运行")
+        return 1
+    os.kill(info["pid"], signal.SIGTERM)
+    print(f"已发送停止信号 (pid={info['pid']})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻浏览器服务：所有发布工具共享一个预热的 Chromium")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    start_p = sub.add_parser("start", help="启动浏览器服务（前台运行）")
+    start_p.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"CDP 端口，默认 {DEFAULT_PORT}")
+    start_p.add_argument("--headless", action="store_true", help="无头模式运行")
+    start_p.add_argument("--no-warm", action="store_true", help="启动后不预先打开各站点")
+
+    sub.add_parser("status", help="查看服务状态")
+    sub.add_parser("stop", help="停止服务")
+
+    args = parser.parse_args()
+    if args.command == "start":
+        return serve(args.port, args.headless, warm=not args.no_warm)
+    if args.command == "status":
+        return status()
+    return stop_service()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+client_pool.py
+
+线程安全的智谱AI客户端池：同一个 API Key 只创建一个底层客户端（复用连接），
+并按模型限制同时进行中的请求数，避免多个会话/后台任务同时调用时触发接口限流。
+每次调用的耗时与 token 用量记录到 metrics（见 metrics.py）。
+
+用法:
+    client = get_client_pool(api_key)
+    searcher = ZhipuNewsSearcher(api_key, client=client)
+    # client.chat.completions.create(model="glm-4-plus", ...) 在超过并发上限时排队等待
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import metrics
+
+
+# 每个模型同时进行中的请求数上限（可用环境变量 ZHIPU_CONCURRENCY_<模型名> 覆盖，
+# 模型名中的 "-" 换成 "_"，如 ZHIPU_CONCURRENCY_GLM_4_PLUS=3）
+DEFAULT_MODEL_LIMITS = {
+    "glm-4-flash": 4,
+    "glm-4-plus": 2,
+}
+DEFAULT_LIMIT = 2
+
+
+def _limit_for(model: str, limits: Dict[str, int], default: int) -> int:
+    env_name = "ZHIPU_CONCURRENCY_" + model.upper().replace("-", "_").replace(".", "_")
+    value = os.environ.get(env_name)
+    if value and value.isdigit() and int(value) > 0:
+        return int(value)
+    return limits.get(model, default)
+
+
+class _LimitedCompletions:
+    """包装 chat.completions：按 model 参数获取对应的信号量后再发请求"""
+
+    def __init__(self, pool: "ClientPool"):
+        self._pool = pool
+
+    def create(self, *args, model: str, **kwargs):
+        with self._pool.semaphore(model):
+            start = time.monotonic()
+            try:
+                response = self._pool.raw.chat.completions.create(*args, model=model, **kwargs)
+            except Exception:
+                metrics.record_llm_call(model, time.monotonic() - start, ok=False)
+                raise
+            metrics.record_llm_call(model, time.monotonic() - start, response)
+            return response
+
+
+class _LimitedChat:
+    def __init__(self, pool: "ClientPool"):
+        self.completions = _LimitedCompletions(pool)
+
+
+class ClientPool:
+    """
+    共享的限流客户端
+
+    对外暴露与 ZhipuAI 客户端相同的 chat.completions.create 接口，
+    可以直接替换 ZhipuNewsSearcher / ZhipuContentGenerator 中的 client。
+    """
+
+    def __init__(self, raw_client, limits: Optional[Dict[str, int]] = None, default_limit: int = DEFAULT_LIMIT):
+        """
+        Args:
+            raw_client: 底层客户端（ZhipuAI 实例，本身可在线程间共享）
+            limits: 模型 → 并发上限
+            default_limit: 未配置模型的并发上限
+        """
+        self.raw = raw_client
+        self.limits = dict(DEFAULT_MODEL_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self.chat = _LimitedChat(self)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaphores.get(model)
+            if sem is None:
+                sem = threading.BoundedSemaphore(_limit_for(model, self.limits, self.default_limit))
+                self._semaphores[model] = sem
+            return sem
+
+
+_pools: Dict[str, ClientPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_client_pool(api_key: str) -> ClientPool:
+    """按 API Key 获取（首次调用时创建）共享的限流客户端"""
+    with _pools_lock:
+        pool = _pools.get(api_key)
+        if pool is None:
+            from zhipuai import ZhipuAI
+            pool = ClientPool(ZhipuAI(api_key=api_key))
+            _pools[api_key] = pool
+        return pool
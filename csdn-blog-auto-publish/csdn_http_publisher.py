@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+csdn_http_publisher.py
+
+CSDN 直连 HTTP 发布后端：复用 storage.json 中的登录 cookies，
+把标题、Markdown、标签与可见范围直接提交到编辑器的保存/发布接口，
+不再驱动浏览器页面（一次请求完成发布）。
+
+- 使用连接池复用 HTTPS 连接（requests.Session + HTTPAdapter）
+- 接口地址可配置，测试时指向本地桩服务
+- 接口网关要求签名时，通过环境变量 CSDN_CA_KEY / CSDN_CA_SECRET 提供密钥
+
+用法:
+  python publish_csdn.py --backend http
+  python csdn_http_publisher.py posts/文章.md --draft
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import html
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    import markdown as markdown_lib
+except ImportError:  # requirements.txt 已包含 markdown；缺失时退化为按段落转义，并提示一次
+    markdown_lib = None
+
+
+DEFAULT_ENDPOINT = "https://bizapi.csdn.net/blog-console-api/v3/mdeditor/saveArticle"
+DEFAULT_STORAGE_FILE = Path("storage.json")
+# 可见范围：public 全部可见 / read_need_fans 粉丝可见 / private 仅自己可见
+READ_TYPES = ("public", "read_need_fans", "private")
+DEFAULT_READ_TYPE = "read_need_fans"  # 与浏览器后端勾选“粉丝可见”保持一致
+
+EDITOR_ORIGIN = "https://editor.csdn.net"
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+
+class CsdnHttpError(Exception):
+    """发布接口返回失败"""
+
+
+_fallback_warned = False
+
+
+def markdown_to_html(md: str) -> str:
+    """把 Markdown 转为接口需要的 HTML 正文"""
+    global _fallback_warned
+    if markdown_lib is not None:
+        return markdown_lib.markdown(md, extensions=["fenced_code", "tables"])
+    if not _fallback_warned:
+        print("⚠️ 未安装 markdown 库，标题、代码块、表格将以原文发布，请执行 pip install -r requirements.txt", file=sys.stderr)
+        _fallback_warned = True
+    paragraphs = [p.strip() for p in md.split("\n\n") if p.strip()]
+    return "\n".join(f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs)
+
+
+def sign_headers(method: str, url: str, key: str, secret: str,
+                 accept: str = "*/*", content_type: str = "application/json") -> Dict[str, str]:
+    """
+    生成 API 网关签名头（x-ca-*）
+
+    签名串格式：METHOD\\nAccept\\n\\nContent-Type\\n\\nx-ca-key:..\\nx-ca-nonce:..\\nPATH
+    """
+    nonce = str(uuid.uuid4())
+    path = urlsplit(url).path
+    to_sign = f"{method.upper()}\n{accept}\n\n{content_type}\n\nx-ca-key:{key}\nx-ca-nonce:{nonce}\n{path}"
+    digest = hmac.new(secret.encode("utf-8"), to_sign.encode("utf-8"), hashlib.sha256).digest()
+    return {
+        "accept": accept,
+        "content-type": content_type,
+        "x-ca-key": key,
+        "x-ca-nonce": nonce,
+        "x-ca-signature": base64.b64encode(digest).decode("ascii"),
+        "x-ca-signature-headers": "x-ca-key,x-ca-nonce",
+    }
+
+
+class CsdnHttpPublisher:
+    """基于已保存登录状态的 CSDN HTTP 发布器"""
+
+    def __init__(
+        self,
+        storage_state: Path = DEFAULT_STORAGE_FILE,
+        endpoint: str = DEFAULT_ENDPOINT,
+        ca_key: Optional[str] = None,
+        ca_secret: Optional[str] = None,
+        timeout: int = 30
+    ):
+        """
+        Args:
+            storage_state: Playwright 保存的登录状态文件
+            endpoint: 保存/发布接口地址
+            ca_key: 网关签名 key，默认读取环境变量 CSDN_CA_KEY
+            ca_secret: 网关签名 secret，默认读取环境变量 CSDN_CA_SECRET
+            timeout: 单次请求超时（秒）
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # 与 image_assets 共用 storage_state → cookies 的加载逻辑
+        from image_assets import load_storage_state_cookies
+
+        storage_state = Path(storage_state)
+        if not storage_state.exists():
+            raise FileNotFoundError(
+                f"未找到登录状态文件 {storage_state}，请先用浏览器后端运行一次 publish_csdn.py 完成登录"
+            )
+
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.ca_key = ca_key or os.environ.get("CSDN_CA_KEY")
+        self.ca_secret = ca_secret or os.environ.get("CSDN_CA_SECRET")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Origin": EDITOR_ORIGIN,
+            "Referer": EDITOR_ORIGIN + "/",
+        })
+        load_storage_state_cookies(self.session, storage_state)
+
+    @staticmethod
+    def build_payload(title: str, md: str, tags: Optional[List[str]] = None,
+                      read_type: str = DEFAULT_READ_TYPE, draft: bool = False) -> Dict:
+        """构造保存/发布接口的请求体"""
+        if read_type not in READ_TYPES:
+            raise ValueError(f"不支持的可见范围: {read_type}，可选 {', '.join(READ_TYPES)}")
+        return {
+            "title": title,
+            "markdowncontent": md,
+            "content": markdown_to_html(md),
+            "readType": read_type,
+            "tags": ",".join(tags or []),
+            "status": 2 if draft else 0,  # 0 发布，2 草稿
+            "pubStatus": "draft" if draft else "publish",
+            "type": "original",
+            "categories": "",
+            "original_link": "",
+            "authorized_status": False,
+            "not_auto_saved": "1",
+            "source": "pc_mdeditor",
+            "cover_images": [],
+            "cover_type": 1,
+            "is_new": 1,
+            "vote_id": 0,
+            "resource_id": "",
+        }
+
+    def publish(self, title: str, md: str, tags: Optional[List[str]] = None,
+                read_type: str = DEFAULT_READ_TYPE, draft: bool = False) -> Dict:
+        """
+        提交一篇文章
+
+        Returns:
+            接口返回的 data 字段（包含文章 id 与 url）
+
+        Raises:
+            CsdnHttpError: 接口返回非成功状态或登录已失效
+        """
+        payload = self.build_payload(title, md, tags, read_type, draft)
+        headers = {}
+        if self.ca_key and self.ca_secret:
+            headers = sign_headers("POST", self.endpoint, self.ca_key, self.ca_secret)
+
+        resp = self.session.post(
+            self.endpoint,
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json", **headers},
+            timeout=self.timeout
+        )
+        if resp.status_code in (401, 403):
+            raise CsdnHttpError(f"登录状态已失效或签名被拒绝（HTTP {resp.status_code}），请重新登录后再试")
+        resp.raise_for_status()
+        try:
+            result = resp.json()
+        except ValueError:
+            raise CsdnHttpError(f"接口返回的不是 JSON: {resp.text[:200]}")
+        if result.get("code") != 200:
+            raise CsdnHttpError(f"发布失败: {result.get('msg') or result.get('message') or result}")
+        return result.get("data") or {}
+
+    def close(self):
+        self.session.close()
+
+
+def main():
+    import frontmatter
+
+    parser = argparse.ArgumentParser(description="通过 HTTP 接口直接发布 Markdown 到 CSDN（复用 storage.json 登录状态）")
+    parser.add_argument("files", nargs="+", help="要发布的 Markdown 文件")
+    parser.add_argument("--storage", default=str(DEFAULT_STORAGE_FILE), help="登录状态文件，默认 storage.json")
+    parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT, help="保存/发布接口地址")
+    parser.add_argument("--tags", default="人工智能", help="标签，逗号分隔")
+    parser.add_argument("--read-type", default=DEFAULT_READ_TYPE, choices=READ_TYPES, help="可见范围")
+    parser.add_argument("--draft", action="store_true", help="只保存为草稿")
+    args = parser.parse_args()
+
+    publisher = CsdnHttpPublisher(Path(args.storage), endpoint=args.endpoint)
+    tags = [t.strip() for t in args.tags.split(",") if t.strip()]
+    failed = 0
+    for f in args.files:
+        fp = Path(f)
+        post = frontmatter.loads(fp.read_text(encoding="utf-8"))
+        try:
+            data = publisher.publish(fp.stem, post.content, tags, args.read_type, args.draft)
+            print(f"✓ {fp.name}: {data.get('url') or data.get('id')}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {fp.name}: {e}")
+    publisher.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
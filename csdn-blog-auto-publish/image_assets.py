@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+image_assets.py
+
+发布前的图片资源处理流水线：
+- 扫描 Markdown 中的图片引用（![alt](src) 与 <img src="...">）
+- 本地并行压缩/缩放图片（安装了 Pillow 时生效，否则原样上传）
+- 每张图片在每个平台只上传一次：缓存“内容哈希 → 平台图床地址”
+- 用图床地址改写 Markdown
+
+上传接口通过 HttpUploader 配置（地址、表单字段、登录 cookies），
+测试时可以指向本地的桩服务。
+
+用法示例:
+  python image_assets.py posts/文章.md --platform csdn --upload-url https://example.com/upload --in-place
+  python image_assets.py --dir ../zhihu-blog-auto/posts --platform zhihu --upload-url http://127.0.0.1:8000/upload
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import mimetypes
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # requirements.txt 已包含 Pillow；缺失时跳过压缩，并提示一次
+    Image = None
+
+
+DEFAULT_CACHE_FILE = Path("image_cache.json")
+MAX_WIDTH = 1600
+JPEG_QUALITY = 85
+
+# ![alt](src "title") 与 <img ... src="...">
+MD_IMAGE_RE = re.compile(r'!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)(?P<title>\s+"[^"]*")?\)')
+HTML_IMAGE_RE = re.compile(r'<img\b[^>]*?\bsrc=["\'](?P<src>[^"\']+)["\']', re.IGNORECASE)
+
+# 上传函数签名：uploader(data, filename, mime) -> 图床地址
+Uploader = Callable[[bytes, str, str], str]
+
+
+def find_image_sources(markdown: str) -> List[str]:
+    """按出现顺序返回去重后的图片地址（跳过 data: URI）"""
+    sources = []
+    for m in list(MD_IMAGE_RE.finditer(markdown)) + list(HTML_IMAGE_RE.finditer(markdown)):
+        src = m.group('src')
+        if src.startswith('data:') or src in sources:
+            continue
+        sources.append(src)
+    return sources
+
+
+def is_remote(src: str) -> bool:
+    return src.startswith('http://') or src.startswith('https://') or src.startswith('//')
+
+
+def load_image(src: str, base_dir: Path, session=None) -> bytes:
+    """读取本地图片或下载远程图片"""
+    if is_remote(src):
+        import requests
+        url = 'https:' + src if src.startswith('//') else src
+        resp = (session or requests).get(url, timeout=30)
+        resp.raise_for_status()
+        return resp.content
+    path = Path(src)
+    if not path.is_absolute():
+        path = base_dir / path
+    return path.read_bytes()
+
+
+_pillow_warned = False
+
+
+def optimize_image(data: bytes, filename: str, max_width: int = MAX_WIDTH,
+                   quality: int = JPEG_QUALITY) -> Tuple[bytes, str]:
+    """
+    压缩并限制图片宽度
+
+    Returns:
+        (图片数据, 文件名)；无法处理（未安装 Pillow、GIF 动图、非图片）时原样返回
+    """
+    global _pillow_warned
+    if Image is None:
+        if not _pillow_warned:
+            print("⚠️ 未安装 Pillow，图片将不压缩、不缩放直接上传，请执行 pip install -r requirements.txt", file=sys.stderr)
+            _pillow_warned = True
+        return data, filename
+    if filename.lower().endswith('.gif'):
+        return data, filename
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        return data, filename
+
+    if img.width > max_width:
+        height = int(img.height * max_width / img.width)
+        img = img.resize((max_width, height), Image.LANCZOS)
+
+    out = io.BytesIO()
+    stem = Path(filename).stem or 'image'
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img.save(out, format='PNG', optimize=True)
+        new_name = f"{stem}.png"
+    else:
+        img.convert('RGB').save(out, format='JPEG', quality=quality, optimize=True, progressive=True)
+        new_name = f"{stem}.jpg"
+
+    optimized = out.getvalue()
+    # 压缩后反而更大时保留原图
+    if len(optimized) >= len(data):
+        return data, filename
+    return optimized, new_name
+
+
+class UrlCache:
+    """
+    平台 → {内容哈希: 图床地址} 的持久化缓存（线程安全）
+
+    另外记录远程图片地址 → 内容哈希，命中时无需重新下载。
+    """
+
+    SOURCES_KEY = '__sources__'
+
+    def __init__(self, path: Optional[Path] = DEFAULT_CACHE_FILE):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, str]] = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"读取图片缓存失败，将重新建立: {e}")
+
+    def get(self, platform: str, digest: str) -> Optional[str]:
+        with self._lock:
+            return self._data.get(platform, {}).get(digest)
+
+    def put(self, platform: str, digest: str, url: str):
+        with self._lock:
+            self._data.setdefault(platform, {})[digest] = url
+
+    def source_digest(self, src: str) -> Optional[str]:
+        with self._lock:
+            return self._data.get(self.SOURCES_KEY, {}).get(src)
+
+    def put_source(self, src: str, digest: str):
+        with self._lock:
+            self._data.setdefault(self.SOURCES_KEY, {})[src] = digest
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            tmp.replace(self.path)
+
+
+class HttpUploader:
+    """
+    通用的 multipart 图片上传器
+
+    各平台图床接口不同，通过参数配置：上传地址、文件字段名、
+    返回 JSON 中图床地址所在的路径（如 "data.url"），以及登录 cookies。
+    """
+
+    def __init__(self, upload_url: str, field: str = 'file', url_path: str = 'data.url',
+                 storage_state: Optional[Path] = None, headers: Optional[Dict[str, str]] = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.upload_url = upload_url
+        self.field = field
+        self.url_path = url_path.split('.') if url_path else []
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        if headers:
+            self.session.headers.update(headers)
+        if storage_state and Path(storage_state).exists():
+            load_storage_state_cookies(self.session, Path(storage_state))
+
+    def __call__(self, data: bytes, filename: str, mime: str) -> str:
+        resp = self.session.post(
+            self.upload_url,
+            files={self.field: (filename, data, mime)},
+            timeout=60
+        )
+        resp.raise_for_status()
+        value = resp.json()
+        for key in self.url_path:
+            value = value[key]
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"上传接口未返回图片地址: {resp.text[:200]}")
+        return value
+
+
+def load_storage_state_cookies(session, storage_state: Path):
+    """把 Playwright storage_state 文件中的 cookies 加载到 requests 会话"""
+    with open(storage_state, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    for c in state.get('cookies', []):
+        session.cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'))
+
+
+def process_markdown(
+    markdown: str,
+    base_dir: Path,
+    platform: str,
+    uploader: Uploader,
+    cache: UrlCache,
+    workers: int = 4,
+    optimize: bool = True
+) -> Tuple[str, Dict[str, int]]:
+    """
+    处理一篇 Markdown 中的所有图片并改写地址
+
+    Args:
+        markdown: 原始 Markdown
+        base_dir: 相对路径图片的基准目录（通常是 md 文件所在目录）
+        platform: 平台名称（csdn / zhihu / wechat ...），缓存按平台隔离
+        uploader: 上传函数
+        cache: 图床地址缓存
+        workers: 并行线程数
+        optimize: 是否压缩图片
+
+    Returns:
+        (改写后的 Markdown, 统计信息 {images, cached, uploaded, failed, bytes_saved})
+    """
+    sources = find_image_sources(markdown)
+    stats = {'images': len(sources), 'cached': 0, 'uploaded': 0, 'failed': 0, 'bytes_saved': 0}
+    if not sources:
+        return markdown, stats
+
+    lock = threading.Lock()
+    mapping: Dict[str, str] = {}
+
+    def load(src: str):
+        """第一阶段：读取/下载并计算内容哈希（远程图片先按地址查缓存）"""
+        if is_remote(src):
+            known = cache.source_digest(src)
+            if known and cache.get(platform, known):
+                return src, known, None
+        try:
+            raw = load_image(src, base_dir)
+        except Exception as e:
+            print(f"  ✗ 读取图片失败 {src}: {e}")
+            return src, None, None
+        digest = hashlib.sha256(raw).hexdigest()
+        if is_remote(src):
+            cache.put_source(src, digest)
+        return src, digest, raw
+
+    def upload(item):
+        """第二阶段：每个内容哈希只压缩、上传一次"""
+        digest, (src, raw) = item
+        filename = Path(src.split('?')[0]).name or f"{digest[:12]}.png"
+        data = raw
+        if optimize:
+            data, filename = optimize_image(raw, filename)
+        mime = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        try:
+            url = uploader(data, filename, mime)
+        except Exception as e:
+            print(f"  ✗ 上传图片失败 {src}: {e}")
+            return digest, None
+        cache.put(platform, digest, url)
+        with lock:
+            stats['bytes_saved'] += len(raw) - len(data)
+        print(f"  ✓ 已上传 {src} → {url}")
+        return digest, url
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        loaded = list(pool.map(load, sources))
+
+        pending: Dict[str, Tuple[str, bytes]] = {}
+        for src, digest, raw in loaded:
+            if digest and raw is not None and not cache.get(platform, digest):
+                pending.setdefault(digest, (src, raw))
+        uploaded = dict(pool.map(upload, pending.items()))
+
+    for src, digest, _ in loaded:
+        if not digest:
+            stats['failed'] += 1
+            continue
+        url = cache.get(platform, digest)
+        if not url:
+            stats['failed'] += 1
+        elif uploaded.get(digest) and pending[digest][0] == src:
+            stats['uploaded'] += 1
+            mapping[src] = url
+        else:
+            stats['cached'] += 1
+            mapping[src] = url
+
+    def replace_md(m):
+        url = mapping.get(m.group('src'))
+        if not url:
+            return m.group(0)
+        return f"![{m.group('alt')}]({url}{m.group('title') or ''})"
+
+    def replace_html(m):
+        url = mapping.get(m.group('src'))
+        if not url:
+            return m.group(0)
+        return m.group(0).replace(m.group('src'), url)
+
+    markdown = MD_IMAGE_RE.sub(replace_md, markdown)
+    markdown = HTML_IMAGE_RE.sub(replace_html, markdown)
+    return markdown, stats
+
+
+def process_file(md_file: Path, platform: str, uploader: Uploader, cache: UrlCache,
+                 workers: int = 4, optimize: bool = True) -> Tuple[str, Dict[str, int]]:
+    """处理单个 Markdown 文件（不写回），返回改写后的内容与统计"""
+    text = md_file.read_text(encoding='utf-8')
+    return process_markdown(text, md_file.parent, platform, uploader, cache, workers, optimize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发布前处理 Markdown 图片：压缩、按平台上传一次并改写地址")
+    parser.add_argument("files", nargs="*", help="要处理的 Markdown 文件")
+    parser.add_argument("--dir", default=None, help="处理目录下所有 .md 文件")
+    parser.add_argument("--platform", required=True, help="目标平台（csdn / zhihu / wechat ...）")
+    parser.add_argument("--upload-url", required=True, help="图片上传接口地址")
+    parser.add_argument("--field", default="file", help="上传表单中的文件字段名，默认 file")
+    parser.add_argument("--url-path", default="data.url", help="返回 JSON 中图片地址的路径，默认 data.url")
+    parser.add_argument("--storage-state", default=None, help="Playwright storage_state 文件，用于携带登录 cookies")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_FILE), help="图床地址缓存文件")
+    parser.add_argument("--workers", type=int, default=4, help="并行线程数，默认 4")
+    parser.add_argument("--no-optimize", action="store_true", help="不压缩图片，原样上传")
+    parser.add_argument("--in-place", action="store_true", help="直接改写原文件（默认只打印统计）")
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.files]
+    if args.dir:
+        files.extend(sorted(Path(args.dir).glob("*.md")))
+    if not files:
+        parser.error("请指定 Markdown 文件或 --dir")
+
+    uploader = HttpUploader(args.upload_url, field=args.field, url_path=args.url_path,
+                            storage_state=Path(args.storage_state) if args.storage_state else None)
+    cache = UrlCache(Path(args.cache))
+
+    total = {'images': 0, 'cached': 0, 'uploaded': 0, 'failed': 0, 'bytes_saved': 0}
+    for md_file in files:
+        print(f"\n处理: {md_file}")
+        new_text, stats = process_file(md_file, args.platform, uploader, cache,
+                                       workers=args.workers, optimize=not args.no_optimize)
+        for k in total:
+            total[k] += stats[k]
+        if args.in_place and stats['images']:
+            md_file.write_text(new_text, encoding='utf-8')
+        cache.save()
+
+    print(f"\n图片 {total['images']} 张：缓存命中 {total['cached']}，新上传 {total['uploaded']}，"
+          f"失败 {total['failed']}，压缩节省 {total['bytes_saved'] / 1024:.1f} KB")
+    return 1 if total['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
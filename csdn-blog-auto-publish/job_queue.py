@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+job_queue.py
+
+持久化后台任务队列：把耗时操作（搜索、生成、发布）从 Gradio 事件处理中移到后台线程。
+
+- 任务保存在 SQLite（jobs.db），每个任务有 ID、状态、日志、结果，刷新页面或重启服务都不会丢失
+- 按队列名分配固定数量的工作线程（如 llm 2 个、publish 1 个），吞吐受配置限制
+- 支持取消：排队中的任务直接取消；运行中的任务在下一次 progress()/check() 时中止
+- 服务重启时，上次仍在运行的任务标记为中断（不自动重跑，避免重复发布），排队中的任务继续执行
+
+用法:
+    queue = JobQueue(Path("jobs.db"), workers={"llm": 2, "publish": 1})
+    queue.register("search_news", handler, queue="llm")
+    queue.start()
+    job_id = queue.submit("search_news", days=1, topics_str="", count=15)
+    queue.get(job_id)["status"]
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+DEFAULT_DB_FILE = Path("jobs.db")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+STATUS_LABELS = {
+    QUEUED: "⏳ 排队中",
+    RUNNING: "🔄 运行中",
+    DONE: "✅ 已完成",
+    FAILED: "❌ 失败",
+    CANCELLED: "🚫 已取消",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    queue TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_desc TEXT NOT NULL DEFAULT '',
+    log TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue_status ON jobs(queue, status, created_at);
+"""
+
+
+class JobCancelled(BaseException):
+    """
+    任务被取消
+
+    继承 BaseException，使其能穿过业务函数里的 `except Exception`，
+    从而在任意 progress() 检查点中止任务。
+    """
+
+
+class JobContext:
+    """传给任务处理函数的上下文，可当作 gr.Progress 使用：ctx(0.5, desc="...")"""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        return self.queue._cancel_requested(self.job_id)
+
+    def check(self):
+        """检查点：已请求取消时抛出 JobCancelled"""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def log(self, message: str):
+        """追加一行任务日志"""
+        self.queue._append_log(self.job_id, message)
+
+    def __call__(self, fraction=None, desc: Optional[str] = None, **kwargs):
+        """更新进度（兼容 gr.Progress 的调用方式），同时作为取消检查点"""
+        self.check()
+        self.queue._set_progress(self.job_id, fraction, desc)
+        if desc:
+            self.log(desc)
+
+
+class JobQueue:
+    """基于 SQLite 的后台任务队列"""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_FILE, workers: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            db_path: SQLite 数据库文件，":memory:" 表示不落盘
+            workers: 队列名 → 工作线程数，默认 {"default": 1}
+        """
+        self.db_path = str(db_path)
+        self.workers = dict(workers or {"default": 1})
+        self._handlers: Dict[str, Callable] = {}
+        self._handler_queues: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    # ---------- 注册与启动 ----------
+
+    def register(self, kind: str, handler: Callable, queue: str = "default"):
+        """
+        注册任务类型
+
+        Args:
+            kind: 任务类型名
+            handler: handler(ctx, **params) -> str，返回值作为任务结果保存
+            queue: 执行该任务的队列名（决定并发上限）
+        """
+        if queue not in self.workers:
+            raise ValueError(f"未配置的队列: {queue}")
+        self._handlers[kind] = handler
+        self._handler_queues[kind] = queue
+
+    def start(self):
+        """恢复上次中断的任务状态并启动工作线程"""
+        if self._threads:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status=?, finished_at=?, log=log || ? WHERE status=?",
+                (FAILED, time.time(), "服务重启，任务在运行中被中断\n", RUNNING)
+            )
+            self._conn.commit()
+        for queue, count in self.workers.items():
+            for i in range(count):
+                t = threading.Thread(target=self._worker, args=(queue,), name=f"job-{queue}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 5):
+        """通知工作线程退出（运行中的任务会执行完当前步骤）"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    # ---------- 对外接口 ----------
+
+    def submit(self, kind: str, **params) -> str:
+        """提交任务，返回任务 ID"""
+        if kind not in self._handlers:
+            raise ValueError(f"未注册的任务类型: {kind}")
+        job_id = uuid.uuid4().hex[:8]
+        with self._wakeup:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, queue, params, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, self._handler_queues[kind], json.dumps(params, ensure_ascii=False),
+                 QUEUED, time.time())
+            )
+            self._conn.commit()
+            self._wakeup.notify_all()
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任务
+
+        Returns:
+            是否成功发出取消（已结束的任务返回 False）
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if not row or row["status"] in FINISHED_STATUSES:
+                return False
+            if row["status"] == QUEUED:
+                self._conn.execute(
+                    "UPDATE jobs SET status=?, finished_at=?, cancel_requested=1 WHERE id=?",
+                    (CANCELLED, time.time(), job_id)
+                )
+            else:
+                self._conn.execute("UPDATE jobs SET cancel_requested=1 WHERE id=?", (job_id,))
+            self._conn.commit()
+        return True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """返回任务详情"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        """按提交时间倒序返回最近的任务"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+
+    def wait(self, job_id: str, timeout: float = 30, interval: float = 0.05) -> Optional[dict]:
+        """阻塞等待任务结束（测试与命令行使用）"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.get(job_id)
+            if job and job["status"] in FINISHED_STATUSES:
+                return job
+            time.sleep(interval)
+        return self.get(job_id)
+
+    # ---------- 内部实现 ----------
+
+    @staticmethod
+    def _row_to_dict(row) -> dict:
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def _claim(self, queue: str) -> Optional[sqlite3.Row]:
+        """取出队列中最早的排队任务并标记为运行中（调用方持有锁）"""
+        row = self._conn.execute(
+            "SELECT * FROM jobs WHERE queue=? AND status=? ORDER BY created_at LIMIT 1",
+            (queue, QUEUED)
+        ).fetchone()
+        if row:
+            self._conn.execute(
+                "UPDATE jobs SET status=?, started_at=? WHERE id=?", (RUNNING, time.time(), row["id"])
+            )
+            self._conn.commit()
+        return row
+
+    def _worker(self, queue: str):
+        while True:
+            with self._wakeup:
+                row = None
+                while not self._stopping:
+                    row = self._claim(queue)
+                    if row:
+                        break
+                    self._wakeup.wait(timeout=1)
+                if self._stopping:
+                    return
+            self._run(row)
+
+    def _run(self, row):
+        job_id = row["id"]
+        ctx = JobContext(self, job_id)
+        handler = self._handlers.get(row["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"未注册的任务类型: {row['kind']}")
+            result = handler(ctx, **json.loads(row["params"]))
+            self._finish(job_id, DONE, result)
+        except JobCancelled:
+            self._finish(job_id, CANCELLED, None, "任务已取消\n")
+        except Exception as e:
+            self._finish(job_id, FAILED, None, f"任务失败: {e}\n{traceback.format_exc()}")
+
+    def _finish(self, job_id: str, status: str, result, extra_log: str = ""):
+        if result is not None and not isinstance(result, str):
+            result = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status=?, result=?, finished_at=?, log=log || ?, "
+                "progress=CASE WHEN ?=? THEN 1 ELSE progress END WHERE id=?",
+                (status, result, time.time(), extra_log, status, DONE, job_id)
+            )
+            self._conn.commit()
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def _append_log(self, job_id: str, message: str):
+        line = f"[{time.strftime('%H:%M:%S')}] {message}\n"
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET log=log || ? WHERE id=?", (line, job_id))
+            self._conn.commit()
+
+    def _set_progress(self, job_id: str, fraction, desc: Optional[str]):
+        with self._lock:
+            if fraction is not None:
+                self._conn.execute("UPDATE jobs SET progress=? WHERE id=?", (float(fraction), job_id))
+            if desc:
+                self._conn.execute("UPDATE jobs SET progress_desc=? WHERE id=?", (desc, job_id))
+            self._conn.commit()
+
+
+def format_job_table(jobs: List[dict]) -> List[List[str]]:
+    """把任务列表转成表格行：ID / 类型 / 状态 / 进度 / 提交时间"""
+    rows = []
+    for job in jobs:
+        rows.append([
+            job["id"],
+            job["kind"],
+            STATUS_LABELS.get(job["status"], job["status"]),
+            f"{job['progress'] * 100:.0f}% {job['progress_desc']}".strip(),
+            time.strftime("%m-%d %H:%M:%S", time.localtime(job["created_at"])),
+        ])
+    return rows
+
+
+def format_job_detail(job: Optional[dict]) -> str:
+    """把任务详情格式化为 Markdown"""
+    if not job:
+        return "请选择任务"
+    text = f"""### 任务 {job['id']}（{job['kind']}）
+
+- **状态**: {STATUS_LABELS.get(job['status'], job['status'])}
+- **进度**: {job['progress'] * 100:.0f}% {job['progress_desc']}
+- **参数**: `{json.dumps(job['params'], ensure_ascii=False)}`
+"""
+    if job["cancel_requested"] and job["status"] == RUNNING:
+        text += "- **已请求取消**，将在下一个检查点停止\n"
+    if job["result"]:
+        text += f"\n**结果**:\n\n{job['result']}\n"
+    if job["log"]:
+        text += f"\n**日志**:\n```\n{job['log'][-5000:]}\n```\n"
+    return text
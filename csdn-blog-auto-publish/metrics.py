@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+metrics.py
+
+流水线埋点与性能统计：各环节把事件追加到 metrics/events.jsonl（多进程可同时追加），
+MetricsStore 增量地把新事件汇总为按小时的聚合表（metrics/rollup.db），
+仪表盘只查询聚合表，历史再长也能立即加载。
+
+事件类型:
+    stage  一个环节（search / titles / article / publish）的一次执行：耗时、成败、消耗的 token 与费用
+    llm    一次大模型调用：模型、耗时、token、费用
+    phase  发布过程中的一个阶段（打开编辑器、填写正文、点击发布……）的耗时
+
+埋点:
+    with metrics.stage("article", title=title):
+        ...  # 期间同一线程内经 ClientPool 发出的大模型调用自动计入该环节的 token 与费用
+
+    with metrics.phase("publish", "fill_body"):
+        ...
+
+用法:
+    python metrics.py ingest          # 把新事件汇总进聚合表
+    python metrics.py report --days 7 # 打印统计报告
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+METRICS_DIR = Path(os.environ.get("PIPELINE_METRICS_DIR", Path(__file__).resolve().parent / "metrics"))
+
+# 每百万 token 的价格（元），输入输出同价；未列出的模型按 0 计
+MODEL_PRICES = {
+    "glm-4-plus": 5.0,
+    "glm-4-air": 0.5,
+    "glm-4-flash": 0.0,
+}
+
+# 耗时直方图的桶上界（秒），最后一个桶收纳更长的耗时；分位数由直方图估算
+LATENCY_BOUNDS = [0.05, 0.1, 0.2, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120, 180, 300, 600]
+
+BUCKET_SECONDS = 3600
+
+_write_lock = threading.Lock()
+_local = threading.local()
+
+
+# ===================== 埋点 =====================
+
+def events_file() -> Path:
+    return METRICS_DIR / "events.jsonl"
+
+
+def record(event_type: str, **fields):
+    """追加一条事件；写入失败只打印提示，不影响流水线本身"""
+    event = {"ts": round(time.time(), 3), "type": event_type, **fields}
+    line = json.dumps(event, ensure_ascii=False) + "\n"
+    try:
+        with _write_lock:
+            METRICS_DIR.mkdir(parents=True, exist_ok=True)
+            # 单行一次性写入追加模式的文件，多个进程同时写也不会交错
+            with open(events_file(), "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        print(f"写入统计事件失败: {e}")
+
+
+def _stage_stack() -> list:
+    if not hasattr(_local, "stages"):
+        _local.stages = []
+    return _local.stages
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """
+    记录一个环节的执行
+
+    抛出异常视为失败；也可以在块内设置 st["ok"] = False 标记失败而不抛异常。
+    """
+    st = {"ok": True, "tokens": 0, "cost": 0.0}
+    stack = _stage_stack()
+    stack.append((name, st))
+    start = time.monotonic()
+    try:
+        yield st
+    except BaseException:
+        st["ok"] = False
+        raise
+    finally:
+        stack.pop()
+        extra = {k: v for k, v in st.items() if k not in ("ok", "tokens", "cost")}
+        record("stage", stage=name, ok=st["ok"], seconds=round(time.monotonic() - start, 3),
+               tokens=st["tokens"], cost=round(st["cost"], 6), **fields, **extra)
+
+
+@contextmanager
+def phase(group: str, name: str):
+    """记录一个阶段的耗时（只统计正常完成的阶段）"""
+    start = time.monotonic()
+    yield
+    record("phase", group=group, phase=name, seconds=round(time.monotonic() - start, 3))
+
+
+def call_cost(model: str, tokens: int) -> float:
+    return tokens * MODEL_PRICES.get(model, 0.0) / 1_000_000
+
+
+def record_llm_call(model: str, seconds: float, response=None, ok: bool = True):
+    """记录一次大模型调用，并把 token 与费用计入当前线程所有进行中的环节"""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    tokens = prompt_tokens + completion_tokens
+    cost = call_cost(model, tokens)
+    stack = _stage_stack()
+    for _, st in stack:
+        st["tokens"] += tokens
+        st["cost"] += cost
+    record("llm", model=model, ok=ok, seconds=round(seconds, 3), prompt_tokens=prompt_tokens,
+           completion_tokens=completion_tokens, cost=round(cost, 6),
+           stage=stack[-1][0] if stack else None)
+
+
+# ===================== 直方图 =====================
+
+def new_hist() -> List[int]:
+    return [0] * (len(LATENCY_BOUNDS) + 1)
+
+
+def hist_add(hist: List[int], seconds: float):
+    hist[bisect_left(LATENCY_BOUNDS, seconds)] += 1
+
+
+def percentile(hist: List[int], q: float) -> Optional[float]:
+    """按直方图估算分位数（桶内线性插值），没有数据时返回 None"""
+    total = sum(hist)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for i, n in enumerate(hist):
+        if n and seen + n >= target:
+            lower = LATENCY_BOUNDS[i - 1] if i > 0 else 0.0
+            upper = LATENCY_BOUNDS[i] if i < len(LATENCY_BOUNDS) else LATENCY_BOUNDS[-1] * 2
+            return lower + (upper - lower) * (target - seen) / n
+        seen += n
+    return LATENCY_BOUNDS[-1]
+
+
+# ===================== 聚合 =====================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup (
+    bucket INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    hist TEXT NOT NULL,
+    PRIMARY KEY (bucket, kind, name)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _rollup_key(event: dict):
+    """事件 → (kind, name)，不参与统计的事件返回 None"""
+    t = event.get("type")
+    if t == "stage":
+        return "stage", event.get("stage", "")
+    if t == "llm":
+        return "llm", event.get("model", "")
+    if t == "phase":
+        return "phase", f"{event.get('group', '')}.{event.get('phase', '')}"
+    return None
+
+
+class MetricsStore:
+    """按小时聚合的统计表，增量消费 events.jsonl"""
+
+    def __init__(self, metrics_dir: Optional[Path] = None):
+        """
+        Args:
+            metrics_dir: 事件与聚合表所在目录，默认 METRICS_DIR
+        """
+        self.dir = Path(metrics_dir) if metrics_dir else METRICS_DIR
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.events_path = self.dir / "events.jsonl"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.dir / "rollup.db"), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def close(self):
+        self.stop()
+        self._conn.close()
+
+    def start(self, interval: float = 60):
+        """启动后台线程，定期汇总新事件"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.ingest()
+                except Exception as e:
+                    print(f"汇总统计事件失败: {e}")
+
+        self._thread = threading.Thread(target=loop, name="metrics-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _get_meta(self, key: str, default: str) -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def ingest(self) -> int:
+        """
+        把上次位置之后的完整事件行汇总进聚合表
+
+        Returns:
+            本次汇总的事件数
+        """
+        with self._lock:
+            if not self.events_path.exists():
+                return 0
+            offset = int(self._get_meta("offset", "0"))
+            if self.events_path.stat().st_size < offset:
+                # 事件文件被清空或替换：从头开始
+                offset = 0
+            with open(self.events_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            end = data.rfind(b"\n") + 1  # 只消费完整的行，写了一半的行留到下次
+            if not end:
+                return 0
+
+            agg: Dict[tuple, dict] = {}
+            count = 0
+            for raw in data[:end].splitlines():
+                try:
+                    event = json.loads(raw)
+                except ValueError:
+                    continue
+                key = _rollup_key(event)
+                if key is None or "ts" not in event:
+                    continue
+                bucket = int(event["ts"] // BUCKET_SECONDS * BUCKET_SECONDS)
+                a = agg.setdefault((bucket,) + key, {
+                    "count": 0, "failed": 0, "seconds": 0.0, "tokens": 0, "cost": 0.0, "hist": new_hist()
+                })
+                seconds = float(event.get("seconds", 0) or 0)
+                a["count"] += 1
+                a["failed"] += 0 if event.get("ok", True) else 1
+                a["seconds"] += seconds
+                a["tokens"] += int(event.get("tokens", 0) or 0) + int(event.get("prompt_tokens", 0) or 0) \
+                    + int(event.get("completion_tokens", 0) or 0)
+                a["cost"] += float(event.get("cost", 0) or 0)
+                hist_add(a["hist"], seconds)
+                count += 1
+
+            for (bucket, kind, name), a in agg.items():
+                row = self._conn.execute(
+                    "SELECT count, failed, seconds, tokens, cost, hist FROM rollup WHERE bucket=? AND kind=? AND name=?",
+                    (bucket, kind, name)
+                ).fetchone()
+                if row:
+                    old_hist = json.loads(row[5])
+                    a["count"] += row[0]
+                    a["failed"] += row[1]
+                    a["seconds"] += row[2]
+                    a["tokens"] += row[3]
+                    a["cost"] += row[4]
+                    a["hist"] = [x + y for x, y in zip(a["hist"], old_hist)]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rollup (bucket, kind, name, count, failed, seconds, tokens, cost, hist) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (bucket, kind, name, a["count"], a["failed"], a["seconds"], a["tokens"], a["cost"],
+                     json.dumps(a["hist"]))
+                )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('offset', ?)", (str(offset + end),))
+            self._conn.commit()
+            return count
+
+    # ---------- 查询 ----------
+
+    def _rows(self, kind: str, since: float):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT bucket, name, count, failed, seconds, tokens, cost, hist FROM rollup "
+                "WHERE kind=? AND bucket>=? ORDER BY bucket",
+                (kind, int(since // BUCKET_SECONDS * BUCKET_SECONDS))
+            ).fetchall()
+
+    def _merged(self, kind: str, since: float) -> Dict[str, dict]:
+        """把时间范围内的小时聚合按名称合并"""
+        result: Dict[str, dict] = {}
+        for _, name, count, failed, seconds, tokens, cost, hist in self._rows(kind, since):
+            m = result.setdefault(name, {"count": 0, "failed": 0, "seconds": 0.0, "tokens": 0, "cost": 0.0,
+                                         "hist": new_hist()})
+            m["count"] += count
+            m["failed"] += failed
+            m["seconds"] += seconds
+            m["tokens"] += tokens
+            m["cost"] += cost
+            m["hist"] = [x + y for x, y in zip(m["hist"], json.loads(hist))]
+        return result
+
+    def article_series(self, since: float, bucket_seconds: int = BUCKET_SECONDS) -> List[dict]:
+        """每个时间段内成功生成 / 发布的文章数"""
+        series: Dict[int, dict] = {}
+        for bucket, name, count, failed, *_ in self._rows("stage", since):
+            if name not in ("article", "publish"):
+                continue
+            b = bucket // bucket_seconds * bucket_seconds
+            s = series.setdefault(b, {"time": b, "generated": 0, "published": 0})
+            s["generated" if name == "article" else "published"] += count - failed
+        return [series[b] for b in sorted(series)]
+
+    def llm_latency(self, since: float) -> List[dict]:
+        """各模型的调用次数、失败数、耗时分位数、token 与费用"""
+        return [
+            {
+                "model": model, "calls": m["count"], "failed": m["failed"],
+                "p50": percentile(m["hist"], 0.5), "p90": percentile(m["hist"], 0.9),
+                "p99": percentile(m["hist"], 0.99), "tokens": m["tokens"], "cost": m["cost"],
+            }
+            for model, m in sorted(self._merged("llm", since).items())
+        ]
+
+    def article_cost(self, since: float) -> dict:
+        """平均每篇（成功生成的）文章消耗的 token 与费用"""
+        m = self._merged("stage", since).get("article")
+        ok = (m["count"] - m["failed"]) if m else 0
+        return {
+            "articles": ok,
+            "tokens_per_article": m["tokens"] / ok if ok else 0,
+            "cost_per_article": m["cost"] / ok if ok else 0.0,
+        }
+
+    def phase_timings(self, since: float, group: str = "publish") -> List[dict]:
+        """某一组阶段（默认发布）的平均耗时与分位数"""
+        prefix = group + "."
+        return [
+            {
+                "phase": name[len(prefix):], "count": m["count"], "mean": m["seconds"] / m["count"],
+                "p50": percentile(m["hist"], 0.5), "p90": percentile(m["hist"], 0.9),
+            }
+            for name, m in self._merged("phase", since).items()
+            if name.startswith(prefix) and m["count"]
+        ]
+
+    def failure_rates(self, since: float) -> List[dict]:
+        """各环节的执行次数与失败率"""
+        return [
+            {"stage": name, "total": m["count"], "failed": m["failed"], "rate": m["failed"] / m["count"]}
+            for name, m in sorted(self._merged("stage", since).items())
+            if m["count"]
+        ]
+
+
+def format_report(store: MetricsStore, days: float) -> str:
+    """生成文本统计报告"""
+    since = time.time() - days * 86400
+    lines = [f"{'=' * 60}", f"流水线统计（最近 {days:g} 天）", f"{'=' * 60}"]
+
+    series = store.article_series(since, 86400)
+    lines.append(f"生成文章: {sum(s['generated'] for s in series)} 篇，发布: {sum(s['published'] for s in series)} 篇")
+    cost = store.article_cost(since)
+    lines.append(f"每篇文章: {cost['tokens_per_article']:.0f} tokens，{cost['cost_per_article']:.4f} 元")
+
+    lines.append("\n[大模型调用]")
+    for r in store.llm_latency(since):
+        lines.append(f"  {r['model']:<14} {r['calls']:>6} 次  失败 {r['failed']:>4}  "
+                     f"p50 {r['p50']:.2f}s  p90 {r['p90']:.2f}s  p99 {r['p99']:.2f}s  {r['cost']:.2f} 元")
+    lines.append("\n[发布阶段耗时]")
+    for r in store.phase_timings(since):
+        lines.append(f"  {r['phase']:<16} {r['count']:>6} 次  平均 {r['mean']:.2f}s  p90 {r['p90']:.2f}s")
+    lines.append("\n[各环节失败率]")
+    for r in store.failure_rates(since):
+        lines.append(f"  {r['stage']:<10} {r['failed']:>4}/{r['total']:<6} {r['rate'] * 100:.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线性能统计")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ingest", help="把新事件汇总进聚合表")
+    report_p = sub.add_parser("report", help="打印统计报告")
+    report_p.add_argument("--days", type=float, default=7, help="统计最近多少天，默认 7")
+    args = parser.parse_args()
+
+    store = MetricsStore()
+    start = time.monotonic()
+    n = store.ingest()
+    if args.command == "ingest":
+        print(f"已汇总 {n} 条事件（{(time.monotonic() - start) * 1000:.0f} ms）")
+    else:
+        print(format_report(store, args.days))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
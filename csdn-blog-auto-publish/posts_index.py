@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+posts_index.py
+
+posts/ 与 todo/ 的内存索引：Web UI 的统计与列表直接读索引，不再每次交互都 glob 目录、重读标题文件。
+
+- 保存每篇文章的标题、大小、修改时间，以及每天标题文件中的标题列表
+- 安装了 watchdog 时使用文件系统通知（Linux 下为 inotify）增量更新，
+  否则后台线程定时扫描，只重新读取修改时间或大小变化的文件
+- UI 自己写入/删除文件后可调用 update_path() 立即更新，无需等待通知
+
+用法:
+    index = FileIndex(Path("posts"), Path("todo"))
+    index.start()
+    index.posts_count()
+    index.titles("20250101")
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog 为可选依赖，未安装时使用轮询
+    FileSystemEventHandler = object
+    Observer = None
+
+
+TITLES_SUFFIX = "_titles.txt"
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class _IndexEventHandler(FileSystemEventHandler):
+    """把文件系统事件转成索引的增量更新"""
+
+    def __init__(self, index: "FileIndex"):
+        self.index = index
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.index.update_path(Path(event.src_path))
+        dest = getattr(event, "dest_path", None)
+        if dest:
+            self.index.update_path(Path(dest))
+
+
+class FileIndex:
+    """posts/ 与 todo/ 的增量内存索引"""
+
+    def __init__(self, posts_dir: Path, todo_dir: Path, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 use_watchdog: bool = True):
+        """
+        Args:
+            posts_dir: 待发布文章目录
+            todo_dir: 标题文件目录
+            poll_interval: 轮询间隔（秒），仅在未使用 watchdog 时生效
+            use_watchdog: 是否优先使用文件系统通知
+        """
+        self.posts_dir = Path(posts_dir).resolve()
+        self.todo_dir = Path(todo_dir).resolve()
+        self.poll_interval = poll_interval
+        self.use_watchdog = use_watchdog and Observer is not None
+
+        self._lock = threading.Lock()
+        # 文章: stem → (size, mtime)
+        self._posts: Dict[str, Tuple[int, float]] = {}
+        # 标题文件: 日期 → (size, mtime, titles)
+        self._titles: Dict[str, Tuple[int, float, List[str]]] = {}
+        self._sorted_posts: Optional[List[Tuple[str, int]]] = None
+
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        """全量扫描一次，然后启动 watchdog 监听或轮询线程"""
+        self.rescan()
+        if self.use_watchdog:
+            self._observer = Observer()
+            handler = _IndexEventHandler(self)
+            for d in (self.posts_dir, self.todo_dir):
+                d.mkdir(parents=True, exist_ok=True)
+                self._observer.schedule(handler, str(d), recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            self._poll_thread = threading.Thread(target=self._poll_loop, name="posts-index-poll", daemon=True)
+            self._poll_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._poll_thread:
+            self._poll_thread.join(timeout=5)
+            self._poll_thread = None
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.rescan()
+            except OSError as e:
+                print(f"扫描文章目录失败: {e}")
+
+    # ---------- 更新 ----------
+
+    def rescan(self):
+        """扫描两个目录，只重新读取有变化的文件，并移除已删除的文件"""
+        posts = {}
+        for entry in self._scan(self.posts_dir):
+            if entry.name.endswith(".md"):
+                st = entry.stat()
+                posts[entry.name[:-3]] = (st.st_size, st.st_mtime)
+
+        seen_dates = set()
+        for entry in self._scan(self.todo_dir):
+            if entry.name.endswith(TITLES_SUFFIX):
+                date_str = entry.name[:-len(TITLES_SUFFIX)]
+                seen_dates.add(date_str)
+                st = entry.stat()
+                cached = self._titles.get(date_str)
+                if not cached or cached[:2] != (st.st_size, st.st_mtime):
+                    self._update_titles(date_str, Path(entry.path))
+
+        with self._lock:
+            if posts != self._posts:
+                self._posts = posts
+                self._sorted_posts = None
+            for date_str in list(self._titles):
+                if date_str not in seen_dates:
+                    del self._titles[date_str]
+
+    @staticmethod
+    def _scan(directory: Path):
+        try:
+            with os.scandir(directory) as it:
+                return [e for e in it if e.is_file()]
+        except FileNotFoundError:
+            return []
+
+    def update_path(self, path: Path):
+        """单个文件变化（新增/修改/删除）后更新索引"""
+        path = Path(path)
+        parent = path.parent.resolve()
+        if parent == self.posts_dir and path.suffix == ".md":
+            try:
+                st = path.stat()
+                value = (st.st_size, st.st_mtime)
+            except FileNotFoundError:
+                value = None
+            with self._lock:
+                if value is None:
+                    self._posts.pop(path.stem, None)
+                else:
+                    self._posts[path.stem] = value
+                self._sorted_posts = None
+        elif parent == self.todo_dir and path.name.endswith(TITLES_SUFFIX):
+            self._update_titles(path.name[:-len(TITLES_SUFFIX)], path)
+
+    def _update_titles(self, date_str: str, path: Path):
+        try:
+            st = path.stat()
+            with open(path, "r", encoding="utf-8") as f:
+                titles = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            with self._lock:
+                self._titles.pop(date_str, None)
+            return
+        with self._lock:
+            self._titles[date_str] = (st.st_size, st.st_mtime, titles)
+
+    # ---------- 查询 ----------
+
+    def posts_count(self) -> int:
+        with self._lock:
+            return len(self._posts)
+
+    def posts(self) -> List[Tuple[str, int]]:
+        """按标题排序的 (标题, 字节数) 列表（结果缓存到下次变化）"""
+        with self._lock:
+            return self._posts_sorted()
+
+    def _posts_sorted(self) -> List[Tuple[str, int]]:
+        if self._sorted_posts is None:
+            self._sorted_posts = [(stem, self._posts[stem][0]) for stem in sorted(self._posts)]
+        return self._sorted_posts
+
+    def posts_page(self, page: int, page_size: int, query: str = "") -> Tuple[List[Tuple[str, int, float]], int]:
+        """
+        分页读取文章元数据（不读取正文）
+
+        Args:
+            page: 页码，从 1 开始
+            page_size: 每页条数
+            query: 标题关键词（不区分大小写），为空表示全部
+
+        Returns:
+            ([(标题, 字节数, 修改时间)], 符合条件的总数)
+        """
+        query = query.strip().lower()
+        with self._lock:
+            titles = [t for t, _ in self._posts_sorted() if query in t.lower()]
+            start = (max(page, 1) - 1) * page_size
+            rows = [(t, self._posts[t][0], self._posts[t][1]) for t in titles[start:start + page_size]]
+        return rows, len(titles)
+
+    def post_info(self, title: str) -> Optional[Tuple[int, float]]:
+        """返回 (字节数, 修改时间)，不存在时返回 None"""
+        with self._lock:
+            return self._posts.get(title)
+
+    def titles(self, date_str: str) -> List[str]:
+        """某天标题文件中的标题（文件不存在时返回空列表）"""
+        with self._lock:
+            cached = self._titles.get(date_str)
+            return list(cached[2]) if cached else []
+
+    def titles_count(self, date_str: str) -> int:
+        with self._lock:
+            cached = self._titles.get(date_str)
+            return len(cached[2]) if cached else 0
@@ -18,26 +18,99 @@ publish_csdn.py
   playwright install
 
 """
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
-import pyperclip
 import argparse
 import sys
 import time
 from pathlib import Path
+from typing import Optional
 import re  # 导入 re (原始脚本中已在函数内导入，这里统一到顶部)
-import frontmatter # 新增：用于解析 YAML Front Matter
+
+from selector_profile import SelectorProfile, compute_page_fingerprint
+from wait_metrics import WaitRecorder
+from image_assets import HttpUploader, UrlCache, process_markdown
+from browser_service import open_page, save_storage_state
+from publish_events import emit_event
+import metrics
+from csdn_http_publisher import CsdnHttpPublisher, CsdnHttpError, DEFAULT_ENDPOINT as CSDN_HTTP_ENDPOINT, DEFAULT_READ_TYPE, READ_TYPES
+
+
+# playwright.sync_api（约 0.1 s）、pyperclip、frontmatter 推迟到首次使用时导入，
+# 这样 --help 和只用到解析函数的调用方不必承担这部分启动开销
+class _PlaywrightErrors:
+    """
+    playwright.sync_api 公开的异常类型（pw_errors.TimeoutError / pw_errors.Error），首次访问时才导入
+
+    except 子句中的表达式只在异常到达该子句时才求值，那时浏览器已经启动、sync_api 早已加载，
+    因此既不依赖 playwright 的私有模块，也不增加模块导入的开销。
+    """
+
+    def __getattr__(self, name):
+        import playwright.sync_api
+        return getattr(playwright.sync_api, name)
+
+
+pw_errors = _PlaywrightErrors()
 
 
 EDITOR_URL = "https://editor.csdn.net/md/?not_checkout=1&spm=1000.2115.3001.5352"
 
+# 未显式传入画像时使用的内存画像（同一进程内多篇文章间共享，不落盘）
+_session_profile = SelectorProfile("csdn", path=None)
+
+# 所有条件等待的耗时记录（--measure-waits 时打印对比报告）
+wait_recorder = WaitRecorder()
+
+# 发布弹窗容器、发布接口与成功提示
+PUBLISH_MODAL_SELECTOR = '.modal__inner-2, .modal__content, .modal__button-bar, .el-dialog__wrapper'
+PUBLISH_API_RE = re.compile(r'/(saveArticle|publishArticle)\b')
+PUBLISH_DONE_SELECTOR = '.el-message--success, .toast, :text-matches("发布成功|已发布")'
+
+# 读取编辑器当前正文（CodeMirror / contenteditable）
+EDITOR_TEXT_JS = """() => {
+    const cm = document.querySelector('.CodeMirror');
+    if (cm && cm.CodeMirror) return cm.CodeMirror.getValue();
+    const el = document.querySelector('pre.editor__inner[contenteditable="true"]')
+        || document.querySelector('div[contenteditable="true"]');
+    return el ? (el.innerText || el.textContent || '') : '';
+}"""
+
+
+def wait_for_editor_content(page, md: str, timeout: int = 10000) -> bool:
+    """等待编辑器中的正文长度与写入内容基本一致（换行规范化会带来少量差异）"""
+    expected = int(len(md.strip()) * 0.9)
+    try:
+        page.wait_for_function(
+            f"(expected) => ({EDITOR_TEXT_JS})().trim().length >= expected",
+            arg=expected,
+            timeout=timeout
+        )
+        return True
+    except pw_errors.TimeoutError:
+        return False
+
+
+def is_publish_response(response) -> bool:
+    """判断是否为文章保存/发布接口的响应"""
+    return response.request.method == "POST" and bool(PUBLISH_API_RE.search(response.url))
+
+
+def wait_for_publish_done(page, timeout: int = 10000) -> bool:
+    """等待发布成功提示出现或跳转到发布成功页"""
+    try:
+        page.wait_for_selector(PUBLISH_DONE_SELECTOR, state='visible', timeout=timeout)
+        return True
+    except pw_errors.TimeoutError:
+        return "/success" in (page.url or "")
+
 
 def read_markdown(path: Path) -> str:
     if not path.exists():
         raise FileNotFoundError(f"Markdown file not found: {path}")
     return path.read_text(encoding="utf-8")
 
-def fill_title(page, title: str) -> bool:
+def fill_title(page, title: str, profile: Optional[SelectorProfile] = None) -> bool:
     """尝试多个可能的标题选择器，返回是否成功填充"""
+    profile = profile or _session_profile
     title_selectors = [
         'input[placeholder*="标题"]',
         'input[placeholder*="文章标题"]',
@@ -45,94 +118,134 @@ def fill_title(page, title: str) -> bool:
         'input#title',
         'input[name="title"]',
     ]
-    for sel in title_selectors:
-        el = page.query_selector(sel)
-        if el:
+
+    def attempt(sel):
+        # 已知赢家时等待其出现，其余候选保持即时探测
+        if sel == profile.winner('title'):
             try:
-                el.fill(title)
-                print(f"已填充标题 (selector={sel})")
-                return True
-            except Exception:
-                continue
+                page.wait_for_selector(sel, state='visible', timeout=10000)
+            except pw_errors.TimeoutError:
+                return False
+        el = page.query_selector(sel)
+        if not el:
+            return False
+        try:
+            el.fill(title)
+        except Exception:
+            return False
+        print(f"已填充标题 (selector={sel})")
+        return True
+
+    if profile.try_in_order('title', title_selectors, attempt):
+        return True
     print("未找到标题输入框，跳过标题填充（你可以在打开页面后手动填写）")
     return False
 
 
-def fill_editor_with_markdown(page, md: str) -> bool:
+def fill_editor_with_markdown(page, md: str, profile: Optional[SelectorProfile] = None) -> bool:
     """向内容可编辑区域写入 markdown 文本。返回是否成功。"""
+    profile = profile or _session_profile
     # 首选精确选择器（来自用户提供信息）
     selectors = [
         'pre.editor__inner.markdown-highlighting[contenteditable="true"]',
         'pre.editor__inner[contenteditable="true"]',
         'div[contenteditable="true"]',
     ]
-    # 尝试通过编辑器 API 写入（如果存在）
-    try:
-        got = page.evaluate("(text) => {\n            try{\n                const cm = document.querySelector('.CodeMirror');\n                if(cm && cm.CodeMirror){ cm.CodeMirror.setValue(text); return true; }\n                if(window.CodeMirror && window.CodeMirror.runMode){ /* best effort */ }\n                if(window.monaco && window.monaco.editor){ try{ const eds = window.monaco.editor.getModels(); if(eds && eds[0]){ const editors = window.monaco.editor.getEditors ? window.monaco.editor.getEditors() : null; if(editors && editors[0]){ editors[0].setValue(text); return true; } } }catch(e){} }\n            }catch(e){}\n            return false;\n        }", md)
-        if got:
-            print("已通过编辑器 API 写入内容")
-            return True
-    except Exception:
-        pass
+    paste_selectors = [
+        'div.editor div.cledit-section',
+        'div.cledit-section',
+        'pre.editor__inner.markdown-highlighting[contenteditable="true"]',
+        'div[contenteditable="true"]',
+    ]
+    clipboard_ready = []
 
-    # JS 写入：使用 textContent 并触发 paste 事件（尽量保留原始换行）
-    for sel in selectors:
+    def write_by_api():
+        # 尝试通过编辑器 API 写入（如果存在）
+        try:
+            got = page.evaluate("(text) => {\n            try{\n                const cm = document.querySelector('.CodeMirror');\n                if(cm && cm.CodeMirror){ cm.CodeMirror.setValue(text); return true; }\n                if(window.CodeMirror && window.CodeMirror.runMode){ /* best effort */ }\n                if(window.monaco && window.monaco.editor){ try{ const eds = window.monaco.editor.getModels(); if(eds && eds[0]){ const editors = window.monaco.editor.getEditors ? window.monaco.editor.getEditors() : null; if(editors && editors[0]){ editors[0].setValue(text); return true; } } }catch(e){} }\n            }catch(e){}\n            return false;\n        }", md)
+            if got:
+                print("已通过编辑器 API 写入内容")
+                return True
+        except Exception:
+            pass
+        return False
+
+    def write_by_js(sel):
+        # JS 写入：使用 textContent 并触发 paste 事件（尽量保留原始换行）
         try:
             el = page.query_selector(sel)
             if not el:
-                continue
+                return False
             try:
                 page.eval_on_selector(sel, '(el, value) => { el.focus(); try{ el.textContent = value; }catch(e){}; try{ const dt = new DataTransfer(); dt.setData("text/plain", value); const evt = new ClipboardEvent("paste", { clipboardData: dt, bubbles: true }); el.dispatchEvent(evt); }catch(e){}; el.dispatchEvent(new Event("input", { bubbles: true })); }', md)
-                print(f"已在编辑器中写入内容 (selector={sel})")
-                return True
             except Exception as e:
                 print(f"通过 JS 写入选择器 {sel} 失败: {e}")
-                continue
+                return False
+            # 与剪贴板方式一致：以编辑器内容确认写入生效，脚本执行完不代表编辑器接受了内容
+            start = time.monotonic()
+            written = wait_for_editor_content(page, md, timeout=profile.timeout_for('editor', f'js:{sel}', 5000))
+            wait_recorder.record('js_write_committed', time.monotonic() - start, 0.0, written)
+            if not written:
+                print(f"JS 写入后编辑器内容未更新 (selector={sel})")
+                return False
+            print(f"已在编辑器中写入内容 (selector={sel})")
+            return True
         except Exception as e:
             print(f"尝试使用选择器 {sel} 写入失败: {e}")
-            continue
-
-    print("未找到可写入的编辑器元素，请检查页面是否已正确加载并已登录")
-
-    try:
-        pyperclip.copy(md)
-    except Exception as e:
-        print(f"将内容复制到系统剪贴板失败: {e}")
-        return False
+            return False
 
-    paste_selectors = [
-        'div.editor div.cledit-section',
-        'div.cledit-section',
-        'pre.editor__inner.markdown-highlighting[contenteditable="true"]',
-        'div[contenteditable="true"]',
-    ]
-    for sel in paste_selectors:
+    def write_by_clipboard(sel):
+        if not clipboard_ready:
+            try:
+                import pyperclip
+                pyperclip.copy(md)
+            except Exception as e:
+                print(f"将内容复制到系统剪贴板失败: {e}")
+                return False
+            clipboard_ready.append(True)
         try:
             locator = page.locator(sel).first
-            locator.wait_for(state="visible", timeout=5000)
+            locator.wait_for(state="visible", timeout=profile.timeout_for('editor', f'paste:{sel}', 5000))
             locator.click()
             # 模拟系统粘贴 (Mac 使用 Meta, 其他使用 Control)
             mod = 'Meta' if sys.platform == 'darwin' else 'Control'
             page.keyboard.press(f"{mod}+v")
-            time.sleep(0.5)
+            # 以编辑器内容长度确认粘贴已生效，而不是固定等待
+            start = time.monotonic()
+            pasted = wait_for_editor_content(page, md, timeout=5000)
+            wait_recorder.record('paste_committed', time.monotonic() - start, 0.5, pasted)
+            if not pasted:
+                print(f"粘贴后编辑器内容未更新 (selector={sel})")
+                return False
             print(f"已通过剪贴板粘贴到编辑器 (selector={sel})")
             return True
         except Exception as e:
             # 尝试下一个选择器
             print(f"尝试通过剪贴板粘贴到选择器 {sel} 失败: {e}")
-            continue
+            return False
+
+    strategies = {'api': write_by_api}
+    for sel in selectors:
+        strategies[f'js:{sel}'] = lambda s=sel: write_by_js(s)
+    for sel in paste_selectors:
+        strategies[f'paste:{sel}'] = lambda s=sel: write_by_clipboard(s)
+
+    if profile.try_in_order('editor', list(strategies), lambda name: strategies[name]()):
+        return True
 
-    print("尝试剪贴板粘贴也失败，可能需要手动粘贴或进一步调整选择器")
+    print("未找到可写入的编辑器元素，且剪贴板粘贴也失败，可能需要手动粘贴或进一步调整选择器")
     return False
 
 
-def click_publish_buttons(page, tags=None) -> bool:
+def click_publish_buttons(page, tags=None, profile: Optional[SelectorProfile] = None) -> bool:
     """点击发布按钮并在弹出的确认框中点击最终发布按钮。返回是否成功。"""
+    profile = profile or _session_profile
+
     def robust_click(selector, desc, timeout=10000, retries=2):
         locator = page.locator(selector).first
         try:
             locator.wait_for(state="visible", timeout=timeout)
-        except PlaywrightTimeoutError:
+        except pw_errors.TimeoutError:
             print(f"等待元素可见超时: {selector} ({desc})")
             return False
 
@@ -144,7 +257,7 @@ def click_publish_buttons(page, tags=None) -> bool:
                 locator.click(timeout=5000)
                 print(f"已点击 {desc} (selector={selector}, attempt={attempt})")
                 return True
-            except PlaywrightError as e:
+            except pw_errors.Error as e:
                 last_err = e
                 print(f"尝试点击 {desc} 失败 (attempt={attempt}): {e}")
                 try:
@@ -152,10 +265,17 @@ def click_publish_buttons(page, tags=None) -> bool:
                     locator.click(force=True, timeout=3000)
                     print(f"已强制点击 {desc} (selector={selector}, attempt={attempt})")
                     return True
-                except PlaywrightError as e2:
+                except pw_errors.Error as e2:
                     last_err = e2
                     print(f"强制点击也失败: {e2}")
-                    time.sleep(0.5)
+                    # 等待元素停止动画/重新可交互后再重试
+                    try:
+                        with wait_recorder.measure('click_retry_ready', legacy=0.5):
+                            handle = locator.element_handle(timeout=2000)
+                            handle.wait_for_element_state('stable', timeout=2000)
+                            handle.wait_for_element_state('enabled', timeout=2000)
+                    except pw_errors.Error:
+                        pass
 
         # JS fallback: 尝试使用原生 DOM click
         try:
@@ -172,81 +292,96 @@ def click_publish_buttons(page, tags=None) -> bool:
         'button.btn-publish',
         'button[role="button"][data-report-click]'
     ]
-    clicked = False
-    for sel in publish_selectors:
-        if robust_click(sel, '主发布按钮', timeout=20000, retries=3):
-            clicked = True
-            break
+    clicked = profile.try_in_order(
+        'publish_button',
+        publish_selectors,
+        lambda sel: robust_click(sel, '主发布按钮', timeout=profile.timeout_for('publish_button', sel, 20000), retries=3)
+    )
 
     if not clicked:
         print("未能找到或点击主发布按钮，可能页面结构已变化或元素被遮挡")
         return False
 
     # 确认弹窗中的发布按钮
-    # 等待弹窗出现（短暂），然后尝试按文字或 modal 范围查找按钮
-    time.sleep(0.5)
+    # 等待弹窗出现，然后尝试按文字或 modal 范围查找按钮
+    try:
+        with wait_recorder.measure('modal_visible', legacy=0.5):
+            page.wait_for_selector(PUBLISH_MODAL_SELECTOR, state='visible', timeout=5000)
+    except pw_errors.TimeoutError:
+        print("未检测到发布弹窗，继续尝试按文本查找确认按钮")
 
     def robust_click_by_text(button_text, desc, timeout=10000, retries=3):
-        last_err = None
-        for attempt in range(1, retries + 1):
-            try:
-                # 优先使用 role-based 查找
-                locator = page.get_by_role("button", name=button_text).first
-                locator.wait_for(state="visible", timeout=timeout)
-                locator.scroll_into_view_if_needed()
-                locator.click(timeout=5000)
-                print(f"已点击 {desc} (by role/name='{button_text}', attempt={attempt})")
-                return True
-            except Exception as e:
-                last_err = e
-                print(f"尝试按文本查找并点击 {desc} 失败 (attempt={attempt}): {e}")
-                # fallback 使用 has-text 选择器
-                try:
-                    locator2 = page.locator(f'button:has-text("{button_text}")').first
-                    locator2.wait_for(state="visible", timeout=2000)
-                    locator2.scroll_into_view_if_needed()
-                    locator2.click(timeout=3000)
-                    print(f"已点击 {desc} (button:has-text('{button_text}'), attempt={attempt})")
-                    return True
-                except Exception as e2:
-                    last_err = e2
-                    print(f"has-text fallback 失败: {e2}")
+        key = f'confirm:{button_text}'
+        modal_containers = ['.modal__button-bar', '.modal', '.el-dialog__footer', '.dialog-footer']
+        last_err = [None]
+
+        def by_role(_):
+            # 优先使用 role-based 查找
+            locator = page.get_by_role("button", name=button_text).first
+            locator.wait_for(state="visible", timeout=profile.timeout_for(key, 'role', timeout))
+            locator.scroll_into_view_if_needed()
+            locator.click(timeout=5000)
+            print(f"已点击 {desc} (by role/name='{button_text}')")
+            return True
 
-            time.sleep(0.5)
+        def by_has_text(_):
+            # fallback 使用 has-text 选择器
+            locator2 = page.locator(f'button:has-text("{button_text}")').first
+            locator2.wait_for(state="visible", timeout=2000)
+            locator2.scroll_into_view_if_needed()
+            locator2.click(timeout=3000)
+            print(f"已点击 {desc} (button:has-text('{button_text}'))")
+            return True
 
-        # 尝试在常见 modal 容器中查找
-        modal_containers = ['.modal__button-bar', '.modal', '.el-dialog__footer', '.dialog-footer']
-        for container in modal_containers:
-            try:
-                locator3 = page.locator(f'{container} >> button:has-text("{button_text}")').first
-                locator3.wait_for(state="visible", timeout=3000)
-                locator3.scroll_into_view_if_needed()
-                locator3.click()
-                print(f"已在容器 {container} 中点击 {desc} (text='{button_text}')")
-                return True
-            except Exception as e:
-                last_err = e
-                # continue
+        def in_container(container):
+            # 尝试在常见 modal 容器中查找
+            locator3 = page.locator(f'{container} >> button:has-text("{button_text}")').first
+            locator3.wait_for(state="visible", timeout=3000)
+            locator3.scroll_into_view_if_needed()
+            locator3.click()
+            print(f"已在容器 {container} 中点击 {desc} (text='{button_text}')")
+            return True
 
-        # JS fallback: 根据按钮文本遍历所有 button 并点击第一个匹配项
-        try:
+        def by_js(_):
+            # JS fallback: 根据按钮文本遍历所有 button 并点击第一个匹配项
             clicked = page.evaluate("(t) => { const btns = Array.from(document.querySelectorAll('button')); for (const b of btns){ if(b.innerText && b.innerText.trim().includes(t)){ b.scrollIntoView(); b.click(); return true; } } return false; }", button_text)
             if clicked:
                 print(f"已使用 JS 文本回退点击 {desc} (text='{button_text}')")
+            return bool(clicked)
+
+        strategies = {'role': by_role, 'has-text': by_has_text}
+        for container in modal_containers:
+            strategies[f'modal:{container}'] = in_container
+        strategies['js'] = by_js
+
+        def attempt(name):
+            try:
+                arg = name.split(':', 1)[1] if name.startswith('modal:') else name
+                return strategies[name](arg)
+            except Exception as e:
+                last_err[0] = e
+                print(f"尝试 {desc} 策略 {name} 失败: {e}")
+                return False
+
+        for attempt_no in range(1, retries + 1):
+            if profile.try_in_order(key, list(strategies), attempt):
                 return True
-        except Exception as e:
-            last_err = e
-            print(f"JS 文本回退出错: {e}")
+            # 等待目标按钮重新出现再进入下一轮
+            try:
+                with wait_recorder.measure('confirm_button_visible', legacy=0.5):
+                    page.wait_for_selector(f'button:has-text("{button_text}")', state='visible', timeout=2000)
+            except pw_errors.TimeoutError:
+                pass
 
-        print(f"最终未能点击 {desc} (text='{button_text}'), last_err={last_err}")
+        print(f"最终未能点击 {desc} (text='{button_text}'), last_err={last_err[0]}")
         return False
 
     # 优先在 modal 区域内查找并点击最终的发布按钮，然后等待 modal 关闭
     modal_containers = ['.modal__inner-2', '.modal__content', '.modal__button-bar', '.el-dialog__wrapper']
-    clicked_confirm = False
 
     def ensure_tags_in_modal(page, container_selector, tag_text='人工智能'):
         """如果 modal 中没有 tags，则尝试触发下拉并输入 tag_text 然后回车添加。"""
+        tag_start = time.monotonic()
         try:
             # 优先在 mark_selection_box 查找已有标签
             tags_locator = page.locator(f'{container_selector} .mark_selection_box .el-tag')
@@ -272,10 +407,10 @@ def click_publish_buttons(page, tags=None) -> bool:
                 'input.el-input__inner',
             ]
 
-            for trig in trigger_selectors:
+            for trig in profile.order('tag_trigger', trigger_selectors):
                 try:
                     trg = page.locator(trig).first
-                    trg.wait_for(state='visible', timeout=2000)
+                    trg.wait_for(state='visible', timeout=profile.timeout_for('tag_trigger', trig, 2000))
                     trg.scroll_into_view_if_needed()
                     # 优先 hover，然后 click，尽量触发下拉
                     try:
@@ -287,19 +422,25 @@ def click_publish_buttons(page, tags=None) -> bool:
                             pass
 
                     # 等待并填写输入框
-                    for inp in input_selector_candidates:
+                    for inp in profile.order('tag_input', input_selector_candidates):
                         try:
                             iloc = page.locator(inp).first
-                            iloc.wait_for(state='visible', timeout=2000)
+                            iloc.wait_for(state='visible', timeout=profile.timeout_for('tag_input', inp, 2000))
                             iloc.click()
                             # 使用 keyboard.type 更接近人工输入以触发下拉建议
                             page.keyboard.type(tag_text)
                             page.keyboard.press('Enter')
-                            time.sleep(0.5)
-                            # 检查是否添加成功
+                            # 等待标签真正出现在已选区域，再检查是否添加成功
+                            try:
+                                with wait_recorder.measure('tag_added', legacy=0.5):
+                                    page.locator(f'{container_selector} .mark_selection_box .el-tag').first.wait_for(state='visible', timeout=2000)
+                            except pw_errors.TimeoutError:
+                                pass
                             new_count = page.locator(f'{container_selector} .mark_selection_box .el-tag').count()
                             if new_count > 0:
                                 print(f"在弹窗中已添加标签: {tag_text}")
+                                profile.record_success('tag_trigger', trig, time.monotonic() - tag_start)
+                                profile.record_success('tag_input', inp, time.monotonic() - tag_start)
                                 # 点击弹窗的空白处以关闭下拉/输入提示（更精确的策略，避免点到下拉本身）
                                 try:
                                     # 1) 尝试点击 modal header 的中心（通常在 .modal__content h3）
@@ -345,8 +486,12 @@ def click_publish_buttons(page, tags=None) -> bool:
                                 except Exception as e:
                                     print(f"点击弹窗空白区域失败: {e}")
 
-                                # 等短暂时间让下拉关闭
-                                time.sleep(0.2)
+                                # 等待标签建议下拉关闭
+                                try:
+                                    with wait_recorder.measure('tag_dropdown_closed', legacy=0.2):
+                                        page.locator('.el-autocomplete-suggestion:visible, .el-select-dropdown:visible').first.wait_for(state='hidden', timeout=1000)
+                                except pw_errors.TimeoutError:
+                                    pass
                                 return True
                         except Exception:
                             continue
@@ -361,6 +506,7 @@ def click_publish_buttons(page, tags=None) -> bool:
 
     def set_fans_visible_in_modal(page, container_selector):
         """在发布弹窗中设置可见范围为'粉丝可见'"""
+        fans_start = time.monotonic()
         try:
             # 尝试多种可能的选择器来找到"粉丝可见"选项
             fans_visible_selectors = [
@@ -372,10 +518,10 @@ def click_publish_buttons(page, tags=None) -> bool:
                 'label:has-text("粉丝可见")'
             ]
             
-            for selector in fans_visible_selectors:
+            for selector in profile.order('fans_visible', fans_visible_selectors):
                 try:
                     locator = page.locator(selector).first
-                    locator.wait_for(state="visible", timeout=3000)
+                    locator.wait_for(state="visible", timeout=profile.timeout_for('fans_visible', selector, 3000))
                     
                     # 检查是否已经被选中
                     # 先尝试找到对应的input元素检查状态
@@ -385,6 +531,7 @@ def click_publish_buttons(page, tags=None) -> bool:
                         is_checked = input_locator.is_checked()
                         if is_checked:
                             print("'粉丝可见'选项已经被选中")
+                            profile.record_success('fans_visible', selector, time.monotonic() - fans_start)
                             return True
                     except Exception:
                         # 如果无法检查状态，直接点击
@@ -394,13 +541,23 @@ def click_publish_buttons(page, tags=None) -> bool:
                     locator.scroll_into_view_if_needed()
                     locator.click(timeout=5000)
                     print(f"已点击'粉丝可见'选项 (selector={selector})")
+                    profile.record_success('fans_visible', selector, time.monotonic() - fans_start)
                     
-                    # 短暂等待以确保状态更新
-                    time.sleep(0.5)
+                    # 等待复选框状态真正更新
+                    try:
+                        with wait_recorder.measure('fans_visible_checked', legacy=0.5):
+                            page.wait_for_function(
+                                "(sel) => { const el = document.querySelector(sel); return !el || el.checked; }",
+                                arg=input_selector,
+                                timeout=2000
+                            )
+                    except pw_errors.TimeoutError:
+                        pass
                     return True
                     
                 except Exception as e:
                     print(f"尝试使用选择器 {selector} 点击'粉丝可见'失败: {e}")
+                    profile.record_failure('fans_visible', selector)
                     continue
             
             # 如果标准选择器都失败，尝试JS方式查找并点击
@@ -450,7 +607,7 @@ def click_publish_buttons(page, tags=None) -> bool:
             print(f"set_fans_visible_in_modal 出错: {e}")
             return False
             
-    for container in modal_containers:
+    def confirm_in_container(container):
         try:
             # 在容器内查找带红色类或文本的按钮
             # 在尝试点击发布前，确保弹窗中有标签（否则添加默认标签）
@@ -484,24 +641,45 @@ def click_publish_buttons(page, tags=None) -> bool:
             btn_locator = page.locator(f'{container} >> button.btn-b-red:visible').first
             if btn_locator:
                 try:
-                    btn_locator.wait_for(state='visible', timeout=5000)
+                    btn_locator.wait_for(state='visible', timeout=profile.timeout_for('confirm_container', container, 5000))
                     btn_locator.scroll_into_view_if_needed()
-                    btn_locator.click(timeout=5000)
+                    # 点击的同时监听发布接口，以接口返回作为“请求已完成”的依据
+                    publish_response = None
+                    btn_clicked = False
+                    try:
+                        with wait_recorder.measure('publish_xhr', legacy=1.0):
+                            with page.expect_response(is_publish_response, timeout=15000) as resp_info:
+                                btn_locator.click(timeout=5000)
+                                btn_clicked = True
+                            publish_response = resp_info.value
+                    except pw_errors.TimeoutError:
+                        if not btn_clicked:
+                            raise
+                        print("未捕获到发布接口响应，继续检查页面状态")
                     print(f"已在容器 {container} 内点击发布按钮")
+                    if publish_response is not None:
+                        print(f"发布接口已返回: HTTP {publish_response.status}")
                     # 等待 modal 被移除
                     try:
-                        page.wait_for_selector(container, state='detached', timeout=10000)
+                        with wait_recorder.measure('modal_detached', legacy=0.0):
+                            page.wait_for_selector(container, state='detached', timeout=10000)
                         print(f"容器 {container} 已关闭")
                     except Exception:
-                        # 如果容器没有按预期关闭，短暂等待以确保发布请求发出
-                        time.sleep(1)
-                    clicked_confirm = True
-                    break
+                        print(f"容器 {container} 未按预期关闭")
+                    start = time.monotonic()
+                    done = wait_for_publish_done(page, timeout=5000)
+                    wait_recorder.record('publish_toast', time.monotonic() - start, 0.0, done)
+                    if done:
+                        print("检测到发布成功提示")
+                    return True
                 except Exception as e:
                     print(f"在容器 {container} 内点击发布失败: {e}")
         except Exception:
             # 容器选择器不存在或不可见
-            continue
+            pass
+        return False
+
+    clicked_confirm = bool(profile.try_in_order('confirm_container', modal_containers, confirm_in_container))
 
     if not clicked_confirm:
         # 除了 container 内查找之外，也尝试按文本/role 查找（已有的文本查找回退）
@@ -514,11 +692,198 @@ def click_publish_buttons(page, tags=None) -> bool:
     return True
 
 
+def open_editor(page, context, storage_file: Path, profile: SelectorProfile, login_timeout: int,
+                shared: bool = False):
+    """打开编辑器页面；没有 storage 时等待用户登录并保存（共享浏览器时只保存 csdn.net 的部分）"""
+    print(f"打开编辑页面：{EDITOR_URL}")
+    page.goto(EDITOR_URL, timeout=60000)
+    # 站点资源变化（发版）时画像自动失效
+    profile.check_fingerprint(compute_page_fingerprint(page))
+
+    # 如果没有 storage，则等待用户登录并保存 storage
+    if not storage_file.exists():
+        print(f"等待最多 {login_timeout} 秒以完成登录并加载编辑器... 如果尚未登录，请在浏览器中完成登录。")
+        try:
+            editor_selector = 'pre.editor__inner.markdown-highlighting[contenteditable="true"]'
+            page.wait_for_selector(editor_selector, timeout=login_timeout * 1000)
+            # 保存 storage
+            try:
+                save_storage_state(context, storage_file, domain="csdn.net" if shared else None)
+                print(f"已保存 login storage 到: {storage_file}")
+            except Exception as e:
+                print(f"保存 storage_state 失败: {e}")
+        except pw_errors.TimeoutError:
+            print("等待编辑器元素超时，尝试继续（可能需要你手动登录或手动打开编辑器）")
+
+
+def publish_one(page, fp: Path, args, profile: SelectorProfile, image_uploader=None, image_cache=None) -> str:
+    """
+    在编辑器中发布单篇文章（各阶段耗时与结果记录到 metrics）
+
+    Returns:
+        'published' 已触发发布 / 'unconfirmed' 已点击发布但未确认成功 /
+        'filled' 仅填充未发布（--skip-publish）/ 'error' 读取或填充失败
+    """
+    # --skip-publish 只填充不发布：单独记为 publish_dry_run，不计入看板的发布成功数
+    with metrics.stage('publish_dry_run' if args.skip_publish else 'publish', backend='browser') as st:
+        status = _publish_one(page, fp, args, profile, image_uploader, image_cache)
+        st['ok'] = status in ('published', 'filled')
+        st['status'] = status
+    return status
+
+
+def _publish_one(page, fp: Path, args, profile: SelectorProfile, image_uploader=None, image_cache=None) -> str:
+    try:
+        # 1. 读取完整 MD 文本
+        full_md_text = read_markdown(fp)
+    except Exception as e:
+        print(f"读取 {fp} 失败: {e}, 跳过")
+        return 'error'
+
+    # 4. 确定最终的 title 和 tags
+    use_title = fp.stem
+    
+    print(f"使用标题: {use_title}")
+    print(f"使用标签: 人工智能")
+
+    # 填充编辑器页面：确保在编辑器页面
+    try:
+        with metrics.phase('publish', 'open_editor'):
+            page.goto(EDITOR_URL, timeout=60000)
+    except Exception as e:
+        print(f"跳转到编辑器失败: {e}")
+
+    # 尝试填标题
+    if use_title:
+        with metrics.phase('publish', 'fill_title'):
+            fill_title(page, use_title, profile=profile)
+
+    # 5. 填充正文 (使用不含 YAML 的 md_content_to_publish)
+    import frontmatter
+    post = frontmatter.loads(full_md_text)
+    if image_uploader:
+        with metrics.phase('publish', 'images'):
+            post.content, img_stats = process_markdown(post.content, fp.parent, 'csdn', image_uploader, image_cache)
+            image_cache.save()
+        if img_stats['images']:
+            print(f"图片处理: 共 {img_stats['images']} 张，缓存命中 {img_stats['cached']}，新上传 {img_stats['uploaded']}，失败 {img_stats['failed']}")
+    with metrics.phase('publish', 'fill_body'):
+        ok = fill_editor_with_markdown(page, post.content, profile=profile)
+    profile.save()
+    if not ok:
+        print("未能自动填充正文，跳过自动发布。你可以手动粘贴后再运行脚本的发布步骤")
+        return 'error'
+
+    # 等待编辑器确认收到完整正文（替代固定等待 2 秒）
+    start = time.monotonic()
+    content_ready = wait_for_editor_content(page, post.content, timeout=10000)
+    wait_recorder.record('editor_content', time.monotonic() - start, 2.0, content_ready)
+    metrics.record('phase', group='publish', phase='content_ready', seconds=round(time.monotonic() - start, 3))
+    if not content_ready:
+        # 写入策略报告成功但正文不完整：反馈给画像，连续出现时作废该策略，下次不再优先尝试
+        profile.record_failure('editor', profile.winner('editor'))
+        profile.save()
+        print("编辑器内容长度与文章不一致，可能未完整写入，继续尝试发布")
+
+    if args.skip_publish:
+        print("--skip-publish 启用，已填充但未触发发布。")
+        return 'filled'
+
+    # 6. 点击发布 (传入最终的 use_tags)
+    use_tags = ["人工智能"]
+    with metrics.phase('publish', 'submit'):
+        published = click_publish_buttons(page, tags=use_tags, profile=profile)
+    profile.save()
+    if published:
+        print(f"已触发发布请求: {fp}")
+        return 'published'
+    print(f"{fp} 的发布步骤未完全成功，请手动检查页面。")
+    return 'unconfirmed'
+
+
+def publish_via_http(files_to_process, args, storage_file: Path, image_uploader=None, image_cache=None):
+    """http 后端：不启动浏览器，逐篇直接提交到发布接口"""
+    try:
+        publisher = CsdnHttpPublisher(storage_file, endpoint=args.http_endpoint)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(2)
+
+    use_tags = ["人工智能"]
+    total = len(files_to_process)
+    emit_event('run_start', total=total, backend='http')
+    counts = {'published': 0, 'filled': 0, 'failed': 0}
+    # --skip-publish 时只保存草稿，与浏览器后端一致记为 filled / publish_dry_run
+    success = 'filled' if args.skip_publish else 'published'
+
+    def done(idx, fp, ok, start):
+        counts[success if ok else 'failed'] += 1
+        metrics.record('stage', stage='publish_dry_run' if args.skip_publish else 'publish', backend='http', ok=ok,
+                       seconds=round(time.monotonic() - start, 3), tokens=0, cost=0.0)
+        emit_event('post_done', index=idx, total=total, file=str(fp), ok=ok, status=success if ok else 'error',
+                   seconds=round(time.monotonic() - start, 1))
+
+    import frontmatter
+
+    for idx, fp in enumerate(files_to_process, start=1):
+        print(f"\n===== 处理 {idx}/{total}: {fp} =====")
+        emit_event('post_start', index=idx, total=total, file=str(fp))
+        post_start = time.monotonic()
+        try:
+            post = frontmatter.loads(read_markdown(fp))
+        except Exception as e:
+            print(f"读取 {fp} 失败: {e}, 跳过")
+            done(idx, fp, False, post_start)
+            continue
+
+        if image_uploader:
+            with metrics.phase('publish', 'images'):
+                post.content, img_stats = process_markdown(post.content, fp.parent, 'csdn', image_uploader, image_cache)
+                image_cache.save()
+            if img_stats['images']:
+                print(f"图片处理: 共 {img_stats['images']} 张，缓存命中 {img_stats['cached']}，新上传 {img_stats['uploaded']}，失败 {img_stats['failed']}")
+
+        start = time.monotonic()
+        try:
+            with metrics.phase('publish', 'http_submit'):
+                data = publisher.publish(fp.stem, post.content, use_tags, read_type=args.read_type, draft=args.skip_publish)
+        except CsdnHttpError as e:
+            print(f"{fp} 发布失败: {e}")
+            done(idx, fp, False, post_start)
+            continue
+        except Exception as e:
+            print(f"{fp} 请求发布接口出错: {e}")
+            done(idx, fp, False, post_start)
+            continue
+        action = "保存草稿" if args.skip_publish else "发布"
+        print(f"已{action}: {fp}（{time.monotonic() - start:.2f} 秒）{data.get('url', '')}")
+        done(idx, fp, True, post_start)
+
+        # 平台频率限制，与浏览器后端保持一致
+        if idx < total:
+            emit_event('cooldown', seconds=30)
+            time.sleep(30)
+
+    publisher.close()
+    emit_event('run_end', **counts)
+
+
 def main():
     parser = argparse.ArgumentParser(description="将 posts 目录下的 Markdown 发布到 CSDN 编辑器（基于 Playwright）。")
     parser.add_argument("--headless", default="false", choices=["true", "false"], help="是否无头模式，默认 false（显示浏览器以便登录）")
     parser.add_argument("--login-timeout", type=int, default=120, help="等待登录时间（秒），默认 120 秒")
-    parser.add_argument("--skip-publish", action='store_true', help="只填充标题与正文但不触发发布（调试用）")
+    parser.add_argument("--skip-publish", action='store_true', help="只填充标题与正文但不触发发布（调试用；http 后端下只保存为草稿）")
+    parser.add_argument("--selector-profile", default="selector_profile.json", help="选择器策略画像文件，默认 selector_profile.json")
+    parser.add_argument("--no-selector-profile", action='store_true', help="不读写选择器策略画像（每次都按固定顺序尝试）")
+    parser.add_argument("--reset-selector-profile", action='store_true', help="清空已学习的选择器策略画像后再运行")
+    parser.add_argument("--measure-waits", action='store_true', help="打印每次条件等待的实际耗时，并在结束时输出与原固定延迟的对比报告")
+    parser.add_argument("--image-upload-url", default=None, help="图片上传接口地址；设置后发布前先压缩并上传文中图片（每张图只传一次）")
+    parser.add_argument("--image-upload-field", default="file", help="图片上传表单的文件字段名，默认 file")
+    parser.add_argument("--image-url-path", default="data.url", help="上传接口返回 JSON 中图片地址的路径，默认 data.url")
+    parser.add_argument("--limit", type=int, default=0, help="最多发布多少篇（按文件名排序），默认全部")
+    parser.add_argument("--backend", default="browser", choices=["browser", "http"], help="发布方式：browser 驱动编辑器页面（默认），http 复用 storage.json 直接调用发布接口")
+    parser.add_argument("--http-endpoint", default=CSDN_HTTP_ENDPOINT, help="http 后端使用的保存/发布接口地址")
+    parser.add_argument("--read-type", default=DEFAULT_READ_TYPE, choices=READ_TYPES, help="http 后端的可见范围，默认粉丝可见")
     # 移除了 --title 和 --file 参数，因为脚本现在是处理 'posts' 目录
     args = parser.parse_args()
 
@@ -531,91 +896,75 @@ def main():
     if not files_to_process:
         print("posts 目录下未找到任何 .md 文件，退出")
         sys.exit(0)
+    if args.limit:
+        files_to_process = files_to_process[:args.limit]
 
     headless = True if args.headless.lower() == "true" else False
+    wait_recorder.verbose = args.measure_waits
+
+    # 选择器策略画像：记录上次成功的选择器，热运行时优先尝试
+    if args.no_selector_profile:
+        profile = SelectorProfile("csdn", path=None)
+    else:
+        profile = SelectorProfile("csdn", path=Path(args.selector_profile))
+        if args.reset_selector_profile:
+            profile.reset()
 
     # 固定 storage.json：不存在则保存，存在则加载
     storage_file = Path('storage.json')
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
+    # 图片预处理：压缩后上传到图床并改写地址，命中缓存的图片不再重复上传
+    image_uploader = image_cache = None
+    if args.image_upload_url:
+        image_uploader = HttpUploader(
+            args.image_upload_url,
+            field=args.image_upload_field,
+            url_path=args.image_url_path,
+            storage_state=storage_file
+        )
+        image_cache = UrlCache()
 
-        # 如果 storage 存在则加载以复用登录状态
-        if storage_file.exists():
-            print(f"加载 storage state: {storage_file}")
-            context = browser.new_context(storage_state=str(storage_file))
-            page = context.new_page()
-        else:
-            context = browser.new_context()
-            page = context.new_page()
-
-        print(f"打开编辑页面：{EDITOR_URL}")
-        page.goto(EDITOR_URL, timeout=60000)
-
-        # 如果没有 storage，则等待用户登录并保存 storage
-        if not storage_file.exists():
-            print(f"等待最多 {args.login_timeout} 秒以完成登录并加载编辑器... 如果尚未登录，请在浏览器中完成登录。")
-            try:
-                editor_selector = 'pre.editor__inner.markdown-highlighting[contenteditable="true"]'
-                page.wait_for_selector(editor_selector, timeout=args.login_timeout * 1000)
-                # 保存 storage
-                try:
-                    context.storage_state(path=str(storage_file))
-                    print(f"已保存 login storage 到: {storage_file}")
-                except Exception as e:
-                    print(f"保存 storage_state 失败: {e}")
-            except PlaywrightTimeoutError:
-                print("等待编辑器元素超时，尝试继续（可能需要你手动登录或手动打开编辑器）")
-        
-        # 循环处理 files_to_process
-        for idx, fp in enumerate(files_to_process, start=1):
-            print(f"\n===== 处理 {idx}/{len(files_to_process)}: {fp} =====")
-            try:
-                # 1. 读取完整 MD 文本
-                full_md_text = read_markdown(fp)
-            except Exception as e:
-                print(f"读取 {fp} 失败: {e}, 跳过")
-                continue
+    if args.backend == 'http':
+        publish_via_http(files_to_process, args, storage_file, image_uploader, image_cache)
+        return
 
-            # 4. 确定最终的 title 和 tags
-            use_title = fp.stem
-            
-            print(f"使用标题: {use_title}")
-            print(f"使用标签: 人工智能")
+    from playwright.sync_api import sync_playwright
 
-            # 填充编辑器页面：确保在编辑器页面
-            try:
-                page.goto(EDITOR_URL, timeout=60000)
-            except Exception as e:
-                print(f"跳转到编辑器失败: {e}")
+    with sync_playwright() as p:
+        # 设置了 BROWSER_CDP_ENDPOINT 时复用常驻浏览器服务，否则本地启动；
+        # 如果 storage 存在则加载以复用登录状态
+        context, page, shared_browser = open_page(p, headless=headless, storage_state=storage_file)
 
-            # 尝试填标题
-            if use_title:
-                fill_title(page, use_title)
+        open_editor(page, context, storage_file, profile, args.login_timeout, shared=shared_browser)
 
-            # 5. 填充正文 (使用不含 YAML 的 md_content_to_publish)
-            post = frontmatter.loads(full_md_text)
-            ok = fill_editor_with_markdown(page, post.content)
-            if not ok:
-                print("未能自动填充正文，跳过自动发布。你可以手动粘贴后再运行脚本的发布步骤")
-                continue
+        # 循环处理 files_to_process
+        total = len(files_to_process)
+        emit_event('run_start', total=total, backend='browser')
+        counts = {'published': 0, 'filled': 0, 'failed': 0}
+        for idx, fp in enumerate(files_to_process, start=1):
+            print(f"\n===== 处理 {idx}/{total}: {fp} =====")
+            emit_event('post_start', index=idx, total=total, file=str(fp))
+            start = time.monotonic()
+            status = publish_one(page, fp, args, profile, image_uploader, image_cache)
+            ok = status in ('published', 'filled')
+            counts[status if ok else 'failed'] += 1
+            emit_event('post_done', index=idx, total=total, file=str(fp), ok=ok, status=status,
+                       seconds=round(time.monotonic() - start, 1))
 
-            time.sleep(2)
+            # 每次发布后给短暂等待，避免触发平台防护，得至少 30 秒
+            # （这是平台频率限制而非页面就绪等待，最后一篇之后无需再等）
+            if status in ('published', 'unconfirmed') and idx < total:
+                emit_event('cooldown', seconds=30)
+                time.sleep(30)
 
-            if args.skip_publish:
-                print("--skip-publish 启用，已填充但未触发发布。")
-                continue
+        emit_event('run_end', **counts)
 
-            # 6. 点击发布 (传入最终的 use_tags)
-            use_tags = ["人工智能"]
-            published = click_publish_buttons(page, tags=use_tags)
-            if published:
-                print(f"已触发发布请求: {fp}")
-            else:
-                print(f"{fp} 的发布步骤未完全成功，请手动检查页面。")
+        if args.measure_waits:
+            print(wait_recorder.report())
 
-            # 每次发布后给短暂等待，避免触发平台防护，得至少 30 秒
-            time.sleep(30)
+        if shared_browser:
+            # 共享浏览器只关闭自己的标签页，浏览器继续为其他工具保持预热
+            page.close()
 
     # with sync_playwright 上下文退出时 Playwright 会负责清理，
     # 避免在 with 之外再次调用 browser.close() 导致 "Event loop is closed" 错误。
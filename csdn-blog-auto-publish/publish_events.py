@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+publish_events.py
+
+发布脚本与调用方（Web UI、后台任务）之间的结构化进度事件。
+
+publish_csdn.py 在普通输出之外打印形如
+    @@EVENT {"type": "post_start", "index": 1, "total": 5, "file": "posts/a.md"}
+的行，调用方逐行读取输出时用 parse_event() 识别，据此显示每篇文章的进度。
+
+事件类型:
+    run_start   {total, backend}
+    post_start  {index, total, file}
+    post_done   {index, total, file, ok, status, seconds}
+    cooldown    {seconds}
+    run_end     {published, filled, failed}（filled 为 --skip-publish 只填充/存草稿的篇数）
+"""
+
+import json
+import sys
+from typing import Optional
+
+
+EVENT_PREFIX = "@@EVENT "
+
+
+def emit_event(event_type: str, **fields):
+    """打印一条事件并立即刷新，保证调用方能实时读到"""
+    payload = {"type": event_type, **fields}
+    print(EVENT_PREFIX + json.dumps(payload, ensure_ascii=False), flush=True)
+    sys.stdout.flush()
+
+
+def parse_event(line: str) -> Optional[dict]:
+    """解析一行输出，是事件则返回字典，否则返回 None"""
+    if not line.startswith(EVENT_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(EVENT_PREFIX):])
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) and "type" in event else None
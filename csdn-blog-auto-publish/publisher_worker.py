@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+publisher_worker.py
+
+常驻发布进程：Web UI 持有一个长期运行的子进程，浏览器与已登录的编辑器在多次发布之间保持预热。
+
+每次点击“发布”不再重新启动 Python 解释器、导入 Playwright、启动 Chromium、
+加载 storage.json 并从头打开编辑器，只需向子进程发送一条命令：
+
+    worker = PublisherWorker(headless=True)
+    for line, event in worker.publish(count=3, posts_dir=Path("posts")):
+        ...
+
+- 子进程的输出（包括 publish_events 事件行）按行转发给调用方，
+  与 ui.stream_publish() 产出的 (line, event) 格式一致
+- 请求进入队列，由后台分发线程逐个交给子进程；按篇数发布时，轮到该请求才挑选文件，
+  并跳过本进程已经发布过的文章，排队的请求不会重复发布前一个请求的文章
+- 调用方提前关闭生成器（取消任务）时，子进程在当前文章完成后停止本次请求；
+  调用方直接丢弃生成器也不会阻塞后续请求（请求照常执行完，输出无人读取）
+- 两次请求之间同样遵守 30 秒的平台发布间隔
+- 子进程意外退出时，下一个请求自动重新启动
+"""
+
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, List, Optional, Tuple
+
+from publish_events import emit_event, parse_event
+
+
+PUBLISH_COOLDOWN = 30
+
+
+class _QueueWriter:
+    """子进程中替换 sys.stdout：按行把输出转发到结果队列"""
+
+    def __init__(self, out_q):
+        self.out_q = out_q
+        self.req_id = None
+        self._buf = ""
+
+    def write(self, s: str):
+        self._buf += s
+        while "\n" in self._buf:
+            line, self._buf = self._buf.split("\n", 1)
+            self.out_q.put((self.req_id, "line", line))
+        return len(s)
+
+    def flush(self):
+        if self._buf:
+            self.out_q.put((self.req_id, "line", self._buf))
+            self._buf = ""
+
+
+def _pick_files(cmd: dict, published: set) -> List[Path]:
+    """请求开始执行时确定要发布的文件：显式文件列表，或 posts_dir 中前 count 篇；都跳过已发布的文章"""
+    if cmd.get("files") is not None:
+        files = [Path(f) for f in cmd["files"]]
+    else:
+        files = sorted(Path(cmd["posts_dir"]).glob("*.md"))
+    files = [f for f in files if str(f.resolve()) not in published]
+    if cmd.get("count") is not None:
+        files = files[:cmd["count"]]
+    return files
+
+
+def _run_request(page, cmd: dict, profile, cancel, state: dict) -> int:
+    """在已打开的编辑器中处理一次发布请求，返回失败篇数"""
+    import publish_csdn
+
+    published = state.setdefault("published", set())
+    files = _pick_files(cmd, published)
+    args = SimpleNamespace(skip_publish=cmd.get("skip_publish", False))
+    total = len(files)
+    counts = {"published": 0, "filled": 0, "failed": 0}
+    emit_event("run_start", total=total, backend="worker")
+
+    for idx, fp in enumerate(files, start=1):
+        # 与上一次发布（可能属于上一个请求）保持平台要求的间隔
+        wait = state["last_publish"] + PUBLISH_COOLDOWN - time.monotonic()
+        if wait > 0 and not args.skip_publish:
+            emit_event("cooldown", seconds=round(wait))
+            if cancel.wait(wait):
+                break
+        if cancel.is_set():
+            break
+
+        print(f"\n===== 处理 {idx}/{total}: {fp} =====")
+        emit_event("post_start", index=idx, total=total, file=str(fp))
+        start = time.monotonic()
+        status = publish_csdn.publish_one(page, fp, args, profile)
+        if status in ("published", "unconfirmed"):
+            state["last_publish"] = time.monotonic()
+            # 已点击发布（即使未确认成功）的文章不再出现在后续请求中，避免重复发布
+            published.add(str(fp.resolve()))
+        ok = status in ("published", "filled")
+        counts[status if ok else "failed"] += 1
+        emit_event("post_done", index=idx, total=total, file=str(fp), ok=ok, status=status,
+                   seconds=round(time.monotonic() - start, 1))
+
+    if cancel.is_set():
+        print("本次发布已取消")
+    emit_event("run_end", **counts)
+    return counts["failed"]
+
+
+def _worker_main(cmd_q, out_q, cancel, options: dict):
+    """子进程入口：启动浏览器并打开编辑器，然后循环处理命令"""
+    writer = _QueueWriter(out_q)
+    sys.stdout = sys.stderr = writer
+
+    from playwright.sync_api import sync_playwright
+
+    import publish_csdn
+    from browser_service import open_page
+    from selector_profile import SelectorProfile
+
+    profile_path = options.get("selector_profile")
+    profile = SelectorProfile("csdn", path=Path(profile_path) if profile_path else None)
+    storage_file = Path(options.get("storage_file", "storage.json"))
+    state = {"last_publish": -PUBLISH_COOLDOWN}
+
+    try:
+        with sync_playwright() as p:
+            start = time.monotonic()
+            context, page, shared_browser = open_page(p, headless=options.get("headless", False),
+                                                      storage_state=storage_file)
+            publish_csdn.open_editor(page, context, storage_file, profile, options.get("login_timeout", 120),
+                                     shared=shared_browser)
+            profile.save()
+            print(f"发布进程已就绪（启动用时 {time.monotonic() - start:.1f} 秒），浏览器保持预热")
+            writer.flush()
+
+            while True:
+                cmd = cmd_q.get()
+                if cmd.get("op") == "stop":
+                    break
+                writer.req_id = cmd["id"]
+                code = 0
+                try:
+                    if page.is_closed():
+                        page = context.new_page()
+                    code = 1 if _run_request(page, cmd, profile, cancel, state) else 0
+                except Exception as e:
+                    print(f"发布请求执行出错: {e}")
+                    code = 1
+                finally:
+                    profile.save()
+                    writer.flush()
+                    out_q.put((cmd["id"], "done", code))
+                    writer.req_id = None
+
+            if shared_browser:
+                page.close()
+    except Exception as e:
+        print(f"发布进程异常退出: {e}")
+        writer.flush()
+        raise
+
+
+class _Request:
+    """排队中的一次发布请求：输出写入自己的队列，与调用方是否还在读取无关"""
+
+    def __init__(self, cmd: dict):
+        self.id = cmd["id"]
+        self.cmd = cmd
+        self.out = queue.Queue()
+        self.cancelled = threading.Event()
+
+
+class PublisherWorker:
+    """UI 持有的常驻发布子进程"""
+
+    def __init__(
+        self,
+        headless: bool = False,
+        storage_file: Path = Path("storage.json"),
+        selector_profile: Optional[Path] = Path("selector_profile.json"),
+        login_timeout: int = 120,
+        abort_timeout: float = 120
+    ):
+        """
+        Args:
+            headless: 浏览器是否无头
+            storage_file: 登录状态文件
+            selector_profile: 选择器策略画像文件，None 表示不落盘
+            login_timeout: 没有登录状态时等待登录的秒数
+            abort_timeout: 取消请求后等待子进程确认的秒数，超时则结束子进程（下次自动重启）
+        """
+        self.headless = headless
+        self.abort_timeout = abort_timeout
+        self.options = {
+            "headless": headless,
+            "storage_file": str(storage_file),
+            "selector_profile": str(selector_profile) if selector_profile else None,
+            "login_timeout": login_timeout,
+        }
+        self._mp = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._cmd_q = None
+        self._out_q = None
+        self._cancel = None
+        self._requests = queue.Queue()
+        self._dispatcher = None
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def start(self):
+        """启动子进程（已在运行时不重复启动）"""
+        if self.alive:
+            return
+        self._cmd_q = self._mp.Queue()
+        self._out_q = self._mp.Queue()
+        self._cancel = self._mp.Event()
+        self._proc = self._mp.Process(
+            target=_worker_main,
+            args=(self._cmd_q, self._out_q, self._cancel, self.options),
+            name="csdn-publisher",
+            daemon=True
+        )
+        self._proc.start()
+
+    def stop(self, timeout: float = 15):
+        """通知子进程关闭浏览器并退出，排队中的请求以失败结束"""
+        with self._lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+        while True:
+            try:
+                pending = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                pending.out.put((None, {"type": "exit", "returncode": 1}))
+        if dispatcher is not None:
+            self._requests.put(None)
+        if self._cancel is not None:
+            self._cancel.set()
+        if dispatcher is not None:
+            dispatcher.join(timeout)
+        if not self.alive:
+            self._proc = None
+            return
+        self._cmd_q.put({"op": "stop"})
+        self._proc.join(timeout)
+        if self._proc.is_alive():
+            self._proc.terminate()
+            self._proc.join(5)
+        self._proc = None
+
+    def publish(self, files: Optional[List[str]] = None, skip_publish: bool = False, count: Optional[int] = None,
+                posts_dir: Optional[Path] = None) -> Iterator[Tuple[Optional[str], Optional[dict]]]:
+        """
+        提交发布请求，返回逐行产出 (line, event) 的生成器，最后产出 (None, {"type": "exit", "returncode": ...})
+
+        请求在调用时立即排队，同一时间子进程只处理一个请求。传入 posts_dir/count 时，
+        要发布的文章在轮到该请求时才挑选，已发布过的文章会被跳过。
+        """
+        cmd = {"op": "publish", "id": uuid.uuid4().hex[:8], "skip_publish": skip_publish, "count": count,
+               "files": [str(f) for f in files] if files is not None else None,
+               "posts_dir": str(posts_dir) if posts_dir is not None else None}
+        if cmd["files"] is None and cmd["posts_dir"] is None:
+            raise ValueError("需要指定 files 或 posts_dir")
+        request = _Request(cmd)
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch, name="csdn-publisher-dispatch", daemon=True)
+                self._dispatcher.start()
+            self._requests.put(request)
+        return self._stream(request)
+
+    def _stream(self, request: _Request):
+        finished = False
+        try:
+            while True:
+                line, event = request.out.get()
+                if event and event.get("type") == "exit":
+                    finished = True
+                yield line, event
+                if finished:
+                    return
+        finally:
+            if not finished:
+                # 只登记取消，由分发线程通知子进程；调用方不必等待子进程确认
+                request.cancelled.set()
+
+    def _dispatch(self):
+        """分发线程：按顺序把请求交给子进程，并把输出转发到各请求自己的队列"""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            if request.cancelled.is_set():
+                request.out.put((None, {"type": "exit", "returncode": 1}))
+                continue
+            try:
+                code = self._execute(request)
+            except Exception as e:
+                request.out.put((f"发布请求分发出错: {e}", None))
+                code = 1
+            request.out.put((None, {"type": "exit", "returncode": code}))
+
+    def _execute(self, request: _Request) -> int:
+        """执行一个请求，返回退出码"""
+        self.start()
+        self._cancel.clear()
+        self._cmd_q.put(request.cmd)
+        abort_deadline = None
+        while True:
+            if request.cancelled.is_set() and abort_deadline is None:
+                self._cancel.set()
+                abort_deadline = time.monotonic() + self.abort_timeout
+            if abort_deadline is not None and time.monotonic() > abort_deadline and self.alive:
+                # 子进程迟迟不确认取消：结束它，下一个请求自动重启
+                self._proc.terminate()
+                self._proc.join(5)
+            try:
+                msg_id, kind, payload = self._out_q.get(timeout=1)
+            except queue.Empty:
+                if not self.alive:
+                    code = self._proc.exitcode if self._proc is not None else None
+                    self._proc = None
+                    return code if code else 1
+                continue
+            # 启动阶段的输出没有请求 ID；被取消的旧请求的残留输出直接丢弃
+            if msg_id not in (None, request.id):
+                continue
+            if kind == "line":
+                request.out.put((payload, parse_event(payload)))
+            elif kind == "done":
+                return payload
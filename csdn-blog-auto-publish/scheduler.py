@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+scheduler.py
+
+内置定时调度：按 cron 表达式定时触发流水线各环节（搜索、生成、发布），
+让搜索在清晨完成、文章生成分散到低峰时段、发布在白天匀速进行。
+
+- schedule.json 保存计划（可在 Web UI 的“⏰ 定时任务”标签页编辑），
+  schedule_state.json 记录每个计划最近一次触发的时间，重启后据此判断错过了哪些运行
+- 错过运行的补跑策略（catch_up）:
+    skip  错过的直接跳过，等下一次
+    once  不管错过几次，启动后只补跑一次
+    all   每次错过的都补跑（最多 MAX_CATCH_UP 次）
+- 每个计划有时间预算（budget_minutes），由执行方通过 Budget 检查，超时后在安全点停止
+- RunLock 是跨进程的运行锁（pipeline.lock），界面与 auto_generate_daily.py 生成文章前都要获取，
+  避免两次运行同时争抢 posts/ 的名额
+
+调度器本身只负责“到点提交”，具体执行由调用方传入的 submit(entry, scheduled_for) 完成
+（Web UI 中提交到后台任务队列）。
+
+用法:
+  python scheduler.py next "30 5 * * *" [--count 5]   # 查看表达式接下来的触发时间
+  python scheduler.py status                           # 查看 schedule.json 中各计划的下次运行时间
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+
+SCHEDULE_FILE = Path("schedule.json")
+STATE_FILE = Path("schedule_state.json")
+LOCK_FILE = Path("pipeline.lock")
+
+STAGES = ("search", "generate", "publish", "auto")
+CATCH_UP_POLICIES = ("skip", "once", "all")
+# “all” 策略最多补跑的次数，以及最多回溯的天数
+MAX_CATCH_UP = 24
+MAX_CATCH_UP_DAYS = 7
+# 触发时间之后多久之内仍算“准时”（秒）
+DEFAULT_GRACE = 120
+
+# 默认计划：清晨搜索，低峰时段分批生成，白天每两小时发布两篇（默认全部停用，需要在界面中启用）
+DEFAULT_ENTRIES = [
+    {
+        "name": "dawn_search", "cron": "30 5 * * *", "stage": "search",
+        "params": {"days": 1, "topics": "", "count": 15},
+        "budget_minutes": 20, "catch_up": "once", "enabled": False,
+    },
+    {
+        "name": "offpeak_generate", "cron": "0 6,13,22 * * *", "stage": "generate",
+        "params": {"count": 5},
+        "budget_minutes": 45, "catch_up": "once", "enabled": False,
+    },
+    {
+        "name": "paced_publish", "cron": "15 9-21/2 * * *", "stage": "publish",
+        "params": {"count": 2, "headless": True, "warm": True},
+        "budget_minutes": 15, "catch_up": "skip", "enabled": False,
+    },
+]
+
+
+# ===================== cron 表达式 =====================
+
+class CronError(ValueError):
+    """cron 表达式格式错误"""
+
+
+# (名称, 最小值, 最大值)
+_FIELDS = [("分钟", 0, 59), ("小时", 0, 23), ("日", 1, 31), ("月", 1, 12), ("星期", 0, 7)]
+
+
+def _parse_field(text: str, name: str, lo: int, hi: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"{name}字段的步长无效: {step_text}")
+            step = int(step_text)
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            if not (a.isdigit() and b.isdigit()):
+                raise CronError(f"{name}字段的范围无效: {part}")
+            start, end = int(a), int(b)
+        elif part.isdigit():
+            start = int(part)
+            # “5/15” 表示从 5 开始每 15 个单位
+            end = hi if step > 1 else start
+        else:
+            raise CronError(f"{name}字段无法解析: {part!r}")
+        if start < lo or end > hi or start > end:
+            raise CronError(f"{name}字段超出范围 {lo}-{hi}: {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpr:
+    """
+    标准 5 段 cron 表达式：分 时 日 月 星期
+
+    支持 *、数字、范围 a-b、列表 a,b、步长 */n 与 a-b/n；星期 0 和 7 都表示周日。
+    与 cron 一致：日和星期都不是 * 时，满足其一即可。
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        parts = self.expr.split()
+        if len(parts) != 5:
+            raise CronError(f"cron 表达式应为 5 段（分 时 日 月 星期），实际为 {len(parts)} 段: {expr!r}")
+        fields = [_parse_field(p, name, lo, hi) for p, (name, lo, hi) in zip(parts, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {d % 7 for d in weekdays}
+        self._dom_any = parts[2] == "*"
+        self._dow_any = parts[4] == "*"
+
+    def __repr__(self):
+        return f"CronExpr({self.expr!r})"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays  # Python 周一为 0，cron 周日为 0
+        if self._dom_any or self._dow_any:
+            return dom and dow
+        return dom or dow
+
+    def matches(self, dt: datetime) -> bool:
+        return (dt.minute in self.minutes and dt.hour in self.hours
+                and dt.month in self.months and self._day_matches(dt))
+
+    def next_after(self, dt: datetime) -> datetime:
+        """dt 之后（不含 dt 所在分钟）的第一个触发时间"""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while t <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise CronError(f"cron 表达式在 5 年内不会触发: {self.expr!r}")
+
+    def occurrences(self, after: datetime, until: datetime) -> List[datetime]:
+        """(after, until] 之间的所有触发时间"""
+        result = []
+        t = self.next_after(after)
+        while t <= until:
+            result.append(t)
+            t = self.next_after(t)
+        return result
+
+
+# ===================== 运行锁与时间预算 =====================
+
+class RunLock:
+    """
+    跨进程的运行锁（操作系统文件锁，进程退出时自动释放，不会残留死锁）
+
+    同一进程内的多个线程同样互斥。锁文件中记录持有者信息，便于提示。
+    """
+
+    def __init__(self, path: Path = LOCK_FILE):
+        self.path = Path(path)
+        self._thread_lock = threading.Lock()
+        self._fh = None
+
+    def acquire(self, owner: str = "") -> bool:
+        """尝试获取锁（不等待），成功返回 True"""
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        try:
+            fh = open(self.path, "a+", encoding="utf-8")
+            try:
+                _lock_file(fh)
+            except OSError:
+                fh.close()
+                self._thread_lock.release()
+                return False
+            fh.seek(0)
+            fh.truncate()
+            fh.write(f"{owner} pid={os.getpid()} since={datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            fh.flush()
+            self._fh = fh
+            return True
+        except Exception:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        if self._fh is None:
+            return
+        try:
+            self._fh.seek(0)
+            self._fh.truncate()
+            _unlock_file(self._fh)
+        finally:
+            self._fh.close()
+            self._fh = None
+            self._thread_lock.release()
+
+    def holder(self) -> str:
+        """当前持有者信息（未被持有时为空字符串）"""
+        try:
+            return self.path.read_text(encoding="utf-8").strip()
+        except OSError:
+            return ""
+
+
+try:
+    import fcntl
+
+    def _lock_file(fh):
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(fh):
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_file(fh):
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(fh):
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BudgetExceeded(BaseException):
+    """
+    环节运行超出时间预算
+
+    与 job_queue.JobCancelled 一样继承 BaseException，使其能穿过业务函数里的
+    `except Exception`，从 progress() 检查点一直传到计划执行方。
+    """
+
+
+class Budget:
+    """环节的时间预算：在安全点调用 check()，超时则抛出 BudgetExceeded"""
+
+    def __init__(self, minutes: Optional[float]):
+        """
+        Args:
+            minutes: 预算分钟数，None 或 0 表示不限
+        """
+        self.deadline = time.monotonic() + minutes * 60 if minutes else None
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self.expired:
+            raise BudgetExceeded("超出时间预算")
+
+
+# ===================== 计划 =====================
+
+def validate_entry(entry: dict) -> dict:
+    """校验并补全一个计划，返回新的字典；格式错误抛出 ValueError"""
+    name = str(entry.get("name", "")).strip()
+    if not name:
+        raise ValueError("计划缺少 name")
+    if entry.get("stage") not in STAGES:
+        raise ValueError(f"计划 {name} 的 stage 应为 {'/'.join(STAGES)} 之一")
+    CronExpr(entry.get("cron", ""))
+    catch_up = entry.get("catch_up", "once")
+    if catch_up not in CATCH_UP_POLICIES:
+        raise ValueError(f"计划 {name} 的 catch_up 应为 {'/'.join(CATCH_UP_POLICIES)} 之一")
+    params = entry.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError(f"计划 {name} 的 params 应为对象")
+    return {
+        "name": name,
+        "cron": entry["cron"].strip(),
+        "stage": entry["stage"],
+        "params": params,
+        "budget_minutes": float(entry.get("budget_minutes") or 0),
+        "catch_up": catch_up,
+        "enabled": bool(entry.get("enabled", True)),
+    }
+
+
+def parse_schedule(text: str) -> List[dict]:
+    """解析 schedule.json 的内容（{"entries": [...]} 或直接是列表）"""
+    data = json.loads(text)
+    entries = data.get("entries", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError("entries 应为列表")
+    result = [validate_entry(e) for e in entries]
+    names = [e["name"] for e in result]
+    if len(names) != len(set(names)):
+        raise ValueError("计划名称不能重复")
+    return result
+
+
+def load_schedule(path: Path = SCHEDULE_FILE) -> List[dict]:
+    """读取计划，文件不存在时返回默认计划（全部停用）"""
+    if not Path(path).exists():
+        return [validate_entry(e) for e in DEFAULT_ENTRIES]
+    return parse_schedule(Path(path).read_text(encoding="utf-8"))
+
+
+def save_schedule(entries: List[dict], path: Path = SCHEDULE_FILE):
+    Path(path).write_text(json.dumps({"entries": entries}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+# ===================== 调度器 =====================
+
+class Scheduler:
+    """后台线程：每分钟检查一次到期的计划并调用 submit(entry, scheduled_for)"""
+
+    def __init__(
+        self,
+        submit: Callable[[dict, datetime], None],
+        schedule_file: Path = SCHEDULE_FILE,
+        state_file: Path = STATE_FILE,
+        grace: float = DEFAULT_GRACE,
+        poll_interval: float = 20
+    ):
+        """
+        Args:
+            submit: 到点时调用，负责实际执行（如提交到后台任务队列）
+            schedule_file: 计划文件
+            state_file: 各计划最近一次触发时间的记录文件
+            grace: 触发时间之后多少秒内仍视为准时，超过则按补跑策略处理
+            poll_interval: 检查间隔（秒）
+        """
+        self.submit = submit
+        self.schedule_file = Path(schedule_file)
+        self.state_file = Path(state_file)
+        self.grace = grace
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.entries = load_schedule(self.schedule_file)
+        self.state: Dict[str, str] = {}
+        if self.state_file.exists():
+            try:
+                self.state = json.loads(self.state_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"读取调度状态失败，重新开始计时: {e}")
+
+    def start(self):
+        """启动调度线程（立即检查一次，以便补跑停机期间错过的计划）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while True:
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"定时调度出错: {e}")
+                if self._stop.wait(self.poll_interval):
+                    return
+
+        self._thread = threading.Thread(target=loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_entry(self, name: str) -> Optional[dict]:
+        with self._lock:
+            return next((dict(e) for e in self.entries if e["name"] == name), None)
+
+    def update_schedule(self, text: str) -> List[dict]:
+        """校验并保存新的计划（格式错误抛出 ValueError，原计划不变）"""
+        entries = parse_schedule(text)
+        with self._lock:
+            save_schedule(entries, self.schedule_file)
+            self.entries = entries
+            # 删除的计划不再保留状态
+            self.state = {k: v for k, v in self.state.items() if any(e["name"] == k for e in entries)}
+            self._save_state()
+        return entries
+
+    def _save_state(self):
+        self.state_file.write_text(json.dumps(self.state, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def _plan(self, entry: dict, now: datetime) -> List[datetime]:
+        """计算本次要执行的触发时间，并推进该计划的状态"""
+        name = entry["name"]
+        last_text = self.state.get(name)
+        if not last_text:
+            # 新计划从现在开始计时，不补跑启用之前的时间
+            self.state[name] = now.replace(second=0, microsecond=0).isoformat()
+            return []
+        last = max(datetime.fromisoformat(last_text), now - timedelta(days=MAX_CATCH_UP_DAYS))
+        due = CronExpr(entry["cron"]).occurrences(last, now)
+        if not due:
+            return []
+        self.state[name] = due[-1].isoformat()
+
+        on_time = (now - due[-1]).total_seconds() <= self.grace
+        policy = entry["catch_up"]
+        if policy == "all":
+            return due[-MAX_CATCH_UP:]
+        if policy == "once" or on_time:
+            return [due[-1]]
+        return []
+
+    def tick(self, now: Optional[datetime] = None) -> List[tuple]:
+        """
+        检查并提交到期的计划
+
+        Returns:
+            [(计划名, 触发时间)]
+        """
+        now = now or datetime.now()
+        fired = []
+        with self._lock:
+            for entry in self.entries:
+                if not entry["enabled"]:
+                    # 停用期间不累积错过的运行
+                    self.state.pop(entry["name"], None)
+                    continue
+                for when in self._plan(entry, now):
+                    fired.append((entry, when))
+            self._save_state()
+        for entry, when in fired:
+            late = (now - when).total_seconds()
+            note = f"（补跑，计划时间 {when:%m-%d %H:%M}）" if late > self.grace else ""
+            print(f"⏰ 定时任务 {entry['name']} 触发{note}")
+            try:
+                self.submit(dict(entry), when)
+            except Exception as e:
+                print(f"定时任务 {entry['name']} 提交失败: {e}")
+        return [(entry["name"], when) for entry, when in fired]
+
+    def status(self, now: Optional[datetime] = None) -> List[list]:
+        """各计划的状态行：名称、环节、cron、启用、补跑策略、预算、上次触发、下次触发"""
+        now = now or datetime.now()
+        rows = []
+        with self._lock:
+            for e in self.entries:
+                last = self.state.get(e["name"], "")
+                nxt = CronExpr(e["cron"]).next_after(now).strftime("%m-%d %H:%M") if e["enabled"] else "-"
+                rows.append([
+                    e["name"], e["stage"], e["cron"], "✅" if e["enabled"] else "⏸️", e["catch_up"],
+                    f"{e['budget_minutes']:g}" if e["budget_minutes"] else "不限",
+                    last.replace("T", " ")[5:16] if last else "-", nxt
+                ])
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线定时调度")
+    sub = parser.add_subparsers(dest="command", required=True)
+    next_p = sub.add_parser("next", help="查看 cron 表达式接下来的触发时间")
+    next_p.add_argument("cron", help='cron 表达式，如 "30 5 * * *"')
+    next_p.add_argument("--count", type=int, default=5, help="显示几次，默认 5")
+    sub.add_parser("status", help="查看各计划的下次运行时间")
+    args = parser.parse_args()
+
+    if args.command == "next":
+        try:
+            expr = CronExpr(args.cron)
+        except CronError as e:
+            print(f"❌ {e}")
+            return 1
+        t = datetime.now()
+        for _ in range(args.count):
+            t = expr.next_after(t)
+            print(t.strftime("%Y-%m-%d %H:%M (%a)"))
+    else:
+        for name, stage, cron, enabled, catch_up, budget, last, nxt in Scheduler(lambda e, w: None).status():
+            print(f"{enabled} {name:<20} {stage:<9} {cron:<18} 补跑:{catch_up:<5} 预算:{budget:<5} 上次:{last:<12} 下次:{nxt}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+selector_profile.py
+
+选择器策略画像：记录每个站点上哪个选择器/策略最先成功以及耗时，持久化到 JSON 文件。
+
+下次运行时优先尝试上次的“赢家”，其余候选只做短超时探测，
+避免每次都在失效的选择器上白等 wait_for 超时。
+当页面资源指纹变化（站点发版）或画像过期时，画像自动失效并重新学习。
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_PROFILE_FILE = Path("selector_profile.json")
+DEFAULT_TTL_DAYS = 7
+# 已有赢家时，其余候选的探测超时（毫秒）
+PROBE_TIMEOUT_MS = 1500
+# 赢家连续失败多少次后作废
+MAX_WINNER_FAILURES = 2
+
+# 采集页面上带 hash 的静态资源地址，站点发版后这些地址会变化
+FINGERPRINT_JS = """() => {
+    const srcs = Array.from(document.querySelectorAll('script[src], link[rel="stylesheet"][href]'))
+        .map(el => el.getAttribute('src') || el.getAttribute('href') || '')
+        .map(u => u.split('?')[0])
+        .filter(u => u);
+    return Array.from(new Set(srcs)).sort().join('\\n');
+}"""
+
+
+def compute_page_fingerprint(page) -> Optional[str]:
+    """
+    根据页面加载的脚本/样式地址计算站点指纹
+
+    Args:
+        page: Playwright 页面对象
+
+    Returns:
+        指纹字符串，获取失败时返回 None
+    """
+    try:
+        assets = page.evaluate(FINGERPRINT_JS)
+    except Exception as e:
+        print(f"计算页面指纹失败: {e}")
+        return None
+    if not assets:
+        return None
+    return hashlib.sha1(assets.encode("utf-8")).hexdigest()[:16]
+
+
+class SelectorProfile:
+    """单个站点的选择器策略画像"""
+
+    def __init__(
+        self,
+        site: str,
+        path: Optional[Path] = DEFAULT_PROFILE_FILE,
+        ttl_days: int = DEFAULT_TTL_DAYS,
+        probe_timeout: int = PROBE_TIMEOUT_MS
+    ):
+        """
+        Args:
+            site: 站点名称（同一文件可保存多个站点）
+            path: 画像文件路径，为 None 时只在内存中学习、不落盘
+            ttl_days: 画像有效天数，过期后整体重新学习
+            probe_timeout: 已有赢家时其余候选的探测超时（毫秒）
+        """
+        self.site = site
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_days * 86400
+        self.probe_timeout = probe_timeout
+        self._all: Dict[str, dict] = {}
+        self._data = self._empty()
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def _empty() -> dict:
+        return {"fingerprint": None, "created_at": time.time(), "entries": {}}
+
+    def load(self):
+        """从文件加载画像，文件损坏或过期时重新开始"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._all = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取选择器画像失败，将重新学习: {e}")
+            self._all = {}
+            return
+
+        data = self._all.get(self.site)
+        if not data:
+            return
+        if time.time() - data.get("created_at", 0) > self.ttl_seconds:
+            print(f"选择器画像已过期（超过 {self.ttl_seconds // 86400} 天），重新学习")
+            self._dirty = True
+            return
+        self._data = data
+
+    def save(self):
+        """将画像写回文件（仅在有变化时写入）"""
+        if not self.path or not self._dirty:
+            return
+        self._all[self.site] = self._data
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._all, f, ensure_ascii=False, indent=2)
+            tmp.replace(self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"保存选择器画像失败: {e}")
+
+    def reset(self):
+        """清空当前站点的画像"""
+        self._data = self._empty()
+        self._dirty = True
+
+    def check_fingerprint(self, fingerprint: Optional[str]) -> bool:
+        """
+        对比站点指纹，变化时清空画像
+
+        Returns:
+            是否因指纹变化而重置了画像
+        """
+        if not fingerprint:
+            return False
+        old = self._data.get("fingerprint")
+        if old == fingerprint:
+            return False
+        if old is not None:
+            print("检测到站点资源已更新，选择器画像失效并重新学习")
+            self._data = self._empty()
+        self._data["fingerprint"] = fingerprint
+        self._dirty = True
+        return old is not None
+
+    def winner(self, key: str) -> Optional[str]:
+        """返回某个步骤上次成功的候选"""
+        entry = self._data["entries"].get(key)
+        return entry.get("winner") if entry else None
+
+    def order(self, key: str, candidates: List[str]) -> List[str]:
+        """把上次成功的候选排到最前，其余保持原顺序"""
+        best = self.winner(key)
+        if best is None or best not in candidates:
+            return list(candidates)
+        return [best] + [c for c in candidates if c != best]
+
+    def timeout_for(self, key: str, candidate: str, default: int) -> int:
+        """
+        返回某个候选应使用的等待超时
+
+        没有赢家（冷启动）或就是赢家本身时使用默认超时；
+        已有赢家时，其余候选只做短探测；赢家本次已失败过则恢复默认超时。
+        """
+        entry = self._data["entries"].get(key)
+        if not entry or entry.get("winner") == candidate or entry.get("failures", 0) > 0:
+            return default
+        return min(default, self.probe_timeout)
+
+    def record_success(self, key: str, candidate: str, elapsed: float):
+        """记录一次成功（elapsed 单位为秒）"""
+        entries = self._data["entries"]
+        entry = entries.get(key)
+        if entry and entry.get("winner") == candidate:
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["failures"] = 0
+        else:
+            entry = {"winner": candidate, "hits": 1, "failures": 0}
+            entries[key] = entry
+        entry["elapsed_ms"] = int(elapsed * 1000)
+        entry["updated_at"] = time.time()
+        self._dirty = True
+
+    def record_failure(self, key: str, candidate: str):
+        """记录一次失败；赢家连续失败多次后作废，本次运行的其余候选恢复默认超时"""
+        entry = self._data["entries"].get(key)
+        if not entry or entry.get("winner") != candidate:
+            return
+        entry["failures"] = entry.get("failures", 0) + 1
+        if entry["failures"] >= MAX_WINNER_FAILURES:
+            print(f"选择器画像中 {key} 的首选策略连续失败，已作废: {candidate}")
+            del self._data["entries"][key]
+        self._dirty = True
+
+    def try_in_order(self, key: str, candidates: List[str], attempt) -> Optional[str]:
+        """
+        按画像顺序依次尝试候选，自动记录成功/失败与耗时
+
+        Args:
+            key: 步骤名称（如 "title"、"publish_button"）
+            candidates: 候选选择器/策略名称列表
+            attempt: 可调用对象，attempt(candidate) 返回是否成功
+
+        Returns:
+            成功的候选，全部失败返回 None
+        """
+        for candidate in self.order(key, candidates):
+            start = time.monotonic()
+            try:
+                ok = attempt(candidate)
+            except Exception as e:
+                print(f"尝试 {key} 策略 {candidate} 出错: {e}")
+                ok = False
+            if ok:
+                self.record_success(key, candidate, time.monotonic() - start)
+                return candidate
+            self.record_failure(key, candidate)
+        return None
+
+    def summary(self) -> Dict[str, dict]:
+        """返回当前各步骤的赢家信息（用于打印/调试）"""
+        return {k: dict(v) for k, v in self._data["entries"].items()}
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+startup_profile.py
+
+启动耗时基准：在全新子进程中测量各入口的冷启动耗时，并汇总 `python -X importtime` 的输出。
+
+- 每个入口重复运行多次取中位数（墙钟时间，包含解释器启动）
+- 把 importtime 的逐模块耗时按顶层包聚合，找出拖慢启动的依赖
+- 与 STARTUP_BUDGET_MS 中的启动预算比较，--check 时超出预算返回非 0
+
+用法:
+  python startup_profile.py                         # 打印报告
+  python startup_profile.py --runs 5 --check        # 超出预算时退出码为 1
+  python startup_profile.py --output docs/STARTUP_PROFILE.md
+"""
+
+import argparse
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+_HERE = Path(__file__).resolve().parent
+
+# 入口名称 → 命令行参数（在本目录下以 python 运行）
+TARGETS: Dict[str, List[str]] = {
+    "publish_csdn --help": ["publish_csdn.py", "--help"],
+    "auto_generate --help": ["auto_generate.py", "--help"],
+    "auto_generate_daily --help": ["auto_generate_daily.py", "--help"],
+    "import zhipu 模块": ["-c", "import zhipu_news_search, zhipu_content_generator"],
+    "import ui": ["-c", "import ui"],
+}
+
+# 启动预算（毫秒，墙钟时间中位数）。ui 的下限是 gradio 本身的导入耗时
+STARTUP_BUDGET_MS: Dict[str, float] = {
+    "publish_csdn --help": 200,
+    "auto_generate --help": 150,
+    "auto_generate_daily --help": 150,
+    "import zhipu 模块": 150,
+    "import ui": 5000,
+}
+
+# import time:      self [us] |  cumulative | imported package
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        [(模块名, 自身耗时 us, 累计耗时 us, 嵌套深度)]，按输出顺序
+    """
+    entries = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            entries.append((m.group(4), int(m.group(1)), int(m.group(2)), depth))
+    return entries
+
+
+def aggregate_by_package(entries: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    """把每个模块的自身耗时累加到其顶层包（us），按耗时从高到低排序"""
+    totals: Dict[str, int] = {}
+    for name, self_us, _, _ in entries:
+        top = name.split(".", 1)[0]
+        totals[top] = totals.get(top, 0) + self_us
+    return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def run_target(args: List[str], importtime: bool = False) -> Tuple[float, str]:
+    """在全新解释器中运行一次，返回 (墙钟耗时 ms, stderr)"""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=_HERE, capture_output=True, text=True, encoding="utf-8", errors="replace",
+                          env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} 退出码 {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    return elapsed, proc.stderr
+
+
+def profile_target(args: List[str], runs: int = 5) -> dict:
+    """
+    测量一个入口
+
+    Returns:
+        {"median_ms", "min_ms", "packages": {顶层包: us}, "modules": 导入模块数}
+    """
+    run_target(args)  # 预热：生成 .pyc、填充文件系统缓存，避免第一次运行拉高中位数
+    times = [run_target(args)[0] for _ in range(runs)]
+    _, stderr = run_target(args, importtime=True)
+    entries = parse_importtime(stderr)
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "packages": aggregate_by_package(entries),
+        "modules": len(entries),
+    }
+
+
+def check_budget(results: Dict[str, dict], budget: Dict[str, float] = STARTUP_BUDGET_MS) -> List[str]:
+    """返回超出预算的入口说明（空列表表示全部达标）"""
+    over = []
+    for name, r in results.items():
+        limit = budget.get(name)
+        if limit is not None and r["median_ms"] > limit:
+            over.append(f"{name}: {r['median_ms']:.0f} ms > 预算 {limit:.0f} ms")
+    return over
+
+
+def format_report(results: Dict[str, dict], runs: int, top: int = 8,
+                  budget: Dict[str, float] = STARTUP_BUDGET_MS) -> str:
+    """把测量结果格式化为 Markdown"""
+    lines = [
+        "# 启动耗时基准",
+        "",
+        f"由 `python startup_profile.py --runs {runs} --output docs/STARTUP_PROFILE.md` 生成。",
+        f"环境：Python {platform.python_version()}，{platform.system()} {platform.machine()}；"
+        f"每个入口预热 1 次后运行 {runs} 次取中位数（含解释器启动）。",
+        "",
+        "| 入口 | 中位数 (ms) | 最快 (ms) | 预算 (ms) | 导入模块数 |",
+        "|---|---:|---:|---:|---:|",
+    ]
+    for name, r in results.items():
+        limit = budget.get(name)
+        limit_text = f"{limit:.0f}" if limit is not None else "-"
+        lines.append(f"| {name} | {r['median_ms']:.0f} | {r['min_ms']:.0f} | {limit_text} | {r['modules']} |")
+
+    lines += ["", "## 各入口导入耗时最高的顶层包（-X importtime，自身耗时累加）", ""]
+    for name, r in results.items():
+        lines.append(f"### {name}")
+        lines.append("")
+        lines.append("| 包 | 耗时 (ms) |")
+        lines.append("|---|---:|")
+        for pkg, us in list(r["packages"].items())[:top]:
+            lines.append(f"| {pkg} | {us / 1000:.1f} |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量各入口的冷启动耗时并汇总 -X importtime")
+    parser.add_argument("--runs", type=int, default=5, help="每个入口的重复次数，默认 5")
+    parser.add_argument("--target", action="append", choices=sorted(TARGETS), help="只测量指定入口（可重复）")
+    parser.add_argument("--top", type=int, default=8, help="每个入口列出耗时最高的前 N 个包，默认 8")
+    parser.add_argument("--output", default=None, help="把 Markdown 报告写入文件")
+    parser.add_argument("--check", action="store_true", help="有入口超出启动预算时返回退出码 1")
+    args = parser.parse_args()
+
+    names = args.target or list(TARGETS)
+    results = {}
+    for name in names:
+        print(f"测量 {name} ...", file=sys.stderr)
+        results[name] = profile_target(TARGETS[name], runs=args.runs)
+
+    report = format_report(results, args.runs, top=args.top)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+        print(f"报告已写入 {args.output}", file=sys.stderr)
+    else:
+        print(report)
+
+    if args.check:
+        over = check_budget(results)
+        for line in over:
+            print(f"超出预算 - {line}", file=sys.stderr)
+        return 1 if over else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
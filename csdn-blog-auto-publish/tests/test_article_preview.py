@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+测试文章预览缓存（article_preview.py）
+"""
+
+import os
+
+import pytest
+
+import article_preview
+from article_preview import PreviewCache, render_markdown
+
+
+def test_render_markdown_escapes_html():
+    rendered = render_markdown("# 标题\n\n正文 **加粗**\n\n<script>alert(1)</script>")
+    assert "<h1>标题</h1>" in rendered
+    assert "<strong>加粗</strong>" in rendered
+    assert "<script>" not in rendered
+
+
+def test_render_file_cached_by_stat_and_hash(tmp_path, monkeypatch):
+    """文件未变时不重新读取与渲染；内容相同的文件共用渲染结果"""
+    print("\n测试: 预览缓存")
+    renders = []
+    real_render = article_preview.render_markdown
+    monkeypatch.setattr(article_preview, "render_markdown", lambda text: renders.append(text) or real_render(text))
+
+    cache = PreviewCache()
+    a = tmp_path / "a.md"
+    a.write_text("# 一\n\n内容", encoding="utf-8")
+    html1, truncated = cache.render_file(a)
+    assert not truncated and "<h1>一</h1>" in html1
+    assert cache.render_file(a) == (html1, False)
+    assert len(renders) == 1 and cache.hits == 1
+
+    b = tmp_path / "b.md"
+    b.write_text("# 一\n\n内容", encoding="utf-8")
+    assert cache.render_file(b)[0] == html1
+    assert len(renders) == 1
+
+    a.write_text("# 二\n\n新内容", encoding="utf-8")
+    os.utime(a, ns=(1, 1))
+    assert "<h1>二</h1>" in cache.render_file(a)[0]
+    assert len(renders) == 2
+    print("✓ 通过")
+
+
+def test_truncation_and_full_text(tmp_path):
+    path = tmp_path / "long.md"
+    path.write_text("段落\n\n" * 1000, encoding="utf-8")
+    cache = PreviewCache()
+    short, truncated = cache.render_file(path, limit=100)
+    assert truncated and short.count("<p>") <= 34
+    full, truncated = cache.render_file(path, limit=None)
+    assert not truncated and full.count("<p>") == 1000
+
+
+def test_lru_eviction():
+    """超过字节上限时淘汰最久未使用的渲染结果"""
+    cache = PreviewCache(max_bytes=250)
+    cache.render_text("a" * 100)
+    cache.render_text("b" * 100)
+    cache.render_text("a" * 100)  # 命中，a 变为最近使用
+    cache.render_text("c" * 100)  # 淘汰 b
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.render_text("a" * 100)
+    cache.render_text("b" * 100)
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache._bytes <= 250
+
+
+def test_stat_records_evicted_with_lru(tmp_path):
+    """文件记录随渲染结果一起淘汰，不会无限增长"""
+    cache = PreviewCache(max_bytes=300)
+    for n in range(20):
+        path = tmp_path / f"{n}.md"
+        path.write_text(f"{n}" * 100, encoding="utf-8")
+        cache.render_file(path)
+    assert len(cache._by_stat) == len(cache._html) <= 3
+    assert sum(len(keys) for keys in cache._stat_keys.values()) == len(cache._by_stat)
+
+
+def test_sanitize_html_keeps_markup_drops_scripts():
+    cleaned = article_preview.sanitize_html(
+        '<blockquote><p>引用 &lt;b&gt;</p></blockquote><script>alert(1)</script>'
+        '<a href="javascript:alert(1)" onclick="x()">链接</a><img src="a.png" onerror="x()">'
+        '<pre><code class="language-py">if a &lt; b &amp;&amp; c:</code></pre>')
+    assert "<blockquote><p>引用 &lt;b&gt;</p></blockquote>" in cleaned
+    assert "alert" not in cleaned and "onclick" not in cleaned and "onerror" not in cleaned
+    assert '<a>链接</a>' in cleaned and '<img src="a.png">' in cleaned
+    assert '<code class="language-py">if a &lt; b &amp;&amp; c:</code>' in cleaned
+
+
+def test_markdown_fallback_renders_quotes_and_code(monkeypatch):
+    """未安装 markdown-it-py 时用 Python-Markdown：引用与代码块正常，原始 HTML 被清理"""
+    markdown_lib = pytest.importorskip("markdown")
+    monkeypatch.setattr(article_preview, "_md", None)
+    monkeypatch.setattr(article_preview, "markdown_lib", markdown_lib)
+    rendered = render_markdown("> 引用\n\n```\nif a < b && c:\n```\n\n<script>alert(1)</script>")
+    assert "<blockquote>" in rendered
+    assert "if a &lt; b &amp;&amp; c:" in rendered and "&amp;lt;" not in rendered
+    assert "<script>" not in rendered
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试文章全文检索（article_search.py）
+"""
+
+import os
+import time
+
+from article_search import ArticleIndex, extract_title
+
+
+def write(path, text, mtime=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def make_index(tmp_path):
+    roots = {"csdn": tmp_path / "posts", "wechat": tmp_path / "done"}
+    for root in roots.values():
+        root.mkdir()
+    return ArticleIndex(tmp_path / "index.db", roots=roots), roots
+
+
+def test_extract_title():
+    assert extract_title("---\ntitle: 标题A\ntags: x\n---\n正文", "f") == "标题A"
+    assert extract_title("前言\n\n# 标题B\n\n正文", "f") == "标题B"
+    assert extract_title("没有标题的正文", "文件名") == "文件名"
+
+
+def test_search_chinese_and_short_terms(tmp_path):
+    """中文子串检索、短词退化为 LIKE、按来源过滤"""
+    print("\n测试: 中文全文检索")
+    index, roots = make_index(tmp_path)
+    write(roots["csdn"] / "a.md", "# 强化学习入门\n\n介绍强化学习在机器人控制中的应用。")
+    write(roots["csdn"] / "b.md", "# 大模型推理优化\n\n量化与 KV 缓存。")
+    write(roots["wechat"] / "c.md", "# 机器人周报\n\n本周强化学习新闻汇总。")
+    assert index.sync() == {"added": 3, "updated": 0, "removed": 0}
+
+    results = index.search("强化学习")
+    assert {r["title"] for r in results} == {"强化学习入门", "机器人周报"}
+    assert results[0]["title"] == "强化学习入门"  # 标题命中权重更高
+    assert "**强化学习**" in results[0]["snippet"]
+
+    assert [r["title"] for r in index.search("强化学习 控制")] == ["强化学习入门"]
+    assert [r["title"] for r in index.search("KV")] == ["大模型推理优化"]
+    assert [r["title"] for r in index.search("强化学习", source="wechat")] == ["机器人周报"]
+    assert index.search("不存在的词") == []
+    assert index.search('引号"注入') == []
+    assert index.search("   ") == []
+    print("✓ 通过")
+
+
+def test_incremental_sync(tmp_path):
+    """只重新索引变化的文件，移走/删除的文件移出索引"""
+    print("\n测试: 增量同步")
+    index, roots = make_index(tmp_path)
+    old = time.time() - 100
+    write(roots["csdn"] / "a.md", "# 旧标题\n\n旧内容", mtime=old)
+    write(roots["csdn"] / "b.md", "# 另一篇\n\n不变的内容", mtime=old)
+    index.sync()
+
+    assert index.sync() == {"added": 0, "updated": 0, "removed": 0}
+
+    write(roots["csdn"] / "a.md", "# 新标题\n\n更新后的内容")
+    (roots["csdn"] / "b.md").rename(roots["wechat"] / "b.md")
+    assert index.sync() == {"added": 1, "updated": 1, "removed": 1}
+    assert index.search("旧内容") == []
+    assert [r["title"] for r in index.search("更新后")] == ["新标题"]
+    assert [r["source"] for r in index.search("不变的")] == ["wechat"]
+    assert index.stats() == {"csdn": 1, "wechat": 1}
+    print("✓ 通过")
+
+
+def test_update_path(tmp_path):
+    """单个文件写入/删除后立即反映到检索结果"""
+    index, roots = make_index(tmp_path)
+    path = roots["csdn"] / "a.md"
+    write(path, "# 新文章\n\n刚生成的内容")
+    index.update_path(path)
+    assert [r["title"] for r in index.search("刚生成")] == ["新文章"]
+
+    path.unlink()
+    index.update_path(path)
+    assert index.search("刚生成") == []
+
+    outside = tmp_path / "other.md"
+    write(outside, "# 外部文件\n\n不应被索引")
+    index.update_path(outside)
+    assert index.search("不应被索引") == []
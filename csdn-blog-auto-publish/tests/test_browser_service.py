@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试常驻浏览器服务（browser_service.py）中不依赖真实浏览器的部分
+"""
+
+import json
+
+import browser_service
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.cookies = []
+        self.pages = []
+
+    def add_cookies(self, cookies):
+        self.cookies.extend(cookies)
+
+    def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = [FakeContext()]
+        self.kwargs = None
+
+    def new_context(self, **kwargs):
+        self.kwargs = kwargs
+        return FakeContext()
+
+
+class FakeChromium:
+    def __init__(self, cdp_ok=True):
+        self.cdp_ok = cdp_ok
+        self.launched = False
+        self.browser = FakeBrowser()
+
+    def connect_over_cdp(self, endpoint):
+        if not self.cdp_ok:
+            raise ConnectionError("refused")
+        return self.browser
+
+    def launch(self, headless=False):
+        self.launched = True
+        return self.browser
+
+
+class FakePlaywright:
+    def __init__(self, cdp_ok=True):
+        self.chromium = FakeChromium(cdp_ok)
+
+
+def test_seed_storage_states_merges_cookies(tmp_path):
+    """各工具的 cookies 合并进同一个上下文，缺失的文件被跳过"""
+    print("\n测试: 合并登录状态")
+    csdn = tmp_path / "storage.json"
+    csdn.write_text(json.dumps({"cookies": [{"name": "a", "value": "1", "domain": ".csdn.net", "path": "/"}]}))
+    zhihu = tmp_path / "zhihu_state.json"
+    zhihu.write_text(json.dumps({"cookies": [{"name": "z", "value": "2", "domain": ".zhihu.com", "path": "/"}]}))
+    sites = {
+        "csdn": {"storage": csdn},
+        "zhihu": {"storage": zhihu},
+        "xhs": {"storage": tmp_path / "missing.json"},
+    }
+    context = FakeContext()
+    browser_service.seed_storage_states(context, sites)
+    assert {c["domain"] for c in context.cookies} == {".csdn.net", ".zhihu.com"}
+    print("✓ 通过")
+
+
+def test_shared_state_is_filtered_by_domain(tmp_path):
+    """共享上下文保存状态时只保留本站点的 cookies 和源，合并时也按站点过滤"""
+    print("\n测试: 按域名过滤登录状态")
+    mixed = {
+        "cookies": [
+            {"name": "a", "value": "1", "domain": ".csdn.net", "path": "/"},
+            {"name": "b", "value": "2", "domain": "passport.csdn.net", "path": "/"},
+            {"name": "n", "value": "3", "domain": ".notcsdn.net", "path": "/"},
+            {"name": "z", "value": "4", "domain": ".zhihu.com", "path": "/"},
+        ],
+        "origins": [
+            {"origin": "https://editor.csdn.net", "localStorage": []},
+            {"origin": "https://www.xiaohongshu.com", "localStorage": []},
+        ],
+    }
+
+    class StateContext(FakeContext):
+        def storage_state(self, path=None):
+            return mixed
+
+    storage = tmp_path / "storage.json"
+    browser_service.save_storage_state(StateContext(), storage, domain="csdn.net")
+    saved = json.loads(storage.read_text(encoding="utf-8"))
+    assert [c["name"] for c in saved["cookies"]] == ["a", "b"]
+    assert [o["origin"] for o in saved["origins"]] == ["https://editor.csdn.net"]
+
+    polluted = tmp_path / "polluted.json"
+    polluted.write_text(json.dumps(mixed))
+    context = FakeContext()
+    browser_service.seed_storage_states(context, {"csdn": {"domain": "csdn.net", "storage": polluted}})
+    assert {c["name"] for c in context.cookies} == {"a", "b"}
+    print("✓ 通过")
+
+
+def test_open_page_uses_service(monkeypatch):
+    """配置了服务地址时连接共享浏览器的默认上下文"""
+    print("\n测试: 连接浏览器服务")
+    monkeypatch.setenv(browser_service.ENDPOINT_ENV, "http://127.0.0.1:9222")
+    p = FakePlaywright()
+    context, page, shared = browser_service.open_page(p)
+    assert shared is True
+    assert context is p.chromium.browser.contexts[0]
+    assert page in context.pages
+    assert p.chromium.launched is False
+    print("✓ 通过")
+
+
+def test_open_page_falls_back_to_launch(monkeypatch, tmp_path):
+    """服务不可用时本地启动并加载登录状态"""
+    print("\n测试: 服务不可用时本地启动")
+    monkeypatch.setenv(browser_service.ENDPOINT_ENV, "http://127.0.0.1:9")
+    state = tmp_path / "storage.json"
+    state.write_text("{}")
+    p = FakePlaywright(cdp_ok=False)
+    _, _, shared = browser_service.open_page(p, storage_state=state)
+    assert shared is False
+    assert p.chromium.launched is True
+    assert p.chromium.browser.kwargs == {"storage_state": str(state)}
+
+    monkeypatch.delenv(browser_service.ENDPOINT_ENV)
+    assert browser_service.get_endpoint() is None
+    print("✓ 通过")
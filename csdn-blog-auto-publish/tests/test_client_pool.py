@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+测试限流客户端池（client_pool.py）与界面会话状态隔离
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import metrics
+from client_pool import ClientPool
+
+
+class FakeRawClient:
+    """记录每个模型同时进行中的请求数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages=None, **kwargs):
+        with self.lock:
+            self.active[model] = self.active.get(model, 0) + 1
+            self.peak[model] = max(self.peak.get(model, 0), self.active[model])
+        time.sleep(0.05)
+        with self.lock:
+            self.active[model] -= 1
+        return f"{model}:{messages}"
+
+
+def test_per_model_concurrency_limit(monkeypatch, tmp_path):
+    """每个模型的并发请求数不超过配置上限，不同模型互不占用名额"""
+    print("\n测试: 按模型限流")
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    monkeypatch.setenv("ZHIPU_CONCURRENCY_GLM_4_FLASH", "3")
+    raw = FakeRawClient()
+    pool = ClientPool(raw, limits={"glm-4-plus": 1, "glm-4-flash": 5})
+
+    results = []
+
+    def call(model, i):
+        results.append(pool.chat.completions.create(model=model, messages=i))
+
+    threads = [threading.Thread(target=call, args=("glm-4-plus", i)) for i in range(4)]
+    threads += [threading.Thread(target=call, args=("glm-4-flash", i)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 12
+    assert raw.peak["glm-4-plus"] == 1
+    assert raw.peak["glm-4-flash"] == 3  # 环境变量覆盖了配置
+    # 每次调用都记录了耗时
+    assert len((tmp_path / "events.jsonl").read_text(encoding="utf-8").splitlines()) == 12
+    print("✓ 通过")
+
+
+def test_sessions_do_not_share_results():
+    """两个会话的搜索结果互不覆盖"""
+    import ui
+
+    a, b = ui.AppState(), ui.AppState()
+    a.search_results = [{"title": "A"}]
+    assert b.search_results is None
+    assert ui.generate_titles(5, b)[0] == "❌ 请先搜索新闻"
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试 CSDN HTTP 发布后端（csdn_http_publisher.py），发布接口使用本地桩服务
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from csdn_http_publisher import CsdnHttpError, CsdnHttpPublisher, sign_headers
+
+
+class StubEditorHandler(BaseHTTPRequestHandler):
+    """模拟编辑器的 saveArticle 接口：需要登录 cookie，返回文章地址"""
+
+    requests = []
+    fail = False
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        StubEditorHandler.requests.append({"headers": dict(self.headers), "body": body, "path": self.path})
+        if "UserToken=abc" not in (self.headers.get('Cookie') or ''):
+            self.send_response(401)
+            self.end_headers()
+            return
+        if StubEditorHandler.fail:
+            result = {"code": 400, "msg": "标题重复"}
+        else:
+            n = len(StubEditorHandler.requests)
+            result = {"code": 200, "data": {"id": n, "url": f"https://blog.csdn.net/u/article/details/{n}"}}
+        data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_endpoint():
+    StubEditorHandler.requests = []
+    StubEditorHandler.fail = False
+    server = HTTPServer(('127.0.0.1', 0), StubEditorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/blog-console-api/v3/mdeditor/saveArticle"
+    server.shutdown()
+
+
+def write_storage(tmp_path, token="abc"):
+    storage = tmp_path / "storage.json"
+    storage.write_text(json.dumps({"cookies": [
+        {"name": "UserToken", "value": token, "domain": "127.0.0.1", "path": "/"}
+    ]}))
+    return storage
+
+
+def test_publish_with_saved_cookies(tmp_path, stub_endpoint):
+    """复用 storage.json 的 cookies 一次请求完成发布"""
+    print("\n测试: HTTP 发布")
+    publisher = CsdnHttpPublisher(write_storage(tmp_path), endpoint=stub_endpoint)
+    data = publisher.publish("标题", "# 小节\n\n正文", tags=["人工智能", "Python"])
+    data2 = publisher.publish("标题2", "正文2", draft=True)
+    publisher.close()
+
+    assert data["url"].endswith("/1")
+    assert data2["id"] == 2
+    first = StubEditorHandler.requests[0]["body"]
+    assert first["title"] == "标题"
+    assert first["markdowncontent"] == "# 小节\n\n正文"
+    assert first["tags"] == "人工智能,Python"
+    assert first["readType"] == "read_need_fans"
+    assert first["status"] == 0
+    assert "正文" in first["content"]
+    assert StubEditorHandler.requests[1]["body"]["status"] == 2
+    print("✓ 通过")
+
+
+def test_expired_login_and_api_error(tmp_path, stub_endpoint):
+    """登录失效与接口业务错误都抛出 CsdnHttpError"""
+    print("\n测试: 错误处理")
+    expired = CsdnHttpPublisher(write_storage(tmp_path, token="old"), endpoint=stub_endpoint)
+    with pytest.raises(CsdnHttpError):
+        expired.publish("t", "body")
+
+    StubEditorHandler.fail = True
+    publisher = CsdnHttpPublisher(write_storage(tmp_path), endpoint=stub_endpoint)
+    with pytest.raises(CsdnHttpError, match="标题重复"):
+        publisher.publish("t", "body")
+
+    with pytest.raises(ValueError):
+        CsdnHttpPublisher.build_payload("t", "body", read_type="everyone")
+    print("✓ 通过")
+
+
+def test_signed_request(tmp_path, stub_endpoint):
+    """配置了签名密钥时附带 x-ca-* 签名头"""
+    print("\n测试: 网关签名")
+    publisher = CsdnHttpPublisher(write_storage(tmp_path), endpoint=stub_endpoint,
+                                  ca_key="k", ca_secret="s")
+    publisher.publish("t", "body")
+    headers = {k.lower(): v for k, v in StubEditorHandler.requests[0]["headers"].items()}
+    assert headers["x-ca-key"] == "k"
+    assert headers["x-ca-signature"]
+
+    a = sign_headers("POST", stub_endpoint, "k", "s")
+    b = sign_headers("POST", stub_endpoint, "k", "s")
+    assert a["x-ca-nonce"] != b["x-ca-nonce"]
+    print("✓ 通过")
+
+
+def test_missing_storage(tmp_path):
+    """没有登录状态文件时提示先登录"""
+    with pytest.raises(FileNotFoundError):
+        CsdnHttpPublisher(tmp_path / "none.json")
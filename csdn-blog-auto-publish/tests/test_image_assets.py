@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试图片资源流水线（image_assets.py），上传接口使用本地桩服务
+"""
+
+import json
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from image_assets import HttpUploader, UrlCache, find_image_sources, process_markdown
+
+
+class StubUploadHandler(BaseHTTPRequestHandler):
+    """模拟图床上传接口：返回 {"data": {"url": ...}}"""
+
+    uploads = []
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers['Content-Length']))
+        filename = re.search(rb'name="file"; filename="([^"]+)"', payload).group(1).decode('utf-8')
+        StubUploadHandler.uploads.append(filename)
+        body = json.dumps({"data": {"url": f"https://img.example.com/{len(self.uploads)}/{filename}"}})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = HTTPServer(('127.0.0.1', 0), StubUploadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_find_image_sources():
+    """识别 Markdown 与 HTML 图片，去重并跳过 data URI"""
+    print("\n测试: 图片引用扫描")
+    md = ('![a](img/a.png)\n![b](img/a.png "标题")\n<img src="https://x.com/b.jpg" width="10">\n'
+          '![c](data:image/png;base64,AAAA)')
+    assert find_image_sources(md) == ['img/a.png', 'https://x.com/b.jpg']
+    print("✓ 通过")
+
+
+def test_upload_once_per_platform():
+    """同一张图片每个平台只上传一次，并改写 Markdown"""
+    print("\n测试: 上传一次 + 地址改写")
+    server = start_stub_server()
+    StubUploadHandler.uploads = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            (tmp / "a.png").write_bytes(b"not-really-a-png-1")
+            (tmp / "b.png").write_bytes(b"not-really-a-png-1")  # 内容相同
+            md = '![一](a.png)\n\n正文\n\n![二](b.png "说明")'
+
+            uploader = HttpUploader(f"http://127.0.0.1:{server.server_port}/upload")
+            cache = UrlCache(tmp / "cache.json")
+
+            new_md, stats = process_markdown(md, tmp, 'csdn', uploader, cache, workers=2)
+            assert 'https://img.example.com/' in new_md
+            assert '"说明")' in new_md
+            assert stats['images'] == 2
+            assert stats['uploaded'] + stats['cached'] == 2
+            assert len(StubUploadHandler.uploads) == 1  # 相同内容只上传一次
+            cache.save()
+
+            # 再次处理：全部命中缓存，不再上传
+            uploads_before = len(StubUploadHandler.uploads)
+            warm_cache = UrlCache(tmp / "cache.json")
+            again, stats2 = process_markdown(md, tmp, 'csdn', uploader, warm_cache)
+            assert stats2['cached'] == 2 and stats2['uploaded'] == 0
+            assert len(StubUploadHandler.uploads) == uploads_before
+            assert again == new_md
+
+            # 换一个平台需要重新上传
+            _, stats3 = process_markdown(md, tmp, 'zhihu', uploader, warm_cache)
+            assert stats3['uploaded'] >= 1
+    finally:
+        server.shutdown()
+    print("✓ 通过")
+
+
+def test_missing_image_is_left_untouched():
+    """读取失败的图片保持原地址"""
+    print("\n测试: 缺失图片")
+    with tempfile.TemporaryDirectory() as tmp:
+        md = '![x](missing.png)'
+        new_md, stats = process_markdown(md, Path(tmp), 'csdn', lambda *a: 'unused', UrlCache(None))
+        assert new_md == md
+        assert stats['failed'] == 1
+    print("✓ 通过")
+
+
+if __name__ == "__main__":
+    test_find_image_sources()
+    test_upload_once_per_platform()
+    test_missing_image_is_left_untouched()
+    print("\n✅ 所有测试通过！")
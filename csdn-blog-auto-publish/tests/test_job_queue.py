@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+测试后台任务队列（job_queue.py）
+"""
+
+import threading
+import time
+
+from job_queue import CANCELLED, DONE, FAILED, QUEUED, JobQueue, format_job_detail
+
+
+def make_queue(db=":memory:", **workers):
+    return JobQueue(db, workers=workers or {"default": 1})
+
+
+def test_submit_and_complete():
+    """任务执行完成，结果、进度与日志被持久化"""
+    print("\n测试: 提交与完成")
+    queue = make_queue()
+
+    def handler(ctx, name):
+        ctx(0.5, desc="处理中")
+        ctx.log("自定义日志")
+        return f"hello {name}"
+
+    queue.register("greet", handler)
+    queue.start()
+    job_id = queue.submit("greet", name="csdn")
+    job = queue.wait(job_id, timeout=5)
+    queue.stop()
+
+    assert job["status"] == DONE
+    assert job["result"] == "hello csdn"
+    assert job["progress"] == 1
+    assert "处理中" in job["log"] and "自定义日志" in job["log"]
+    assert "hello csdn" in format_job_detail(job)
+    print("✓ 通过")
+
+
+def test_cancel_queued_and_running():
+    """排队任务直接取消；运行中任务在检查点停止，且能穿过 except Exception"""
+    print("\n测试: 取消任务")
+    queue = make_queue()
+    started = threading.Event()
+
+    def slow(ctx):
+        started.set()
+        try:
+            for _ in range(200):
+                ctx(desc=None)
+                time.sleep(0.02)
+        except Exception:
+            return "不应被业务代码吞掉"
+        return "finished"
+
+    queue.register("slow", slow)
+    queue.start()
+    running = queue.submit("slow")
+    waiting = queue.submit("slow")
+    assert started.wait(5)
+
+    assert queue.cancel(waiting) is True
+    assert queue.get(waiting)["status"] == CANCELLED
+    assert queue.cancel(running) is True
+    assert queue.wait(running, timeout=5)["status"] == CANCELLED
+    assert queue.cancel(running) is False
+    queue.stop()
+    print("✓ 通过")
+
+
+def test_failure_and_concurrency_limit():
+    """失败记录错误信息；同一队列的并发数不超过配置的工作线程数"""
+    print("\n测试: 失败与并发上限")
+    queue = make_queue(llm=2)
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def work(ctx):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.1)
+        with lock:
+            state["now"] -= 1
+        return "ok"
+
+    def boom(ctx):
+        raise RuntimeError("接口超时")
+
+    queue.register("work", work, queue="llm")
+    queue.register("boom", boom, queue="llm")
+    queue.start()
+    ids = [queue.submit("work") for _ in range(5)]
+    bad = queue.submit("boom")
+    for job_id in ids:
+        assert queue.wait(job_id, timeout=5)["status"] == DONE
+    failed = queue.wait(bad, timeout=5)
+    queue.stop()
+
+    assert state["peak"] == 2
+    assert failed["status"] == FAILED
+    assert "接口超时" in failed["log"]
+    print("✓ 通过")
+
+
+def test_restart_recovers_jobs(tmp_path):
+    """重启后：运行中的任务标记为中断，排队中的任务继续执行"""
+    print("\n测试: 重启恢复")
+    db = tmp_path / "jobs.db"
+    first = make_queue(db)
+    first.register("echo", lambda ctx, v: v)
+    interrupted = first.submit("echo", v="a")
+    pending = first.submit("echo", v="b")
+    # 模拟进程在执行第一个任务时退出
+    first._conn.execute("UPDATE jobs SET status='running' WHERE id=?", (interrupted,))
+    first._conn.commit()
+    assert first.get(pending)["status"] == QUEUED
+
+    second = make_queue(db)
+    second.register("echo", lambda ctx, v: v)
+    second.start()
+    assert second.wait(pending, timeout=5)["result"] == "b"
+    assert second.get(interrupted)["status"] == FAILED
+    assert [j["id"] for j in second.recent()] == [pending, interrupted]
+    second.stop()
+    print("✓ 通过")
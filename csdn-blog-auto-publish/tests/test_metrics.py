@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试流水线埋点与增量聚合（metrics.py）
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from metrics import MetricsStore, new_hist, hist_add, percentile
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    return tmp_path
+
+
+def fake_response(prompt_tokens, completion_tokens):
+    return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+
+
+def read_events(path):
+    return [json.loads(line) for line in (path / "events.jsonl").read_text(encoding="utf-8").splitlines()]
+
+
+def test_stage_collects_llm_tokens(metrics_dir):
+    """环节内的大模型调用计入该环节的 token 与费用；异常记为失败"""
+    print("\n测试: 环节埋点")
+    with metrics.stage("article", title="A"):
+        metrics.record_llm_call("glm-4-plus", 1.5, fake_response(1000, 3000))
+        metrics.record_llm_call("glm-4-flash", 0.3, fake_response(100, 100))
+    with pytest.raises(RuntimeError):
+        with metrics.stage("titles"):
+            raise RuntimeError("接口错误")
+    metrics.record_llm_call("glm-4-plus", 0.2)  # 不在任何环节内
+
+    events = read_events(metrics_dir)
+    llm = [e for e in events if e["type"] == "llm"]
+    stages = {e["stage"]: e for e in events if e["type"] == "stage"}
+    assert [e["stage"] for e in llm] == ["article", "article", None]
+    assert stages["article"]["ok"] and stages["article"]["tokens"] == 4200
+    assert stages["article"]["cost"] == pytest.approx(4000 * metrics.MODEL_PRICES["glm-4-plus"] / 1e6)
+    assert stages["article"]["title"] == "A"
+    assert stages["titles"]["ok"] is False
+    print("✓ 通过")
+
+
+def test_percentile_from_histogram():
+    hist = new_hist()
+    for s in [0.3] * 50 + [1.5] * 40 + [10] * 10:
+        hist_add(hist, s)
+    assert 0.2 <= percentile(hist, 0.5) <= 0.5
+    assert 1 <= percentile(hist, 0.9) <= 2
+    assert 8 <= percentile(hist, 0.99) <= 13
+    assert percentile(new_hist(), 0.5) is None
+
+
+def test_incremental_ingest(metrics_dir):
+    """只汇总新增的完整行，重复汇总不重复计数"""
+    print("\n测试: 增量汇总")
+    store = MetricsStore(metrics_dir)
+    for ok in (True, True, False):
+        metrics.record("stage", stage="article", ok=ok, seconds=10, tokens=2000, cost=0.01)
+    metrics.record("stage", stage="publish", ok=True, seconds=40)
+    metrics.record("phase", group="publish", phase="fill_body", seconds=3.0)
+    metrics.record("llm", model="glm-4-plus", ok=True, seconds=2.0, prompt_tokens=10, completion_tokens=20, cost=0)
+    assert store.ingest() == 6
+    assert store.ingest() == 0
+
+    # 写了一半的行留到下次
+    with open(metrics_dir / "events.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"ts": %f, "type": "phase", "group": "publish", "phase": "fill_body"' % time.time())
+    assert store.ingest() == 0
+    with open(metrics_dir / "events.jsonl", "a", encoding="utf-8") as f:
+        f.write(', "seconds": 5.0}\n')
+    assert store.ingest() == 1
+
+    since = time.time() - 86400
+    series = store.article_series(since)
+    assert sum(r["generated"] for r in series) == 2
+    assert sum(r["published"] for r in series) == 1
+    assert store.article_cost(since)["tokens_per_article"] == 3000  # 失败的调用也计入成本
+    rates = {r["stage"]: r for r in store.failure_rates(since)}
+    assert rates["article"]["failed"] == 1 and rates["article"]["total"] == 3
+    phases = store.phase_timings(since)
+    assert phases[0]["phase"] == "fill_body" and phases[0]["count"] == 2 and phases[0]["mean"] == 4.0
+    llm = store.llm_latency(since)
+    assert llm[0]["model"] == "glm-4-plus" and llm[0]["tokens"] == 30
+
+    # 新实例从上次的位置继续
+    store.close()
+    assert MetricsStore(metrics_dir).ingest() == 0
+    print("✓ 通过")
+
+
+def test_dry_run_is_not_counted_as_published(metrics_dir, monkeypatch):
+    """--skip-publish 只填充的运行单独记为 publish_dry_run，看板不把它算作发布成功"""
+    print("\n测试: 只填充不发布的运行")
+    import publish_csdn
+
+    monkeypatch.setattr(publish_csdn, "_publish_one", lambda page, fp, args, *a: "filled" if args.skip_publish else "published")
+    publish_csdn.publish_one(None, None, SimpleNamespace(skip_publish=True), None)
+    publish_csdn.publish_one(None, None, SimpleNamespace(skip_publish=False), None)
+
+    stages = [(e["stage"], e["status"]) for e in read_events(metrics_dir) if e["type"] == "stage"]
+    assert stages == [("publish_dry_run", "filled"), ("publish", "published")]
+    store = MetricsStore(metrics_dir)
+    store.ingest()
+    assert sum(s["published"] for s in store.article_series(0)) == 1
+    print("✓ 通过")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试 posts/ 与 todo/ 的内存索引（posts_index.py）
+"""
+
+import os
+import time
+
+from posts_index import FileIndex
+
+
+def wait_until(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return cond()
+
+
+def make_dirs(tmp_path):
+    posts, todo = tmp_path / "posts", tmp_path / "todo"
+    posts.mkdir()
+    todo.mkdir()
+    (posts / "b.md").write_text("bbbb", encoding="utf-8")
+    (posts / "a.md").write_text("aa", encoding="utf-8")
+    (posts / "note.txt").write_text("忽略", encoding="utf-8")
+    (todo / "20250101_titles.txt").write_text("标题一\n\n标题二\n", encoding="utf-8")
+    return posts, todo
+
+
+def test_initial_scan_and_update_path(tmp_path):
+    """全量扫描后，单个文件的新增/删除通过 update_path 立即生效"""
+    print("\n测试: 索引扫描与增量更新")
+    posts, todo = make_dirs(tmp_path)
+    index = FileIndex(posts, todo)
+    index.rescan()
+
+    assert index.posts() == [("a", 2), ("b", 4)]
+    assert index.titles("20250101") == ["标题一", "标题二"]
+    assert index.titles_count("20991231") == 0
+
+    (posts / "c.md").write_text("ccc", encoding="utf-8")
+    index.update_path(posts / "c.md")
+    (posts / "a.md").unlink()
+    index.update_path(posts / "a.md")
+    assert index.posts() == [("b", 4), ("c", 3)]
+    assert index.posts_count() == 2
+
+    (todo / "20250101_titles.txt").write_text("新标题\n", encoding="utf-8")
+    index.update_path(todo / "20250101_titles.txt")
+    assert index.titles("20250101") == ["新标题"]
+    print("✓ 通过")
+
+
+def test_polling_picks_up_changes(tmp_path):
+    """未使用 watchdog 时，后台轮询发现外部进程的修改"""
+    print("\n测试: 轮询更新")
+    posts, todo = make_dirs(tmp_path)
+    index = FileIndex(posts, todo, poll_interval=0.05, use_watchdog=False)
+    index.start()
+    try:
+        (posts / "new.md").write_text("x", encoding="utf-8")
+        (todo / "20250101_titles.txt").unlink()
+        (todo / "20250102_titles.txt").write_text("明天\n", encoding="utf-8")
+        assert wait_until(lambda: index.posts_count() == 3)
+        assert wait_until(lambda: index.titles("20250102") == ["明天"])
+        assert index.titles("20250101") == []
+
+        # 修改内容（大小与修改时间变化）后重新读取
+        target = todo / "20250102_titles.txt"
+        target.write_text("明天\n后天\n", encoding="utf-8")
+        os.utime(target, (time.time() + 5, time.time() + 5))
+        assert wait_until(lambda: index.titles_count("20250102") == 2)
+    finally:
+        index.stop()
+    print("✓ 通过")
+
+
+def test_posts_page(tmp_path):
+    """分页与标题过滤只读元数据"""
+    posts, todo = make_dirs(tmp_path)
+    for i in range(5):
+        (posts / f"强化学习{i}.md").write_text("x" * i, encoding="utf-8")
+    index = FileIndex(posts, todo)
+    index.rescan()
+
+    rows, total = index.posts_page(1, 3)
+    assert total == 7
+    assert [r[0] for r in rows] == ["a", "b", "强化学习0"]
+    rows, total = index.posts_page(3, 3)
+    assert [r[0] for r in rows] == ["强化学习4"]
+    rows, total = index.posts_page(2, 3, query="强化")
+    assert total == 5 and [(r[0], r[1]) for r in rows] == [("强化学习3", 3), ("强化学习4", 4)]
+    assert index.posts_page(1, 3, query="不存在") == ([], 0)
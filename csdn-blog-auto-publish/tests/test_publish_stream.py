@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+测试发布输出的实时流式显示（publish_events.py 与 ui.publish_articles）
+
+用一个假的 publish_csdn.py 代替真实发布脚本，不启动浏览器。
+"""
+
+import json
+
+from publish_events import EVENT_PREFIX, parse_event
+
+
+FAKE_PUBLISHER = '''
+import json, sys, time
+args = sys.argv[1:]
+limit = int(args[args.index("--limit") + 1])
+def event(**kw):
+    print("@@EVENT " + json.dumps(kw, ensure_ascii=False), flush=True)
+event(type="run_start", total=limit, backend="browser")
+for i in range(1, limit + 1):
+    event(type="post_start", index=i, total=limit, file=f"posts/{i}.md")
+    print(f"正在发布第 {i} 篇", flush=True)
+    time.sleep(0.2)
+    event(type="post_done", index=i, total=limit, file=f"posts/{i}.md", ok=i != 2, seconds=0.2)
+event(type="run_end", published=limit - 1, failed=1)
+'''
+
+
+def test_parse_event():
+    """识别事件行，普通输出与损坏的事件返回 None"""
+    line = EVENT_PREFIX + json.dumps({"type": "post_start", "index": 1})
+    assert parse_event(line) == {"type": "post_start", "index": 1}
+    assert parse_event("普通输出") is None
+    assert parse_event(EVENT_PREFIX + "{broken") is None
+
+
+def test_publish_articles_streams(tmp_path, monkeypatch):
+    """发布过程中逐步产出输出，并统计每篇结果"""
+    print("\n测试: 发布输出流式显示")
+    import ui
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "publish_csdn.py").write_text(FAKE_PUBLISHER, encoding="utf-8")
+    (tmp_path / "posts").mkdir()
+    for i in range(3):
+        (tmp_path / "posts" / f"{i}.md").write_text("正文", encoding="utf-8")
+
+    updates = [text for text, _ in ui.publish_articles(3, True, progress=lambda *a, **k: None)]
+
+    assert len(updates) > 3
+    assert any("正在发布第 1 篇" in u and "已完成 1/3" in u for u in updates)
+    final = updates[-1]
+    assert "已完成 3/3（成功 2，失败 1）" in final
+    assert "✅ 发布完成" in final
+    print("✓ 通过")
+
+
+def test_publish_job_logs_lines(tmp_path, monkeypatch):
+    """后台任务版本把普通输出写入任务日志，事件用于更新进度"""
+    import ui
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "publish_csdn.py").write_text(FAKE_PUBLISHER, encoding="utf-8")
+    (tmp_path / "posts").mkdir()
+    (tmp_path / "posts" / "a.md").write_text("正文", encoding="utf-8")
+
+    class Ctx:
+        def __init__(self):
+            self.logs, self.fractions = [], []
+
+        def __call__(self, fraction=None, desc=None):
+            self.fractions.append(fraction)
+
+        def log(self, line):
+            self.logs.append(line)
+
+        def check(self):
+            pass
+
+    ctx = Ctx()
+    result = ui.publish_job(ctx, 1, True)
+    assert ctx.logs == ["正在发布第 1 篇"]
+    assert ctx.fractions[-1] == 1.0
+    assert "已完成 1/1" in result
+
+
+def test_publishes_are_serialized_and_archived(monkeypatch):
+    """所有发布入口共用一把锁：等待期间产出 waiting 事件；发布成功的文章随即归档"""
+    print("\n测试: 发布串行化与归档")
+    import ui
+
+    archived = []
+    monkeypatch.setattr(ui, "archive_published", archived.append)
+
+    def fake_stream(count, headless, warm):
+        yield None, {"type": "post_done", "file": "posts/a.md", "status": "published"}
+        yield None, {"type": "post_done", "file": "posts/b.md", "status": "error"}
+        yield None, {"type": "exit", "returncode": 0}
+
+    monkeypatch.setattr(ui, "open_publish_stream", fake_stream)
+
+    assert ui.publish_lock.acquire(timeout=1)
+    stream = ui.serialized_publish_stream(2, True, False)
+    try:
+        assert next(stream) == (None, {"type": "waiting"})
+    finally:
+        ui.publish_lock.release()
+    rest = list(stream)
+    assert rest[-1] == (None, {"type": "exit", "returncode": 0})
+    assert archived == ["posts/a.md"]
+    assert not ui.publish_lock.locked()
+    print("✓ 通过")
+
+
+def test_archive_moves_article_in_search_index(tmp_path, monkeypatch):
+    """归档到 published/ 后检索索引立即更新：来源变为 csdn_published，不等下一次目录同步"""
+    print("\n测试: 归档时增量更新检索索引")
+    import ui
+    from article_search import ArticleIndex
+
+    posts, published = tmp_path / "posts", tmp_path / "published"
+    posts.mkdir()
+    index = ArticleIndex(tmp_path / "index.db", roots={"csdn": posts, "csdn_published": published})
+    monkeypatch.setattr(ui, "get_article_index", lambda: index)
+    monkeypatch.setattr(ui, "get_file_index", lambda: type("Idx", (), {"update_path": lambda self, p: None})())
+    monkeypatch.setattr(ui, "PUBLISHED_DIR", published)
+
+    article = posts / "a.md"
+    article.write_text("# 强化学习入门\n\n正文", encoding="utf-8")
+    index.update_path(article)
+    assert [r["source"] for r in index.search("强化学习")] == ["csdn"]
+
+    ui.archive_published(str(article))
+    assert [r["source"] for r in index.search("强化学习")] == ["csdn_published"]
+    index.close()
+    print("✓ 通过")
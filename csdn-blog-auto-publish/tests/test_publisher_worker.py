@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+测试常驻发布进程（publisher_worker.py）中不依赖真实浏览器的部分
+"""
+
+import queue
+import threading
+
+import publish_csdn
+import publisher_worker
+from publish_events import parse_event
+
+
+def collect_events(out_q):
+    events = []
+    while True:
+        try:
+            _, kind, payload = out_q.get_nowait()
+        except queue.Empty:
+            return events
+        event = parse_event(payload) if kind == "line" else None
+        if event:
+            events.append(event)
+
+
+def test_queue_writer_splits_lines():
+    """子进程输出按行转发，并带上当前请求 ID"""
+    out_q = queue.Queue()
+    writer = publisher_worker._QueueWriter(out_q)
+    writer.req_id = "r1"
+    writer.write("第一行\n第二")
+    writer.write("行\n尾巴")
+    writer.flush()
+    assert [out_q.get_nowait() for _ in range(3)] == [
+        ("r1", "line", "第一行"), ("r1", "line", "第二行"), ("r1", "line", "尾巴")
+    ]
+
+
+def test_run_request_cooldown_and_cancel(monkeypatch):
+    """请求之间保持发布间隔；取消后不再处理剩余文章"""
+    print("\n测试: 常驻进程的发布请求")
+    calls = []
+    monkeypatch.setattr(publish_csdn, "publish_one", lambda page, fp, args, profile: calls.append(fp.name) or "published")
+    monkeypatch.setattr(publisher_worker, "PUBLISH_COOLDOWN", 0.2)
+
+    out_q = queue.Queue()
+    writer = publisher_worker._QueueWriter(out_q)
+    monkeypatch.setattr("sys.stdout", writer)
+    cancel = threading.Event()
+    state = {"last_publish": -1.0}
+
+    failed = publisher_worker._run_request(None, {"files": ["a.md", "b.md"]}, None, cancel, state)
+    writer.flush()
+    assert failed == 0
+    assert calls == ["a.md", "b.md"]
+    types = [e["type"] for e in collect_events(out_q)]
+    assert types == ["run_start", "post_start", "post_done", "cooldown", "post_start", "post_done", "run_end"]
+
+    # 上一次发布刚结束：新请求先等待间隔，期间取消则直接结束
+    cancel.set()
+    failed = publisher_worker._run_request(None, {"files": ["c.md"]}, None, cancel, state)
+    writer.flush()
+    assert failed == 0
+    assert calls == ["a.md", "b.md"]
+    run_end = [e for e in collect_events(out_q) if e["type"] == "run_end"][0]
+    assert run_end == {"type": "run_end", "published": 0, "filled": 0, "failed": 0}
+    print("✓ 通过")
+
+
+class FakeProc:
+    def __init__(self, thread):
+        self.thread = thread
+        self.exitcode = 0
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+
+    def terminate(self):
+        pass
+
+
+def fake_start(worker):
+    """用线程代替子进程：按 _pick_files 挑选文件，每篇输出一行文件名"""
+    def start():
+        if worker.alive:
+            return
+        worker._cmd_q, worker._out_q, worker._cancel = queue.Queue(), queue.Queue(), threading.Event()
+
+        def child():
+            published = set()
+            while True:
+                cmd = worker._cmd_q.get()
+                if cmd.get("op") == "stop":
+                    return
+                for fp in publisher_worker._pick_files(cmd, published):
+                    published.add(str(fp.resolve()))
+                    worker._out_q.put((cmd["id"], "line", fp.name))
+                worker._out_q.put((cmd["id"], "done", 0))
+
+        thread = threading.Thread(target=child, daemon=True)
+        thread.start()
+        worker._proc = FakeProc(thread)
+    return start
+
+
+def test_queued_requests_pick_files_in_turn(tmp_path):
+    """排队的请求轮到时才挑选文章，不会重复发布；丢弃的输出流不阻塞后续请求"""
+    print("\n测试: 常驻进程的请求队列")
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.md").write_text(name, encoding="utf-8")
+    worker = publisher_worker.PublisherWorker()
+    worker.start = fake_start(worker)
+
+    # 第一个请求的调用方从不读取输出（例如页面断开）
+    worker.publish(count=2, posts_dir=tmp_path)
+    second = list(worker.publish(count=2, posts_dir=tmp_path))
+    assert [line for line, _ in second if line] == ["c.md"]
+    assert second[-1] == (None, {"type": "exit", "returncode": 0})
+
+    # 显式文件列表同样跳过已发布的文章
+    third = list(worker.publish(files=[tmp_path / "a.md"]))
+    assert [line for line, _ in third if line] == []
+    worker.stop(timeout=2)
+    print("✓ 通过")
+
+
+def test_pick_files_skips_published(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.md").write_text(name, encoding="utf-8")
+    published = {str((tmp_path / "a.md").resolve())}
+    assert publisher_worker._pick_files({"posts_dir": str(tmp_path), "count": 5}, published) == [tmp_path / "b.md"]
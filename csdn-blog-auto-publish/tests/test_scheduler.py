@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+测试内置定时调度（scheduler.py）：cron 解析、补跑策略、运行锁与时间预算
+"""
+
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+import scheduler
+from scheduler import Budget, BudgetExceeded, CronError, CronExpr, RunLock, Scheduler
+
+
+def test_cron_next_after():
+    print("\n测试: cron 表达式")
+    t = datetime(2026, 1, 30, 22, 10)
+    assert CronExpr("30 5 * * *").next_after(t) == datetime(2026, 1, 31, 5, 30)
+    assert CronExpr("*/20 * * * *").next_after(t) == datetime(2026, 1, 30, 22, 20)
+    assert CronExpr("15 9-21/2 * * *").next_after(datetime(2026, 1, 30, 9, 15)) == datetime(2026, 1, 30, 11, 15)
+    # 跨月、跨年
+    assert CronExpr("0 0 1 * *").next_after(t) == datetime(2026, 2, 1, 0, 0)
+    assert CronExpr("0 12 29 2 *").next_after(t) == datetime(2028, 2, 29, 12, 0)
+    # 星期：2026-01-30 是周五，0 和 7 都是周日
+    assert CronExpr("0 8 * * 0").next_after(t) == datetime(2026, 2, 1, 8, 0)
+    assert CronExpr("0 8 * * 7").next_after(t) == datetime(2026, 2, 1, 8, 0)
+    assert CronExpr("0 8 * * 1-5").next_after(t) == datetime(2026, 2, 2, 8, 0)
+    # 日和星期都指定时满足其一即可
+    assert CronExpr("0 0 13 * 5").next_after(datetime(2026, 2, 1)) == datetime(2026, 2, 6, 0, 0)
+    print("✓ 通过")
+
+
+@pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "a * * * *", "5-1 * * * *"])
+def test_cron_invalid(expr):
+    with pytest.raises(CronError):
+        CronExpr(expr)
+
+
+def make_scheduler(tmp_path, catch_up, cron="0 * * * *"):
+    fired = []
+    (tmp_path / "schedule.json").write_text(json.dumps({"entries": [
+        {"name": "job", "cron": cron, "stage": "generate", "catch_up": catch_up, "enabled": True}
+    ]}), encoding="utf-8")
+    sched = Scheduler(lambda entry, when: fired.append(when),
+                      schedule_file=tmp_path / "schedule.json", state_file=tmp_path / "state.json")
+    return sched, fired
+
+
+@pytest.mark.parametrize("catch_up, expected", [
+    ("skip", []),
+    ("once", [datetime(2026, 3, 1, 13, 0)]),
+    ("all", [datetime(2026, 3, 1, h, 0) for h in (11, 12, 13)]),
+])
+def test_catch_up_policies(tmp_path, catch_up, expected):
+    """服务停机期间错过的运行按补跑策略处理"""
+    sched, fired = make_scheduler(tmp_path, catch_up)
+    assert sched.tick(datetime(2026, 3, 1, 10, 30)) == []  # 新计划从现在开始计时
+    assert sched.tick(datetime(2026, 3, 1, 10, 59)) == []
+
+    # 重启后（重新读取状态文件）发现错过了 11、12、13 点
+    sched, fired = make_scheduler(tmp_path, catch_up)
+    sched.tick(datetime(2026, 3, 1, 13, 20))
+    assert fired == expected
+    # 已处理过的时间点不会再次触发
+    assert sched.tick(datetime(2026, 3, 1, 13, 30)) == []
+
+
+def test_on_time_run_and_disable(tmp_path):
+    """准时的运行总会执行；停用期间不累积错过的运行"""
+    sched, fired = make_scheduler(tmp_path, "skip")
+    sched.tick(datetime(2026, 3, 1, 10, 30))
+    sched.tick(datetime(2026, 3, 1, 11, 0, 30))
+    assert fired == [datetime(2026, 3, 1, 11, 0)]
+
+    text = (tmp_path / "schedule.json").read_text(encoding="utf-8").replace("true", "false")
+    sched.update_schedule(text)
+    sched.tick(datetime(2026, 3, 1, 12, 0))
+    sched.update_schedule(text.replace("false", "true"))
+    sched.tick(datetime(2026, 3, 1, 15, 30))
+    assert fired == [datetime(2026, 3, 1, 11, 0)]
+
+    with pytest.raises(ValueError):
+        sched.update_schedule('{"entries": [{"name": "x", "cron": "bad", "stage": "generate"}]}')
+    assert sched.get_entry("job") is not None
+
+
+def test_run_lock_excludes_threads_and_processes(tmp_path):
+    print("\n测试: 运行锁")
+    path = tmp_path / "pipeline.lock"
+    lock = RunLock(path)
+    assert lock.acquire("测试")
+    assert "测试" in lock.holder()
+    assert not lock.acquire("同进程的另一个任务")
+    assert not RunLock(path).acquire("另一个实例")
+
+    module_dir = Path(scheduler.__file__).parent
+    code = "import sys; from scheduler import RunLock; sys.exit(0 if RunLock(sys.argv[1]).acquire('子进程') else 3)"
+    assert subprocess.run([sys.executable, "-c", code, str(path)], cwd=module_dir).returncode == 3
+
+    lock.release()
+    assert lock.holder() == ""
+    assert subprocess.run([sys.executable, "-c", code, str(path)], cwd=module_dir).returncode == 0
+    assert lock.acquire("再次获取")
+    lock.release()
+    print("✓ 通过")
+
+
+def test_budget():
+    Budget(None).check()
+    Budget(10).check()
+    with pytest.raises(BudgetExceeded):
+        Budget(1e-9).check()
+
+
+class FakeBudget:
+    """到 expire() 之后才超出预算"""
+    current = None
+
+    def __init__(self, minutes):
+        self.expired = False
+        FakeBudget.current = self
+
+    def check(self):
+        if self.expired:
+            raise BudgetExceeded("超出时间预算")
+
+
+class FakeCtx:
+    def __init__(self):
+        self.values = []
+        self.lines = []
+
+    def __call__(self, value, desc=None):
+        self.values.append(value)
+
+    def log(self, line):
+        self.lines.append(line)
+
+    def check(self):
+        pass
+
+
+class FakeScheduler:
+    def __init__(self, stage):
+        self.entry = {"name": "job", "stage": stage, "budget_minutes": 5,
+                      "params": {"days": 1, "topics": "", "count": 2}}
+
+    def get_entry(self, name):
+        return self.entry
+
+
+def _scheduled(monkeypatch, stage):
+    import ui
+    monkeypatch.setattr(ui, "Budget", FakeBudget)
+    monkeypatch.setattr(ui, "get_scheduler", lambda: FakeScheduler(stage))
+    return ui
+
+
+def test_budget_passes_through_search_handler(monkeypatch):
+    """搜索途中超出预算：穿过 search_news 的 except Exception，报告为超出预算而不是搜索失败"""
+    print("\n测试: 搜索中途超出预算")
+    ui = _scheduled(monkeypatch, "search")
+
+    class SlowSearcher:
+        def search_tech_news(self, days_ago, topics):
+            FakeBudget.current.expired = True
+            return [{"title": "新闻"}]
+
+        def _parse_search_results(self, news_list, count):
+            raise AssertionError("超出预算后不应继续")
+
+    def init_components(self, api_key=None):
+        self.news_searcher = SlowSearcher()
+
+    monkeypatch.setattr(ui.AppState, "init_components", init_components)
+    result = ui.run_scheduled(FakeCtx(), "job")
+    assert result.startswith("⏱️"), result
+    print("✓ 通过")
+
+
+def test_auto_budget_checked_inside_steps_but_not_after_last(monkeypatch):
+    """一键流程：预算在各步骤内部的检查点生效；全部完成后超出预算不影响结果"""
+    print("\n测试: 一键流程的预算检查点")
+    ui = _scheduled(monkeypatch, "auto")
+    calls = []
+
+    def step(name, expire_at=None):
+        def run(*args, progress=None):
+            calls.append(name)
+            progress(0.5, desc=name)
+            if name == expire_at:
+                FakeBudget.current.expired = True
+            progress(1.0, desc=name)
+            return ("✅ 完成", "", "")[:2 if name != "titles" else 3]
+        return run
+
+    monkeypatch.setattr(ui, "search_news", step("search"))
+    monkeypatch.setattr(ui, "generate_titles", step("titles"))
+    monkeypatch.setattr(ui, "generate_articles", step("articles", expire_at="articles"))
+    ctx = FakeCtx()
+    result = ui.run_scheduled(ctx, "job")
+    assert not result.startswith("⏱️"), result
+    assert calls == ["search", "titles", "articles"]
+    assert ctx.values[-1] == 1.0
+    assert ctx.values == sorted(ctx.values)  # 子步骤进度映射到整体进度区间内
+
+    calls.clear()
+    monkeypatch.setattr(ui, "generate_articles", step("articles"))
+    monkeypatch.setattr(ui, "generate_titles", step("titles", expire_at="titles"))
+    monkeypatch.setattr(ui, "search_news", step("search"))
+    result = ui.run_scheduled(FakeCtx(), "job")
+    assert result.startswith("⏱️"), result
+    assert calls == ["search", "titles"]  # 生成标题内部的检查点就停止了
+    print("✓ 通过")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+测试选择器策略画像（selector_profile.py）
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from selector_profile import SelectorProfile
+import publish_csdn
+
+
+CANDIDATES = ['input.a', 'input.b', 'input.c']
+
+
+def test_winner_first_and_short_probe():
+    """成功过的候选排在最前，其余候选只做短探测"""
+    print("\n测试: 赢家优先 + 短探测")
+    profile = SelectorProfile("csdn", path=None, probe_timeout=1500)
+
+    # 冷启动：保持原顺序和默认超时
+    assert profile.order('title', CANDIDATES) == CANDIDATES
+    assert profile.timeout_for('title', 'input.a', 20000) == 20000
+
+    winner = profile.try_in_order('title', CANDIDATES, lambda c: c == 'input.c')
+    assert winner == 'input.c'
+    assert profile.order('title', CANDIDATES) == ['input.c', 'input.a', 'input.b']
+    assert profile.timeout_for('title', 'input.c', 20000) == 20000
+    assert profile.timeout_for('title', 'input.a', 20000) == 1500
+    print("✓ 通过")
+
+
+def test_persist_and_fingerprint_reset():
+    """画像可落盘复用，站点指纹变化时自动失效"""
+    print("\n测试: 持久化与指纹失效")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "profile.json"
+
+        profile = SelectorProfile("csdn", path=path)
+        profile.check_fingerprint("v1")
+        profile.record_success('editor', 'api', 0.12)
+        profile.save()
+        assert json.loads(path.read_text(encoding="utf-8"))["csdn"]["entries"]["editor"]["winner"] == 'api'
+
+        warm = SelectorProfile("csdn", path=path)
+        assert warm.winner('editor') == 'api'
+        assert warm.check_fingerprint("v1") is False
+        assert warm.winner('editor') == 'api'
+
+        assert warm.check_fingerprint("v2") is True
+        assert warm.winner('editor') is None
+    print("✓ 通过")
+
+
+def test_failed_winner_is_dropped():
+    """赢家失败后其余候选恢复默认超时，连续失败则作废"""
+    print("\n测试: 赢家失效")
+    profile = SelectorProfile("csdn", path=None)
+    profile.record_success('publish_button', 'input.a', 0.1)
+
+    profile.record_failure('publish_button', 'input.a')
+    assert profile.timeout_for('publish_button', 'input.b', 20000) == 20000
+    assert profile.winner('publish_button') == 'input.a'
+
+    profile.record_failure('publish_button', 'input.a')
+    assert profile.winner('publish_button') is None
+
+    # 新的候选成功后成为赢家
+    assert profile.try_in_order('publish_button', CANDIDATES, lambda c: c == 'input.b') == 'input.b'
+    assert profile.winner('publish_button') == 'input.b'
+    print("✓ 通过")
+
+
+def test_expired_profile_is_ignored():
+    """超过有效期的画像不再使用"""
+    print("\n测试: 画像过期")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "profile.json"
+        path.write_text(json.dumps({
+            "csdn": {"fingerprint": "v1", "created_at": 0, "entries": {"title": {"winner": "input.a"}}}
+        }), encoding="utf-8")
+        profile = SelectorProfile("csdn", path=path, ttl_days=7)
+        assert profile.winner('title') is None
+    print("✓ 通过")
+
+
+class FakeEditorPage:
+    """只实现 fill_editor_with_markdown 用到的方法；accepts 为 False 时编辑器不接受写入"""
+
+    def __init__(self, accepts: bool):
+        self.accepts = accepts
+
+    def evaluate(self, script, arg=None):
+        return False  # 没有 CodeMirror / monaco
+
+    def query_selector(self, sel):
+        return object()
+
+    def eval_on_selector(self, sel, script, arg):
+        pass
+
+    def wait_for_function(self, script, arg=None, timeout=None):
+        if not self.accepts:
+            from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+            raise PlaywrightTimeoutError("timeout")
+
+    def locator(self, sel):
+        raise RuntimeError("no paste target")
+
+
+def test_js_write_is_verified_before_learning():
+    """JS 写入后编辑器内容未变化时不算成功，不会被记为赢家"""
+    print("\n测试: JS 写入需经编辑器内容确认")
+    profile = SelectorProfile("csdn", path=None, probe_timeout=10)
+    assert publish_csdn.fill_editor_with_markdown(FakeEditorPage(accepts=False), "正文" * 20, profile) is False
+    assert profile.winner('editor') is None
+
+    assert publish_csdn.fill_editor_with_markdown(FakeEditorPage(accepts=True), "正文" * 20, profile) is True
+    assert profile.winner('editor').startswith('js:')
+    print("✓ 通过")
+
+
+if __name__ == "__main__":
+    test_winner_first_and_short_probe()
+    test_persist_and_fingerprint_reset()
+    test_failed_winner_is_dropped()
+    test_expired_profile_is_ignored()
+    test_js_write_is_verified_before_learning()
+    print("\n✅ 所有测试通过！")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+测试启动耗时基准（startup_profile.py）与重依赖的延迟导入
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from startup_profile import parse_importtime, aggregate_by_package, check_budget
+
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+import time:       300 |        300 |   zhipuai._client
+import time:       200 |        500 | zhipuai
+import time:        50 |         50 |   json.decoder
+import time:        80 |        130 | json
+"""
+
+
+def test_parse_importtime():
+    entries = parse_importtime(SAMPLE)
+    assert entries[0] == ("_io", 120, 120, 0)
+    assert entries[1] == ("zhipuai._client", 300, 300, 1)
+    assert entries[-1] == ("json", 80, 130, 0)
+    assert len(entries) == 5  # 表头行被跳过
+
+
+def test_aggregate_by_package():
+    totals = aggregate_by_package(parse_importtime(SAMPLE))
+    assert totals == {"zhipuai": 500, "json": 130, "_io": 120}
+    assert list(totals) == ["zhipuai", "json", "_io"]
+
+
+def test_check_budget():
+    results = {"a": {"median_ms": 90.0}, "b": {"median_ms": 300.0}, "c": {"median_ms": 1.0}}
+    over = check_budget(results, {"a": 100, "b": 200})
+    assert len(over) == 1 and over[0].startswith("b:")
+
+
+def test_cli_modules_do_not_load_heavy_sdks():
+    """导入生成/发布模块时不应加载 zhipuai 与完整的 playwright.sync_api（首次使用时才导入）"""
+    code = (
+        "import sys, zhipu_news_search, zhipu_content_generator, publish_csdn, auto_generate, auto_generate_daily\n"
+        "print(','.join(m for m in ('zhipuai', 'playwright.sync_api', 'pyperclip', 'frontmatter') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
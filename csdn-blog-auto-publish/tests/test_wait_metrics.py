@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+测试等待耗时记录器（wait_metrics.py）
+"""
+
+from wait_metrics import WaitRecorder
+
+
+def test_measure_and_report():
+    """记录实际耗时并与原固定延迟对比"""
+    print("\n测试: 等待耗时报告")
+    recorder = WaitRecorder()
+    with recorder.measure("modal_visible", legacy=0.5):
+        pass
+    recorder.record("editor_content", 0.3, 2.0, ok=True)
+    recorder.record("editor_content", 0.5, 2.0, ok=False)
+
+    summary = recorder.summary()
+    assert summary["modal_visible"]["count"] == 1
+    assert summary["editor_content"]["count"] == 2
+    assert summary["editor_content"]["timeouts"] == 1
+    assert abs(summary["editor_content"]["legacy_total"] - 4.0) < 1e-9
+
+    report = recorder.report()
+    print(report)
+    assert "editor_content" in report
+    assert "原固定延迟合计" in report
+    print("✓ 通过")
+
+
+def test_failed_wait_is_recorded():
+    """条件等待抛出异常时也会被记录为未满足"""
+    print("\n测试: 异常等待记录")
+    recorder = WaitRecorder()
+    try:
+        with recorder.measure("publish_xhr", legacy=1.0):
+            raise TimeoutError("timeout")
+    except TimeoutError:
+        pass
+    assert recorder.records[0]["ok"] is False
+    print("✓ 通过")
+
+
+if __name__ == "__main__":
+    test_measure_and_report()
+    test_failed_wait_is_recorded()
+    print("\n✅ 所有测试通过！")
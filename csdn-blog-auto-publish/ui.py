@@ -6,9 +6,14 @@ CSDN自动发布系统 - 可视化界面
 
 import gradio as gr
 import os
+import sys
 import json
-import subprocess
+import html
+import time
 import threading
+import atexit
+from collections import deque
+from contextlib import closing
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Tuple, Optional
@@ -16,56 +21,186 @@ from typing import List, Tuple, Optional
 # 导入核心模块
 from zhipu_news_search import ZhipuNewsSearcher
 from zhipu_content_generator import ZhipuContentGenerator
-import subprocess
+from job_queue import JobQueue, format_job_table, format_job_detail
+from publish_events import parse_event
+from posts_index import FileIndex
+from publisher_worker import PublisherWorker
+from client_pool import get_client_pool
+from article_search import ArticleIndex, format_results, DEFAULT_ROOTS as ARTICLE_SOURCES
+import metrics
+from metrics import MetricsStore
+from scheduler import Scheduler, RunLock, Budget, BudgetExceeded
+from article_preview import PreviewCache, PREVIEW_CHARS
 
 # 配置
 POSTS_DIR = Path("posts")
 TODO_DIR = Path("todo")
 POSTS_LIMIT = 16
+JOBS_DB = Path("jobs.db")
+ARTICLE_INDEX_DB = Path("article_index.db")
+# 定时发布成功后文章移到这里，避免下一次定时发布重复发布
+PUBLISHED_DIR = Path("published")
+# 文章管理列表每页条数
+POSTS_PAGE_SIZE = 20
+# 后台任务队列的并发上限：大模型调用 2 个，浏览器发布 1 个
+JOB_WORKERS = {"llm": 2, "publish": 1}
+# 各类界面事件同时处理的请求数（多个浏览器会话共享）
+EVENT_CONCURRENCY = {"search": 4, "titles": 4, "articles": 2, "auto": 2, "publish": 1}
 
-# 全局状态
+# 会话状态：每个浏览器会话（gr.State）一份，互不覆盖搜索结果与标题
 class AppState:
-    def __init__(self):
+    def __init__(self, search_results: Optional[list] = None, titles_info: Optional[list] = None):
         self.news_searcher = None
         self.content_generator = None
-        self.api_key = os.getenv("ZHIPUAI_API_KEY", "")
-        self.search_results = None
-        self.titles_info = None
+        self.search_results = search_results
+        self.titles_info = titles_info
+    
+    @property
+    def api_key(self) -> str:
+        """API Key 为进程级配置，所有会话共用"""
+        return os.getenv("ZHIPUAI_API_KEY", "")
         
     def init_components(self, api_key: str = None):
-        """初始化组件"""
+        """初始化组件（底层客户端按 API Key 共享，并按模型限制并发）"""
         if api_key:
-            self.api_key = api_key
             os.environ["ZHIPUAI_API_KEY"] = api_key
         
         if not self.api_key:
             raise ValueError("请先设置 API Key")
         
-        self.news_searcher = ZhipuNewsSearcher(self.api_key)
-        self.content_generator = ZhipuContentGenerator(self.api_key)
+        client = get_client_pool(self.api_key)
+        self.news_searcher = ZhipuNewsSearcher(self.api_key, client=client)
+        self.content_generator = ZhipuContentGenerator(self.api_key, client=client)
         
         return "✅ 组件初始化成功"
 
+# 默认状态：供命令行/脚本直接调用这些函数时使用，界面中每个会话使用自己的 AppState
 app_state = AppState()
 
+# 文章预览的渲染缓存（按内容哈希，所有会话共用）
+preview_cache = PreviewCache()
+
+# 生成文章前获取的运行锁（与 auto_generate_daily.py 共用），避免同时运行的任务争抢 posts 名额
+pipeline_lock = RunLock()
+
+# 所有发布入口（前台按钮、后台任务、定时发布）共用的锁：同一时间只运行一个发布，
+# 后来者排队，轮到时已发布的文章已经移出 posts/，不会被重复发布
+publish_lock = threading.Lock()
+
 # ===================== 工具函数 =====================
 
+_file_index = None
+_file_index_lock = threading.Lock()
+
+def get_file_index() -> FileIndex:
+    """获取（首次调用时创建并启动）posts/ 与 todo/ 的内存索引"""
+    global _file_index
+    with _file_index_lock:
+        if _file_index is None:
+            index = FileIndex(POSTS_DIR, TODO_DIR)
+            index.start()
+            _file_index = index
+    return _file_index
+
+_article_index = None
+_article_index_lock = threading.Lock()
+
+def get_article_index() -> ArticleIndex:
+    """获取（首次调用时创建）CSDN / 公众号 / 知乎文章的全文索引"""
+    global _article_index
+    with _article_index_lock:
+        if _article_index is None:
+            _article_index = ArticleIndex(ARTICLE_INDEX_DB)
+    return _article_index
+
+def search_articles(query: str, source: str = "全部", limit: int = 20) -> str:
+    """全文检索已生成/已发布的文章"""
+    if not query or not query.strip():
+        return "请输入关键词"
+    index = get_article_index()
+    # 其他进程（发布脚本）移动/删除的文件在这里增量同步，节流避免每次查询都扫描目录
+    index.maybe_sync()
+    start = time.monotonic()
+    results = index.search(query, limit=int(limit), source=None if source == "全部" else source)
+    return format_results(results, (time.monotonic() - start) * 1000)
+
+_metrics_store = None
+_metrics_store_lock = threading.Lock()
+
+def get_metrics_store() -> MetricsStore:
+    """获取（首次调用时创建并启动定期汇总）性能统计聚合表"""
+    global _metrics_store
+    with _metrics_store_lock:
+        if _metrics_store is None:
+            store = MetricsStore()
+            store.start()
+            _metrics_store = store
+    return _metrics_store
+
+# 仪表盘时间范围 → (秒数, 折线图的时间粒度秒数)
+DASHBOARD_RANGES = {
+    "最近24小时": (86400, 3600),
+    "最近7天": (7 * 86400, 3600),
+    "最近30天": (30 * 86400, 86400),
+    "最近一年": (365 * 86400, 86400),
+}
+
+def load_dashboard(range_label: str = "最近7天"):
+    """读取聚合表生成仪表盘数据（只查询预先汇总的按小时统计）"""
+    import pandas as pd
+    
+    store = get_metrics_store()
+    store.ingest()  # 只汇总上次之后新增的事件
+    seconds, bucket = DASHBOARD_RANGES.get(range_label, DASHBOARD_RANGES["最近7天"])
+    since = time.time() - seconds
+    
+    series = store.article_series(since, bucket)
+    articles_df = pd.DataFrame(
+        [{"时间": datetime.fromtimestamp(r["time"]), "类型": "生成", "篇数": r["generated"]} for r in series]
+        + [{"时间": datetime.fromtimestamp(r["time"]), "类型": "发布", "篇数": r["published"]} for r in series],
+        columns=["时间", "类型", "篇数"]
+    )
+    
+    def fmt(v):
+        return round(v, 2) if v is not None else None
+    
+    llm_df = pd.DataFrame(
+        [[r["model"], r["calls"], r["failed"], fmt(r["p50"]), fmt(r["p90"]), fmt(r["p99"]), r["tokens"], round(r["cost"], 4)]
+         for r in store.llm_latency(since)],
+        columns=["模型", "调用次数", "失败", "p50(秒)", "p90(秒)", "p99(秒)", "tokens", "费用(元)"]
+    )
+    phases_df = pd.DataFrame(
+        [{"阶段": r["phase"], "指标": name, "秒": round(r[key], 2)}
+         for r in store.phase_timings(since) for name, key in (("平均", "mean"), ("p90", "p90"))],
+        columns=["阶段", "指标", "秒"]
+    )
+    failures = store.failure_rates(since)
+    failures_df = pd.DataFrame(
+        [{"环节": r["stage"], "失败率(%)": round(r["rate"] * 100, 1)} for r in failures],
+        columns=["环节", "失败率(%)"]
+    )
+    
+    cost = store.article_cost(since)
+    total_generated = sum(r["generated"] for r in series)
+    total_published = sum(r["published"] for r in series)
+    summary = f"""
+### 📈 {range_label}
+
+- **生成文章**: {total_generated} 篇 | **发布**: {total_published} 篇
+- **每篇文章消耗**: {cost['tokens_per_article']:.0f} tokens，约 {cost['cost_per_article']:.4f} 元
+- **各环节失败**: {'，'.join(f"{r['stage']} {r['failed']}/{r['total']}" for r in failures) or '暂无数据'}
+    """
+    return summary.strip(), articles_df, llm_df, phases_df, failures_df
+
 def get_stats() -> dict:
     """获取系统统计信息"""
-    posts_count = len(list(POSTS_DIR.glob("*.md"))) if POSTS_DIR.exists() else 0
-    
-    # 获取今天的标题文件
+    index = get_file_index()
     today = datetime.now().strftime("%Y%m%d")
-    titles_file = TODO_DIR / f"{today}_titles.txt"
-    titles_count = 0
-    if titles_file.exists():
-        with open(titles_file, 'r', encoding='utf-8') as f:
-            titles_count = len([line for line in f if line.strip()])
     
     return {
-        "posts_count": posts_count,
+        "posts_count": index.posts_count(),
         "posts_limit": POSTS_LIMIT,
-        "titles_count": titles_count,
+        "titles_count": index.titles_count(today),
         "api_key_set": bool(app_state.api_key)
     }
 
@@ -84,30 +219,28 @@ def format_stats_display() -> str:
 
 def read_posts_list() -> List[Tuple[str, str]]:
     """读取待发布文章列表"""
-    if not POSTS_DIR.exists():
-        return []
-    
-    posts = []
-    for md_file in sorted(POSTS_DIR.glob("*.md")):
-        title = md_file.stem
-        size = md_file.stat().st_size
-        posts.append((title, f"{size} bytes"))
-    
-    return posts
+    return [(title, f"{size} bytes") for title, size in get_file_index().posts()]
 
 def read_titles_list(date_str: str = None) -> List[str]:
     """读取标题列表"""
     if not date_str:
         date_str = datetime.now().strftime("%Y%m%d")
     
-    titles_file = TODO_DIR / f"{date_str}_titles.txt"
-    if not titles_file.exists():
-        return []
-    
-    with open(titles_file, 'r', encoding='utf-8') as f:
-        titles = [line.strip() for line in f if line.strip()]
-    
-    return titles
+    return get_file_index().titles(date_str)
+
+def generated_titles_file(date_str: str = None) -> Path:
+    """当天已生成文章的标题记录（定时生成据此跳过已生成的标题）"""
+    return TODO_DIR / f"{date_str or datetime.now().strftime('%Y%m%d')}_generated.txt"
+
+def mark_generated(title: str):
+    with open(generated_titles_file(), "a", encoding="utf-8") as f:
+        f.write(title + "\n")
+
+def pending_titles() -> List[str]:
+    """今天的标题中尚未生成文章的部分"""
+    done_file = generated_titles_file()
+    done = set(done_file.read_text(encoding="utf-8").splitlines()) if done_file.exists() else set()
+    return [t for t in read_titles_list() if t not in done]
 
 def read_article_content(title: str) -> str:
     """读取文章内容"""
@@ -122,12 +255,13 @@ def read_article_content(title: str) -> str:
 
 # ===================== 核心功能函数 =====================
 
-def search_news(days: int, topics_str: str, count: int, progress=gr.Progress()) -> Tuple[str, str]:
+def search_news(days: int, topics_str: str, count: int, state: Optional[AppState] = None, progress=gr.Progress()) -> Tuple[str, str]:
     """搜索技术新闻"""
+    state = state or app_state
     try:
         # 初始化组件
-        if not app_state.news_searcher:
-            app_state.init_components()
+        if not state.news_searcher:
+            state.init_components()
         
         progress(0, desc="🔍 开始搜索新闻...")
         
@@ -139,10 +273,12 @@ def search_news(days: int, topics_str: str, count: int, progress=gr.Progress())
         
         # 搜索新闻
         progress(0.3, desc="🌐 正在搜索新闻...")
-        news_list = app_state.news_searcher.search_tech_news(
-            days_ago=days,
-            topics=topics
-        )
+        with metrics.stage("search") as st:
+            news_list = state.news_searcher.search_tech_news(
+                days_ago=days,
+                topics=topics
+            )
+            st["ok"] = bool(news_list)
         
         if not news_list:
             return "❌ 未搜索到新闻", format_stats_display()
@@ -150,15 +286,16 @@ def search_news(days: int, topics_str: str, count: int, progress=gr.Progress())
         progress(0.6, desc="🤖 正在提取关键信息...")
         
         # 提取关键信息
-        selected_news = app_state.news_searcher._parse_search_results(news_list, count)
+        with metrics.stage("extract"):
+            selected_news = state.news_searcher._parse_search_results(news_list, count)
         
         progress(0.9, desc="💾 保存搜索结果...")
         
         # 保存结果
         today = datetime.now().strftime("%Y%m%d")
-        app_state.news_searcher.save_news_info(selected_news, today)
+        state.news_searcher.save_news_info(selected_news, today)
         
-        app_state.search_results = selected_news
+        state.search_results = selected_news
         
         progress(1.0, desc="✅ 搜索完成！")
         
@@ -179,27 +316,32 @@ def search_news(days: int, topics_str: str, count: int, progress=gr.Progress())
     except Exception as e:
         return f"❌ 搜索失败: {str(e)}", format_stats_display()
 
-def generate_titles(count: int, progress=gr.Progress()) -> Tuple[str, str, str]:
+def generate_titles(count: int, state: Optional[AppState] = None, progress=gr.Progress()) -> Tuple[str, str, str]:
     """生成标题"""
+    state = state or app_state
     try:
-        if not app_state.news_searcher or not app_state.search_results:
+        if not state.search_results:
             return "❌ 请先搜索新闻", format_stats_display(), ""
+        if not state.news_searcher:
+            state.init_components()
         
         progress(0, desc="📝 开始生成标题...")
         
         # 生成标题
-        titles_with_info = app_state.news_searcher.generate_titles_from_news(
-            app_state.search_results,
-            count=count
-        )
+        with metrics.stage("titles"):
+            titles_with_info = state.news_searcher.generate_titles_from_news(
+                state.search_results,
+                count=count
+            )
         
         progress(0.7, desc="💾 保存标题信息...")
         
         # 保存标题
         today = datetime.now().strftime("%Y%m%d")
-        app_state.news_searcher.save_titles_with_info(titles_with_info, today)
+        state.news_searcher.save_titles_with_info(titles_with_info, today)
+        get_file_index().update_path(TODO_DIR / f"{today}_titles.txt")
         
-        app_state.titles_info = titles_with_info
+        state.titles_info = titles_with_info
         
         progress(1.0, desc="✅ 标题生成完成！")
         
@@ -222,11 +364,20 @@ def generate_titles(count: int, progress=gr.Progress()) -> Tuple[str, str, str]:
     except Exception as e:
         return f"❌ 生成失败: {str(e)}", format_stats_display(), gr.Dropdown(choices=[])
 
-def generate_articles(count: int, selected_titles: List[str], progress=gr.Progress()) -> Tuple[str, str]:
-    """生成文章"""
+def generate_articles(count: int, selected_titles: List[str], state: Optional[AppState] = None, progress=gr.Progress()) -> Tuple[str, str]:
+    """生成文章（持有运行锁，同一时间只有一个生成任务写入 posts 目录）"""
+    if not pipeline_lock.acquire("Web UI 文章生成"):
+        return f"❌ 另一个生成任务正在运行（{pipeline_lock.holder()}），请稍后再试", format_stats_display()
+    try:
+        return _generate_articles(count, selected_titles, state, progress)
+    finally:
+        pipeline_lock.release()
+
+def _generate_articles(count: int, selected_titles: List[str], state: Optional[AppState], progress) -> Tuple[str, str]:
+    state = state or app_state
     try:
-        if not app_state.content_generator:
-            app_state.init_components()
+        if not state.content_generator:
+            state.init_components()
         
         # 确定要生成的标题
         if selected_titles:
@@ -241,7 +392,7 @@ def generate_articles(count: int, selected_titles: List[str], progress=gr.Progre
         progress(0, desc=f"✍️ 准备生成 {len(titles_to_generate)} 篇文章...")
         
         # 检查 posts 目录
-        current_count = len(list(POSTS_DIR.glob("*.md"))) if POSTS_DIR.exists() else 0
+        current_count = get_file_index().posts_count()
         available_slots = POSTS_LIMIT - current_count
         
         if available_slots <= 0:
@@ -293,15 +444,20 @@ def generate_articles(count: int, selected_titles: List[str], progress=gr.Progre
 
 请直接输出文章内容，不要包含标题（标题将自动添加）。"""
                     
-                    article = app_state.content_generator.generate_article(prompt)
+                    with metrics.stage("article"):
+                        article = state.content_generator.generate_article(prompt)
                 else:
                     # 标准生成
-                    article = app_state.content_generator.generate_article(
-                        f"请撰写一篇关于'{title}'的技术博客"
-                    )
+                    with metrics.stage("article"):
+                        article = state.content_generator.generate_article(
+                            f"请撰写一篇关于'{title}'的技术博客"
+                        )
                 
                 # 保存文章
-                app_state.content_generator.save_article_to_posts(title, article)
+                saved_path = state.content_generator.save_article_to_posts(title, article)
+                get_file_index().update_path(saved_path)
+                get_article_index().update_path(saved_path)
+                mark_generated(title)
                 generated.append(title)
                 
             except Exception as e:
@@ -331,78 +487,200 @@ def generate_articles(count: int, selected_titles: List[str], progress=gr.Progre
     except Exception as e:
         return f"❌ 生成失败: {str(e)}", format_stats_display()
 
-def publish_articles(count: int, headless: bool, progress=gr.Progress()) -> Tuple[str, str]:
-    """发布文章到CSDN"""
+class PublishRun:
+    """汇总一次发布运行的实时输出与每篇文章的进度"""
+    
+    def __init__(self, total: int, headless: bool):
+        self.total = total
+        self.headless = headless
+        self.lines = deque(maxlen=40)
+        self.results = []
+        self.current = None
+        self.cooldown = False
+        self.waiting = False
+        self.returncode = None
+    
+    @property
+    def fraction(self) -> float:
+        return len(self.results) / self.total if self.total else 0.0
+    
+    @property
+    def desc(self) -> str:
+        if self.waiting:
+            return "⏳ 等待其他发布任务完成..."
+        if self.cooldown:
+            return f"⏳ 冷却中（已完成 {len(self.results)}/{self.total}）"
+        if self.current:
+            return f"📤 正在发布第 {self.current['index']}/{self.total} 篇..."
+        return "🚀 准备发布..."
+    
+    def feed(self, line: Optional[str], event: Optional[dict]):
+        """处理一行输出或一个事件"""
+        if event is None:
+            if line is not None:
+                self.lines.append(line)
+            return
+        kind = event.get("type")
+        if kind == "waiting":
+            self.waiting = True
+        elif kind == "run_start":
+            self.total = event.get("total", self.total)
+            self.waiting = False
+        elif kind == "post_start":
+            self.current = event
+            self.cooldown = False
+        elif kind == "post_done":
+            self.results.append(event)
+            self.current = None
+        elif kind == "cooldown":
+            self.cooldown = True
+        elif kind == "exit":
+            self.returncode = event.get("returncode")
+    
+    def render(self) -> str:
+        ok_count = sum(1 for r in self.results if r.get("ok"))
+        text = f"""
+### 🚀 发布到CSDN
+
+- **待发布**: {self.total} 篇
+- **模式**: {'无头模式' if self.headless else '可见模式'}
+- **进度**: 已完成 {len(self.results)}/{self.total}（成功 {ok_count}，失败 {len(self.results) - ok_count}）
+- **当前**: {self.desc}
+"""
+        if self.results:
+            text += "\n**每篇结果**:\n"
+            for r in self.results:
+                mark = "✅" if r.get("ok") else "❌"
+                text += f"\n{mark} {Path(r.get('file', '')).stem}（{r.get('seconds', 0)} 秒）"
+            text += "\n"
+        if self.returncode is not None:
+            if self.returncode == 0:
+                text += "\n### ✅ 发布完成\n"
+            else:
+                text += f"\n### ❌ 发布脚本异常退出（返回码 {self.returncode}）\n"
+        text += "\n**实时输出**（最近 40 行）:\n```\n" + "\n".join(self.lines) + "\n```\n"
+        return text
+
+def stream_publish(count: int, headless: bool):
+    """
+    启动 publish_csdn.py 并逐行产出 (line, event)
+    
+    不设总超时（每篇之间有 30 秒冷却，篇数多时运行时间很长）；
+    结束时产出 (None, {"type": "exit", "returncode": ...})。
+    生成器被提前关闭（任务取消、页面断开）时终止发布进程。
+    """
+    import subprocess
+
+    cmd = [sys.executable, "-u", "publish_csdn.py",
+           "--headless", "true" if headless else "false",
+           "--limit", str(count)]
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+        env=dict(os.environ, PYTHONUNBUFFERED="1")
+    )
     try:
-        progress(0, desc="🚀 准备发布...")
-        
-        # 获取待发布文章
-        posts = list(POSTS_DIR.glob("*.md"))
-        if not posts:
-            return "❌ 没有待发布的文章", format_stats_display()
-        
-        posts = sorted(posts)[:count]
-        
-        result_text = f"""
-### 🚀 开始发布到CSDN
+        for raw in proc.stdout:
+            line = raw.rstrip("\n")
+            yield line, parse_event(line)
+        yield None, {"type": "exit", "returncode": proc.wait()}
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
 
-- **待发布**: {len(posts)} 篇
-- **模式**: {'无头模式' if headless else '可见模式'}
+_publisher_worker = None
+_publisher_worker_lock = threading.Lock()
 
-**发布进度**:
-正在调用 publish_csdn.py 脚本...
-"""
-        
-        progress(0.5, desc="📤 正在发布文章...")
-        
-        # 使用subprocess调用publish_csdn.py
-        cmd = ["python", "publish_csdn.py"]
-        if headless:
-            cmd.extend(["--headless", "true"])
-        else:
-            cmd.extend(["--headless", "false"])
-        
-        # 运行发布脚本
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10分钟超时
-            )
-            
-            progress(1.0, desc="✅ 发布完成！")
-            
-            # 解析输出
-            if result.returncode == 0:
-                result_text += f"""
+def get_publisher_worker(headless: bool) -> PublisherWorker:
+    """获取常驻发布进程；无头设置变化时重启"""
+    global _publisher_worker
+    with _publisher_worker_lock:
+        if _publisher_worker is not None and _publisher_worker.headless != headless:
+            _publisher_worker.stop()
+            _publisher_worker = None
+        if _publisher_worker is None:
+            _publisher_worker = PublisherWorker(headless=headless)
+            atexit.register(_publisher_worker.stop)
+    return _publisher_worker
 
-### ✅ 发布完成
+def open_publish_stream(count: int, headless: bool, warm: bool):
+    """返回发布输出流：warm 时交给常驻发布进程，否则每次启动 publish_csdn.py"""
+    if warm:
+        # 文章在轮到该请求时才由常驻进程挑选，排队期间被其他请求发布的文章不会重复发布
+        return get_publisher_worker(headless).publish(count=count, posts_dir=POSTS_DIR)
+    return stream_publish(count, headless)
 
-**输出信息**:
-```
-{result.stdout}
-```
-"""
-            else:
-                result_text += f"""
+def serialized_publish_stream(count: int, headless: bool, warm: bool):
+    """
+    所有发布入口共用的发布输出流（格式与 open_publish_stream 相同）
 
-### ❌ 发布失败
+    等待 publish_lock 期间每秒产出一次 (None, {"type": "waiting"})，调用方借此更新状态、检查取消；
+    发布成功的文章随即移到 published/。
+    """
+    while not publish_lock.acquire(timeout=1):
+        yield None, {"type": "waiting"}
+    try:
+        with closing(open_publish_stream(count, headless, warm)) as stream:
+            for line, event in stream:
+                if event and event.get("type") == "post_done" and event.get("status") == "published":
+                    archive_published(event["file"])
+                yield line, event
+    finally:
+        publish_lock.release()
 
-**错误信息**:
-```
-{result.stderr}
-```
-"""
-        except subprocess.TimeoutExpired:
-            result_text += "\n\n### ⏱️ 发布超时（超过10分钟）"
-        except Exception as e:
-            result_text += f"\n\n### ❌ 执行失败: {str(e)}"
-        
-        return result_text, format_stats_display()
-        
+def publish_articles(count: int, headless: bool, warm: bool = False, progress=gr.Progress()):
+    """发布文章到CSDN（逐行实时显示发布脚本输出）"""
+    posts = list(POSTS_DIR.glob("*.md"))
+    if not posts:
+        yield "❌ 没有待发布的文章", format_stats_display()
+        return
+    
+    run = PublishRun(min(len(posts), count), headless)
+    progress(0, desc=run.desc)
+    yield run.render(), format_stats_display()
+    
+    last_yield = 0.0
+    try:
+        with closing(serialized_publish_stream(count, headless, warm)) as stream:
+            for line, event in stream:
+                run.feed(line, event)
+                if event:
+                    progress(run.fraction, desc=run.desc)
+                # 事件立即刷新，普通输出最多每 0.5 秒刷新一次
+                if event or time.monotonic() - last_yield > 0.5:
+                    last_yield = time.monotonic()
+                    yield run.render(), format_stats_display()
     except Exception as e:
-        return f"❌ 发布失败: {str(e)}", format_stats_display()
+        run.lines.append(f"❌ 执行失败: {str(e)}")
+    
+    yield run.render(), format_stats_display()
+
+def publish_job(ctx, count: int, headless: bool, warm: bool = False) -> str:
+    """后台任务版本的发布：输出写入任务日志，取消任务时终止发布进程"""
+    posts = list(POSTS_DIR.glob("*.md"))
+    if not posts:
+        return "❌ 没有待发布的文章"
+    
+    run = PublishRun(min(len(posts), count), headless)
+    ctx(0, desc=run.desc)
+    with closing(serialized_publish_stream(count, headless, warm)) as stream:
+        for line, event in stream:
+            run.feed(line, event)
+            if event:
+                ctx(run.fraction, desc=run.desc)
+            elif line is not None:
+                ctx.log(line)
+                ctx.check()
+    return run.render()
 
 def delete_article(title: str) -> Tuple[str, str]:
     """删除文章"""
@@ -412,18 +690,247 @@ def delete_article(title: str) -> Tuple[str, str]:
             return "❌ 文章不存在", format_stats_display()
         
         file_path.unlink()
+        get_file_index().update_path(file_path)
+        get_article_index().update_path(file_path)
         return f"✅ 已删除文章: {title}", format_stats_display()
         
     except Exception as e:
         return f"❌ 删除失败: {str(e)}", format_stats_display()
 
-def preview_article(title: str) -> str:
-    """预览文章"""
+def list_posts_page(page: int = 1, query: str = ""):
+    """分页列出待发布文章（只读索引中的元数据，不读取正文）"""
+    index = get_file_index()
+    _, total = index.posts_page(1, 0, query or "")
+    pages = max(1, -(-total // POSTS_PAGE_SIZE))
+    page = min(max(int(page or 1), 1), pages)
+    rows, _ = index.posts_page(page, POSTS_PAGE_SIZE, query or "")
+    table = [[title, f"{size / 1024:.1f} KB", datetime.fromtimestamp(mtime).strftime("%m-%d %H:%M")]
+             for title, size, mtime in rows]
+    return table, page, f"第 {page}/{pages} 页，共 {total} 篇"
+
+def preview_article(title: str, full: bool = False) -> Tuple[str, bool]:
+    """
+    预览文章：服务端渲染 HTML（按内容哈希缓存），长文章默认只渲染开头
+
+    Returns:
+        (html, 是否还有未显示的内容)
+    """
     if not title:
-        return "请选择要预览的文章"
+        return "<p>请在左侧列表中选择文章</p>", False
+    file_path = POSTS_DIR / f"{title}.md"
+    if not file_path.exists():
+        return "<p>文章不存在</p>", False
+    
+    rendered, truncated = preview_cache.render_file(file_path, limit=None if full else PREVIEW_CHARS)
+    header = f"<h1>{html.escape(title)}</h1>"
+    if truncated:
+        header += f"<p><em>文章较长，仅显示前 {PREVIEW_CHARS} 字，点击“加载全文”查看全部</em></p>"
+    return header + rendered, truncated
+
+def sub_progress(progress, start: float, end: float):
+    """把子步骤的 0~1 进度映射到整体进度的 [start, end] 区间（子步骤内的检查点同样生效）"""
+    def report(value, desc=None):
+        progress(start + (end - start) * value, desc=desc)
+    return report
+
+def auto_workflow(days, topics_str, count, state: Optional[AppState] = None, progress=gr.Progress()):
+    """一键自动化流程"""
+    state = state or app_state
+    result_text = "### ⚡ 开始自动化流程\n\n"
+    
+    # 步骤1: 搜索新闻
+    progress(0.1, desc="🔍 步骤1: 搜索新闻...")
+    search_result, _ = search_news(days, topics_str, count, state, progress=sub_progress(progress, 0.1, 0.4))
+    result_text += f"**步骤1: 搜索新闻**\n{search_result}\n\n"
+    
+    if "❌" in search_result:
+        return result_text, format_stats_display()
+    
+    # 步骤2: 生成标题
+    progress(0.4, desc="📝 步骤2: 生成标题...")
+    title_result, _, _ = generate_titles(count, state, progress=sub_progress(progress, 0.4, 0.7))
+    result_text += f"**步骤2: 生成标题**\n{title_result}\n\n"
+    
+    if "❌" in title_result:
+        return result_text, format_stats_display()
+    
+    # 步骤3: 生成文章
+    progress(0.7, desc="✍️ 步骤3: 生成文章...")
+    article_result, _ = generate_articles(count, [], state, progress=sub_progress(progress, 0.7, 1.0))
+    result_text += f"**步骤3: 生成文章**\n{article_result}\n\n"
+    
+    progress(1.0, desc="✅ 流程完成！")
+    result_text += "\n### ✅ 自动化流程完成！\n\n现在可以前往 'CSDN发布' 标签页发布文章。"
+    
+    return result_text, format_stats_display()
+
+# ===================== 后台任务队列 =====================
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """获取（首次调用时创建并启动）后台任务队列"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            queue = JobQueue(JOBS_DB, workers=JOB_WORKERS)
+            # 任务处理函数复用同步版本，ctx 充当 progress 并作为取消检查点；
+            # 每个任务使用独立的 AppState，所需的会话数据（搜索结果）随参数提交
+            queue.register("search_news", lambda ctx, **kw: search_news(state=AppState(), progress=ctx, **kw)[0], queue="llm")
+            queue.register("generate_titles", lambda ctx, search_results=None, **kw: generate_titles(
+                state=AppState(search_results=search_results), progress=ctx, **kw)[0], queue="llm")
+            queue.register("generate_articles", lambda ctx, **kw: generate_articles(state=AppState(), progress=ctx, **kw)[0], queue="llm")
+            queue.register("auto_workflow", lambda ctx, **kw: auto_workflow(state=AppState(), progress=ctx, **kw)[0], queue="llm")
+            queue.register("publish_articles", publish_job, queue="publish")
+            queue.register("scheduled_llm", run_scheduled, queue="llm")
+            queue.register("scheduled_publish", run_scheduled, queue="publish")
+            queue.start()
+            _job_queue = queue
+    return _job_queue
+
+def submit_job(kind: str, **params) -> str:
+    """提交后台任务，返回提示信息"""
+    try:
+        job_id = get_job_queue().submit(kind, **params)
+    except Exception as e:
+        return f"❌ 提交任务失败: {str(e)}"
+    return f"📥 已提交后台任务 `{job_id}`，可在“📋 任务队列”标签页查看进度与日志（刷新页面不会丢失）"
+
+def refresh_jobs_view(job_id: str):
+    """刷新任务列表与选中任务的详情"""
+    queue = get_job_queue()
+    job = queue.get(job_id.strip()) if job_id and job_id.strip() else None
+    return format_job_table(queue.recent(30)), format_job_detail(job)
+
+def cancel_job(job_id: str):
+    """取消任务"""
+    job_id = (job_id or "").strip()
+    if not job_id:
+        return "请先输入或选择任务ID"
+    if get_job_queue().cancel(job_id):
+        return f"🚫 已请求取消任务 `{job_id}`"
+    return f"❌ 任务 `{job_id}` 不存在或已结束"
+
+# ===================== 定时调度 =====================
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> Scheduler:
+    """获取（首次调用时创建并启动）定时调度器：到点的计划提交到后台任务队列执行"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(submit=submit_scheduled)
+            _scheduler.start()
+    return _scheduler
+
+def submit_scheduled(entry: dict, scheduled_for: datetime) -> str:
+    """把一次计划运行提交到对应的任务队列（发布走 publish 队列，其余走 llm 队列）"""
+    kind = "scheduled_publish" if entry["stage"] == "publish" else "scheduled_llm"
+    return get_job_queue().submit(kind, name=entry["name"], scheduled_for=scheduled_for.isoformat())
+
+def archive_published(file_path: str):
+    """发布成功的文章移到 published/，之后的任何发布（前台、后台、定时）都不会重复发布"""
+    src = Path(file_path)
+    if not src.exists():
+        return
+    PUBLISHED_DIR.mkdir(exist_ok=True)
+    dst = PUBLISHED_DIR / src.name
+    src.replace(dst)
+    get_file_index().update_path(src)
+    get_article_index().update_path(src)
+    get_article_index().update_path(dst)
+
+def run_scheduled(ctx, name: str, scheduled_for: str = "") -> str:
+    """
+    执行一次计划运行
+
+    每个环节在安全点（每篇文章之间、每行输出之后）检查时间预算，
+    超出预算后停止剩余工作并返回已完成的部分。
+    """
+    entry = get_scheduler().get_entry(name)
+    if entry is None:
+        return f"❌ 计划 {name} 不存在（可能已被删除）"
+    budget = Budget(entry["budget_minutes"])
+    params = entry["params"]
+    stage = entry["stage"]
+    ctx.log(f"计划 {name}（{stage}）开始，计划时间 {scheduled_for or '立即'}")
+    
+    def progress(value, desc=None):
+        # 全部工作完成后（进度 1.0）不再检查预算，已完成的运行不会被报告为“已停止”
+        if value < 1.0:
+            budget.check()
+        ctx(value, desc=desc)
     
-    content = read_article_content(title)
-    return f"# {title}\n\n{content}"
+    state = AppState()
+    days = int(params.get("days", 1))
+    topics = params.get("topics", "")
+    count = int(params.get("count", 5))
+    try:
+        if stage == "search":
+            search_result, _ = search_news(days, topics, count, state, progress=progress)
+            if "❌" in search_result:
+                return search_result
+            return generate_titles(count, state, progress=progress)[0]
+        
+        if stage == "auto":
+            return auto_workflow(days, topics, count, state, progress=progress)[0]
+        
+        if stage == "generate":
+            titles = pending_titles()[:count]
+            if not titles:
+                return "今天没有待生成的标题"
+            results = []
+            for i, title in enumerate(titles):
+                progress(i / len(titles), desc=f"✍️ 生成第 {i + 1}/{len(titles)} 篇...")
+                result, _ = generate_articles(1, [title], state, progress=lambda *a, **k: None)
+                if result.startswith("❌"):
+                    # posts 已满或其他生成任务正在运行：剩余标题留给下一次
+                    results.append(result)
+                    break
+                results.append(f"- {title}: {'❌ 生成失败' if '失败列表' in result else '✅'}")
+            return "\n".join(results)
+        
+        # publish
+        headless = bool(params.get("headless", True))
+        run = PublishRun(min(len(list(POSTS_DIR.glob("*.md"))), count), headless)
+        if not run.total:
+            return "❌ 没有待发布的文章"
+        with closing(serialized_publish_stream(count, headless, bool(params.get("warm", True)))) as stream:
+            for line, event in stream:
+                run.feed(line, event)
+                if event:
+                    progress(run.fraction, desc=run.desc)
+                elif line is not None:
+                    ctx.log(line)
+                    ctx.check()
+                    budget.check()
+        return run.render()
+    except BudgetExceeded:
+        ctx.log(f"⏱️ 计划 {name} 超出 {entry['budget_minutes']:g} 分钟预算，已停止剩余工作")
+        return f"⏱️ 超出时间预算（{entry['budget_minutes']:g} 分钟），已停止"
+
+def refresh_schedule_view():
+    """刷新计划列表"""
+    return get_scheduler().status()
+
+def save_schedule_text(text: str):
+    """保存编辑后的计划"""
+    try:
+        entries = get_scheduler().update_schedule(text)
+    except ValueError as e:
+        return f"❌ 计划格式错误: {e}", refresh_schedule_view()
+    return f"✅ 已保存 {len(entries)} 个计划", refresh_schedule_view()
+
+def run_schedule_now(name: str) -> str:
+    """立即运行一个计划（不影响其定时触发）"""
+    entry = get_scheduler().get_entry((name or "").strip())
+    if entry is None:
+        return "❌ 计划不存在"
+    job_id = submit_scheduled(entry, datetime.now())
+    return f"📥 已提交计划 {entry['name']}，任务 `{job_id}`"
 
 # ===================== 构建界面 =====================
 
@@ -448,6 +955,9 @@ def create_ui():
         # 全局状态显示
         stats_display = gr.Markdown(format_stats_display(), elem_classes="stat-box")
         
+        # 每个浏览器会话独立的状态（搜索结果、标题等）
+        session_state = gr.State(AppState())
+        
         # Tab 1: 配置
         with gr.Tab("⚙️ 系统配置"):
             gr.Markdown("### API Key 配置")
@@ -464,8 +974,8 @@ def create_ui():
             init_output = gr.Textbox(label="初始化状态", lines=2)
             
             init_btn.click(
-                fn=lambda key: (app_state.init_components(key), format_stats_display()),
-                inputs=[api_key_input],
+                fn=lambda key, state: (state.init_components(key), format_stats_display()),
+                inputs=[api_key_input, session_state],
                 outputs=[init_output, stats_display]
             )
             
@@ -512,14 +1022,23 @@ def create_ui():
                     )
                     
                     search_btn = gr.Button("🔍 开始搜索", variant="primary")
+                    search_bg_btn = gr.Button("📥 后台搜索")
                 
                 with gr.Column(scale=2):
                     search_output = gr.Markdown("等待搜索...")
             
             search_btn.click(
                 fn=search_news,
+                inputs=[days_input, topics_input, news_count, session_state],
+                outputs=[search_output, stats_display],
+                concurrency_limit=EVENT_CONCURRENCY["search"],
+                concurrency_id="search"
+            )
+            
+            search_bg_btn.click(
+                fn=lambda days, topics, count: submit_job("search_news", days=days, topics_str=topics, count=count),
                 inputs=[days_input, topics_input, news_count],
-                outputs=[search_output, stats_display]
+                outputs=[search_output]
             )
         
         # Tab 3: 标题生成
@@ -537,6 +1056,7 @@ def create_ui():
                     )
                     
                     gen_title_btn = gr.Button("📝 生成标题", variant="primary")
+                    gen_title_bg_btn = gr.Button("📥 后台生成")
                 
                 with gr.Column(scale=2):
                     title_output = gr.Markdown("等待生成...")
@@ -552,8 +1072,17 @@ def create_ui():
             
             gen_title_btn.click(
                 fn=generate_titles,
-                inputs=[title_count],
-                outputs=[title_output, stats_display, selected_titles]
+                inputs=[title_count, session_state],
+                outputs=[title_output, stats_display, selected_titles],
+                concurrency_limit=EVENT_CONCURRENCY["titles"],
+                concurrency_id="titles"
+            )
+            
+            gen_title_bg_btn.click(
+                fn=lambda count, state: submit_job("generate_titles", count=count,
+                                                   search_results=state.search_results or []),
+                inputs=[title_count, session_state],
+                outputs=[title_output]
             )
         
         # Tab 4: 文章生成
@@ -571,6 +1100,7 @@ def create_ui():
                     )
                     
                     gen_article_btn = gr.Button("✍️ 开始生成", variant="primary")
+                    gen_article_bg_btn = gr.Button("📥 后台生成")
                     
                     gr.Markdown("""
                     **提示**:
@@ -584,8 +1114,16 @@ def create_ui():
             
             gen_article_btn.click(
                 fn=generate_articles,
+                inputs=[article_count, selected_titles, session_state],
+                outputs=[article_output, stats_display],
+                concurrency_limit=EVENT_CONCURRENCY["articles"],
+                concurrency_id="articles"
+            )
+            
+            gen_article_bg_btn.click(
+                fn=lambda count, titles: submit_job("generate_articles", count=count, selected_titles=titles or []),
                 inputs=[article_count, selected_titles],
-                outputs=[article_output, stats_display]
+                outputs=[article_output]
             )
         
         # Tab 5: 文章管理
@@ -594,38 +1132,79 @@ def create_ui():
             
             with gr.Row():
                 with gr.Column(scale=1):
-                    refresh_btn = gr.Button("🔄 刷新列表")
+                    with gr.Row():
+                        posts_filter = gr.Textbox(label="按标题筛选", placeholder="输入关键词后回车", scale=3)
+                        refresh_btn = gr.Button("🔄 刷新", scale=1)
                     
-                    posts_list = gr.Dropdown(
-                        label="选择文章",
-                        choices=[title for title, _ in read_posts_list()],
-                        interactive=True
+                    posts_table = gr.Dataframe(
+                        headers=["标题", "大小", "修改时间"],
+                        value=lambda: list_posts_page(1)[0],
+                        interactive=False
                     )
                     
                     with gr.Row():
-                        preview_btn = gr.Button("👁️ 预览", variant="secondary")
+                        prev_page_btn = gr.Button("⬅️ 上一页", size="sm")
+                        posts_page = gr.Number(value=1, precision=0, show_label=False, container=False, minimum=1)
+                        next_page_btn = gr.Button("下一页 ➡️", size="sm")
+                    posts_page_info = gr.Markdown(lambda: list_posts_page(1)[2])
+                    
+                    selected_post = gr.Textbox(label="当前文章", interactive=False)
+                    with gr.Row():
+                        full_text_btn = gr.Button("📄 加载全文", variant="secondary", visible=False)
                         delete_btn = gr.Button("🗑️ 删除", variant="stop")
                     
                     delete_output = gr.Textbox(label="操作结果", lines=2)
                 
                 with gr.Column(scale=2):
-                    preview_content = gr.Markdown("选择文章后点击预览")
+                    preview_content = gr.HTML("<p>在左侧列表中选择文章即可预览</p>")
             
-            refresh_btn.click(
-                fn=lambda: gr.Dropdown(choices=[title for title, _ in read_posts_list()]),
-                outputs=[posts_list]
-            )
+            page_outputs = [posts_table, posts_page, posts_page_info]
             
-            preview_btn.click(
-                fn=preview_article,
-                inputs=[posts_list],
-                outputs=[preview_content]
-            )
+            refresh_btn.click(fn=list_posts_page, inputs=[posts_page, posts_filter], outputs=page_outputs)
+            posts_filter.submit(fn=lambda q: list_posts_page(1, q), inputs=[posts_filter], outputs=page_outputs)
+            posts_page.submit(fn=list_posts_page, inputs=[posts_page, posts_filter], outputs=page_outputs)
+            prev_page_btn.click(fn=lambda p, q: list_posts_page((p or 1) - 1, q), inputs=[posts_page, posts_filter], outputs=page_outputs)
+            next_page_btn.click(fn=lambda p, q: list_posts_page((p or 1) + 1, q), inputs=[posts_page, posts_filter], outputs=page_outputs)
+            
+            def select_post(table, evt: gr.SelectData):
+                """点击表格行时选中文章（正文此时才读取）"""
+                return str(table.iloc[evt.index[0], 0])
+            
+            def show_preview(title, full=False):
+                rendered, truncated = preview_article(title, full)
+                return rendered, gr.Button(visible=truncated)
+            
+            posts_table.select(fn=select_post, inputs=[posts_table], outputs=[selected_post])
+            selected_post.change(fn=show_preview, inputs=[selected_post], outputs=[preview_content, full_text_btn])
+            full_text_btn.click(fn=lambda t: show_preview(t, True), inputs=[selected_post], outputs=[preview_content, full_text_btn])
             
             delete_btn.click(
                 fn=delete_article,
-                inputs=[posts_list],
+                inputs=[selected_post],
                 outputs=[delete_output, stats_display]
+            ).then(fn=list_posts_page, inputs=[posts_page, posts_filter], outputs=page_outputs)
+        
+        # 文章全文检索
+        with gr.Tab("🔎 文章搜索"):
+            gr.Markdown("### 检索 CSDN 待发布、公众号已发布、知乎文章")
+            
+            with gr.Row():
+                search_query = gr.Textbox(label="关键词", placeholder="多个关键词用空格分隔，如：强化学习 机器人", scale=4)
+                search_source = gr.Dropdown(label="来源", choices=["全部"] + list(ARTICLE_SOURCES), value="全部", scale=1)
+                search_limit = gr.Slider(label="最多显示", minimum=5, maximum=100, value=20, step=5, scale=1)
+            
+            article_search_btn = gr.Button("🔎 搜索", variant="primary")
+            article_search_output = gr.Markdown()
+            
+            article_search_btn.click(
+                fn=search_articles,
+                inputs=[search_query, search_source, search_limit],
+                outputs=[article_search_output]
+            )
+            search_query.submit(
+                fn=search_articles,
+                inputs=[search_query, search_source, search_limit],
+                outputs=[article_search_output]
             )
         
         # Tab 6: CSDN发布
@@ -649,14 +1228,21 @@ def create_ui():
                         info="勾选后浏览器将在后台运行（不可见）"
                     )
                     
+                    warm_mode = gr.Checkbox(
+                        label="保持浏览器预热",
+                        value=False,
+                        info="由常驻发布进程发布，浏览器与编辑器在多次发布之间保持打开"
+                    )
+                    
                     publish_btn = gr.Button("🚀 开始发布", variant="primary")
+                    publish_bg_btn = gr.Button("📥 后台发布")
                     
                     gr.Markdown("""
                     **注意事项**:
                     - 首次发布需要在浏览器中登录CSDN
                     - 登录状态会保存，后续无需重复登录
                     - 建议首次使用时不勾选"无头模式"
-                    - 发布过程可能需要几分钟，请耐心等待
+                    - 发布过程可能需要几分钟，输出会实时显示在右侧
                     """)
                 
                 with gr.Column(scale=2):
@@ -664,8 +1250,16 @@ def create_ui():
             
             publish_btn.click(
                 fn=publish_articles,
-                inputs=[publish_count, headless_mode],
-                outputs=[publish_output, stats_display]
+                inputs=[publish_count, headless_mode, warm_mode],
+                outputs=[publish_output, stats_display],
+                concurrency_limit=EVENT_CONCURRENCY["publish"],
+                concurrency_id="publish"
+            )
+            
+            publish_bg_btn.click(
+                fn=lambda count, headless, warm: submit_job("publish_articles", count=count, headless=headless, warm=warm),
+                inputs=[publish_count, headless_mode, warm_mode],
+                outputs=[publish_output]
             )
         
         # Tab 7: 一键流程
@@ -693,45 +1287,139 @@ def create_ui():
                     auto_count = gr.Slider(label="生成文章数量", minimum=1, maximum=20, value=10, step=1)
                     
                     auto_run_btn = gr.Button("⚡ 一键运行", variant="primary")
+                    auto_bg_btn = gr.Button("📥 后台运行")
                 
                 with gr.Column(scale=2):
                     auto_output = gr.Markdown("点击按钮开始...")
             
-            def auto_workflow(days, topics_str, count, progress=gr.Progress()):
-                """一键自动化流程"""
-                result_text = "### ⚡ 开始自动化流程\n\n"
-                
-                # 步骤1: 搜索新闻
-                progress(0.1, desc="🔍 步骤1: 搜索新闻...")
-                search_result, _ = search_news(days, topics_str, count)
-                result_text += f"**步骤1: 搜索新闻**\n{search_result}\n\n"
-                
-                if "❌" in search_result:
-                    return result_text, format_stats_display()
-                
-                # 步骤2: 生成标题
-                progress(0.4, desc="📝 步骤2: 生成标题...")
-                title_result, _, _ = generate_titles(count)
-                result_text += f"**步骤2: 生成标题**\n{title_result}\n\n"
-                
-                if "❌" in title_result:
-                    return result_text, format_stats_display()
-                
-                # 步骤3: 生成文章
-                progress(0.7, desc="✍️ 步骤3: 生成文章...")
-                article_result, _ = generate_articles(count, [])
-                result_text += f"**步骤3: 生成文章**\n{article_result}\n\n"
-                
-                progress(1.0, desc="✅ 流程完成！")
-                result_text += "\n### ✅ 自动化流程完成！\n\n现在可以前往 'CSDN发布' 标签页发布文章。"
-                
-                return result_text, format_stats_display()
-            
             auto_run_btn.click(
                 fn=auto_workflow,
+                inputs=[auto_days, auto_topics, auto_count, session_state],
+                outputs=[auto_output, stats_display],
+                concurrency_limit=EVENT_CONCURRENCY["auto"],
+                concurrency_id="auto"
+            )
+            
+            auto_bg_btn.click(
+                fn=lambda days, topics, count: submit_job("auto_workflow", days=days, topics_str=topics, count=count),
                 inputs=[auto_days, auto_topics, auto_count],
-                outputs=[auto_output, stats_display]
+                outputs=[auto_output]
+            )
+        
+        # Tab 8: 任务队列
+        with gr.Tab("📋 任务队列"):
+            gr.Markdown("### 后台任务")
+            
+            jobs_table = gr.Dataframe(
+                headers=["任务ID", "类型", "状态", "进度", "提交时间"],
+                value=lambda: format_job_table(get_job_queue().recent(30)),
+                interactive=False
+            )
+            
+            with gr.Row():
+                job_id_input = gr.Textbox(label="任务ID", placeholder="点击表格中的任务或输入任务ID", scale=3)
+                refresh_jobs_btn = gr.Button("🔄 刷新", scale=1)
+                cancel_job_btn = gr.Button("🚫 取消任务", variant="stop", scale=1)
+            
+            cancel_output = gr.Textbox(label="操作结果", lines=1)
+            job_detail = gr.Markdown("选择任务后查看详情与日志")
+            
+            def select_job(table, evt: gr.SelectData):
+                """点击表格行时填入任务ID"""
+                return str(table.iloc[evt.index[0], 0])
+            
+            jobs_table.select(fn=select_job, inputs=[jobs_table], outputs=[job_id_input])
+            
+            job_id_input.change(
+                fn=refresh_jobs_view,
+                inputs=[job_id_input],
+                outputs=[jobs_table, job_detail]
             )
+            
+            refresh_jobs_btn.click(
+                fn=refresh_jobs_view,
+                inputs=[job_id_input],
+                outputs=[jobs_table, job_detail]
+            )
+            
+            cancel_job_btn.click(
+                fn=cancel_job,
+                inputs=[job_id_input],
+                outputs=[cancel_output]
+            )
+            
+            # 定时轮询任务状态（不占用任务队列的工作线程）
+            if hasattr(gr, "Timer"):
+                jobs_timer = gr.Timer(2)
+                jobs_timer.tick(
+                    fn=refresh_jobs_view,
+                    inputs=[job_id_input],
+                    outputs=[jobs_table, job_detail],
+                    show_progress="hidden"
+                )
+        
+        # Tab: 定时任务
+        with gr.Tab("⏰ 定时任务"):
+            gr.Markdown("""### 定时运行流水线
+            
+按 cron 表达式（分 时 日 月 星期）定时执行：`search` 搜索新闻并生成标题，`generate` 为今天尚未生成的标题写文章，
+`publish` 发布文章（成功后移到 published/），`auto` 一键流程。`catch_up` 为错过运行（如服务停机）时的补跑策略：
+`skip` 跳过 / `once` 补跑一次 / `all` 逐次补跑；`budget_minutes` 为单次运行的时间预算。""")
+            
+            schedule_table = gr.Dataframe(
+                headers=["名称", "环节", "cron", "状态", "补跑", "预算(分钟)", "上次触发", "下次触发"],
+                value=refresh_schedule_view,
+                interactive=False
+            )
+            
+            with gr.Row():
+                schedule_name = gr.Textbox(label="计划名称", placeholder="点击表格中的计划或输入名称", scale=3)
+                run_now_btn = gr.Button("▶️ 立即运行", scale=1)
+                refresh_schedule_btn = gr.Button("🔄 刷新", scale=1)
+            
+            schedule_output = gr.Textbox(label="操作结果", lines=1)
+            schedule_editor = gr.Code(
+                label="计划（schedule.json）",
+                language="json",
+                value=lambda: json.dumps({"entries": get_scheduler().entries}, ensure_ascii=False, indent=2)
+            )
+            save_schedule_btn = gr.Button("💾 保存计划", variant="primary")
+            
+            def select_schedule(table, evt: gr.SelectData):
+                """点击表格行时填入计划名称"""
+                return str(table.iloc[evt.index[0], 0])
+            
+            schedule_table.select(fn=select_schedule, inputs=[schedule_table], outputs=[schedule_name])
+            run_now_btn.click(fn=run_schedule_now, inputs=[schedule_name], outputs=[schedule_output])
+            refresh_schedule_btn.click(fn=refresh_schedule_view, outputs=[schedule_table])
+            save_schedule_btn.click(
+                fn=save_schedule_text,
+                inputs=[schedule_editor],
+                outputs=[schedule_output, schedule_table]
+            )
+        
+        # Tab 9: 性能统计
+        with gr.Tab("📈 性能统计"):
+            with gr.Row():
+                dashboard_range = gr.Dropdown(
+                    label="时间范围",
+                    choices=list(DASHBOARD_RANGES),
+                    value="最近7天",
+                    scale=3
+                )
+                dashboard_refresh_btn = gr.Button("🔄 刷新", scale=1)
+            
+            dashboard_summary = gr.Markdown()
+            articles_plot = gr.LinePlot(x="时间", y="篇数", color="类型", title="文章产出")
+            llm_table = gr.Dataframe(label="大模型调用耗时", interactive=False)
+            with gr.Row():
+                phases_plot = gr.BarPlot(x="阶段", y="秒", color="指标", title="发布阶段耗时")
+                failures_plot = gr.BarPlot(x="环节", y="失败率(%)", title="各环节失败率")
+            
+            dashboard_outputs = [dashboard_summary, articles_plot, llm_table, phases_plot, failures_plot]
+            dashboard_refresh_btn.click(fn=load_dashboard, inputs=[dashboard_range], outputs=dashboard_outputs)
+            dashboard_range.change(fn=load_dashboard, inputs=[dashboard_range], outputs=dashboard_outputs)
+            app.load(fn=load_dashboard, inputs=[dashboard_range], outputs=dashboard_outputs)
         
         # 页脚
         gr.Markdown("""
@@ -760,6 +1448,10 @@ def main():
     else:
         print(f"✓ API Key 已设置: {app_state.api_key[:10]}...")
     
+    # 启动后台任务队列（恢复上次未执行的排队任务）与定时调度（补跑停机期间错过的计划）
+    get_job_queue()
+    get_scheduler()
+    
     # 创建并启动界面
     app = create_ui()
     
@@ -770,8 +1462,8 @@ def main():
     print("\n界面将在浏览器中自动打开")
     print("如未自动打开，请手动访问显示的地址\n")
     
-    # 启用队列以支持进度追踪
-    app.queue()
+    # 启用队列以支持进度追踪；未单独设置并发上限的事件（预览、删除等）最多同时处理 8 个
+    app.queue(default_concurrency_limit=8)
     
     app.launch(
         server_name="0.0.0.0",
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+wait_metrics.py
+
+记录发布流程中每次“条件等待”的实际耗时，并与原来的固定 sleep 时长对比。
+
+用法：
+    recorder = WaitRecorder(verbose=True)
+    with recorder.measure("modal_visible", legacy=0.5):
+        page.wait_for_selector(".modal", state="visible")
+    print(recorder.report())
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class WaitRecorder:
+    """等待耗时记录器"""
+
+    def __init__(self, verbose: bool = False):
+        """
+        Args:
+            verbose: 是否在每次等待结束时打印耗时
+        """
+        self.verbose = verbose
+        self.records: List[Dict] = []
+
+    @contextmanager
+    def measure(self, name: str, legacy: float):
+        """
+        测量一次等待
+
+        Args:
+            name: 等待名称（如 "editor_content"）
+            legacy: 该位置原来的固定延迟（秒），用于对比
+        """
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.monotonic() - start, legacy, ok)
+
+    def record(self, name: str, actual: float, legacy: float, ok: bool = True):
+        """记录一次等待结果（单位：秒）"""
+        self.records.append({"name": name, "actual": actual, "legacy": legacy, "ok": ok})
+        if self.verbose:
+            status = "" if ok else "（未满足，已超时）"
+            print(f"[等待] {name}: {actual * 1000:.0f} ms（原固定延迟 {legacy * 1000:.0f} ms）{status}")
+
+    def summary(self) -> Dict[str, Dict]:
+        """按名称汇总：次数、实际耗时合计/最大值、原固定延迟合计、未满足次数"""
+        result: Dict[str, Dict] = {}
+        for r in self.records:
+            s = result.setdefault(r["name"], {
+                "count": 0, "actual_total": 0.0, "actual_max": 0.0,
+                "legacy_total": 0.0, "timeouts": 0
+            })
+            s["count"] += 1
+            s["actual_total"] += r["actual"]
+            s["actual_max"] = max(s["actual_max"], r["actual"])
+            s["legacy_total"] += r["legacy"]
+            if not r["ok"]:
+                s["timeouts"] += 1
+        return result
+
+    def report(self, title: Optional[str] = None) -> str:
+        """生成“实际等待 vs 原固定延迟”的文本报告"""
+        summary = self.summary()
+        lines = [f"{'=' * 70}", title or "等待耗时报告（实际 vs 原固定延迟）", f"{'=' * 70}"]
+        if not summary:
+            lines.append("（无等待记录）")
+            return "\n".join(lines)
+
+        lines.append(f"{'等待项':<24}{'次数':>6}{'实际平均ms':>12}{'实际最大ms':>12}{'原固定ms':>10}{'超时':>6}")
+        total_actual = total_legacy = 0.0
+        for name, s in summary.items():
+            total_actual += s["actual_total"]
+            total_legacy += s["legacy_total"]
+            lines.append(
+                f"{name:<24}{s['count']:>6}"
+                f"{s['actual_total'] / s['count'] * 1000:>12.0f}"
+                f"{s['actual_max'] * 1000:>12.0f}"
+                f"{s['legacy_total'] / s['count'] * 1000:>10.0f}"
+                f"{s['timeouts']:>6}"
+            )
+        lines.append("-" * 70)
+        lines.append(f"实际等待合计: {total_actual:.2f} s，原固定延迟合计: {total_legacy:.2f} s，"
+                     f"差值: {total_legacy - total_actual:+.2f} s")
+        return "\n".join(lines)
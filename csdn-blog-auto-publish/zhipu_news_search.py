@@ -10,7 +10,6 @@ import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
-from zhipuai import ZhipuAI
 
 
 class ZhipuNewsSearcher:
@@ -35,18 +34,23 @@ class ZhipuNewsSearcher:
         "AI应用"
     ]
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, client=None):
         """
         初始化智谱AI客户端
         
         Args:
             api_key: API密钥，如果为None则从环境变量ZHIPUAI_API_KEY读取
+            client: 可选，共享的客户端（如 client_pool.get_client_pool() 返回的限流客户端）
         """
         self.api_key = api_key or os.environ.get("ZHIPUAI_API_KEY")
         if not self.api_key:
             raise ValueError("请提供智谱AI API Key，或设置环境变量 ZHIPUAI_API_KEY")
         
-        self.client = ZhipuAI(api_key=self.api_key)
+        if client is None:
+            # 延迟导入：SDK 较重，只在真正需要新建客户端时加载
+            from zhipuai import ZhipuAI
+            client = ZhipuAI(api_key=self.api_key)
+        self.client = client
     
     def search_tech_news(
         self, 
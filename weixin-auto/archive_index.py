@@ -0,0 +1,275 @@
+"""
+公众号已归档文章索引
+
+done/ 中的文章按内容哈希登记（标题、保存草稿的时间、草稿 ID），批量保存草稿前先查索引，
+内容相同的文章不会被重复保存为草稿——即使文件改了名，或 done/ 中已有同名文件被加了时间戳后缀。
+
+- 查重是按主键查一次 SQLite，在启动浏览器或调用接口之前完成
+- 换行符统一为 \\n、去掉末尾空白后再计算 sha256，编辑器保存造成的差异不影响判重
+- rebuild 增量扫描 done/：只对新增或修改时间、大小变化的文件重新计算哈希（多线程读取），
+  已登记的草稿 ID 不会丢失
+
+用法:
+    index = ArchiveIndex()
+    new_files, duplicates = index.filter_new(md_files)
+    index.record(digest, done_path, title, draft_id)
+
+    python archive_index.py rebuild            # 增量同步 done/（--full 重新计算全部哈希）
+    python archive_index.py check posts/*.md   # 查看哪些文章已经保存过草稿
+    python archive_index.py stats
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+_HERE = Path(__file__).resolve().parent
+
+DEFAULT_DB_FILE = _HERE / "archive_index.db"
+DEFAULT_DONE_DIR = _HERE / "done"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived (
+    hash TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    path TEXT,
+    drafted_at REAL NOT NULL,
+    draft_id TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+HEADING_RE = re.compile(r'^#\s+(.+?)\s*$', re.MULTILINE)
+FRONTMATTER_TITLE_RE = re.compile(r'\A---\s*\n(?:.*\n)*?title:\s*["\']?(.+?)["\']?\s*\n(?:.*\n)*?---', re.MULTILINE)
+
+
+def content_hash(text: str) -> str:
+    """文章内容哈希（统一换行符、忽略末尾空白）"""
+    normalized = text.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def extract_title(text: str, fallback: str) -> str:
+    """标题优先取 front matter 的 title，其次是第一个一级标题，最后用文件名"""
+    m = FRONTMATTER_TITLE_RE.match(text)
+    if m:
+        return m.group(1).strip()
+    m = HEADING_RE.search(text[:2000])
+    if m:
+        return m.group(1).strip()
+    return fallback
+
+
+def _hash_file(path: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """(路径, 内容哈希, 标题)，读取失败时哈希为 None"""
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"读取 {path} 失败，跳过: {e}")
+        return path, None, None
+    return path, content_hash(text), extract_title(text, Path(path).stem)
+
+
+class ArchiveIndex:
+    """按内容哈希登记已保存为草稿的文章"""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_FILE, done_dir: Path = DEFAULT_DONE_DIR):
+        """
+        Args:
+            db_path: 索引数据库文件
+            done_dir: 归档目录（rebuild 扫描的目录）
+        """
+        self.db_path = str(db_path)
+        self.done_dir = Path(done_dir)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    # ---------- 查询 ----------
+
+    def lookup(self, digest: str) -> Optional[dict]:
+        """按内容哈希查找已归档的文章，返回 {"title", "path", "drafted_at", "draft_id"}"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, path, drafted_at, draft_id FROM archived WHERE hash=?", (digest,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def filter_new(self, md_files: List[Path]) -> Tuple[List[Tuple[Path, str]], List[Tuple[Path, dict]]]:
+        """
+        把待处理文件分为未保存过的和重复的（已归档，或与本批前面的文件内容相同）
+
+        Returns:
+            ([(文件, 内容哈希)], [(文件, 已有记录)])
+        """
+        new_files = []
+        duplicates = []
+        batch: Dict[str, dict] = {}
+        for md_file in md_files:
+            try:
+                text = Path(md_file).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                # 读不了的文件交给后续流程报错
+                new_files.append((md_file, None))
+                continue
+            digest = content_hash(text)
+            record = self.lookup(digest) or batch.get(digest)
+            if record:
+                duplicates.append((md_file, record))
+                continue
+            batch[digest] = {"title": extract_title(text, Path(md_file).stem), "path": str(md_file),
+                             "drafted_at": None, "draft_id": None}
+            new_files.append((md_file, digest))
+        return new_files, duplicates
+
+    # ---------- 登记 ----------
+
+    def record(self, digest: str, path: Path, title: str, draft_id: Optional[str] = None,
+               drafted_at: Optional[float] = None):
+        """保存草稿并归档后登记（同一内容再次保存时以最新一次为准）"""
+        path = Path(path).resolve()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO archived (hash, title, path, drafted_at, draft_id) VALUES (?, ?, ?, ?, ?)",
+                (digest, title, str(path), drafted_at or time.time(), draft_id)
+            )
+            if path.is_file():
+                st = path.stat()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, hash, mtime, size) VALUES (?, ?, ?, ?)",
+                    (str(path), digest, st.st_mtime, st.st_size)
+                )
+            self._conn.commit()
+
+    def rebuild(self, full: bool = False, workers: int = 8) -> Dict[str, int]:
+        """
+        增量同步 done/：新增或变化的文件并行计算哈希，未登记的内容补登记
+
+        补登记的文章没有草稿 ID，保存时间取文件移入 done/ 的时间（近似值）。
+        已登记的草稿记录即使文件被删除也会保留，仍然参与查重。
+
+        Args:
+            full: 忽略修改时间和大小，重新计算全部文件的哈希
+
+        Returns:
+            {"files", "hashed", "added", "removed"}
+        """
+        stats = {"files": 0, "hashed": 0, "added": 0, "removed": 0}
+        seen = {}
+        if self.done_dir.is_dir():
+            for entry in os.scandir(self.done_dir):
+                if entry.is_file() and entry.name.endswith(".md"):
+                    st = entry.stat()
+                    # 移动文件会更新 ctime（Windows 上是创建时间），取较大者近似归档时间
+                    seen[str(Path(entry.path).resolve())] = (st.st_mtime, st.st_size, max(st.st_mtime, st.st_ctime))
+        stats["files"] = len(seen)
+
+        with self._lock:
+            if full:
+                self._conn.execute("DELETE FROM files")
+            existing = {
+                row["path"]: (row["mtime"], row["size"])
+                for row in self._conn.execute("SELECT path, mtime, size FROM files")
+            }
+        removed = [path for path in existing if path not in seen]
+        changed = [path for path, (mtime, size, _) in seen.items() if existing.get(path) != (mtime, size)]
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            hashed = list(pool.map(_hash_file, changed))
+
+        with self._lock:
+            self._conn.executemany("DELETE FROM files WHERE path=?", [(p,) for p in removed])
+            for path, digest, title in hashed:
+                if digest is None:
+                    continue
+                mtime, size, archived_at = seen[path]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, hash, mtime, size) VALUES (?, ?, ?, ?)",
+                    (path, digest, mtime, size)
+                )
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO archived (hash, title, path, drafted_at, draft_id) VALUES (?, ?, ?, ?, NULL)",
+                    (digest, title, path, archived_at)
+                )
+                stats["added"] += cur.rowcount
+                stats["hashed"] += 1
+            self._conn.commit()
+        stats["removed"] = len(removed)
+        return stats
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COUNT(draft_id) FROM archived"
+            ).fetchone()
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {"archived": row[0], "with_draft_id": row[1], "files": files}
+
+
+def format_record(record: dict) -> str:
+    """“标题（保存于 时间，草稿 ID）”"""
+    parts = []
+    if record.get("drafted_at"):
+        parts.append(f"保存于 {time.strftime('%Y-%m-%d %H:%M', time.localtime(record['drafted_at']))}")
+    if record.get("draft_id"):
+        parts.append(f"草稿 {record['draft_id']}")
+    if not parts:
+        parts.append(f"与本批 {Path(record['path']).name} 内容相同")
+    return f"{record['title']}（{'，'.join(parts)}）"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="公众号已归档文章索引")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = sub.add_parser("rebuild", help="增量同步 done/ 目录")
+    rebuild_parser.add_argument("--full", action="store_true", help="重新计算全部文件的哈希")
+    rebuild_parser.add_argument("--workers", type=int, default=8, help="并行读取文件的线程数，默认 8")
+    check_parser = sub.add_parser("check", help="检查文章是否已经保存过草稿")
+    check_parser.add_argument("files", nargs="+")
+    sub.add_parser("stats", help="查看索引统计")
+    parser.add_argument("--db", default=str(DEFAULT_DB_FILE), help="索引数据库文件")
+    parser.add_argument("--done", default=str(DEFAULT_DONE_DIR), help="归档目录")
+    args = parser.parse_args()
+
+    index = ArchiveIndex(Path(args.db), Path(args.done))
+    if args.command == "rebuild":
+        start = time.perf_counter()
+        stats = index.rebuild(full=args.full, workers=args.workers)
+        print(f"✓ 扫描 {stats['files']} 个文件，计算哈希 {stats['hashed']} 个，新登记 {stats['added']} 篇，"
+              f"移除 {stats['removed']} 个失效路径（{time.perf_counter() - start:.2f} 秒）")
+    elif args.command == "check":
+        new_files, duplicates = index.filter_new([Path(f) for f in args.files])
+        for md_file, record in duplicates:
+            print(f"重复  {md_file}: {format_record(record)}")
+        for md_file, _ in new_files:
+            print(f"新    {md_file}")
+    else:
+        stats = index.stats()
+        print(f"已归档 {stats['archived']} 篇（其中 {stats['with_draft_id']} 篇有草稿 ID），done/ 中已索引 {stats['files']} 个文件")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,41 +2,100 @@
 Markdown 文章自动发布到微信公众号脚本
 实现功能：
 1. 读取本地 posts 文件夹下的 markdown 文件
-2. 使用 md.doocs.org 转换 markdown 为富文本格式
+2. 在本地把 markdown 渲染为公众号富文本（wechat_renderer.py；也可改用 md.doocs.org 在线转换）
 3. 复制格式化后的内容
 4. 粘贴到微信公众号编辑器
 5. 保存为草稿
 """
 
 import asyncio
-import os
 import shutil
+import time
 from pathlib import Path
-from playwright.async_api import async_playwright, Page
 
+import wechat_renderer
+import wechat_session
+from archive_index import ArchiveIndex, format_record
+from render_cache import RenderCache
+from wechat_engine import (DEFAULT_TABS, EDITOR_EMPTY_JS, MarkdownSource, WeChatEngine, modifier_key,
+                           title_from_path, wait_recorder)
+from wechat_session import SessionExpired
+
+
+DOOCS_EDITOR_SELECTOR = '.cm-content[contenteditable="true"]'
+# doocs 预览区内容非空且两次轮询之间长度不再变化，视为渲染完成
+DOOCS_RENDERED_JS = """() => {
+    const el = document.querySelector('#output') || document.querySelector('.preview');
+    if (!el) return false;
+    const n = el.innerText.trim().length;
+    const prev = window.__previewLength;
+    window.__previewLength = n;
+    return n > 0 && n === prev;
+}"""
+
+# 流水线阶段间队列的容量：渲染最多领先 2 篇；除正在填写的 tabs 个标签页外，最多再预先打开 1 个
+RENDER_QUEUE_SIZE = 2
+EDITOR_QUEUE_SIZE = 1
+
+
+class StageTimings:
+    """流水线各阶段的耗时统计"""
+
+    STAGE_NAMES = {"render": "渲染", "open_editor": "打开编辑器", "fill_save": "填写并保存"}
 
-class MarkdownToWeChatAutomation:
     def __init__(self):
-        self.browser = None
-        self.context = None
-        self.page = None
-        self.article_page = None
+        self.durations = {name: [] for name in self.STAGE_NAMES}
+
+    def add(self, stage, seconds):
+        self.durations.setdefault(stage, []).append(seconds)
+
+    def report(self, wall_seconds):
+        """各阶段累计耗时与批量总耗时的对比"""
+        lines = ["⏱️ 流水线阶段耗时:"]
+        busy = 0.0
+        slowest = 0.0
+        for stage, values in self.durations.items():
+            if not values:
+                continue
+            total = sum(values)
+            busy += total
+            slowest = max(slowest, total)
+            name = self.STAGE_NAMES.get(stage, stage)
+            lines.append(f"  {name}: {len(values)} 次，累计 {total:.2f} 秒，平均 {total / len(values):.2f} 秒，最长 {max(values):.2f} 秒")
+        lines.append(f"  批量总耗时 {wall_seconds:.2f} 秒（各阶段累计之和 {busy:.2f} 秒，最慢阶段 {slowest:.2f} 秒）")
+        return "\n".join(lines)
+
+
+class MarkdownToWeChatAutomation(WeChatEngine):
+    """Markdown 文件批量保存为草稿（浏览器会话、登录、填写、保存由 WeChatEngine 提供）"""
+
+    def __init__(self, theme="default", converter="local", unattended=False, headless=False, tabs=1):
+        """
+        Args:
+            theme: 本地渲染使用的主题（见 wechat_renderer.THEMES）
+            converter: "local" 本地渲染（默认），"doocs" 使用 md.doocs.org 在线转换
+            unattended: 无人值守模式：登录失效时立即失败而不是等待扫码，结束时不等待查看结果
+            headless: 无头模式（需要已保存的登录状态）
+            tabs: 流水线中同时填写的编辑器标签页数
+        """
+        super().__init__(unattended=unattended, headless=headless)
+        self.tabs = max(1, tabs)
         self.posts_dir = Path("posts")
         self.done_dir = Path("done")
-        
-    async def start(self):
-        """启动浏览器"""
-        playwright = await async_playwright().start()
-        # 使用 chromium，设置为非无头模式
-        self.browser = await playwright.chromium.launch(
-            headless=False,
-            args=['--start-maximized']
-        )
-        # 创建浏览器上下文
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080}
-        )
-        self.page = await self.context.new_page()
+        self.theme = theme
+        self.converter = converter
+        # 最近一次本地渲染得到的 HTML 与标题（正文一级标题或 front matter 中的 title）
+        self.rendered_html = None
+        self.rendered_title = None
+        # 渲染结果缓存：重跑批量时内容未变的文章直接复用
+        self.render_cache = RenderCache()
+        # 已归档文章索引：内容相同的文章不重复保存草稿
+        self.archive = ArchiveIndex(done_dir=self.done_dir)
+        # 本批待处理文件 → 内容哈希（归档时登记）
+        self.file_hashes = {}
+        # 逐篇处理时最近一次保存得到的草稿 ID 与实际使用的标题
+        self.last_draft_id = None
+        self.last_title = None
         
     def ensure_directories(self):
         """确保 posts 和 done 文件夹存在"""
@@ -67,7 +126,7 @@ class MarkdownToWeChatAutomation:
             return None
     
     def move_to_done(self, file_path):
-        """将处理完成的文件移动到 done 文件夹"""
+        """将处理完成的文件移动到 done 文件夹，返回移动后的路径（失败时为 None）"""
         try:
             source_path = Path(file_path)
             target_path = self.done_dir / source_path.name
@@ -81,62 +140,105 @@ class MarkdownToWeChatAutomation:
             
             shutil.move(str(source_path), str(target_path))
             print(f"✓ 文件已移动到完成目录: {target_path.name}")
-            return True
+            return target_path
         except Exception as e:
             print(f"❌ 移动文件失败 {file_path}: {e}")
-            return False
+            return None
+
+    def skip_archived(self, md_files):
+        """
+        查归档索引，去掉已经保存过草稿（或与本批前面的文件内容相同）的文章
+
+        在启动浏览器之前调用；重复的文件留在 posts/ 中不做处理。
+        """
+        new_files, duplicates = self.archive.filter_new(md_files)
+        if duplicates:
+            print(f"\n⏭️ 跳过 {len(duplicates)} 篇内容重复的文章:")
+            for md_file, record in duplicates:
+                print(f"  - {Path(md_file).name}: {format_record(record)}")
+        self.file_hashes = {md_file: digest for md_file, digest in new_files if digest}
+        return [md_file for md_file, _ in new_files]
+
+    def archive_article(self, md_file, done_path, title, draft_id=None):
+        """保存成功并归档后登记到归档索引"""
+        digest = self.file_hashes.get(md_file)
+        if digest and done_path:
+            self.archive.record(digest, done_path, title, draft_id)
             
     async def convert_markdown_to_richtext(self, markdown_content):
+        """
+        将 markdown 转换为富文本
+
+        默认在本地渲染（毫秒级，不依赖第三方网站），结果保存在 self.rendered_html，
+        由 fill_article 直接粘贴进编辑器；converter="doocs" 或未安装
+        markdown-it-py 时使用 md.doocs.org 在线转换，结果在系统剪贴板中。
+        """
+        self.rendered_html = None
+        self.rendered_title = None
+        if self.converter == "local" and wechat_renderer.MarkdownIt is not None:
+            try:
+                start = time.perf_counter()
+                source = MarkdownSource(markdown_content, theme=self.theme, render_cache=self.render_cache)
+                self.rendered_html = source.to_html()
+                self.rendered_title = source.render()["title"]
+                source = "命中渲染缓存" if source.cache_hit else "已在本地渲染"
+                print(f"✓ Markdown {source}（主题 {self.theme}，{(time.perf_counter() - start) * 1000:.1f} ms）")
+                return True
+            except Exception as e:
+                print(f"❌ Markdown 转换失败: {e}")
+                import traceback
+                traceback.print_exc()
+                return False
+        if self.converter == "local":
+            print("⚠️ 未安装 markdown-it-py，改用 md.doocs.org 在线转换")
+        return await self.convert_with_doocs(markdown_content)
+
+    async def convert_with_doocs(self, markdown_content):
         """
         使用 md.doocs.org 将 markdown 转换为富文本格式
         """
         print("\n正在打开 Markdown 编辑器...")
-        await self.page.goto("https://md.doocs.org/")
-        
-        # 等待页面加载完成
-        print("等待页面加载...")
-        await asyncio.sleep(3)
+        await self.page.goto("https://md.doocs.org/", wait_until="domcontentloaded")
         
         try:
-            # 查找编辑器元素
+            # 等待编辑器出现（代替原来页面加载后固定等待 3 秒）
             print("正在查找编辑器元素...")
-            editor = await self.page.wait_for_selector(
-                '.cm-content[contenteditable="true"]',
-                timeout=10000
-            )
+            with wait_recorder.measure("doocs_editor", legacy=3):
+                editor = await self.page.wait_for_selector(DOOCS_EDITOR_SELECTOR, timeout=10000)
             print("✓ 找到编辑器")
             
-            # 点击编辑器获取焦点
+            # 点击编辑器获取焦点（click 本身会等待元素可点击）
             await editor.click()
-            await asyncio.sleep(0.5)
             
             # 清空编辑器内容 - 使用 Ctrl+A 全选然后删除
             print("正在清空编辑器...")
-            await self.page.keyboard.press("Meta+A" if os.uname().sysname == "Darwin" else "Control+A")
-            await asyncio.sleep(0.3)
+            await self.page.keyboard.press(f"{modifier_key()}+A")
             await self.page.keyboard.press("Backspace")
-            await asyncio.sleep(0.5)
+            with wait_recorder.measure("doocs_cleared", legacy=1.3):
+                await self.page.wait_for_function(EDITOR_EMPTY_JS, arg=DOOCS_EDITOR_SELECTOR, timeout=5000)
             
             # 粘贴 markdown 内容
             print("正在粘贴 Markdown 内容...")
-            # 使用 JavaScript 直接设置内容更可靠
-            await self.page.evaluate(f"""
-                const editor = document.querySelector('.cm-content[contenteditable="true"]');
-                const content = {repr(markdown_content)};
-                
-                // 清空编辑器
-                editor.textContent = '';
-                
-                // 触发输入事件
-                editor.focus();
-                document.execCommand('insertText', false, content);
-            """)
+            # 内容作为参数传入页面，清空编辑器后用 insertText 触发输入事件
+            await self.page.evaluate(
+                """([selector, content]) => {
+                    const editor = document.querySelector(selector);
+                    editor.textContent = '';
+                    editor.focus();
+                    document.execCommand('insertText', false, content);
+                }""",
+                [DOOCS_EDITOR_SELECTOR, markdown_content]
+            )
             
             print("✓ Markdown 内容已粘贴")
             
-            # 等待渲染完成 - 增加等待时间确保渲染完成
+            # 等待预览区渲染完成（内容非空且不再变化）
             print("等待 Markdown 渲染...")
-            await asyncio.sleep(5)
+            try:
+                with wait_recorder.measure("doocs_rendered", legacy=5):
+                    await self.page.wait_for_function(DOOCS_RENDERED_JS, polling=200, timeout=10000)
+            except Exception:
+                print("⚠️ 未检测到预览渲染完成，继续尝试复制")
             
             # 点击复制按钮
             print("正在查找复制按钮...")
@@ -148,19 +250,13 @@ class MarkdownToWeChatAutomation:
             print("正在点击复制按钮...")
             await copy_button.click()
             
-            # 等待复制完成 - 这个过程可能需要几秒
+            # 等待复制成功提示（代替原来固定等待 6 秒再检查 2 秒）
             print("等待复制完成（处理格式化内容）...")
-            await asyncio.sleep(6)
-            
-            # 检查是否有成功提示
             try:
-                # 可能会有成功提示的 toast
-                await self.page.wait_for_selector(
-                    'text=/复制成功|已复制/',
-                    timeout=2000
-                )
+                with wait_recorder.measure("doocs_copied", legacy=6):
+                    await self.page.wait_for_selector('text=/复制成功|已复制/', timeout=8000)
                 print("✓ 内容已复制到剪贴板（检测到成功提示）")
-            except:
+            except Exception:
                 print("✓ 复制命令已执行（未检测到提示但继续执行）")
             
             return True
@@ -171,172 +267,30 @@ class MarkdownToWeChatAutomation:
             traceback.print_exc()
             return False
             
-    async def login_wechat(self, url="https://mp.weixin.qq.com/"):
-        """
-        打开微信公众号登录页面，等待用户扫码登录
-        """
-        print("\n正在打开微信公众号登录页面...")
-        await self.page.goto(url)
-        
-        print("请使用微信扫码登录...")
-        print("等待跳转到主页面...")
-        
-        try:
-            # 等待登录成功
-            await self.page.wait_for_url("**/cgi-bin/**", timeout=120000)
-            print("✓ 登录成功！")
-            await asyncio.sleep(2)
-        except Exception as e:
-            try:
-                await self.page.wait_for_selector(".new-creation__menu-content", timeout=60000)
-                print("✓ 登录成功（通过元素检测）！")
-            except:
-                print("❌ 无法确认登录状态")
-                raise
-                
-    async def click_article_button(self):
-        """
-        点击文章按钮，在新标签页打开编辑器
-        """
-        print("\n正在查找文章按钮...")
-        
-        try:
-            article_button = await self.page.wait_for_selector(
-                ".new-creation__menu-content:has-text('文章')",
-                timeout=10000
-            )
-            
-            print("找到文章按钮，准备点击...")
-            
-            # 监听新标签页的打开
-            async with self.context.expect_page() as new_page_info:
-                await article_button.click()
-                
-            # 获取新打开的标签页
-            new_page = await new_page_info.value
-            await new_page.wait_for_load_state('domcontentloaded')
-            print("✓ 文章编辑页面已在新标签页打开！")
-            
-            # 切换到新标签页
-            self.article_page = new_page
-            return new_page
-            
-        except Exception as e:
-            print(f"❌ 点击文章按钮失败: {e}")
-            raise
-            
-    async def fill_article_with_paste(self, title, author):
-        """
-        填写文章标题和作者，正文内容通过粘贴富文本格式
-        
-        Args:
-            title: 文章标题
-            author: 作者名称
-        """
-        print("\n开始填写文章内容...")
-        page = self.article_page
-        
-        try:
-            # 1. 填写标题
-            print("正在填写标题...")
-            title_input = await page.wait_for_selector("#title", timeout=10000)
-            await title_input.click()
-            await asyncio.sleep(0.5)
-            await title_input.fill(title)
-            print(f"✓ 标题已填写: {title}")
-            
-            # 2. 粘贴正文（富文本格式）
-            print("正在粘贴正文内容（富文本格式）...")
-            # 等待富文本编辑器加载
-            content_editor = await page.wait_for_selector(
-                ".ProseMirror[contenteditable='true']",
-                timeout=10000
-            )
-            
-            # 点击编辑器获取焦点
-            await content_editor.click()
-            await asyncio.sleep(0.5)
-            
-            # 清空编辑器
-            await page.keyboard.press("Meta+A" if os.uname().sysname == "Darwin" else "Control+A")
-            await asyncio.sleep(0.3)
-            await page.keyboard.press("Backspace")
-            await asyncio.sleep(0.5)
-            
-            # 粘贴内容 - 使用 Cmd+V (macOS) 或 Ctrl+V (Windows/Linux)
-            print("正在粘贴剪贴板内容...")
-            if os.uname().sysname == "Darwin":
-                await page.keyboard.press("Meta+V")
-            else:
-                await page.keyboard.press("Control+V")
-                
-            await asyncio.sleep(2)
-            print("✓ 正文已粘贴（带格式）")
-            
-            # 3. 填写作者
-            print("正在填写作者...")
-            author_input = await page.wait_for_selector("#author", timeout=10000)
-            await author_input.click()
-            await asyncio.sleep(0.5)
-            await author_input.fill(author)
-            print(f"✓ 作者已填写: {author}")
-            
-            await asyncio.sleep(1)
-            
-        except Exception as e:
-            print(f"❌ 填写文章内容失败: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
-            
-    async def save_as_draft(self):
-        """
-        点击保存为草稿按钮
-        """
-        print("\n正在保存为草稿...")
-        page = self.article_page
-        
-        try:
-            save_button = await page.wait_for_selector(
-                "#js_submit button",
-                timeout=10000
-            )
-            
-            print("找到保存按钮，准备点击...")
-            await save_button.click()
-            
-            await asyncio.sleep(3)
-            
-            try:
-                success_msg = await page.wait_for_selector(
-                    ".weui-desktop-toast__content:has-text('保存成功')",
-                    timeout=5000
-                )
-                print("✓ 文章已保存为草稿！")
-            except:
-                print("✓ 保存命令已执行")
-                
-        except Exception as e:
-            print(f"❌ 保存草稿失败: {e}")
-            raise
-    
+    @staticmethod
+    def default_title(markdown_file):
+        """由文件名生成标题"""
+        return title_from_path(markdown_file)
+
+    @classmethod
+    def article_title(cls, markdown_file, rendered_title=None):
+        """文章标题：优先使用渲染得到的标题，与 API 后端一致；没有时由文件名生成"""
+        return rendered_title or cls.default_title(markdown_file)
+
     async def process_single_article(self, markdown_file, title=None, author="自动发布"):
         """
         处理单个 markdown 文件
         
         Args:
             markdown_file: markdown 文件路径
-            title: 文章标题（如果为None，从文件名生成）
+            title: 文章标题（如果为None，使用渲染得到的标题，没有时从文件名生成）
             author: 作者名称
         """
+        self.last_draft_id = None
+        self.last_title = None
         try:
-            # 生成标题（如果未提供）
-            if title is None:
-                title = Path(markdown_file).stem.replace('-', ' ').replace('_', ' ').title()
-                
             print(f"\n{'='*60}")
             print(f"📝 开始处理文章: {Path(markdown_file).name}")
-            print(f"📄 标题: {title}")
             print(f"👤 作者: {author}")
             print(f"{'='*60}")
             
@@ -353,15 +307,21 @@ class MarkdownToWeChatAutomation:
             if not success:
                 print("❌ Markdown 转换失败")
                 return False
+
+            # 生成标题（如果未提供）
+            if title is None:
+                title = self.article_title(markdown_file, self.rendered_title)
+            self.last_title = title
+            print(f"📄 标题: {title}")
                 
             # 3. 点击文章按钮（创建新文章）
             await self.click_article_button()
             
             # 4. 填写文章内容
-            await self.fill_article_with_paste(title, author)
+            await self.fill_article(title, author, html=self.rendered_html)
             
             # 5. 保存为草稿
-            await self.save_as_draft()
+            self.last_draft_id = await self.save_as_draft()
             
             print(f"\n✅ 文章 '{title}' 处理完成！")
             return True
@@ -372,59 +332,201 @@ class MarkdownToWeChatAutomation:
             traceback.print_exc()
             return False
             
+    async def run_pipeline(self, md_files, author="自动发布"):
+        """
+        流水线批量处理：渲染 → 打开编辑器 → 填写并保存，三个阶段并行运行，
+        阶段之间用有界队列衔接
+        
+        第 N 篇在填写保存时，第 N+1 篇的编辑器标签页已经在打开、后面的文章已经渲染好，
+        批量总耗时趋近于最慢阶段的累计耗时，而不是所有阶段之和。
+        正文通过合成粘贴事件写入各自的标签页，不争用系统剪贴板。
+        
+        self.tabs > 1 时同时填写多个标签页（打开的编辑器标签页总数不超过 tabs + 1），
+        某个标签页出错只影响对应的文章。
+        
+        Returns:
+            (成功篇数, 失败文件名列表)
+        """
+        timings = StageTimings()
+        rendered = asyncio.Queue(maxsize=RENDER_QUEUE_SIZE)
+        opened = asyncio.Queue()
+        # 编辑器标签页名额：正在填写的 tabs 个 + 预先打开的 EDITOR_QUEUE_SIZE 个
+        tab_slots = asyncio.Semaphore(self.tabs + EDITOR_QUEUE_SIZE)
+        total = len(md_files)
+        successful_count = 0
+        done = 0
+        failed_files = []
+        
+        async def render_stage():
+            try:
+                for md_file in md_files:
+                    start = time.perf_counter()
+                    content = self.read_markdown_file(md_file)
+                    html = title = None
+                    try:
+                        if content:
+                            article = self.render_cache.render(content, theme=self.theme)[0]
+                            html, title = article["html"], article["title"]
+                    except Exception as e:
+                        print(f"❌ 渲染 {md_file.name} 失败: {e}")
+                        html = None
+                    timings.add("render", time.perf_counter() - start)
+                    if not html:
+                        failed_files.append(md_file.name)
+                        continue
+                    await rendered.put((md_file, html, self.article_title(md_file, title)))
+            finally:
+                await rendered.put(None)
+        
+        async def open_one(md_file, html, title):
+            start = time.perf_counter()
+            try:
+                page = await self.click_article_button()
+            except Exception as e:
+                print(f"❌ 为 {md_file.name} 打开编辑器失败: {e}")
+                failed_files.append(md_file.name)
+                tab_slots.release()
+                return
+            finally:
+                timings.add("open_editor", time.perf_counter() - start)
+            await opened.put((md_file, html, title, page))
+        
+        async def open_stage():
+            # 有名额就开始打开下一篇的编辑器，多个标签页的加载可以同时进行
+            opening = []
+            try:
+                while True:
+                    item = await rendered.get()
+                    if item is None:
+                        break
+                    await tab_slots.acquire()
+                    opening.append(asyncio.ensure_future(open_one(*item)))
+                await asyncio.gather(*opening)
+            finally:
+                for _ in range(self.tabs):
+                    await opened.put(None)
+        
+        async def fill_worker():
+            nonlocal successful_count, done
+            while True:
+                item = await opened.get()
+                if item is None:
+                    break
+                md_file, html, title, page = item
+                done += 1
+                print(f"\n🔄 处理进度: {done}/{total}  {md_file.name}")
+                start = time.perf_counter()
+                try:
+                    # 多个标签页同时填写时系统剪贴板会互相覆盖，不使用剪贴板兜底
+                    await self.fill_article(title, author, html=html, page=page,
+                                            clipboard_fallback=self.tabs == 1)
+                    draft_id = await self.save_as_draft(page=page)
+                except SessionExpired:
+                    raise
+                except Exception as e:
+                    print(f"❌ 处理文件 {md_file.name} 时出错: {e}")
+                    failed_files.append(md_file.name)
+                    continue
+                finally:
+                    timings.add("fill_save", time.perf_counter() - start)
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                    tab_slots.release()
+                successful_count += 1
+                done_path = self.move_to_done(md_file)
+                if done_path:
+                    self.archive_article(md_file, done_path, title, draft_id)
+                    print(f"✅ {md_file.name} 处理完成并已归档")
+                else:
+                    print(f"⚠️ {md_file.name} 处理成功但归档失败")
+        
+        start = time.perf_counter()
+        await asyncio.gather(render_stage(), open_stage(), *(fill_worker() for _ in range(self.tabs)))
+        print("\n" + timings.report(time.perf_counter() - start))
+        return successful_count, failed_files
+        
+    async def run_sequential(self, md_files):
+        """
+        逐篇处理：转换、打开编辑器、填写、保存，完成一篇再处理下一篇
+        
+        Returns:
+            (成功篇数, 失败文件名列表)
+        """
+        successful_count = 0
+        failed_files = []
+        
+        for i, md_file in enumerate(md_files, 1):
+            print(f"\n🔄 处理进度: {i}/{len(md_files)}")
+            
+            try:
+                # 处理单个文章
+                success = await self.process_single_article(md_file)
+                
+                if success:
+                    # 成功后移动文件到 done 目录
+                    done_path = self.move_to_done(md_file)
+                    if done_path:
+                        self.archive_article(md_file, done_path, self.last_title, self.last_draft_id)
+                        successful_count += 1
+                        print(f"✅ 第 {i} 篇文章处理完成并已归档")
+                    else:
+                        print(f"⚠️ 第 {i} 篇文章处理成功但归档失败")
+                        successful_count += 1
+                else:
+                    failed_files.append(md_file.name)
+                    print(f"❌ 第 {i} 篇文章处理失败")
+                    
+                # 文章间等待一下，避免操作过快
+                if i < len(md_files):
+                    print("⏳ 等待 3 秒后处理下一篇文章...")
+                    await asyncio.sleep(3)
+                    
+            except Exception as e:
+                print(f"❌ 处理文件 {md_file.name} 时出错: {e}")
+                failed_files.append(md_file.name)
+                continue
+        
+        return successful_count, failed_files
+        
     async def run_batch(self):
         """
         批量处理所有 markdown 文件
+
+        Returns:
+            退出码：全部成功（或没有需要处理的文章）为 0，有文章失败或批处理出错为 1；
+            登录失效时抛出 SessionExpired
         """
         try:
-            # 1. 启动浏览器
-            await self.start()
-            
-            # 2. 获取所有 markdown 文件
+            # 1. 获取所有 markdown 文件，先查归档索引去掉已经保存过的文章
             md_files = self.get_markdown_files()
             if not md_files:
                 print("❌ posts 文件夹中没有找到 Markdown 文件")
-                return
+                return 0
+            md_files = self.skip_archived(md_files)
+            if not md_files:
+                print("✓ 所有文章都已保存过草稿，无需启动浏览器")
+                return 0
+            
+            # 2. 启动浏览器
+            await self.start()
             
             print(f"\n🚀 准备批量处理 {len(md_files)} 个文件:")
             for i, file in enumerate(md_files, 1):
                 print(f"  {i}. {file.name}")
             
-            # 3. 登录微信公众号（只需要登录一次）
-            await self.login_wechat()
+            self.render_cache.reset_stats()
             
-            # 4. 逐个处理每个文件
-            successful_count = 0
-            failed_files = []
+            # 3. 登录微信公众号（只需要登录一次）
+            await self.login()
             
-            for i, md_file in enumerate(md_files, 1):
-                print(f"\n🔄 处理进度: {i}/{len(md_files)}")
-                
-                try:
-                    # 处理单个文章
-                    success = await self.process_single_article(md_file)
-                    
-                    if success:
-                        # 成功后移动文件到 done 目录
-                        if self.move_to_done(md_file):
-                            successful_count += 1
-                            print(f"✅ 第 {i} 篇文章处理完成并已归档")
-                        else:
-                            print(f"⚠️ 第 {i} 篇文章处理成功但归档失败")
-                            successful_count += 1
-                    else:
-                        failed_files.append(md_file.name)
-                        print(f"❌ 第 {i} 篇文章处理失败")
-                        
-                    # 文章间等待一下，避免操作过快
-                    if i < len(md_files):
-                        print("⏳ 等待 3 秒后处理下一篇文章...")
-                        await asyncio.sleep(3)
-                        
-                except Exception as e:
-                    print(f"❌ 处理文件 {md_file.name} 时出错: {e}")
-                    failed_files.append(md_file.name)
-                    continue
+            # 4. 处理所有文件：本地渲染时走流水线（渲染、打开编辑器、填写保存三个阶段并行），
+            #    在线转换依赖剪贴板，只能逐篇处理
+            if self.converter == "local" and wechat_renderer.MarkdownIt is not None:
+                successful_count, failed_files = await self.run_pipeline(md_files)
+            else:
+                successful_count, failed_files = await self.run_sequential(md_files)
             
             # 5. 显示最终结果
             print(f"\n{'='*60}")
@@ -432,6 +534,8 @@ class MarkdownToWeChatAutomation:
             print(f"{'='*60}")
             print(f"✅ 成功处理: {successful_count} 篇")
             print(f"❌ 失败文件: {len(failed_files)} 篇")
+            if self.converter == "local":
+                print(f"🗂️ {self.render_cache.stats_line()}")
             
             if failed_files:
                 print(f"\n失败的文件列表:")
@@ -445,35 +549,41 @@ class MarkdownToWeChatAutomation:
             
             print(f"\n{'='*60}")
             
-            # 等待用户查看结果
-            print("\n浏览器将在15秒后关闭...")
-            await asyncio.sleep(15)
+            # 等待用户查看结果（无人值守时直接结束）
+            if not self.unattended:
+                print("\n浏览器将在15秒后关闭...")
+                await asyncio.sleep(15)
+            return 1 if failed_files else 0
+            
+        except SessionExpired as e:
+            print(f"\n❌ {e}")
+            raise
             
         except Exception as e:
             print(f"\n❌ 批量处理过程中出现错误: {e}")
             import traceback
             traceback.print_exc()
-            print("浏览器将在30秒后关闭，请检查...")
-            await asyncio.sleep(30)
+            if not self.unattended:
+                print("浏览器将在30秒后关闭，请检查...")
+                await asyncio.sleep(30)
+            return 1
             
         finally:
             # 关闭浏览器
-            if self.browser:
-                await self.browser.close()
-                print("浏览器已关闭")
+            await self.close()
             
-    async def run(self, markdown_file, title, author):
+    async def run(self, markdown_file, title=None, author="自动发布"):
         """
         执行完整的自动化流程
         
         Args:
             markdown_file: markdown 文件路径
-            title: 文章标题
+            title: 文章标题（如果为None，使用渲染得到的标题，没有时从文件名生成）
             author: 作者名称
         """
         try:
-            # 1. 启动浏览器
-            await self.start()
+            # 1. 启动浏览器并登录（已就绪的会话直接复用）
+            await self.ensure_ready()
             
             # 2. 读取 markdown 文件
             print(f"\n正在读取 Markdown 文件: {markdown_file}")
@@ -488,17 +598,16 @@ class MarkdownToWeChatAutomation:
             if not success:
                 print("❌ Markdown 转换失败")
                 return
+            if title is None:
+                title = self.article_title(markdown_file, self.rendered_title)
                 
-            # 4. 登录微信公众号
-            await self.login_wechat()
-            
-            # 5. 点击文章按钮
+            # 4. 点击文章按钮
             await self.click_article_button()
             
-            # 6. 填写文章内容（标题、粘贴正文、作者）
-            await self.fill_article_with_paste(title, author)
+            # 5. 填写文章内容（标题、粘贴正文、作者）
+            await self.fill_article(title, author, html=self.rendered_html)
             
-            # 7. 保存为草稿
+            # 6. 保存为草稿
             await self.save_as_draft()
             
             print("\n" + "="*50)
@@ -518,16 +627,25 @@ class MarkdownToWeChatAutomation:
             
         finally:
             # 关闭浏览器
-            if self.browser:
-                await self.browser.close()
-                print("浏览器已关闭")
+            await self.close()
 
 
-async def main():
+async def main(unattended=False, theme="default", measure_waits=False, headless=False, tabs=1):
     """
     主函数 - 批量处理所有 markdown 文件
+    
+    Args:
+        unattended: 无人值守模式（定时任务用）：不等待回车确认，登录失效时立即失败
+        theme: 本地渲染主题
+        measure_waits: 打印每次条件等待的耗时，结束时输出与原固定延迟的对比报告
+        headless: 无头模式（无显示器的服务器上运行，需要已保存的登录状态）
+        tabs: 同时填写的编辑器标签页数
+    
+    Returns:
+        退出码：全部成功为 0，有文章失败或批处理出错为 1，登录失效为 2
     """
-    automation = MarkdownToWeChatAutomation()
+    automation = MarkdownToWeChatAutomation(theme=theme, unattended=unattended, headless=headless, tabs=tabs)
+    wait_recorder.verbose = measure_waits
     
     # 确保目录存在
     automation.ensure_directories()
@@ -543,7 +661,7 @@ async def main():
         print("\n示例：posts/my-article.md")
         print("\n创建示例文件命令:")
         print("  echo '# 我的文章\\n\\n这是内容...' > posts/example.md")
-        return
+        return 0
     
     print("="*60)
     print("🚀 Markdown 文章批量发布到微信公众号")
@@ -561,13 +679,21 @@ async def main():
     print(f"\n⚠️  注意事项:")
     print(f"  • 请确保网络连接稳定")
     print(f"  • 整个过程可能需要 {len(md_files) * 2} - {len(md_files) * 3} 分钟")
-    print(f"  • 请准备好微信扫码登录")
+    ok, reason = wechat_session.check_state_file()
+    print(f"  • {'已保存登录状态，' + reason if ok else '请准备好微信扫码登录'}")
     
     print(f"\n" + "="*60)
-    input("按回车键开始批量处理...")
+    if not automation.unattended:
+        input("按回车键开始批量处理...")
     
     # 执行批量自动化流程
-    await automation.run_batch()
+    try:
+        return await automation.run_batch()
+    except SessionExpired:
+        return 2
+    finally:
+        if measure_waits:
+            print(wait_recorder.report())
 
 
 async def main_single():
@@ -584,15 +710,34 @@ async def main_single():
         return
     
     selected_file = md_files[0]
-    default_title = selected_file.stem.replace('-', ' ').replace('_', ' ').title()
     
     # 执行单文件流程（旧版本兼容）
     await automation.run(
         markdown_file=selected_file,
-        title=default_title,
         author="芝士AI吃鱼"
     )
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Markdown 文章批量保存为微信公众号草稿")
+    parser.add_argument("--unattended", action="store_true",
+                        help="无人值守：复用已保存的登录状态，失效时立即退出（退出码 2）而不是等待扫码")
+    parser.add_argument("--theme", default="default", choices=sorted(wechat_renderer.THEMES), help="排版主题")
+    parser.add_argument("--measure-waits", action="store_true",
+                        help="打印每次条件等待的实际耗时，并在结束时输出与原固定延迟的对比报告")
+    parser.add_argument("--headless", action="store_true",
+                        help="无头模式运行（无显示器的服务器），需要已保存的登录状态，失效时退出码 2")
+    parser.add_argument("--tabs", type=int, default=None,
+                        help="同时填写的编辑器标签页数，无头模式默认 4，否则默认 1")
+    parser.add_argument("--backend", default="browser", choices=["browser", "api"],
+                        help="browser 驱动浏览器（默认）；api 通过官方草稿接口创建（需要 WECHAT_APPID / WECHAT_APPSECRET）")
+    args = parser.parse_args()
+    if args.backend == "api":
+        import wechat_api
+        sys.exit(wechat_api.run_batch(sorted(Path("posts").glob("*.md")), theme=args.theme))
+    tabs = args.tabs or (DEFAULT_TABS if args.headless else 1)
+    sys.exit(asyncio.run(main(unattended=args.unattended, theme=args.theme, measure_waits=args.measure_waits,
+                              headless=args.headless, tabs=tabs)))
@@ -0,0 +1,184 @@
+"""
+公众号渲染结果缓存
+
+批量保存草稿中途失败后重跑时，Markdown 没有变化的文章不必重新渲染：
+以 (Markdown 内容, 主题指纹, 渲染器版本) 的哈希为键，把渲染出的 HTML 连同
+提取的标题、摘要、封面候选一起存进本地 SQLite 文件。
+
+- 内容或主题样式变化、渲染器升级（RENDERER_VERSION）都会自然错过缓存
+- 总大小超过上限时按最近使用时间淘汰
+- 记录命中/未命中次数，批量结束时报告命中率
+
+用法:
+    cache = RenderCache()
+    article, hit = cache.render(markdown_text, theme="default")
+    print(cache.stats_line())
+
+    python render_cache.py stats
+    python render_cache.py clear
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import wechat_renderer
+
+
+DEFAULT_CACHE_FILE = Path(__file__).resolve().parent / "render_cache.db"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS renders (
+    key TEXT PRIMARY KEY,
+    html TEXT NOT NULL,
+    title TEXT,
+    digest TEXT,
+    covers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS renders_last_used ON renders (last_used);
+"""
+
+
+def cache_key(markdown_text: str, theme: str = "default") -> str:
+    """内容 + 主题指纹 + 渲染器版本的哈希"""
+    fingerprint = wechat_renderer.get_theme(theme).fingerprint
+    h = hashlib.sha256()
+    h.update(f"v{wechat_renderer.RENDERER_VERSION}\0{theme}\0{fingerprint}\0".encode("utf-8"))
+    h.update(markdown_text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """按内容哈希缓存的公众号渲染结果（磁盘持久化，按总大小淘汰）"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: 缓存数据库文件
+            max_bytes: 缓存 HTML 的总字节数上限，超过后淘汰最久未使用的条目
+        """
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, markdown_text: str, theme: str = "default") -> Optional[dict]:
+        """命中时返回 {"html", "title", "digest", "covers"}，并刷新最近使用时间"""
+        key = cache_key(markdown_text, theme)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html, title, digest, covers FROM renders WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE renders SET last_used=? WHERE key=?", (time.time(), key))
+            self._conn.commit()
+        return {"html": row["html"], "title": row["title"], "digest": row["digest"],
+                "covers": json.loads(row["covers"])}
+
+    def put(self, markdown_text: str, theme: str, article: dict):
+        """写入一条渲染结果，必要时淘汰旧条目"""
+        key = cache_key(markdown_text, theme)
+        now = time.time()
+        size = len(article["html"].encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO renders (key, html, title, digest, covers, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, article["html"], article.get("title"), article.get("digest"),
+                 json.dumps(article.get("covers") or [], ensure_ascii=False), size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM renders").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 从最久未使用的开始删，直到总大小回到上限以内（至少保留最新一条）
+        rows = self._conn.execute("SELECT key, size FROM renders ORDER BY last_used ASC").fetchall()
+        for row in rows[:-1]:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM renders WHERE key=?", (row["key"],))
+            total -= row["size"]
+
+    def render(self, markdown_text: str, theme: str = "default") -> Tuple[dict, bool]:
+        """
+        取缓存，未命中时渲染并写入
+
+        Returns:
+            (article, 是否命中)
+        """
+        article = self.get(markdown_text, theme)
+        if article is not None:
+            self.hits += 1
+            return article, True
+        article = wechat_renderer.render_article(markdown_text, theme=theme)
+        self.misses += 1
+        self.put(markdown_text, theme, article)
+        return article, False
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_line(self) -> str:
+        total = self.hits + self.misses
+        return f"渲染缓存命中 {self.hits}/{total}（{self.hit_ratio:.0%}）"
+
+    def usage(self) -> dict:
+        """缓存条目数与总字节数"""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM renders").fetchone()
+        return {"entries": row[0], "bytes": row[1]}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM renders")
+            self._conn.commit()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="公众号渲染结果缓存")
+    parser.add_argument("command", choices=["stats", "clear"], help="stats 查看缓存占用；clear 清空缓存")
+    parser.add_argument("--db", default=str(DEFAULT_CACHE_FILE), help="缓存数据库文件")
+    args = parser.parse_args()
+
+    cache = RenderCache(Path(args.db))
+    if args.command == "clear":
+        cache.clear()
+        print("✓ 渲染缓存已清空")
+    else:
+        usage = cache.usage()
+        print(f"{usage['entries']} 条，{usage['bytes'] / 1024:.1f} KB（上限 {cache.max_bytes / 1024 / 1024:.0f} MB）")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+"""
+与 csdn-blog-auto-publish 共用的模块
+
+图片上传缓存（image_assets.UrlCache）、等待耗时记录（wait_metrics.WaitRecorder）等通用模块只在 csdn-blog-auto-publish 中维护一份，
+本目录的脚本先 import shared，再直接 import 这些模块，不再各自复制一份。
+"""
+
+import sys
+from pathlib import Path
+
+SHARED_DIR = Path(__file__).resolve().parent.parent / "csdn-blog-auto-publish"
+
+# 追加在末尾：本目录的同名模块优先
+if SHARED_DIR.is_dir() and str(SHARED_DIR) not in sys.path:
+    sys.path.append(str(SHARED_DIR))
@@ -0,0 +1 @@
+# Tests package for WeChat auto publish
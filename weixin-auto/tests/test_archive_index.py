@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试归档索引（archive_index.py）的查重与增量同步
+"""
+
+import pytest
+
+from archive_index import ArchiveIndex, content_hash
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "done").mkdir()
+    (tmp_path / "posts").mkdir()
+    archive = ArchiveIndex(tmp_path / "archive.db", done_dir=tmp_path / "done")
+    yield archive
+    archive.close()
+
+
+def write(path, text):
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def test_renamed_file_is_duplicate(index, tmp_path):
+    """改了文件名但内容相同的文章仍然判为重复"""
+    print("\n测试: 改名后的文章")
+    done = write(tmp_path / "done" / "old-name.md", "# 标题\n\n正文\n")
+    index.record(content_hash(done.read_text(encoding="utf-8")), done, "标题", "draft-1")
+
+    renamed = write(tmp_path / "posts" / "new-name.md", "# 标题\n\n正文\n")
+    new_files, duplicates = index.filter_new([renamed])
+    assert new_files == []
+    assert duplicates[0][0] == renamed
+    assert duplicates[0][1]["draft_id"] == "draft-1"
+    print("✓ 通过")
+
+
+def test_line_endings_do_not_matter(index, tmp_path):
+    """CRLF 与 LF（以及末尾空白）不同的同一篇文章判为重复"""
+    print("\n测试: 换行符差异")
+    lf = write(tmp_path / "done" / "lf.md", "# 标题\n\n第一段\n第二段\n")
+    index.record(content_hash(lf.read_text(encoding="utf-8")), lf, "标题")
+
+    crlf = write(tmp_path / "posts" / "crlf.md", "# 标题\r\n\r\n第一段\r\n第二段\r\n\r\n")
+    new_files, duplicates = index.filter_new([crlf])
+    assert new_files == [] and len(duplicates) == 1
+
+    changed = write(tmp_path / "posts" / "changed.md", "# 标题\r\n\r\n第一段\r\n第三段\r\n")
+    new_files, duplicates = index.filter_new([changed])
+    assert [f for f, _ in new_files] == [changed] and duplicates == []
+    print("✓ 通过")
+
+
+def test_duplicate_within_one_batch(index, tmp_path):
+    """同一批中内容相同的文章只保留第一篇"""
+    print("\n测试: 同批重复")
+    first = write(tmp_path / "posts" / "a.md", "# 同一篇\n\n正文\n")
+    second = write(tmp_path / "posts" / "b.md", "# 同一篇\r\n\r\n正文\r\n")
+    other = write(tmp_path / "posts" / "c.md", "# 另一篇\n")
+
+    new_files, duplicates = index.filter_new([first, second, other])
+    assert [f for f, _ in new_files] == [first, other]
+    assert duplicates[0][0] == second
+    assert duplicates[0][1]["path"] == str(first)
+    assert duplicates[0][1]["draft_id"] is None
+    # 只是预检查，不登记
+    assert index.stats()["archived"] == 0
+    print("✓ 通过")
+
+
+def test_incremental_rebuild(index, tmp_path):
+    """rebuild 只为新增或变化的文件计算哈希，并移除已删除文件的路径"""
+    print("\n测试: 增量同步 done/")
+    a = write(tmp_path / "done" / "a.md", "# A\n")
+    b = write(tmp_path / "done" / "b.md", "# B\n")
+    first = index.rebuild()
+    assert first == {"files": 2, "hashed": 2, "added": 2, "removed": 0}
+
+    assert index.rebuild() == {"files": 2, "hashed": 0, "added": 0, "removed": 0}
+
+    write(tmp_path / "done" / "c.md", "# C\n")
+    write(b, "# B 修改后的内容更长\n")
+    a.unlink()
+    stats = index.rebuild()
+    assert stats == {"files": 2, "hashed": 2, "added": 2, "removed": 1}
+    # 已删除文件的草稿记录仍然参与查重
+    assert index.lookup(content_hash("# A\n"))["title"] == "A"
+
+    full = index.rebuild(full=True)
+    assert full["hashed"] == 2 and full["added"] == 0
+    print("✓ 通过")
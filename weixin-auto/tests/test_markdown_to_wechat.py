@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试浏览器后端（markdown_to_wechat.py）的批量流程：编辑器操作用假实现代替
+"""
+
+import asyncio
+
+import pytest
+
+import markdown_to_wechat
+from archive_index import ArchiveIndex, content_hash
+from markdown_to_wechat import MarkdownToWeChatAutomation
+from render_cache import RenderCache
+
+
+class FakePage:
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def automation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    posts = tmp_path / "posts"
+    posts.mkdir()
+    (posts / "with-heading.md").write_text("# 正文里的标题\n\n正文内容\n", encoding="utf-8")
+    (posts / "no-heading.md").write_text("只有正文\n", encoding="utf-8")
+
+    monkeypatch.setattr(markdown_to_wechat, "RenderCache", lambda: RenderCache(tmp_path / "render_cache.db"))
+    monkeypatch.setattr(markdown_to_wechat, "ArchiveIndex",
+                        lambda done_dir: ArchiveIndex(tmp_path / "archive.db", done_dir=done_dir))
+    auto = MarkdownToWeChatAutomation()
+    auto.filled = []
+
+    async def click_article_button():
+        return FakePage()
+
+    async def fill_article(title, author, html=None, page=None, clipboard_fallback=True):
+        auto.filled.append(title)
+
+    async def save_as_draft(page=None):
+        return f"draft-{len(auto.filled)}"
+
+    monkeypatch.setattr(auto, "click_article_button", click_article_button)
+    monkeypatch.setattr(auto, "fill_article", fill_article)
+    monkeypatch.setattr(auto, "save_as_draft", save_as_draft)
+    monkeypatch.setattr(asyncio, "sleep", _no_sleep)
+    yield auto
+    auto.archive.close()
+    auto.render_cache.close()
+
+
+async def _no_sleep(*args, **kwargs):
+    pass
+
+
+@pytest.mark.parametrize("mode", ["pipeline", "sequential"])
+def test_title_comes_from_rendered_article(automation, mode):
+    """两种批量模式都优先使用渲染得到的标题，没有标题时才由文件名生成（与 API 后端一致）"""
+    print(f"\n测试: {mode} 模式的文章标题")
+    md_files = automation.get_markdown_files()
+    automation.skip_archived(md_files)
+    if mode == "pipeline":
+        ok, failed = asyncio.run(automation.run_pipeline(md_files))
+    else:
+        ok, failed = asyncio.run(automation.run_sequential(md_files))
+
+    assert (ok, failed) == (2, [])
+    assert sorted(automation.filled) == ["No Heading", "正文里的标题"]
+    digest = content_hash("# 正文里的标题\n\n正文内容\n")
+    assert automation.archive.lookup(digest)["title"] == "正文里的标题"
+    print("✓ 通过")
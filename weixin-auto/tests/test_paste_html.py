@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+测试合成粘贴（wechat_engine.paste_html）：在本地 contenteditable 页面上验证块数确认
+
+需要 Playwright 的 Chromium（playwright install chromium），未安装时跳过。
+"""
+
+import asyncio
+
+import pytest
+
+from wechat_engine import paste_html
+
+# 模拟公众号编辑器：处理 paste 事件，把 text/html 中的块逐个插入编辑器（keep 限制插入的块数）
+EDITOR_PAGE = """
+<div class="ProseMirror" contenteditable="true"><p>旧内容</p></div>
+<script>
+  const editor = document.querySelector('.ProseMirror');
+  editor.addEventListener('paste', (event) => {
+    event.preventDefault();
+    const doc = new DOMParser().parseFromString(event.clipboardData.getData('text/html'), 'text/html');
+    let root = doc.body;
+    if (root.children.length === 1 && root.firstElementChild.tagName === 'SECTION') root = root.firstElementChild;
+    const keep = window.keepBlocks ?? root.children.length;
+    setTimeout(() => {
+      editor.replaceChildren(...Array.from(root.children).slice(0, keep));
+    }, 50);
+  });
+</script>
+"""
+
+HTML = "<section><h1>标题</h1><p>第一段</p><p>第二段</p></section>"
+
+
+def run_in_page(keep=None, html=HTML, content=EDITOR_PAGE, timeout=2000):
+    from playwright.async_api import async_playwright
+
+    async def scenario():
+        async with async_playwright() as p:
+            try:
+                browser = await p.chromium.launch()
+            except Exception as e:
+                pytest.skip(f"无法启动 Chromium: {str(e).splitlines()[0]}")
+            try:
+                page = await browser.new_page()
+                await page.set_content(content)
+                if keep is not None:
+                    await page.evaluate(f"window.keepBlocks = {keep}")
+                result = await paste_html(page, html, timeout=timeout)
+                text = await page.evaluate("() => document.body.innerText")
+                return result, text
+            finally:
+                await browser.close()
+
+    return asyncio.run(scenario())
+
+
+def test_paste_confirmed_by_block_count():
+    """编辑器插入全部顶层块后返回 (True, 期望块数, 实际块数)，旧内容被替换"""
+    print("\n测试: 合成粘贴成功")
+    (ok, expected, actual), text = run_in_page()
+    assert (ok, expected, actual) == (True, 3, 3)
+    assert "第二段" in text and "旧内容" not in text
+    print("✓ 通过")
+
+
+def test_paste_reports_missing_blocks():
+    """编辑器只接收了部分块时返回 (False, 期望块数, 实际块数)"""
+    print("\n测试: 合成粘贴块数不足")
+    (ok, expected, actual), _ = run_in_page(keep=1, timeout=500)
+    assert (ok, expected, actual) == (False, 3, 1)
+    print("✓ 通过")
+
+
+def test_paste_without_editor():
+    print("\n测试: 页面上没有编辑器")
+    (ok, expected, actual), _ = run_in_page(content="<p>没有编辑器</p>")
+    assert (ok, expected, actual) == (False, 0, 0)
+    print("✓ 通过")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+测试渲染结果缓存（render_cache.py）：按大小的 LRU 淘汰、缓存键失效、命中统计
+"""
+
+import itertools
+
+import pytest
+
+import render_cache
+import wechat_renderer
+from render_cache import RenderCache, cache_key
+
+pytestmark = pytest.mark.skipif(wechat_renderer.MarkdownIt is None, reason="未安装 markdown-it-py")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """单调递增的假时钟，保证最近使用时间有先后"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(render_cache.time, "time", lambda: float(next(ticks)))
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(max_bytes=render_cache.DEFAULT_MAX_BYTES):
+        cache = RenderCache(tmp_path / "render_cache.db", max_bytes=max_bytes)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def article(size):
+    return {"html": "x" * size, "title": None, "digest": None, "covers": []}
+
+
+def test_evicts_least_recently_used_by_size(make_cache, clock):
+    """总大小超过上限时从最久未使用的条目开始淘汰；读取会刷新使用时间"""
+    print("\n测试: 按大小 LRU 淘汰")
+    cache = make_cache(max_bytes=250)
+    cache.put("a", "default", article(100))
+    cache.put("b", "default", article(100))
+    assert cache.get("a") is not None  # a 变为最近使用
+    cache.put("c", "default", article(100))  # 300 > 250，淘汰最久未用的 b
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.usage() == {"entries": 2, "bytes": 200}
+    print("✓ 通过")
+
+
+def test_oversized_entry_is_kept_alone(make_cache, clock):
+    """单条超过上限时淘汰其他所有条目，但保留最新写入的一条"""
+    print("\n测试: 超大条目")
+    cache = make_cache(max_bytes=100)
+    cache.put("a", "default", article(50))
+    cache.put("big", "default", article(500))
+    assert cache.usage() == {"entries": 1, "bytes": 500}
+    assert cache.get("big") is not None
+    print("✓ 通过")
+
+
+def test_key_changes_with_theme_fingerprint_and_version(monkeypatch):
+    """主题样式或渲染器版本变化时缓存键变化；内容相同、主题不变时键稳定"""
+    print("\n测试: 缓存键失效")
+    text = "# 标题\n\n正文\n"
+    base = cache_key(text, "default")
+    assert cache_key(text, "default") == base
+    assert cache_key(text + " ", "default") != base
+    assert cache_key(text, "green") != base
+
+    monkeypatch.setattr(wechat_renderer, "RENDERER_VERSION", wechat_renderer.RENDERER_VERSION + 1)
+    assert cache_key(text, "default") != base
+    print("✓ 通过")
+
+
+def test_restyled_theme_misses_cache(make_cache, monkeypatch):
+    """同名主题改了样式后重新渲染，不会取到旧样式的结果"""
+    print("\n测试: 主题改样式后缓存失效")
+    monkeypatch.setattr(wechat_renderer, "THEMES", dict(wechat_renderer.THEMES))
+    wechat_renderer.register_theme(wechat_renderer.Theme("test-theme", primary="#111111"))
+    cache = make_cache()
+    first, hit = cache.render("# 标题\n", theme="test-theme")
+    assert not hit and "#111111" in first["html"]
+
+    wechat_renderer.register_theme(wechat_renderer.Theme("test-theme", primary="#222222"))
+    second, hit = cache.render("# 标题\n", theme="test-theme")
+    assert not hit
+    assert "#222222" in second["html"] and "#111111" not in second["html"]
+    wechat_renderer._renderers.pop("test-theme", None)
+    print("✓ 通过")
+
+
+def test_hits_and_misses_add_up(make_cache):
+    """命中与未命中次数之和等于渲染调用次数，并反映在 stats_line 中"""
+    print("\n测试: 命中统计")
+    cache = make_cache()
+    texts = ["# A\n", "# B\n", "# A\n", "# C\n", "# B\n"]
+    results = [cache.render(t)[1] for t in texts]
+    assert results == [False, False, True, False, True]
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert cache.stats_line() == "渲染缓存命中 2/5（40%）"
+
+    reopened = make_cache()
+    assert reopened.render("# C\n") == (cache.get("# C\n"), True)  # 持久化到磁盘
+    cache.reset_stats()
+    assert cache.stats_line() == "渲染缓存命中 0/0（0%）"
+    print("✓ 通过")
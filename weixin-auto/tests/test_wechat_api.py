@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+测试草稿接口后端（wechat_api.py），全部请求发往本地桩服务（wechat_api_stub.py）
+"""
+
+import functools
+import json
+
+import pytest
+
+import wechat_api
+from archive_index import ArchiveIndex
+from render_cache import RenderCache
+from wechat_api_stub import PIXEL_PNG, STUB_APPID, STUB_SECRET, StubWeChatServer
+
+
+@pytest.fixture
+def server():
+    stub = StubWeChatServer().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def make_client(server, tmp_path):
+    clients = []
+
+    def make():
+        client = wechat_api.WeChatDraftClient(STUB_APPID, STUB_SECRET, api_base=server.url,
+                                              token_file=tmp_path / "token.json",
+                                              media_file=tmp_path / "media.json", workers=4)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_token_fetched_once_and_reused(server, make_client):
+    """令牌只获取一次：同一客户端内复用，新客户端从缓存文件复用"""
+    print("\n测试: 令牌复用")
+    client = make_client()
+    client.upload_image(PIXEL_PNG, "a.png")
+    client.upload_image(PIXEL_PNG + b"1", "b.png")
+    assert client.stats["token_fetches"] == 1
+
+    again = make_client()
+    again.upload_image(PIXEL_PNG + b"2", "c.png")
+    assert again.stats["token_fetches"] == 0
+    assert server.calls["/cgi-bin/stable_token"] == 1
+    print("✓ 通过")
+
+
+def test_expired_token_refreshed_once(server, make_client):
+    """令牌过期（42001）时只刷新一次并重试"""
+    print("\n测试: 令牌过期刷新")
+    client = make_client()
+    client.upload_image(PIXEL_PNG, "a.png")
+    server.expire_tokens()
+
+    url = client.upload_image(PIXEL_PNG + b"1", "b.png")
+    assert url.startswith("http://mmbiz.qpic.cn/")
+    assert server.calls["/cgi-bin/stable_token"] == 2
+    assert server.calls["/cgi-bin/media/uploadimg"] == 3  # 首次 + 过期被拒 + 重试
+    assert client.stats["token_fetches"] == 2
+    print("✓ 通过")
+
+
+def test_identical_images_uploaded_once(server, make_client, tmp_path):
+    """内容相同的图片（即使文件名不同）只上传一次"""
+    print("\n测试: 图片去重")
+    (tmp_path / "one.png").write_bytes(PIXEL_PNG)
+    (tmp_path / "two.png").write_bytes(PIXEL_PNG)
+    md_files = []
+    for n in range(3):
+        md_file = tmp_path / f"post-{n}.md"
+        md_file.write_text(f"# 文章 {n}\n\n![图](one.png)\n\n![图](two.png)\n", encoding="utf-8")
+        md_files.append(md_file)
+
+    client = make_client()
+    cache = RenderCache(tmp_path / "render_cache.db")
+    drafts, failed = client.publish_files(md_files, article_workers=3, render_cache=cache)
+    cache.close()
+    assert failed == [] and len(drafts) == 3
+    assert server.images == 1
+    assert len(server.thumbs) == 1
+    assert client.stats["images_uploaded"] == 2  # 正文图片 1 张 + 封面素材 1 个
+    assert client.stats["images_cached"] >= 4
+    print("✓ 通过")
+
+
+def test_media_cache_shared_format_and_legacy_migration(server, make_client, tmp_path):
+    """上传记录使用 image_assets.UrlCache 的格式，旧版扁平记录读入后不再重复上传"""
+    print("\n测试: 上传记录格式")
+    import hashlib
+    (tmp_path / "one.png").write_bytes(PIXEL_PNG)
+    digest = hashlib.sha256(PIXEL_PNG).hexdigest()
+    (tmp_path / "media.json").write_text(json.dumps(
+        {f"{STUB_APPID}:img:{digest}": "http://mmbiz.qpic.cn/legacy"}), encoding="utf-8")
+
+    client = make_client()
+    assert client._image_url("one.png", tmp_path) == "http://mmbiz.qpic.cn/legacy"
+    assert server.images == 0
+    client._thumb_media_id("one.png", tmp_path)
+    data = json.loads((tmp_path / "media.json").read_text(encoding="utf-8"))
+    assert data[wechat_api.media_platform(STUB_APPID)][digest] == "http://mmbiz.qpic.cn/legacy"
+    assert digest in data[wechat_api.media_platform(STUB_APPID, "thumb")]
+    assert f"{STUB_APPID}:img:{digest}" not in data
+    print("✓ 通过")
+
+
+def test_draft_payload_keeps_chinese(server, make_client, tmp_path):
+    """draft/add 的请求体保留中文原文，不转义为 \\uXXXX"""
+    print("\n测试: 草稿中文编码")
+    (tmp_path / "cover.png").write_bytes(PIXEL_PNG)
+    md_file = tmp_path / "post.md"
+    md_file.write_text("# 中文标题\n\n正文内容。\n\n![封面](cover.png)\n", encoding="utf-8")
+
+    client = make_client()
+    article = client.build_article(md_file)
+    client.add_draft([article])
+
+    body = server.draft_bodies[0]
+    assert "中文标题".encode("utf-8") in body
+    assert b"\\u" not in body
+    assert json.loads(body.decode("utf-8"))["articles"][0]["title"] == "中文标题"
+    print("✓ 通过")
+
+
+def test_no_move_still_records_archive(server, make_client, tmp_path):
+    """不移动文件（--no-move）时同样登记内容哈希，重跑时跳过"""
+    print("\n测试: 不移动文件时登记归档索引")
+    (tmp_path / "cover.png").write_bytes(PIXEL_PNG)
+    md_file = tmp_path / "post.md"
+    md_file.write_text("# 标题\n\n![封面](cover.png)\n", encoding="utf-8")
+
+    archive = ArchiveIndex(tmp_path / "archive.db", done_dir=tmp_path / "done")
+    client = make_client()
+    cache = RenderCache(tmp_path / "render_cache.db")
+    drafts, failed = client.publish_files([md_file], render_cache=cache, archive=archive)
+    cache.close()
+    assert md_file.exists()
+    new_files, duplicates = archive.filter_new([md_file])
+    archive.close()
+    assert new_files == []
+    assert duplicates[0][1]["draft_id"] == drafts["post.md"]
+    assert duplicates[0][1]["path"] == str(md_file.resolve())
+    print("✓ 通过")
+
+
+def test_non_official_api_base_uses_separate_archive(server, tmp_path, monkeypatch):
+    """指向桩服务时草稿登记在单独的索引中，默认索引不受影响"""
+    print("\n测试: 按接口地址区分归档索引")
+    monkeypatch.setattr(wechat_api, "ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(wechat_api, "WeChatDraftClient",
+                        functools.partial(wechat_api.WeChatDraftClient, token_file=tmp_path / "token.json",
+                                          media_file=tmp_path / "media.json"))
+    monkeypatch.setattr(wechat_api, "RenderCache", lambda: RenderCache(tmp_path / "render_cache.db"))
+    monkeypatch.setenv("WECHAT_APPID", STUB_APPID)
+    monkeypatch.setenv("WECHAT_APPSECRET", STUB_SECRET)
+    monkeypatch.delenv("WECHAT_API_BASE", raising=False)
+    (tmp_path / "cover.png").write_bytes(PIXEL_PNG)
+    md_file = tmp_path / "post.md"
+    md_file.write_text("# 标题\n\n![封面](cover.png)\n", encoding="utf-8")
+
+    for _ in range(2):
+        assert wechat_api.run_batch([md_file], done_dir=None, api_base=server.url) == 0
+    assert server.calls["/cgi-bin/draft/add"] == 1  # 第二次按桩服务的索引跳过
+
+    stub_db = wechat_api.archive_db_for(STUB_APPID, server.url)
+    assert stub_db.exists() and stub_db.name != "archive_index.db"
+    assert not (tmp_path / "archive_index.db").exists()
+    assert wechat_api.archive_db_for(STUB_APPID) == tmp_path / "archive_index.db"
+    assert wechat_api.archive_db_for("other", server.url) != stub_db
+    print("✓ 通过")
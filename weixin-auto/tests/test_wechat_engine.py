@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+测试浏览器引擎（wechat_engine.py）的批量保存：浏览器会话用假实现代替
+"""
+
+import asyncio
+
+import pytest
+
+import wechat_engine
+from archive_index import ArchiveIndex, content_hash
+from render_cache import RenderCache
+
+
+class FakeEngine:
+    """记录启动次数与保存的标题，不启动浏览器"""
+    started = 0
+    published = []
+
+    def __init__(self, unattended=False, headless=False):
+        pass
+
+    async def __aenter__(self):
+        FakeEngine.started += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def publish(self, source, author="自动发布"):
+        FakeEngine.published.append(source.title)
+        return f"draft-{len(FakeEngine.published)}"
+
+    async def publish_many(self, sources, author="自动发布", tabs=1):
+        return [(await self.publish(s, author), None) for s in sources]
+
+
+@pytest.fixture
+def posts(tmp_path, monkeypatch):
+    monkeypatch.setattr(wechat_engine, "WeChatEngine", FakeEngine)
+    FakeEngine.started = 0
+    FakeEngine.published = []
+    (tmp_path / "posts").mkdir()
+    a = tmp_path / "posts" / "a.md"
+    a.write_text("# 第一篇\n\n正文\n", encoding="utf-8")
+    b = tmp_path / "posts" / "b.md"
+    b.write_text("# 第一篇\r\n\r\n正文\r\n", encoding="utf-8")
+    return [a, b]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    archive = ArchiveIndex(tmp_path / "archive.db", done_dir=tmp_path / "done")
+    cache = RenderCache(tmp_path / "render_cache.db")
+    yield {"archive": archive, "render_cache": cache}
+    archive.close()
+    cache.close()
+
+
+@pytest.mark.parametrize("tabs", [1, 3])
+def test_archived_files_skipped_before_browser_starts(posts, stores, tabs):
+    """同批重复的文件只保存一次；保存过的内容重跑时不再启动浏览器"""
+    print(f"\n测试: 批量保存查归档索引（tabs={tabs}）")
+    failed = asyncio.run(wechat_engine.publish_files(posts, tabs=tabs, **stores))
+    assert failed == []
+    assert FakeEngine.published == ["第一篇"]
+    assert stores["archive"].stats()["archived"] == 1
+    assert stores["archive"].lookup(content_hash(posts[0].read_text(encoding="utf-8")))["draft_id"] == "draft-1"
+
+    failed = asyncio.run(wechat_engine.publish_files(posts, tabs=tabs, **stores))
+    assert failed == []
+    assert FakeEngine.started == 1
+    assert FakeEngine.published == ["第一篇"]
+
+    asyncio.run(wechat_engine.publish_files(posts[:1], tabs=tabs, force=True, **stores))
+    assert FakeEngine.published == ["第一篇", "第一篇"]
+    print("✓ 通过")
+
+
+def test_publish_many_isolates_failing_tab(monkeypatch):
+    """某个标签页出错只影响对应的文章，其他文章照常保存并返回草稿 ID"""
+    print("\n测试: 并行标签页互不影响")
+    engine = wechat_engine.WeChatEngine(headless=True)
+    tabs = []
+
+    async def ensure_ready():
+        pass
+
+    async def click_article_button():
+        tab = FakeTab()
+        tabs.append(tab)
+        return tab
+
+    async def fill_article(title, author, html=None, page=None, clipboard_fallback=True):
+        await asyncio.sleep(0)
+        if title == "第二篇":
+            raise RuntimeError("编辑器没有响应")
+        page.title = title
+
+    async def save_as_draft(page=None):
+        return f"draft-{page.title}"
+
+    for name, fake in (("ensure_ready", ensure_ready), ("click_article_button", click_article_button),
+                       ("fill_article", fill_article), ("save_as_draft", save_as_draft)):
+        monkeypatch.setattr(engine, name, fake)
+    sources = [wechat_engine.MarkdownSource(f"# {t}\n\n正文\n") for t in ("第一篇", "第二篇", "第三篇")]
+
+    results = asyncio.run(engine.publish_many(sources, tabs=3))
+    assert [draft_id for draft_id, _ in results] == ["draft-第一篇", None, "draft-第三篇"]
+    assert [type(error) for _, error in results] == [type(None), RuntimeError, type(None)]
+    assert len(tabs) == 3 and all(tab.closed for tab in tabs)
+    print("✓ 通过")
+
+
+class FakeTab:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def new_page(self):
+        page = FakeTab()
+        self.pages.append(page)
+        return page
+
+
+class FakeBrowser:
+    def __init__(self, context):
+        self.contexts = [context]
+        self.disconnected = False
+
+    async def close(self):
+        self.disconnected = True
+
+
+def test_shared_browser_closes_only_own_tabs(monkeypatch):
+    """共享浏览器服务：只关闭本次打开的标签页，其他工具之后打开的标签页保留"""
+    print("\n测试: 共享浏览器只关闭自己的标签页")
+    existing = FakeTab()
+    context = FakeContext([existing])
+    browser = FakeBrowser(context)
+
+    class FakeChromium:
+        async def connect_over_cdp(self, endpoint):
+            return browser
+
+    class FakePlaywright:
+        chromium = FakeChromium()
+
+        async def stop(self):
+            pass
+
+    class FakeStarter:
+        async def start(self):
+            return FakePlaywright()
+
+    monkeypatch.setenv("BROWSER_CDP_ENDPOINT", "http://127.0.0.1:9222")
+    monkeypatch.setattr(wechat_engine, "async_playwright", FakeStarter)
+
+    async def scenario():
+        engine = wechat_engine.WeChatEngine()
+        await engine.start()
+        own = engine._track(await context.new_page())
+        other_tool = await context.new_page()  # 另一个工具同时打开的标签页
+        await engine.close()
+        return engine, own, other_tool
+
+    engine, own, other_tool = asyncio.run(scenario())
+    assert own.closed and context.pages[1].closed  # 启动时打开的后台页 + 编辑器页
+    assert not other_tool.closed and not existing.closed
+    assert browser.disconnected
+    print("✓ 通过")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+测试本地渲染（wechat_renderer.py）：各类元素的输出、外链脚注、Front Matter，以及与参照输出的对比
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+import pytest
+
+import wechat_renderer
+
+pytestmark = pytest.mark.skipif(wechat_renderer.MarkdownIt is None, reason="未安装 markdown-it-py")
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+
+
+def render(text, theme="default"):
+    return wechat_renderer.render(text, theme=theme)
+
+
+def test_headings_use_theme_styles():
+    """各级标题带主题色内联样式，不输出 class / <style>"""
+    print("\n测试: 标题")
+    theme = wechat_renderer.get_theme("green")
+    out = render("# 一级\n\n## 二级\n\n### 三级\n", theme="green")
+    assert f'<h1 style="{theme.styles["h1"]}">一级</h1>' in out
+    assert f'<h2 style="{theme.styles["h2"]}">二级</h2>' in out
+    assert f'<h3 style="{theme.styles["h3"]}">三级</h3>' in out
+    assert theme.primary in theme.styles["h2"]
+    assert "class=" not in out and "<style" not in out
+    print("✓ 通过")
+
+
+@pytest.mark.skipif(wechat_renderer.get_lexer_by_name is None, reason="未安装 Pygments")
+def test_code_block_highlighted_and_keeps_indentation():
+    """代码块逐 token 着色，缩进和换行转成 &nbsp; / <br>，特殊字符只转义一次"""
+    print("\n测试: 代码块高亮")
+    out = render("```python\ndef f(a):\n    return a < 1 and '&'\n```\n")
+    assert '<pre style="' in out
+    assert re.search(r'<span style="color: #[0-9A-Fa-f]{6}; font-weight: bold;">def</span>', out)
+    assert "<br>&nbsp;&nbsp;&nbsp;&nbsp;" in out
+    assert "&lt;" in out and "&amp;lt;" not in out
+    assert "\n" not in out.split("<code", 1)[1].split("</code>", 1)[0]
+    print("✓ 通过")
+
+
+def test_unknown_language_is_plain_text():
+    print("\n测试: 未知语言的代码块")
+    out = render("```nosuchlang\na  b\n```\n")
+    assert "a&nbsp;&nbsp;b" in out
+    print("✓ 通过")
+
+
+def test_table_alignment_kept():
+    """表格列对齐写进 style，与主题样式合并"""
+    print("\n测试: 表格对齐")
+    out = render("| L | C | R |\n|:--|:--:|--:|\n| 1 | 2 | 3 |\n")
+    styles = wechat_renderer.get_theme("default").styles
+    assert out.count('<section style="' + styles["table_wrap"]) == 1
+    for align, cell in (("left", "1"), ("center", "2"), ("right", "3")):
+        assert re.search(rf'<td style="text-align:{align}; [^"]*">{cell}</td>', out)
+    assert re.search(r'<th style="text-align:center; [^"]*">C</th>', out)
+    print("✓ 通过")
+
+
+def test_blockquote_and_nested_lists():
+    """引用中的段落使用引用段落样式；嵌套列表保持层级"""
+    print("\n测试: 引用与嵌套列表")
+    styles = wechat_renderer.get_theme("default").styles
+    out = render("> 引用\n\n正文\n\n- 外层\n  - 内层\n    1. 更深\n")
+    assert f'<blockquote style="{styles["blockquote"]}">\n<p style="{styles["blockquote_p"]}">引用</p>' in out
+    assert f'<p style="{styles["p"]}">正文</p>' in out
+    inner = out.index("内层")
+    assert out.count("<ul ") == 2 and out.count("<ol ") == 1
+    assert out.index("外层") < out.index("<ul ", out.index("外层")) < inner < out.index("<ol ") < out.index("更深")
+    print("✓ 通过")
+
+
+def test_external_links_become_footnotes():
+    """外部链接转为文末脚注（按出现顺序编号），公众号文章链接保留为 <a>"""
+    print("\n测试: 外链脚注")
+    out = render("看 [官网](https://example.com/a?x=1&y=2) 和 [另一篇](https://mp.weixin.qq.com/s/xyz)，"
+                 "还有 [文档](http://docs.example.com)。\n")
+    assert "https://example.com" not in out.split("引用链接")[0]
+    assert '<a href="https://mp.weixin.qq.com/s/xyz"' in out
+    assert "[1]</sup>" in out and "[2]</sup>" in out and "[3]</sup>" not in out
+    notes = out.split("引用链接", 1)[1]
+    assert "[1]</code> 官网: <i style=\"word-break: break-all;\">https://example.com/a?x=1&amp;y=2</i>" in notes
+    assert "[2]</code> 文档:" in notes
+    assert "mp.weixin.qq.com" not in notes
+    print("✓ 通过")
+
+
+def test_no_footnotes_section_without_external_links():
+    print("\n测试: 没有外链时不输出脚注")
+    assert "引用链接" not in render("[公众号](https://mp.weixin.qq.com/s/1)\n")
+    print("✓ 通过")
+
+
+def test_front_matter_title_and_digest():
+    """Front Matter 的 title / digest 优先；不输出到正文"""
+    print("\n测试: Front Matter")
+    article = wechat_renderer.render_article(
+        "---\ntitle: \"指定标题\"\ndescription: '指定摘要'\n---\n# 正文标题\n\n第一段。\n"
+    )
+    assert article["title"] == "指定标题"
+    assert article["digest"] == "指定摘要"
+    assert "title:" not in article["html"] and "指定标题" not in article["html"]
+    print("✓ 通过")
+
+
+def test_title_digest_and_covers_from_body():
+    """没有 Front Matter 时标题取第一个一级标题，摘要取第一段纯文本（截断），封面取前几张图片"""
+    print("\n测试: 从正文提取元信息")
+    text = ("## 不是一级\n\n# 真正的标题\n\n" + "摘要**加粗** `代码`\n换行" + "字" * 200 +
+            "\n\n![a](1.png) ![b](2.png) ![a](1.png)\n")
+    article = wechat_renderer.render_article(text)
+    assert article["title"] == "真正的标题"
+    assert article["digest"].startswith("摘要加粗 代码 换行字")
+    assert len(article["digest"]) == wechat_renderer.DIGEST_CHARS
+    assert article["covers"] == ["1.png", "2.png"]
+
+    empty = wechat_renderer.render_article("只有正文\n")
+    assert empty["title"] is None and empty["covers"] == []
+    print("✓ 通过")
+
+
+class _Blocks(HTMLParser):
+    """抽取块级结构：(标签, 文本)，忽略样式与空白差异，用于和在线转换的输出对比"""
+    BLOCKS = {"h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "blockquote", "pre", "th", "td", "hr", "img"}
+
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+        self._stack = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BLOCKS:
+            self.blocks.append([tag, ""])
+            if tag in ("hr", "img"):
+                self.blocks[-1][1] = dict(attrs).get("src") or ""
+                return
+            self._stack.append(len(self.blocks) - 1)
+
+    def handle_endtag(self, tag):
+        if tag in self.BLOCKS and self._stack and self.blocks[self._stack[-1]][0] == tag:
+            self._stack.pop()
+
+    def handle_data(self, data):
+        if self._stack:
+            self.blocks[self._stack[-1]][1] += data
+
+    @classmethod
+    def of(cls, html_text):
+        parser = cls()
+        parser.feed(html_text)
+        return [(tag, " ".join(text.replace("\xa0", " ").split())) for tag, text in parser.blocks]
+
+
+@pytest.mark.skipif(wechat_renderer.get_lexer_by_name is None, reason="未安装 Pygments（代码块输出不同）")
+def test_sample_matches_golden():
+    """
+    示例文章的渲染结果与 golden/sample.html 逐字一致
+
+    样式或渲染规则有意改动时，用 UPDATE_GOLDEN=1 重新生成，并在提交中说明原因。
+    """
+    print("\n测试: 示例文章的渲染快照")
+    out = render((GOLDEN_DIR / "sample.md").read_text(encoding="utf-8"))
+    golden = GOLDEN_DIR / "sample.html"
+    if os.environ.get("UPDATE_GOLDEN"):
+        golden.write_text(out, encoding="utf-8")
+    assert out == golden.read_text(encoding="utf-8")
+    print("✓ 通过")
+
+
+def test_sample_matches_doocs_output():
+    """
+    与 md.doocs.org 在线转换的输出对比块级结构和文字（样式细节不要求一致）
+
+    golden/sample.doocs.html 为在 md.doocs.org 中粘贴 golden/sample.md 后“复制”得到的 HTML
+    （即在线转换流程粘贴进公众号编辑器的内容）。外链脚注与代码高亮颜色两边实现不同，只比较文字。
+    """
+    print("\n测试: 与在线转换输出对比")
+    doocs = GOLDEN_DIR / "sample.doocs.html"
+    if not doocs.exists():
+        pytest.skip("缺少 golden/sample.doocs.html（需联网从 md.doocs.org 保存）")
+    ours = _Blocks.of(render((GOLDEN_DIR / "sample.md").read_text(encoding="utf-8")))
+    theirs = _Blocks.of(doocs.read_text(encoding="utf-8"))
+    assert ours == theirs
+    print("✓ 通过")
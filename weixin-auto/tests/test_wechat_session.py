@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+测试公众号登录状态持久化（wechat_session.py）中不依赖真实浏览器的部分
+"""
+
+import asyncio
+import json
+
+import wechat_session
+
+
+class SharedContext:
+    """常驻浏览器服务的默认上下文：里面有所有站点的登录状态"""
+
+    async def storage_state(self):
+        return {
+            "cookies": [
+                {"name": "slave_sid", "value": "1", "domain": "mp.weixin.qq.com", "path": "/", "expires": -1},
+                {"name": "data_ticket", "value": "2", "domain": ".weixin.qq.com", "path": "/", "expires": -1},
+                {"name": "UserName", "value": "3", "domain": ".csdn.net", "path": "/", "expires": -1},
+                {"name": "z_c0", "value": "4", "domain": ".zhihu.com", "path": "/", "expires": -1},
+                {"name": "uin", "value": "5", "domain": ".qq.com", "path": "/", "expires": -1},
+            ],
+            "origins": [
+                {"origin": "https://mp.weixin.qq.com", "localStorage": [{"name": "a", "value": "1"}]},
+                {"origin": "https://www.xiaohongshu.com", "localStorage": [{"name": "b", "value": "2"}]},
+            ],
+        }
+
+
+def test_save_state_keeps_only_wechat(tmp_path):
+    """共享上下文中只保存 *.weixin.qq.com 的 cookies 和源"""
+    print("\n测试: 登录状态按域名过滤")
+    state_file = tmp_path / "wechat_state.json"
+    asyncio.run(wechat_session.save_state(SharedContext(), state_file))
+
+    saved = json.loads(state_file.read_text(encoding="utf-8"))
+    assert [c["name"] for c in saved["cookies"]] == ["slave_sid", "data_ticket"]
+    assert [o["origin"] for o in saved["origins"]] == ["https://mp.weixin.qq.com"]
+    assert state_file.stat().st_mode & 0o777 == 0o600
+    assert wechat_session.check_state_file(state_file)[0]
+    print("✓ 通过")
@@ -0,0 +1,491 @@
+"""
+微信公众号草稿接口后端
+
+浏览器流程（打开编辑器、粘贴、点保存）每篇需要几十秒；已认证的公众号可以改用
+官方 HTTP 接口直接创建草稿，几百篇文章几分钟内即可完成：
+
+- access_token 缓存到 wechat_token.json，过期前一直复用（使用 stable_token 接口，
+  多个进程同时运行也不会互相顶掉）；接口返回令牌失效时自动刷新重试一次
+- 正文图片（本地文件或外链）并发上传，按内容哈希去重，上传结果记录在 wechat_media.json，
+  重跑时同一张图片不会重复上传；第一张图片同时作为封面上传为永久素材。上传记录与 CSDN / 知乎
+  共用 image_assets.UrlCache（平台名 wechat:AppID / wechat_thumb:AppID），上传前同样压缩图片
+- 所有请求共用一个带连接池的 requests.Session
+- 接口地址可配置，测试时指向本地桩服务（见 wechat_api_stub.py）；非官方地址的草稿登记在
+  按 AppID + 接口地址区分的单独归档索引中，不影响正式运行的查重
+
+需要在公众号后台「设置与开发 → 基本配置」获取 AppID / AppSecret，并把本机 IP 加入白名单。
+
+用法:
+    export WECHAT_APPID=wx...  WECHAT_APPSECRET=...
+    python wechat_api.py                        # 处理 posts/ 下所有文章，成功后移动到 done/
+    python wechat_api.py posts/a.md posts/b.md --no-move
+    python markdown_to_wechat.py --backend api  # 批量脚本改走接口
+"""
+
+import hashlib
+import html
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import shared  # noqa: F401  共用 csdn-blog-auto-publish/image_assets.py
+import wechat_renderer
+from archive_index import DEFAULT_DB_FILE, DEFAULT_DONE_DIR, ArchiveIndex, content_hash, format_record
+from image_assets import UrlCache, is_remote, load_image, optimize_image
+from render_cache import RenderCache
+
+
+DEFAULT_API_BASE = "https://api.weixin.qq.com"
+TOKEN_FILE = Path(__file__).resolve().parent / "wechat_token.json"
+MEDIA_FILE = Path(__file__).resolve().parent / "wechat_media.json"
+# 非官方接口地址（桩服务等）的归档索引放在这里，文件名带 AppID + 接口地址的哈希
+ARCHIVE_DIR = Path(__file__).resolve().parent
+# access_token 剩余有效期不足该秒数时提前刷新
+TOKEN_MARGIN = 5 * 60
+# 令牌无效 / 过期的错误码，刷新后重试
+TOKEN_ERRCODES = (40001, 40014, 42001)
+# 已经在微信图床上的图片不需要再上传
+WECHAT_IMAGE_HOSTS = ("mmbiz.qpic.cn", "mmbiz.qlogo.cn")
+IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]*)(")')
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+
+def resolve_api_base(api_base: Optional[str] = None) -> str:
+    """接口地址：参数 > 环境变量 WECHAT_API_BASE > 官方地址"""
+    return (api_base or os.environ.get("WECHAT_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+
+
+def archive_db_for(appid: Optional[str], api_base: Optional[str] = None) -> Path:
+    """
+    归档索引文件：官方接口与浏览器后端共用默认索引；其他地址按 AppID + 接口地址各用一个索引，
+    桩服务返回的草稿 ID 不会让正式运行把文章当成“已保存过”
+    """
+    api_base = resolve_api_base(api_base)
+    if api_base == DEFAULT_API_BASE:
+        return ARCHIVE_DIR / DEFAULT_DB_FILE.name
+    key = hashlib.sha1(f"{appid}|{api_base}".encode("utf-8")).hexdigest()[:12]
+    return ARCHIVE_DIR / f"archive_index.{key}.db"
+
+
+class WeChatApiError(Exception):
+    """接口返回错误码"""
+
+    def __init__(self, errcode, errmsg=""):
+        super().__init__(f"errcode={errcode} {errmsg}")
+        self.errcode = errcode
+        self.errmsg = errmsg
+
+
+def media_platform(appid: str, kind: str = "img") -> str:
+    """UrlCache 中的平台名：正文图片 wechat:AppID，封面素材 wechat_thumb:AppID"""
+    return f"wechat:{appid}" if kind == "img" else f"wechat_{kind}:{appid}"
+
+
+def open_media_cache(path: Optional[Path] = MEDIA_FILE) -> UrlCache:
+    """
+    打开图片上传记录
+
+    旧版 wechat_media.json 是扁平的 {"AppID:img:哈希": 地址}，读入时转换为 UrlCache 的按平台分组格式。
+    """
+    legacy = {}
+    if path and Path(path).exists():
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        legacy = {k: v for k, v in data.items() if isinstance(v, str) and k.count(":") >= 2}
+        if legacy:
+            rest = {k: v for k, v in data.items() if k not in legacy}
+            Path(path).write_text(json.dumps(rest, ensure_ascii=False, indent=2), encoding="utf-8")
+    cache = UrlCache(path)
+    for key, value in legacy.items():
+        appid, kind, digest = key.split(":", 2)
+        cache.put(media_platform(appid, kind), digest, value)
+    if legacy:
+        cache.save()
+    return cache
+
+
+class WeChatDraftClient:
+    """通过官方接口创建公众号草稿"""
+
+    def __init__(self, appid: Optional[str] = None, secret: Optional[str] = None,
+                 api_base: Optional[str] = None, token_file: Optional[Path] = TOKEN_FILE,
+                 media_file: Optional[Path] = MEDIA_FILE, workers: int = 8, timeout: int = 30):
+        """
+        Args:
+            appid / secret: 公众号 AppID / AppSecret，默认读取环境变量 WECHAT_APPID / WECHAT_APPSECRET
+            api_base: 接口地址，默认读取环境变量 WECHAT_API_BASE，否则为官方地址
+            token_file: access_token 缓存文件，None 表示只缓存在内存
+            media_file: 图片上传记录文件，None 表示只缓存在内存
+            workers: 图片并发上传数（同时也是连接池大小）
+            timeout: 单次请求超时（秒）
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.appid = appid or os.environ.get("WECHAT_APPID")
+        self.secret = secret or os.environ.get("WECHAT_APPSECRET")
+        if not self.appid or not self.secret:
+            raise ValueError("缺少公众号 AppID / AppSecret，请设置环境变量 WECHAT_APPID / WECHAT_APPSECRET")
+        self.api_base = resolve_api_base(api_base)
+        self.token_file = Path(token_file) if token_file else None
+        self.timeout = timeout
+        self.workers = max(1, workers)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.workers + 4, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+
+        self.media = open_media_cache(media_file)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._lock = threading.Lock()
+        self._token_lock = threading.Lock()
+        self._digest_locks: Dict[str, threading.Lock] = {}
+        self._token = None
+        self._token_expires = 0.0
+        self.stats = {"token_fetches": 0, "images_uploaded": 0, "images_cached": 0, "drafts": 0}
+
+    # ---------- access_token ----------
+
+    def access_token(self, stale: Optional[str] = None) -> str:
+        """
+        返回有效的 access_token：内存 → 缓存文件 → 接口，过期前一直复用
+
+        Args:
+            stale: 接口报告失效的令牌；多个线程同时报告同一个失效令牌时只刷新一次
+        """
+        with self._token_lock:
+            now = time.time()
+            if self._token and self._token != stale and self._token_expires - now > TOKEN_MARGIN:
+                return self._token
+            if self._load_token_file(now) and self._token != stale:
+                return self._token
+            force = stale is not None
+
+            resp = self.session.post(
+                f"{self.api_base}/cgi-bin/stable_token",
+                json={"grant_type": "client_credential", "appid": self.appid,
+                      "secret": self.secret, "force_refresh": force},
+                timeout=self.timeout
+            )
+            resp.raise_for_status()
+            result = resp.json()
+            if result.get("errcode"):
+                raise WeChatApiError(result["errcode"], result.get("errmsg", ""))
+            self._token = result["access_token"]
+            self._token_expires = now + int(result.get("expires_in", 7200))
+            self.stats["token_fetches"] += 1
+            self._save_token_file()
+            return self._token
+
+    def _load_token_file(self, now: float) -> bool:
+        if not self.token_file or not self.token_file.exists():
+            return False
+        try:
+            cached = json.loads(self.token_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if (cached.get("appid") != self.appid or cached.get("api_base") != self.api_base
+                or cached.get("expires_at", 0) - now <= TOKEN_MARGIN):
+            return False
+        self._token = cached["access_token"]
+        self._token_expires = cached["expires_at"]
+        return True
+
+    def _save_token_file(self):
+        if not self.token_file:
+            return
+        tmp = self.token_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "appid": self.appid,
+            "api_base": self.api_base,
+            "access_token": self._token,
+            "expires_at": self._token_expires,
+        }), encoding="utf-8")
+        try:
+            os.chmod(tmp, 0o600)  # 令牌等同于接口调用权限，只允许本人读写
+        except OSError:
+            pass
+        os.replace(tmp, self.token_file)
+
+    def _call(self, path: str, params: Optional[dict] = None, payload: Optional[dict] = None,
+              files: Optional[dict] = None) -> dict:
+        """POST 调用接口；令牌失效时强制刷新并重试一次"""
+        token = None
+        for attempt in (0, 1):
+            token = self.access_token(stale=token)
+            query = dict(params or {}, access_token=token)
+            if payload is not None:
+                # 必须保留中文原文，否则草稿里会出现 \uXXXX
+                resp = self.session.post(
+                    f"{self.api_base}{path}", params=query,
+                    data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                    headers={"Content-Type": "application/json; charset=utf-8"},
+                    timeout=self.timeout
+                )
+            else:
+                resp = self.session.post(f"{self.api_base}{path}", params=query, files=files,
+                                         timeout=self.timeout)
+            resp.raise_for_status()
+            result = resp.json()
+            errcode = result.get("errcode", 0)
+            if errcode in TOKEN_ERRCODES and attempt == 0:
+                continue
+            if errcode:
+                raise WeChatApiError(errcode, result.get("errmsg", ""))
+            return result
+
+    # ---------- 图片 ----------
+
+    def upload_image(self, data: bytes, filename: str) -> str:
+        """上传正文图片，返回微信图床地址"""
+        mime = mimetypes.guess_type(filename)[0] or "image/png"
+        result = self._call("/cgi-bin/media/uploadimg", files={"media": (filename, data, mime)})
+        return result["url"]
+
+    def upload_thumb(self, data: bytes, filename: str) -> str:
+        """上传封面图为永久素材，返回 media_id"""
+        mime = mimetypes.guess_type(filename)[0] or "image/png"
+        result = self._call("/cgi-bin/material/add_material", params={"type": "image"},
+                            files={"media": (filename, data, mime)})
+        return result["media_id"]
+
+    def _cached(self, platform: str, digest: Optional[str]) -> Optional[str]:
+        value = self.media.get(platform, digest) if digest else None
+        if value:
+            with self._lock:
+                self.stats["images_cached"] += 1
+        return value
+
+    def _once(self, kind: str, src: str, base_dir: Path, upload: Callable[[bytes, str], str]) -> str:
+        """
+        同一内容只上传一次：已有记录直接返回，并发上传同一张图片时后来者等待前者的结果
+
+        外链图片先按地址查已知的内容哈希，命中时不必重新下载；上传前压缩图片。
+        """
+        platform = media_platform(self.appid, kind)
+        if is_remote(src):
+            value = self._cached(platform, self.media.source_digest(src))
+            if value:
+                return value
+        raw = load_image(src, base_dir, session=self.session)
+        digest = hashlib.sha256(raw).hexdigest()
+        if is_remote(src):
+            self.media.put_source(src, digest)
+        value = self._cached(platform, digest)
+        if value:
+            return value
+        with self._lock:
+            lock = self._digest_locks.setdefault(f"{platform}:{digest}", threading.Lock())
+        with lock:
+            value = self._cached(platform, digest)
+            if value:
+                return value
+            data, filename = optimize_image(raw, Path(src.split("?")[0]).name or f"{digest[:12]}.png")
+            value = upload(data, filename)
+            self.media.put(platform, digest, value)
+            self.media.save()
+            with self._lock:
+                self.stats["images_uploaded"] += 1
+            return value
+
+    def _image_url(self, src: str, base_dir: Path) -> str:
+        if any(host in src for host in WECHAT_IMAGE_HOSTS):
+            return src
+        return self._once("img", src, base_dir, self.upload_image)
+
+    def _thumb_media_id(self, src: str, base_dir: Path) -> str:
+        return self._once("thumb", src, base_dir, self.upload_thumb)
+
+    def replace_images(self, content: str, base_dir: Path) -> str:
+        """把正文中的图片并发上传到微信图床并替换地址"""
+        sources = []
+        for m in IMG_SRC_RE.finditer(content):
+            src = html.unescape(m.group(2))
+            if src and not src.startswith("data:") and src not in sources:
+                sources.append(src)
+        if not sources:
+            return content
+        urls = dict(zip(sources, self._pool.map(lambda s: self._image_url(s, base_dir), sources)))
+        return IMG_SRC_RE.sub(
+            lambda m: m.group(1) + html.escape(urls.get(html.unescape(m.group(2)), m.group(2))) + m.group(3),
+            content
+        )
+
+    # ---------- 草稿 ----------
+
+    def add_draft(self, articles: List[dict]) -> str:
+        """新建草稿，返回草稿 media_id"""
+        result = self._call("/cgi-bin/draft/add", payload={"articles": articles})
+        with self._lock:
+            self.stats["drafts"] += 1
+        return result["media_id"]
+
+    def build_article(self, md_file: Path, theme: str = "default", author: str = "自动发布",
+                      thumb: Optional[Path] = None, render_cache: Optional[RenderCache] = None) -> dict:
+        """
+        渲染一篇 Markdown 并上传其中的图片，返回 draft/add 需要的文章字段
+
+        标题取 Front Matter 或第一个一级标题，没有时由文件名生成；封面取文中第一张图片，
+        没有图片时使用 thumb 指定的默认封面。
+        """
+        md_file = Path(md_file)
+        text = md_file.read_text(encoding="utf-8")
+        if render_cache is not None:
+            article, _ = render_cache.render(text, theme=theme)
+        else:
+            article = wechat_renderer.render_article(text, theme=theme)
+
+        base_dir = md_file.parent
+        cover = article["covers"][0] if article["covers"] else None
+        if cover:
+            thumb_future = self._pool.submit(self._thumb_media_id, cover, base_dir)
+        elif thumb:
+            thumb_future = self._pool.submit(self._thumb_media_id, str(Path(thumb).resolve()), base_dir)
+        else:
+            raise ValueError(f"{md_file.name} 中没有图片，请用 --thumb 指定默认封面")
+        content = self.replace_images(article["html"], base_dir)
+
+        title = article["title"] or md_file.stem.replace("-", " ").replace("_", " ").title()
+        return {
+            "title": title,
+            "author": author,
+            "digest": article["digest"] or "",
+            "content": content,
+            "content_source_url": "",
+            "thumb_media_id": thumb_future.result(),
+            "need_open_comment": 0,
+            "only_fans_can_comment": 0,
+        }
+
+    def publish_files(self, md_files: List[Path], theme: str = "default", author: str = "自动发布",
+                      thumb: Optional[Path] = None, done_dir: Optional[Path] = None,
+                      article_workers: int = 4, render_cache: Optional[RenderCache] = None,
+                      archive: Optional[ArchiveIndex] = None) -> Tuple[Dict[str, str], List[str]]:
+        """
+        批量创建草稿（多篇文章并发处理）
+
+        传入 archive 时，把内容哈希、标题和草稿 media_id 登记到归档索引（传入 done_dir 时登记移动后的路径，
+        否则登记原路径），下次运行不会为相同内容重复创建草稿。
+
+        Returns:
+            ({文件名: 草稿 media_id}, 失败文件名列表)
+        """
+        cache = render_cache or RenderCache()
+        cache.reset_stats()
+        drafts: Dict[str, str] = {}
+        failed: List[str] = []
+
+        def publish_one(md_file: Path):
+            try:
+                article = self.build_article(md_file, theme, author, thumb, cache)
+                media_id = self.add_draft([article])
+            except Exception as e:
+                print(f"❌ {md_file.name}: {e}")
+                return md_file, None, None
+            print(f"✓ {md_file.name} → 草稿 {media_id}")
+            return md_file, media_id, article["title"]
+
+        with ThreadPoolExecutor(max_workers=max(1, article_workers)) as pool:
+            for md_file, media_id, title in pool.map(publish_one, md_files):
+                if not media_id:
+                    failed.append(md_file.name)
+                    continue
+                drafts[md_file.name] = media_id
+                digest = content_hash(md_file.read_text(encoding="utf-8")) if archive else None
+                target = md_file
+                if done_dir:
+                    Path(done_dir).mkdir(exist_ok=True)
+                    target = Path(done_dir) / md_file.name
+                    if target.exists():
+                        target = target.with_name(f"{md_file.stem}_{time.strftime('%Y%m%d_%H%M%S')}{md_file.suffix}")
+                    shutil.move(str(md_file), str(target))
+                if archive:
+                    archive.record(digest, target, title, media_id)
+        print(f"🗂️ {cache.stats_line()}")
+        if render_cache is None:
+            cache.close()
+        return drafts, failed
+
+    def stats_line(self) -> str:
+        s = self.stats
+        return (f"草稿 {s['drafts']} 篇，获取令牌 {s['token_fetches']} 次，"
+                f"上传图片 {s['images_uploaded']} 张，复用已上传图片 {s['images_cached']} 次")
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+
+def run_batch(md_files: List[Path], theme: str = "default", author: str = "自动发布",
+              thumb: Optional[Path] = None, done_dir: Optional[Path] = Path("done"),
+              workers: int = 8, article_workers: int = 4, api_base: Optional[str] = None) -> int:
+    """批量创建草稿并打印统计，返回退出码（有失败时为 1）"""
+    if not md_files:
+        print("❌ 没有找到 Markdown 文件")
+        return 0
+    # 先查归档索引（按接口地址区分），内容已经保存过草稿的文章不再调用接口
+    archive = ArchiveIndex(archive_db_for(os.environ.get("WECHAT_APPID"), api_base),
+                           done_dir=done_dir or DEFAULT_DONE_DIR)
+    new_files, duplicates = archive.filter_new(md_files)
+    for md_file, record in duplicates:
+        print(f"⏭️ 跳过 {Path(md_file).name}: {format_record(record)}")
+    md_files = [md_file for md_file, _ in new_files]
+    if not md_files:
+        print("✓ 所有文章都已保存过草稿")
+        archive.close()
+        return 0
+
+    client = WeChatDraftClient(api_base=api_base, workers=workers)
+    start = time.perf_counter()
+    try:
+        drafts, failed = client.publish_files(md_files, theme=theme, author=author, thumb=thumb,
+                                              done_dir=done_dir, article_workers=article_workers,
+                                              archive=archive)
+    finally:
+        client.close()
+        archive.close()
+    elapsed = time.perf_counter() - start
+    print(f"\n{'='*60}")
+    print(f"✅ 成功: {len(drafts)} 篇    ❌ 失败: {len(failed)} 篇    ⏱️ {elapsed:.1f} 秒")
+    print(f"📊 {client.stats_line()}")
+    for name in failed:
+        print(f"  - {name}")
+    return 1 if failed else 0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="通过官方接口把 Markdown 文章批量保存为公众号草稿")
+    parser.add_argument("files", nargs="*", help="Markdown 文件，默认处理 posts/ 下所有文件")
+    parser.add_argument("--theme", default="default", choices=sorted(wechat_renderer.THEMES), help="排版主题")
+    parser.add_argument("--author", default="自动发布", help="作者")
+    parser.add_argument("--thumb", default=None, help="文章没有图片时使用的默认封面")
+    parser.add_argument("--workers", type=int, default=8, help="图片并发上传数，默认 8")
+    parser.add_argument("--article-workers", type=int, default=4, help="同时处理的文章数，默认 4")
+    parser.add_argument("--api-base", default=None, help="接口地址（测试时指向 wechat_api_stub.py）")
+    parser.add_argument("--no-move", action="store_true", help="成功后不把文件移动到 done/")
+    args = parser.parse_args()
+
+    md_files = [Path(f) for f in args.files] or sorted(Path("posts").glob("*.md"))
+    return run_batch(md_files, theme=args.theme, author=args.author,
+                     thumb=Path(args.thumb) if args.thumb else None,
+                     done_dir=None if args.no_move else Path("done"),
+                     workers=args.workers, article_workers=args.article_workers, api_base=args.api_base)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+公众号草稿接口的本地桩服务
+
+模拟 wechat_api.py 用到的几个官方接口，用于在没有真实公众号的情况下联调和压测：
+
+- POST /cgi-bin/stable_token          发放 access_token（有效期可配置，便于验证过期刷新）
+- POST /cgi-bin/media/uploadimg       上传正文图片，返回图床地址
+- POST /cgi-bin/material/add_material 上传封面永久素材，返回 media_id
+- POST /cgi-bin/draft/add             新建草稿（校验标题、正文、封面素材）
+
+令牌错误、过期时返回与官方一致的错误码（40001 / 42001）。可以给每个请求加上固定延迟，
+模拟真实网络往返。
+
+用法:
+    python wechat_api_stub.py serve --port 8765
+    WECHAT_APPID=stub WECHAT_APPSECRET=stub python wechat_api.py --api-base http://127.0.0.1:8765 --no-move
+
+    python wechat_api_stub.py bench --count 300 --latency 80   # 生成 300 篇文章走一遍完整流程
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+STUB_APPID = "stub"
+STUB_SECRET = "stub"
+# 1x1 PNG，bench 生成文章用
+PIXEL_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+)
+
+
+class StubWeChatServer:
+    """在后台线程中运行的桩服务，记录收到的调用"""
+
+    def __init__(self, port: int = 0, appid: str = STUB_APPID, secret: str = STUB_SECRET,
+                 token_ttl: int = 7200, latency: float = 0.0):
+        """
+        Args:
+            port: 监听端口，0 表示随机分配
+            token_ttl: 发放的 access_token 有效期（秒）
+            latency: 每个请求的固定延迟（秒）
+        """
+        self.appid = appid
+        self.secret = secret
+        self.token_ttl = token_ttl
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.tokens = {}  # token → 过期时间
+        self.calls = {}  # 路径 → 次数
+        self.images = 0
+        self.thumbs = set()
+        self.drafts = []
+        self.draft_bodies = []  # draft/add 收到的原始请求体，用于核对编码
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def expire_tokens(self):
+        """让已发放的令牌全部过期（模拟提前过期，之后的调用返回 42001）"""
+        with self.lock:
+            for token in self.tokens:
+                self.tokens[token] = 0
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 保持长连接，才能体现客户端连接池的效果
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub.lock:
+                    stub.calls[parts.path] = stub.calls.get(parts.path, 0) + 1
+                route = {
+                    "/cgi-bin/stable_token": stub._stable_token,
+                    "/cgi-bin/media/uploadimg": stub._upload_image,
+                    "/cgi-bin/material/add_material": stub._add_material,
+                    "/cgi-bin/draft/add": stub._add_draft,
+                }.get(parts.path)
+                if route is None:
+                    self._reply(404, {"errcode": 404, "errmsg": "not found"})
+                    return
+                if parts.path != "/cgi-bin/stable_token":
+                    error = stub._check_token(query.get("access_token"))
+                    if error:
+                        self._reply(200, error)
+                        return
+                self._reply(200, route(query, body))
+
+            def _reply(self, status, result):
+                data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _check_token(self, token):
+        with self.lock:
+            expires = self.tokens.get(token)
+        if expires is None:
+            return {"errcode": 40001, "errmsg": "invalid credential, access_token is invalid or not latest"}
+        if expires < time.time():
+            return {"errcode": 42001, "errmsg": "access_token expired"}
+        return None
+
+    def _stable_token(self, query, body):
+        params = json.loads(body.decode("utf-8") or "{}")
+        if params.get("appid") != self.appid or params.get("secret") != self.secret:
+            return {"errcode": 40125, "errmsg": "invalid appsecret"}
+        with self.lock:
+            token = f"stub-token-{len(self.tokens) + 1}-{int(time.time() * 1000)}"
+            self.tokens[token] = time.time() + self.token_ttl
+        return {"access_token": token, "expires_in": self.token_ttl}
+
+    def _upload_image(self, query, body):
+        if b'name="media"' not in body:
+            return {"errcode": 41005, "errmsg": "media data missing"}
+        with self.lock:
+            self.images += 1
+            n = self.images
+        return {"url": f"http://mmbiz.qpic.cn/stub/{n}/0?wx_fmt=png"}
+
+    def _add_material(self, query, body):
+        if query.get("type") != "image" or b'name="media"' not in body:
+            return {"errcode": 40004, "errmsg": "invalid media type"}
+        with self.lock:
+            media_id = f"thumb-{len(self.thumbs) + 1}"
+            self.thumbs.add(media_id)
+        return {"media_id": media_id, "url": f"http://mmbiz.qpic.cn/stub/{media_id}/0"}
+
+    def _add_draft(self, query, body):
+        try:
+            articles = json.loads(body.decode("utf-8"))["articles"]
+        except (ValueError, KeyError):
+            return {"errcode": 44003, "errmsg": "empty news data"}
+        for article in articles:
+            if not article.get("title") or not article.get("content"):
+                return {"errcode": 44003, "errmsg": "empty news data"}
+            if article.get("thumb_media_id") not in self.thumbs:
+                return {"errcode": 40007, "errmsg": "invalid media_id"}
+        with self.lock:
+            self.drafts.append(articles)
+            self.draft_bodies.append(body)
+            media_id = f"draft-{len(self.drafts)}"
+        return {"media_id": media_id}
+
+
+def bench(count: int, images: int, latency: float, workers: int, article_workers: int) -> int:
+    """生成 count 篇文章（共用 images 张图片），通过桩服务完整跑一遍批量创建草稿"""
+    import wechat_api
+    from render_cache import RenderCache
+
+    server = StubWeChatServer(latency=latency).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for i in range(images):
+            (tmp / f"img{i}.png").write_bytes(PIXEL_PNG + i.to_bytes(4, "big"))
+        md_files = []
+        for n in range(count):
+            body = "\n\n".join(f"第 {k} 段正文，包含 `代码` 与 **强调**。\n\n![图 {k}](img{(n + k) % images}.png)"
+                               for k in range(3))
+            md_file = tmp / f"article-{n:04d}.md"
+            md_file.write_text(f"# 测试文章 {n}\n\n{body}\n\n```python\nprint({n})\n```\n", encoding="utf-8")
+            md_files.append(md_file)
+
+        client = wechat_api.WeChatDraftClient(STUB_APPID, STUB_SECRET, api_base=server.url,
+                                              token_file=tmp / "token.json", media_file=tmp / "media.json",
+                                              workers=workers)
+        start = time.perf_counter()
+        render_cache = RenderCache(tmp / "render_cache.db")
+        drafts, failed = client.publish_files(md_files, article_workers=article_workers, render_cache=render_cache)
+        elapsed = time.perf_counter() - start
+        client.close()
+        render_cache.close()
+    server.stop()
+
+    print(f"\n{'='*60}")
+    print(f"草稿 {len(drafts)}/{count} 篇，用时 {elapsed:.1f} 秒（{len(drafts) / elapsed * 60:.0f} 篇/分钟，"
+          f"每个请求延迟 {latency * 1000:.0f} ms）")
+    print(client.stats_line())
+    print("接口调用次数: " + "，".join(f"{path} {n}" for path, n in sorted(server.calls.items())))
+    return 1 if failed else 0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="公众号草稿接口本地桩服务")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="启动桩服务")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--token-ttl", type=int, default=7200, help="access_token 有效期（秒）")
+    serve_parser.add_argument("--latency", type=float, default=0, help="每个请求的延迟（毫秒）")
+    bench_parser = sub.add_parser("bench", help="生成文章并通过桩服务批量创建草稿")
+    bench_parser.add_argument("--count", type=int, default=200, help="文章数，默认 200")
+    bench_parser.add_argument("--images", type=int, default=20, help="不同图片的数量，默认 20")
+    bench_parser.add_argument("--latency", type=float, default=80, help="每个请求的延迟（毫秒），默认 80")
+    bench_parser.add_argument("--workers", type=int, default=8, help="图片并发上传数，默认 8")
+    bench_parser.add_argument("--article-workers", type=int, default=8, help="同时处理的文章数，默认 8")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        return bench(args.count, args.images, args.latency / 1000, args.workers, args.article_workers)
+
+    server = StubWeChatServer(args.port, token_ttl=args.token_ttl, latency=args.latency / 1000)
+    print(f"桩服务已启动: {server.url}（AppID {STUB_APPID} / AppSecret {STUB_SECRET}），Ctrl+C 退出")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
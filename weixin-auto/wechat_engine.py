@@ -0,0 +1,666 @@
+"""
+微信公众号浏览器自动化引擎
+
+wechat_mp_automation.py（纯文本）和 markdown_to_wechat.py（Markdown 批量）共用的部分：
+启动/连接浏览器、登录、打开编辑器、填写、保存草稿。
+
+- 正文来源可替换：TextSource 纯文本、MarkdownSource Markdown（本地渲染，走渲染缓存）、
+  HtmlSource 已渲染好的 HTML，统一转换为 HTML 后通过合成粘贴事件写入编辑器
+- 内容只作为 page.evaluate 的参数传入页面，不拼接进 JS 源码
+- 单篇与批量共用同一个已登录的浏览器会话：publish() 首次调用时启动并登录，之后直接复用
+- 批量保存前查归档索引（archive_index.py），内容已经保存过草稿的文件不再启动浏览器处理
+- 所有等待都是条件等待，耗时记录在 wait_recorder 中（--measure-waits 时输出对比报告）
+- 无头模式（headless=True）：复用已保存的登录状态，publish_many() 在同一个上下文中
+  同时打开最多 N 个编辑器标签页并行填写保存，单个标签页出错不影响其他文章
+
+用法:
+    async with WeChatEngine() as engine:
+        await engine.publish(TextSource("正文"), title="标题", author="作者")
+        await engine.publish(MarkdownSource.from_file("posts/a.md"))
+
+    python wechat_engine.py posts/a.md notes.txt page.html --author 作者
+    python wechat_engine.py posts/*.md --headless --tabs 4
+    python wechat_engine.py posts/*.md --force    # 不跳过已经保存过草稿的文件
+"""
+
+import asyncio
+import html as html_lib
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from playwright.async_api import async_playwright
+
+import shared  # noqa: F401  共用 csdn-blog-auto-publish/wait_metrics.py
+import wechat_renderer
+import wechat_session
+from wait_metrics import WaitRecorder
+from wechat_session import SessionExpired
+
+
+EDITOR_SELECTOR = ".ProseMirror[contenteditable='true']"
+ARTICLE_BUTTON_SELECTOR = ".new-creation__menu-content:has-text('文章')"
+
+# 在编辑器上派发携带 text/html 的合成粘贴事件（ProseMirror 从 event.clipboardData 读取内容，
+# 不检查 isTrusted），替换编辑器原有内容；返回 HTML 顶层块数，用于粘贴后核对
+SYNTHETIC_PASTE_JS = """([selector, html]) => {
+    const editor = document.querySelector(selector);
+    if (!editor) return -1;
+    const doc = new DOMParser().parseFromString(html, 'text/html');
+    let root = doc.body;
+    // 渲染结果外层是一个 <section> 容器，块数按容器内的子元素计算
+    if (root.children.length === 1 && root.firstElementChild.tagName === 'SECTION') root = root.firstElementChild;
+    const expected = root.children.length;
+
+    editor.focus();
+    const range = document.createRange();
+    range.selectNodeContents(editor);
+    const selection = window.getSelection();
+    selection.removeAllRanges();
+    selection.addRange(range);
+
+    const data = new DataTransfer();
+    data.setData('text/html', html);
+    data.setData('text/plain', root.innerText || root.textContent || '');
+    editor.dispatchEvent(new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true}));
+    return expected;
+}"""
+
+# 发布草稿的保存接口（新建 sub=create，更新 sub=update）
+SAVE_DRAFT_API_RE = re.compile(r'/cgi-bin/operate_appmsg')
+SAVE_TOAST_SELECTOR = ".weui-desktop-toast__content:has-text('保存成功')"
+
+# 编辑器正文为空 / 非空（Ctrl+A、Backspace、粘贴后的确认条件）
+EDITOR_EMPTY_JS = "(selector) => { const el = document.querySelector(selector); return !!el && el.innerText.trim() === ''; }"
+EDITOR_FILLED_JS = "(selector) => { const el = document.querySelector(selector); return !!el && el.innerText.trim().length > 0; }"
+INPUT_VALUE_JS = "([selector, value]) => { const el = document.querySelector(selector); return !!el && el.value === value; }"
+
+# 无头模式下默认同时打开的编辑器标签页数
+DEFAULT_TABS = 4
+
+# 所有条件等待的耗时记录（--measure-waits 时打印与原固定延迟的对比报告）
+wait_recorder = WaitRecorder()
+
+
+def modifier_key():
+    return "Meta" if os.uname().sysname == "Darwin" else "Control"
+
+
+def title_from_path(path) -> str:
+    """由文件名生成标题"""
+    return Path(path).stem.replace('-', ' ').replace('_', ' ').title()
+
+
+async def paste_html(page, html, selector=EDITOR_SELECTOR, timeout=5000):
+    """
+    不经过系统剪贴板，把富文本 HTML 粘贴进 ProseMirror 编辑器
+
+    粘贴后等待编辑器的顶层节点数达到 HTML 的顶层块数（ProseMirror 可能在末尾多留一个空段落）。
+    不依赖剪贴板，因此可以在无头模式和多个标签页中并行使用。
+
+    Returns:
+        (是否成功, 期望块数, 编辑器实际块数)
+    """
+    expected = await page.evaluate(SYNTHETIC_PASTE_JS, [selector, html])
+    if expected < 0:
+        return False, 0, 0
+    try:
+        await page.wait_for_function(
+            "([selector, expected]) => { const el = document.querySelector(selector);"
+            " return el && el.childElementCount >= expected && el.innerText.trim().length > 0; }",
+            arg=[selector, expected],
+            timeout=timeout
+        )
+    except Exception:
+        pass
+    actual = await page.evaluate("(selector) => document.querySelector(selector).childElementCount", selector)
+    return actual >= expected > 0, expected, actual
+
+
+class ContentSource:
+    """正文来源：提供可粘贴进编辑器的 HTML，以及可选的标题"""
+
+    def __init__(self, content: str, path: Optional[Path] = None):
+        self.content = content
+        self.path = Path(path) if path else None
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        return cls(Path(path).read_text(encoding="utf-8"), path=path, **kwargs)
+
+    @property
+    def title(self) -> Optional[str]:
+        return title_from_path(self.path) if self.path else None
+
+    def to_html(self) -> str:
+        raise NotImplementedError
+
+
+class TextSource(ContentSource):
+    """纯文本：空行分段，段内换行保留，内容全部转义"""
+
+    def to_html(self) -> str:
+        paragraphs = [p.strip() for p in re.split(r'\n\s*\n', self.content) if p.strip()]
+        body = "".join(f"<p>{html_lib.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs)
+        return f"<section>{body}</section>"
+
+
+class HtmlSource(ContentSource):
+    """已渲染好的 HTML，原样粘贴"""
+
+    def to_html(self) -> str:
+        return self.content
+
+
+class MarkdownSource(ContentSource):
+    """Markdown：本地渲染为公众号富文本，传入 render_cache 时复用缓存"""
+
+    def __init__(self, content: str, path: Optional[Path] = None, theme: str = "default", render_cache=None):
+        super().__init__(content, path)
+        self.theme = theme
+        self.render_cache = render_cache
+        self.cache_hit = False
+        self._article = None
+
+    def render(self) -> dict:
+        """渲染结果 {"html", "title", "digest", "covers"}（只渲染一次）"""
+        if self._article is None:
+            if self.render_cache is not None:
+                self._article, self.cache_hit = self.render_cache.render(self.content, theme=self.theme)
+            else:
+                self._article = wechat_renderer.render_article(self.content, theme=self.theme)
+        return self._article
+
+    def to_html(self) -> str:
+        return self.render()["html"]
+
+    @property
+    def title(self) -> Optional[str]:
+        """Front Matter 或第一个一级标题，没有时由文件名生成"""
+        return self.render()["title"] or super().title
+
+
+SOURCE_TYPES = {".md": MarkdownSource, ".markdown": MarkdownSource, ".html": HtmlSource, ".htm": HtmlSource}
+
+
+def source_for_file(path, theme: str = "default", render_cache=None) -> ContentSource:
+    """按扩展名选择正文来源：.md → Markdown，.html → HTML，其他按纯文本处理"""
+    cls = SOURCE_TYPES.get(Path(path).suffix.lower(), TextSource)
+    if cls is MarkdownSource:
+        return MarkdownSource.from_file(path, theme=theme, render_cache=render_cache)
+    return cls.from_file(path)
+
+
+class WeChatEngine:
+    """公众号后台浏览器会话：启动、登录、打开编辑器、填写、保存草稿"""
+
+    def __init__(self, unattended=False, headless=False):
+        """
+        Args:
+            unattended: 无人值守模式：登录失效时立即抛出 SessionExpired 而不是等待扫码
+            headless: 无头模式（无显示器的服务器上运行）；无法扫码，登录状态失效时同样立即失败
+        """
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        # 连接常驻浏览器服务时，记录本次打开的标签页，结束时只关闭这些（其他工具的标签页不动）
+        self.own_pages = None
+        self.article_page = None
+        self.headless = headless
+        self.unattended = unattended or headless
+        # 后台 token（登录后从地址中获取）
+        self.token = None
+        # 串行化“点击文章按钮 → 等待新标签页”，多个标签页并发打开时不会认错页面
+        self._open_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """启动浏览器"""
+        self._open_lock = asyncio.Lock()
+        self.playwright = await async_playwright().start()
+        # 设置了 BROWSER_CDP_ENDPOINT 时复用常驻浏览器服务（见 csdn-blog-auto-publish/browser_service.py）
+        endpoint = os.environ.get("BROWSER_CDP_ENDPOINT")
+        if endpoint:
+            try:
+                self.browser = await self.playwright.chromium.connect_over_cdp(endpoint)
+                self.context = self.browser.contexts[0]
+                self.own_pages = []
+                self.page = self._track(await self.context.new_page())
+                print(f"✓ 已连接浏览器服务: {endpoint}")
+                return
+            except Exception as e:
+                print(f"连接浏览器服务 {endpoint} 失败，改为本地启动: {e}")
+                self.own_pages = None
+        # 默认使用可见窗口以便扫码登录；无头模式依赖已保存的登录状态
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            args=[] if self.headless else ['--start-maximized']
+        )
+        # 创建浏览器上下文（有未过期的登录状态文件时加载，免扫码）
+        self.context = await wechat_session.new_context(
+            self.browser,
+            viewport={'width': 1920, 'height': 1080}
+        )
+        self.page = await self.context.new_page()
+
+    def _track(self, page):
+        """登记本次打开的标签页（仅共享浏览器服务时需要）"""
+        if self.own_pages is not None:
+            self.own_pages = [p for p in self.own_pages if not p.is_closed()]
+            self.own_pages.append(page)
+        return page
+
+    async def close(self):
+        """关闭浏览器；连接的是共享浏览器服务时只关闭本次打开的标签页"""
+        if not self.browser:
+            return
+        if self.own_pages is not None:
+            for page in self.own_pages:
+                if not page.is_closed():
+                    await page.close()
+            self.own_pages = None
+            await self.browser.close()  # 仅断开连接，服务端浏览器保持运行
+            print("已断开浏览器服务连接")
+        else:
+            await self.browser.close()
+            print("浏览器已关闭")
+        self.browser = self.context = self.page = None
+        self.token = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def login(self):
+        """
+        打开微信公众号后台：登录状态有效时直接进入，否则等待用户扫码登录
+
+        无人值守模式下登录失效会抛出 SessionExpired。登录确认后刷新保存 wechat_state.json。
+        """
+        if self.unattended and self.own_pages is None:
+            # 本地启动时登录状态只来自状态文件：离线预检不通过就不必再打开页面探测
+            ok, reason = wechat_session.check_state_file()
+            if not ok:
+                raise SessionExpired(f"{reason}，请先运行一次有人值守模式扫码登录")
+        print("\n正在打开微信公众号后台...")
+        self.token = await wechat_session.ensure_login(self.context, self.page, unattended=self.unattended)
+        return self.token
+
+    async def ensure_ready(self):
+        """浏览器未启动时启动，未登录时登录；已就绪的会话直接复用"""
+        if self.browser is None:
+            await self.start()
+        if self.token is None:
+            await self.login()
+
+    async def click_article_button(self):
+        """
+        点击文章按钮，在新标签页打开编辑器
+        """
+        print("\n正在查找文章按钮...")
+        new_page = None
+
+        try:
+            # 只有点击与捕获新标签页需要串行，等待编辑器加载可以多个标签页同时进行
+            async with self._open_lock:
+                article_button = await self.page.wait_for_selector(ARTICLE_BUTTON_SELECTOR, timeout=10000)
+
+                print("找到文章按钮，准备点击...")
+
+                # 监听新标签页的打开
+                async with self.context.expect_page() as new_page_info:
+                    await article_button.click()
+
+                # 获取新打开的标签页
+                new_page = self._track(await new_page_info.value)
+            # 新标签页加载完成且标题输入框、正文编辑器都已出现，才算编辑器可用
+            with wait_recorder.measure("new_tab_ready", legacy=0):
+                await new_page.wait_for_load_state('domcontentloaded')
+                await new_page.wait_for_selector("#title", state="visible", timeout=15000)
+                await new_page.wait_for_selector(EDITOR_SELECTOR, timeout=15000)
+            print("✓ 文章编辑页面已在新标签页打开！")
+
+            # 切换到新标签页
+            self.article_page = new_page
+            return new_page
+
+        except Exception as e:
+            print(f"❌ 点击文章按钮失败: {e}")
+            if new_page is not None:
+                await new_page.close()
+            raise
+
+    async def copy_html_to_clipboard(self, html):
+        """
+        把富文本 HTML 复制到系统剪贴板
+
+        在临时标签页中渲染 HTML，全选后用真实的复制快捷键复制（带格式），
+        不影响当前公众号页面。
+        """
+        scratch = self._track(await self.context.new_page())
+        try:
+            await scratch.set_content('<div id="wechat-html" contenteditable="true"></div>')
+            await scratch.eval_on_selector("#wechat-html", "(el, html) => { el.innerHTML = html; }", html)
+            await scratch.focus("#wechat-html")
+            await scratch.keyboard.press(f"{modifier_key()}+A")
+            await scratch.keyboard.press(f"{modifier_key()}+C")
+            print("✓ 富文本已复制到剪贴板")
+        finally:
+            await scratch.close()
+
+    async def fill_article(self, title, author, html=None, page=None, clipboard_fallback=True):
+        """
+        填写文章标题、正文和作者
+
+        有 HTML 时派发合成粘贴事件直接写入编辑器（不占用系统剪贴板）并核对块数；
+        核对失败时经剪贴板用快捷键粘贴。html 为 None 表示正文已在系统剪贴板中
+        （md.doocs.org 在线转换），直接快捷键粘贴。
+
+        Args:
+            title: 文章标题
+            author: 作者名称
+            html: 要粘贴的富文本 HTML
+            page: 文章编辑标签页，默认 self.article_page
+            clipboard_fallback: 合成粘贴核对失败时是否改用剪贴板；多个标签页并行填写时
+                系统剪贴板会互相覆盖，应关闭并直接报错
+        """
+        print("\n开始填写文章内容...")
+        page = page or self.article_page
+
+        try:
+            # 1. 填写标题
+            print("正在填写标题...")
+            title_input = await page.wait_for_selector("#title", timeout=10000)
+            # fill 会等待输入框可编辑并聚焦，无需先点击再等待
+            await title_input.fill(title)
+            print(f"✓ 标题已填写: {title}")
+
+            # 2. 粘贴正文（富文本格式）
+            print("正在粘贴正文内容（富文本格式）...")
+            content_editor = await page.wait_for_selector(EDITOR_SELECTOR, timeout=10000)
+
+            pasted = False
+            if html:
+                start = time.monotonic()
+                pasted, expected, actual = await paste_html(page, html)
+                wait_recorder.record("editor_pasted", time.monotonic() - start, legacy=2, ok=pasted)
+                if pasted:
+                    print(f"✓ 正文已粘贴（合成粘贴事件，编辑器 {actual} 个块 / 期望 {expected} 个）")
+                elif not clipboard_fallback:
+                    raise RuntimeError(f"合成粘贴核对失败（编辑器 {actual} 个块 / 期望 {expected} 个）")
+                else:
+                    print(f"⚠️ 合成粘贴核对失败（编辑器 {actual} 个块 / 期望 {expected} 个），改用剪贴板粘贴")
+                    await self.copy_html_to_clipboard(html)
+
+            if not pasted:
+                await content_editor.click()
+
+                # 清空编辑器，确认正文已清空
+                await page.keyboard.press(f"{modifier_key()}+A")
+                await page.keyboard.press("Backspace")
+                with wait_recorder.measure("editor_cleared", legacy=1.3):
+                    await page.wait_for_function(EDITOR_EMPTY_JS, arg=EDITOR_SELECTOR, timeout=5000)
+
+                print("正在粘贴剪贴板内容...")
+                await page.keyboard.press(f"{modifier_key()}+V")
+
+                # 正文出现内容即粘贴完成
+                with wait_recorder.measure("editor_pasted", legacy=2):
+                    await page.wait_for_function(EDITOR_FILLED_JS, arg=EDITOR_SELECTOR, timeout=10000)
+                print("✓ 正文已粘贴（带格式）")
+
+            # 3. 填写作者
+            print("正在填写作者...")
+            author_input = await page.wait_for_selector("#author", timeout=10000)
+            await author_input.fill(author)
+            # 确认输入框的值已提交（代替原来填写后固定等待 1 秒）
+            with wait_recorder.measure("author_committed", legacy=1.5):
+                await page.wait_for_function(INPUT_VALUE_JS, arg=["#author", author], timeout=5000)
+            print(f"✓ 作者已填写: {author}")
+
+        except Exception as e:
+            print(f"❌ 填写文章内容失败: {e}")
+            raise
+
+    async def save_as_draft(self, page=None):
+        """
+        点击保存为草稿按钮，以保存接口的响应确认结果
+
+        Args:
+            page: 文章编辑标签页，默认 self.article_page
+
+        Returns:
+            保存接口返回的草稿 ID（appMsgId），接口未返回时为 None
+        """
+        print("\n正在保存为草稿...")
+        page = page or self.article_page
+
+        try:
+            save_button = await page.wait_for_selector("#js_submit button", timeout=10000)
+
+            print("找到保存按钮，准备点击...")
+            # 以保存接口的响应为准（代替原来点击后固定等待 3 秒）
+            with wait_recorder.measure("save_response", legacy=3):
+                async with page.expect_response(
+                    lambda r: SAVE_DRAFT_API_RE.search(r.url) and r.request.method == "POST",
+                    timeout=15000
+                ) as response_info:
+                    await save_button.click()
+                response = await response_info.value
+            try:
+                result = await response.json()
+            except Exception:
+                result = {"base_resp": {"ret": 0 if response.ok else response.status}}
+            ret = result.get("base_resp", {}).get("ret", 0)
+            if ret != 0:
+                raise RuntimeError(f"保存接口返回错误: ret={ret}")
+
+            try:
+                with wait_recorder.measure("save_toast", legacy=0):
+                    await page.wait_for_selector(SAVE_TOAST_SELECTOR, timeout=5000)
+                print("✓ 文章已保存为草稿！")
+            except Exception:
+                print("✓ 保存接口已返回成功")
+            draft_id = result.get("appMsgId") or result.get("appmsgid")
+            return str(draft_id) if draft_id else None
+
+        except Exception as e:
+            print(f"❌ 保存草稿失败: {e}")
+            raise
+
+    async def publish(self, source: ContentSource, title: Optional[str] = None, author: str = "自动发布",
+                      keep_tab: bool = False):
+        """
+        把一篇内容保存为草稿：需要时启动浏览器并登录，打开编辑器、填写、保存
+
+        Args:
+            source: 正文来源
+            title: 文章标题，默认取正文来源提供的标题
+            author: 作者名称
+            keep_tab: 保存后保留编辑器标签页（默认关闭，批量时避免标签页堆积）
+
+        Returns:
+            草稿 ID（保存接口未返回时为 None）
+        """
+        html = source.to_html()
+        title = title or source.title
+        if not title:
+            raise ValueError("缺少文章标题")
+        await self.ensure_ready()
+        page = await self.click_article_button()
+        try:
+            await self.fill_article(title, author, html=html, page=page)
+            return await self.save_as_draft(page=page)
+        finally:
+            if not keep_tab:
+                await page.close()
+                self.article_page = None
+
+    async def publish_many(self, sources, author: str = "自动发布", tabs: int = DEFAULT_TABS):
+        """
+        在同一个已登录的上下文中并行保存多篇草稿
+
+        最多同时打开 tabs 个编辑器标签页，每个标签页独立地合成粘贴、填写、保存后关闭；
+        某篇出错只记录该篇失败，不影响其他标签页（登录失效除外，直接抛出）。
+
+        Args:
+            sources: 正文来源列表
+            tabs: 同时打开的编辑器标签页上限
+
+        Returns:
+            与 sources 一一对应的 (草稿 ID, 错误) 列表：成功时错误为 None（保存接口未返回 ID 时草稿 ID 为 None），
+            失败时草稿 ID 为 None
+        """
+        await self.ensure_ready()
+        semaphore = asyncio.Semaphore(max(1, tabs))
+        total = len(sources)
+
+        async def publish_one(i, source):
+            name = source.path.name if source.path else f"第 {i} 篇"
+            async with semaphore:
+                try:
+                    html = source.to_html()
+                    title = source.title
+                    if not title:
+                        raise ValueError("缺少文章标题")
+                    page = await self.click_article_button()
+                    try:
+                        await self.fill_article(title, author, html=html, page=page, clipboard_fallback=False)
+                        draft_id = await self.save_as_draft(page=page)
+                    finally:
+                        await page.close()
+                except SessionExpired:
+                    raise
+                except Exception as e:
+                    print(f"❌ [{i}/{total}] {name}: {e}")
+                    return None, e
+            print(f"✅ [{i}/{total}] {name} 已保存为草稿")
+            return draft_id, None
+
+        return await asyncio.gather(*(publish_one(i, s) for i, s in enumerate(sources, 1)))
+
+
+async def publish_files(paths, author="自动发布", theme="default", unattended=False, headless=False,
+                        tabs=1, force=False, archive=None, render_cache=None):
+    """
+    在同一个浏览器会话中保存多个文件（.md / .html / 纯文本），返回失败的文件列表
+
+    tabs > 1 时并行打开多个编辑器标签页；读取或渲染失败的文件直接记为失败。
+    启动浏览器之前先查归档索引，跳过已经保存过草稿（或与本批前面的文件内容相同）的文件，
+    保存成功后登记内容哈希；force=True 时不跳过。未传入 archive / render_cache 时使用默认文件。
+    """
+    from archive_index import ArchiveIndex, format_record
+    from render_cache import RenderCache
+
+    index = archive or ArchiveIndex()
+    new_files, duplicates = index.filter_new([Path(p) for p in paths])
+    if force:
+        new_files += [(path, None) for path, _ in duplicates]
+    else:
+        for path, record in duplicates:
+            print(f"⏭️ 跳过 {path.name}: {format_record(record)}")
+    hashes = {}
+    cache = render_cache or RenderCache()
+    failed = []
+    sources = []
+    for path, digest in new_files:
+        try:
+            source = source_for_file(path, theme=theme, render_cache=cache)
+            source.to_html()
+        except Exception as e:
+            print(f"❌ {Path(path).name}: {e}")
+            failed.append(str(path))
+            continue
+        sources.append(source)
+        hashes[source] = digest or _content_digest(path)
+
+    def archive_source(source, draft_id=None):
+        if hashes[source]:
+            index.record(hashes[source], source.path, source.title, draft_id)
+
+    start = time.perf_counter()
+    try:
+        if not sources:
+            if not failed:
+                print("✓ 所有文件都已保存过草稿")
+            return failed
+        async with WeChatEngine(unattended=unattended, headless=headless) as engine:
+            if tabs > 1:
+                results = await engine.publish_many(sources, author=author, tabs=tabs)
+                for source, (draft_id, error) in zip(sources, results):
+                    if error is None:
+                        archive_source(source, draft_id)
+                    else:
+                        failed.append(str(source.path))
+            else:
+                for i, source in enumerate(sources, 1):
+                    print(f"\n🔄 处理进度: {i}/{len(sources)}  {source.path.name}")
+                    try:
+                        draft_id = await engine.publish(source, author=author)
+                        print(f"✅ {source.path.name} 已保存为草稿")
+                    except SessionExpired:
+                        raise
+                    except Exception as e:
+                        print(f"❌ {source.path.name}: {e}")
+                        failed.append(str(source.path))
+                        continue
+                    archive_source(source, draft_id)
+    finally:
+        if render_cache is None:
+            cache.close()
+        if archive is None:
+            index.close()
+    print(f"\n共 {len(paths)} 篇，跳过 {len(paths) - len(new_files)} 篇，失败 {len(failed)} 篇，"
+          f"用时 {time.perf_counter() - start:.1f} 秒")
+    return failed
+
+
+def _content_digest(path) -> Optional[str]:
+    """force 时重复文件没有预先计算的哈希，这里补算"""
+    from archive_index import content_hash
+
+    try:
+        return content_hash(Path(path).read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把 Markdown / HTML / 纯文本文件保存为微信公众号草稿（共用一个浏览器会话）")
+    parser.add_argument("files", nargs="+", help="要保存的文件，按扩展名识别格式")
+    parser.add_argument("--author", default="自动发布", help="作者")
+    parser.add_argument("--theme", default="default", choices=sorted(wechat_renderer.THEMES), help="Markdown 排版主题")
+    parser.add_argument("--unattended", action="store_true", help="登录失效时立即退出（退出码 2）而不是等待扫码")
+    parser.add_argument("--headless", action="store_true", help="无头模式运行（需要已保存的登录状态）")
+    parser.add_argument("--tabs", type=int, default=None,
+                        help=f"同时打开的编辑器标签页数，无头模式默认 {DEFAULT_TABS}，否则默认 1")
+    parser.add_argument("--measure-waits", action="store_true", help="结束时输出条件等待与原固定延迟的对比报告")
+    parser.add_argument("--force", action="store_true", help="不跳过已经保存过草稿的文件")
+    args = parser.parse_args()
+
+    wait_recorder.verbose = args.measure_waits
+    try:
+        tabs = args.tabs or (DEFAULT_TABS if args.headless else 1)
+        failed = asyncio.run(publish_files(args.files, args.author, args.theme, args.unattended,
+                                           args.headless, tabs, args.force))
+    except SessionExpired as e:
+        print(f"\n❌ {e}")
+        return 2
+    finally:
+        if args.measure_waits:
+            print(wait_recorder.report())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+"""
+Markdown → 微信公众号富文本（本地渲染）
+
+替代打开 md.doocs.org 在线转换再点击“复制”的流程：在本进程内把 Markdown 渲染为
+全部使用内联样式的 HTML（公众号编辑器会丢弃 <style> 和 class），单篇耗时为毫秒级。
+
+支持：
+1. 标题、段落、粗体/斜体/删除线、行内代码
+2. 代码块语法高亮（需要 Pygments，未安装时按纯文本输出）
+3. 表格、引用、有序/无序列表、分割线、图片（带图注）
+4. 外部链接转为文末“引用链接”脚注（公众号正文只允许公众号文章链接）
+5. 可插拔主题：内置 default（经典蓝）、green（翡翠绿）、orange（活力橘），
+   也可以用 register_theme() 注册自定义主题
+
+默认主题的配色与排版参照 md.doocs.org 的默认主题，保证与原在线转换的效果一致。
+
+用法:
+    python wechat_renderer.py render posts/article.md -o article.html --theme green
+    python wechat_renderer.py bench                  # 渲染 posts/ 与 done/ 下所有文章并统计耗时
+    python wechat_renderer.py themes
+"""
+
+import argparse
+import hashlib
+import html
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # 本地渲染依赖 markdown-it-py，未安装时调用方可退回在线转换
+    MarkdownIt = None
+
+try:
+    from pygments.lexers import get_lexer_by_name
+    from pygments.lexers.special import TextLexer
+    from pygments.styles import get_style_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # Pygments 为可选依赖，未安装时代码块不做高亮
+    get_lexer_by_name = None
+
+
+# 各元素的内联样式，{primary} 为主题色。注意样式里不能出现双引号（会写进 style="..." 属性）
+BASE_STYLES = {
+    "container": "font-family: -apple-system-font, BlinkMacSystemFont, 'Helvetica Neue', 'PingFang SC', "
+                 "'Hiragino Sans GB', 'Microsoft YaHei UI', 'Microsoft YaHei', Arial, sans-serif; "
+                 "font-size: 16px; line-height: 1.75; color: #3f3f3f; text-align: left; letter-spacing: 0.1em;",
+    "h1": "display: table; padding: 0 1em; border-bottom: 2px solid {primary}; margin: 2em auto 1em; "
+          "color: #3f3f3f; font-size: 1.2em; font-weight: bold; text-align: center;",
+    "h2": "display: table; padding: 0 0.2em; margin: 4em auto 2em; color: #fff; background: {primary}; "
+          "font-size: 1.2em; font-weight: bold; text-align: center;",
+    "h3": "padding-left: 8px; border-left: 3px solid {primary}; margin: 2em 8px 0.75em 0; color: #3f3f3f; "
+          "font-size: 1.1em; font-weight: bold; line-height: 1.2;",
+    "h4": "margin: 2em 8px 0.5em; color: {primary}; font-size: 1em; font-weight: bold;",
+    "h5": "margin: 1.5em 8px 0.5em; color: {primary}; font-size: 1em; font-weight: bold;",
+    "h6": "margin: 1.5em 8px 0.5em; color: {primary}; font-size: 1em;",
+    "p": "margin: 1.5em 8px; letter-spacing: 0.1em; color: #3f3f3f;",
+    "blockquote": "font-style: normal; padding: 1em; border-left: 4px solid {primary}; border-radius: 6px; "
+                  "color: rgba(0, 0, 0, 0.5); background: #f7f7f7; margin: 0 8px 1em;",
+    "blockquote_p": "display: block; font-size: 1em; letter-spacing: 0.1em; color: #3f3f3f; margin: 0;",
+    "pre": "font-size: 90%; overflow-x: auto; border-radius: 8px; padding: 1em; line-height: 1.5; "
+           "margin: 10px 8px; background: #f6f8fa; color: #24292e;",
+    "code": "display: block; margin: 0; padding: 0; background: none; color: inherit; white-space: nowrap; "
+            "font-family: Menlo, 'Operator Mono', Consolas, Monaco, monospace;",
+    "codespan": "font-size: 90%; white-space: pre-wrap; color: #d14; background: rgba(27, 31, 35, 0.05); "
+                "padding: 3px 5px; border-radius: 4px;",
+    "ul": "list-style: circle; padding-left: 1em; margin: 0.5em 8px; color: #3f3f3f;",
+    "ol": "padding-left: 1em; margin: 0.5em 8px; color: #3f3f3f;",
+    "li": "margin: 0.2em 8px; color: #3f3f3f;",
+    "strong": "color: {primary}; font-weight: bold;",
+    "em": "font-style: italic;",
+    "s": "text-decoration: line-through;",
+    "a": "color: #576b95; text-decoration: none;",
+    "link": "color: {primary};",
+    "sup": "color: {primary}; font-size: 0.75em;",
+    "img": "display: block; max-width: 100%; margin: 0.1em auto 0.5em; border-radius: 4px;",
+    "figcaption": "text-align: center; color: #888; font-size: 0.8em;",
+    "hr": "border-style: solid; border-width: 1px 0 0; border-color: rgba(0, 0, 0, 0.1); "
+          "transform-origin: 0 0; transform: scale(1, 0.5); height: 0.4em; margin: 1.5em 0;",
+    "table_wrap": "overflow-x: auto; margin: 1em 8px;",
+    "table": "width: 100%; border-collapse: collapse; color: #3f3f3f; font-size: 0.9em;",
+    "th": "border: 1px solid #dfdfdf; padding: 0.25em 0.5em; background: rgba(0, 0, 0, 0.05); "
+          "font-weight: bold; word-break: keep-all;",
+    "td": "border: 1px solid #dfdfdf; padding: 0.25em 0.5em; word-break: keep-all;",
+    "footnotes": "font-size: 80%; margin: 0.5em 8px; color: #3f3f3f;",
+}
+
+# 渲染逻辑变化时加一，使旧的渲染缓存失效
+RENDERER_VERSION = 1
+# 公众号摘要最多 120 字；封面候选最多取文中前几张图片
+DIGEST_CHARS = 120
+MAX_COVERS = 5
+
+# 公众号正文中允许保留为超链接的地址，其余链接转为脚注
+WECHAT_LINK_RE = re.compile(r'^https?://mp\.weixin\.qq\.com/')
+FRONT_MATTER_RE = re.compile(r'\A---\s*\n.*?\n---\s*\n', re.DOTALL)
+FRONT_MATTER_FIELD_RE = r'^{}:\s*["\']?(.+?)["\']?\s*$'
+
+
+class Theme:
+    """排版主题：各元素的内联样式 + 代码高亮配色"""
+
+    def __init__(self, name: str, primary: str = "#0F4C81", highlight: str = "default", styles: dict = None):
+        """
+        Args:
+            name: 主题名称
+            primary: 主题色（标题、强调、引用边框等）
+            highlight: Pygments 配色名称（如 default、monokai、github-dark）
+            styles: 在基础样式上覆盖的元素样式，键同 BASE_STYLES
+        """
+        self.name = name
+        self.primary = primary
+        self.highlight = highlight
+        self.styles = {key: css.format(primary=primary) for key, css in BASE_STYLES.items()}
+        self.styles.update(styles or {})
+
+    @property
+    def fingerprint(self) -> str:
+        """主题内容的指纹：同名主题改了样式后，渲染缓存也会失效"""
+        raw = "\n".join([self.name, self.highlight] + [f"{k}={v}" for k, v in sorted(self.styles.items())])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+THEMES = {}
+# 主题名 → 渲染器实例（get_renderer 复用）
+_renderers = {}
+
+
+def register_theme(theme: Theme):
+    """注册主题，之后可以按名称使用（覆盖同名主题时丢弃按旧样式创建的渲染器）"""
+    THEMES[theme.name] = theme
+    _renderers.pop(theme.name, None)
+    return theme
+
+
+def get_theme(name: str) -> Theme:
+    if name not in THEMES:
+        raise ValueError(f"未知主题 {name}，可选: {', '.join(sorted(THEMES))}")
+    return THEMES[name]
+
+
+register_theme(Theme("default", primary="#0F4C81"))
+register_theme(Theme("green", primary="#009874"))
+register_theme(Theme("orange", primary="#FA5151"))
+
+
+class WeChatRenderer:
+    """把 Markdown 渲染为公众号可直接粘贴的内联样式 HTML"""
+
+    def __init__(self, theme="default"):
+        """
+        Args:
+            theme: 主题名称或 Theme 实例
+        """
+        if MarkdownIt is None:
+            raise ImportError("本地渲染需要 markdown-it-py：pip install markdown-it-py")
+        self.theme = get_theme(theme) if isinstance(theme, str) else theme
+        self.styles = self.theme.styles
+
+        self.md = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+        rules = self.md.renderer.rules
+        rules["fence"] = self._render_code_block
+        rules["code_block"] = self._render_code_block
+        rules["image"] = self._render_image
+        rules["link_open"] = self._render_link_open
+        rules["link_close"] = self._render_link_close
+        rules["table_open"] = self._render_table_open
+        rules["table_close"] = self._render_table_close
+
+        # 代码高亮：语言 → lexer，token 类型 → 内联样式
+        self._lexers = {}
+        self._token_css = {}
+        self._code_style = None
+        if get_lexer_by_name is not None:
+            try:
+                self._code_style = get_style_by_name(self.theme.highlight)
+            except ClassNotFound:
+                print(f"⚠️ 未找到代码配色 {self.theme.highlight}，代码块不做高亮")
+
+    def render(self, markdown_text: str) -> str:
+        """
+        渲染一篇文章
+
+        Args:
+            markdown_text: Markdown 原文（开头的 YAML Front Matter 会被去掉）
+
+        Returns:
+            以 <section> 包裹、全部使用内联样式的 HTML
+        """
+        return self.render_article(markdown_text)["html"]
+
+    def render_article(self, markdown_text: str) -> dict:
+        """
+        渲染一篇文章，并顺带提取草稿需要的元信息（只解析一次）
+
+        Returns:
+            {"html", "title", "digest", "covers"}；title 取 Front Matter 的 title 或第一个一级标题，
+            digest 取 Front Matter 的 digest/description/summary 或第一段正文，covers 为文中前几张图片地址
+        """
+        front = FRONT_MATTER_RE.match(markdown_text)
+        front_text = front.group(0) if front else ""
+        markdown_text = markdown_text[len(front_text):]
+        env = {"footnotes": [], "link_stack": []}
+        tokens = self.md.parse(markdown_text, env)
+        meta = self._extract_meta(tokens, env)
+        title = _front_matter_field(front_text, "title") or meta["title"]
+        digest = next((v for v in (_front_matter_field(front_text, k) for k in ("digest", "description", "summary")) if v),
+                      meta["digest"])
+
+        self._apply_styles(tokens)
+        body = self.md.renderer.render(tokens, self.md.options, env)
+        return {
+            "html": f'<section style="{self.styles["container"]}">{body}{self._render_footnotes(env)}</section>',
+            "title": title,
+            "digest": digest[:DIGEST_CHARS] if digest else None,
+            "covers": meta["covers"],
+        }
+
+    def _extract_meta(self, tokens, env) -> dict:
+        title = digest = None
+        covers = []
+        for i, token in enumerate(tokens):
+            if token.type != "inline":
+                continue
+            parent = tokens[i - 1] if i else None
+            if title is None and parent is not None and parent.type == "heading_open" and parent.tag == "h1":
+                title = token.content.strip()
+            elif digest is None and parent is not None and parent.type == "paragraph_open":
+                text = "".join(
+                    c.content if c.type in ("text", "code_inline") else " " if c.type in ("softbreak", "hardbreak") else ""
+                    for c in token.children or []
+                )
+                digest = " ".join(text.split()) or None
+            for child in token.children or []:
+                if child.type == "image" and len(covers) < MAX_COVERS:
+                    src = child.attrGet("src")
+                    if src and src not in covers:
+                        covers.append(src)
+        return {"title": title, "digest": digest, "covers": covers}
+
+    # ---------- 样式 ----------
+
+    def _apply_styles(self, tokens):
+        """给每个开始/自闭合标签写入 style 属性（保留表格对齐等已有样式）"""
+        quote_depth = 0
+        for token in tokens:
+            if token.type == "blockquote_open":
+                quote_depth += 1
+            elif token.type == "blockquote_close":
+                quote_depth -= 1
+            if token.children:
+                self._apply_styles(token.children)
+            if token.nesting == -1 or not token.tag or token.type in ("fence", "code_block"):
+                continue
+            if token.type == "code_inline":
+                key = "codespan"
+            elif token.tag == "p" and quote_depth:
+                key = "blockquote_p"
+            else:
+                key = token.tag
+            css = self.styles.get(key)
+            if css:
+                existing = token.attrGet("style")
+                token.attrSet("style", f"{existing}; {css}" if existing else css)
+
+    # ---------- 自定义渲染规则 ----------
+
+    def _render_code_block(self, tokens, idx, options, env):
+        token = tokens[idx]
+        lang = token.info.strip().split()[0] if token.info and token.info.strip() else ""
+        code = self._highlight(token.content.rstrip("\n"), lang)
+        return f'<pre style="{self.styles["pre"]}"><code style="{self.styles["code"]}">{code}</code></pre>\n'
+
+    def _highlight(self, code: str, lang: str) -> str:
+        """逐个 token 输出带颜色的 <span>；空格与换行转成 &nbsp; / <br>，避免公众号吞掉缩进"""
+        if self._code_style is None:
+            return _code_text(code)
+        lexer = self._lexers.get(lang)
+        if lexer is None:
+            try:
+                lexer = get_lexer_by_name(lang) if lang else TextLexer()
+            except ClassNotFound:
+                lexer = TextLexer()
+            self._lexers[lang] = lexer
+        parts = []
+        for ttype, value in lexer.get_tokens(code):
+            css = self._token_css.get(ttype)
+            if css is None:
+                css = self._token_css[ttype] = _pygments_css(self._code_style.style_for_token(ttype))
+            text = _code_text(value)
+            parts.append(f'<span style="{css}">{text}</span>' if css and value.strip() else text)
+        out = "".join(parts)
+        # get_tokens 总会在末尾补一个换行
+        return out[:-4] if out.endswith("<br>") else out
+
+    def _render_image(self, tokens, idx, options, env):
+        token = tokens[idx]
+        alt = self.md.renderer.renderInlineAsText(token.children or [], options, env)
+        token.attrSet("alt", alt)
+        img = self.md.renderer.renderToken(tokens, idx, options, env)
+        if not alt:
+            return img
+        # 图片通常位于 <p> 内，图注用块级 <span> 而不是 <figure>，避免生成非法嵌套
+        return f'{img}<span style="display: block; {self.styles["figcaption"]}">{html.escape(alt)}</span>'
+
+    def _render_link_open(self, tokens, idx, options, env):
+        href = tokens[idx].attrGet("href") or ""
+        if WECHAT_LINK_RE.match(href):
+            env["link_stack"].append(None)
+            return self.md.renderer.renderToken(tokens, idx, options, env)
+        # 链接文字先压栈，在 link_close 时生成脚注编号
+        env["link_stack"].append(href)
+        return f'<span style="{self.styles["link"]}">'
+
+    def _render_link_close(self, tokens, idx, options, env):
+        href = env["link_stack"].pop() if env["link_stack"] else None
+        if href is None:
+            return "</a>"
+        footnotes = env["footnotes"]
+        title = tokens[idx - 1].content if idx and tokens[idx - 1].type == "text" else href
+        footnotes.append((title, href))
+        return f'</span><sup style="{self.styles["sup"]}">[{len(footnotes)}]</sup>'
+
+    def _render_table_open(self, tokens, idx, options, env):
+        return f'<section style="{self.styles["table_wrap"]}">' + self.md.renderer.renderToken(tokens, idx, options, env)
+
+    def _render_table_close(self, tokens, idx, options, env):
+        return self.md.renderer.renderToken(tokens, idx, options, env) + "</section>"
+
+    def _render_footnotes(self, env) -> str:
+        if not env["footnotes"]:
+            return ""
+        items = "".join(
+            f'<code style="font-size: 90%;">[{i}]</code> {html.escape(title)}: '
+            f'<i style="word-break: break-all;">{html.escape(href)}</i><br>'
+            for i, (title, href) in enumerate(env["footnotes"], 1)
+        )
+        return (f'<h4 style="{self.styles["h4"]}">引用链接</h4>'
+                f'<p style="{self.styles["footnotes"]}">{items}</p>')
+
+
+def _front_matter_field(front_text: str, field: str):
+    if not front_text:
+        return None
+    m = re.search(FRONT_MATTER_FIELD_RE.format(field), front_text, re.MULTILINE)
+    return m.group(1).strip() if m else None
+
+
+def _code_text(text: str) -> str:
+    return (html.escape(text, quote=False)
+            .replace("\t", "    ")
+            .replace(" ", "&nbsp;")
+            .replace("\n", "<br>"))
+
+
+def _pygments_css(style: dict) -> str:
+    css = []
+    if style.get("color"):
+        css.append(f"color: #{style['color']};")
+    if style.get("bold"):
+        css.append("font-weight: bold;")
+    if style.get("italic"):
+        css.append("font-style: italic;")
+    return " ".join(css)
+
+
+
+def get_renderer(theme: str = "default") -> WeChatRenderer:
+    """同一主题复用渲染器实例"""
+    renderer = _renderers.get(theme)
+    if renderer is None:
+        renderer = _renderers[theme] = WeChatRenderer(theme)
+    return renderer
+
+
+def render(markdown_text: str, theme: str = "default") -> str:
+    """用指定主题渲染"""
+    return get_renderer(theme).render(markdown_text)
+
+
+def render_article(markdown_text: str, theme: str = "default") -> dict:
+    """用指定主题渲染并提取标题、摘要、封面候选"""
+    return get_renderer(theme).render_article(markdown_text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown → 微信公众号富文本（本地渲染）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render_p = sub.add_parser("render", help="渲染单篇文章")
+    render_p.add_argument("file", help="Markdown 文件")
+    render_p.add_argument("-o", "--output", default=None, help="输出 HTML 文件，默认打印到标准输出")
+    render_p.add_argument("--theme", default="default", choices=sorted(THEMES), help="主题，默认 default")
+
+    bench_p = sub.add_parser("bench", help="统计渲染耗时")
+    bench_p.add_argument("files", nargs="*", help="Markdown 文件，默认 posts/ 与 done/ 下的全部文章")
+    bench_p.add_argument("--runs", type=int, default=20, help="每篇重复次数，默认 20")
+    bench_p.add_argument("--theme", default="default", choices=sorted(THEMES), help="主题，默认 default")
+
+    sub.add_parser("themes", help="列出可用主题")
+
+    args = parser.parse_args()
+
+    if args.command == "themes":
+        for name, theme in sorted(THEMES.items()):
+            print(f"{name}: 主题色 {theme.primary}，代码配色 {theme.highlight}")
+        return 0
+
+    if args.command == "render":
+        output = render(Path(args.file).read_text(encoding="utf-8"), theme=args.theme)
+        if args.output:
+            Path(args.output).write_text(output, encoding="utf-8")
+            print(f"✓ 已写入 {args.output}（{len(output):,} 字符）")
+        else:
+            print(output)
+        return 0
+
+    files = [Path(f) for f in args.files] or sorted(Path("posts").glob("*.md")) + sorted(Path("done").glob("*.md"))
+    if not files:
+        print("❌ 没有找到 Markdown 文件")
+        return 1
+    renderer = WeChatRenderer(args.theme)
+    medians = []
+    for fp in files:
+        text = fp.read_text(encoding="utf-8")
+        start = time.perf_counter()
+        renderer.render(text)  # 首次渲染包含 lexer 初始化
+        first = (time.perf_counter() - start) * 1000
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            renderer.render(text)
+            times.append((time.perf_counter() - start) * 1000)
+        medians.append(statistics.median(times))
+        print(f"{fp.name[:40]:<40} {len(text):>7,} 字符  首次 {first:6.1f} ms  中位数 {medians[-1]:6.2f} ms")
+    print(f"\n共 {len(files)} 篇，平均每篇 {statistics.mean(medians):.2f} ms（每篇重复 {args.runs} 次取中位数）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+微信公众号登录状态持久化
+
+与 CSDN（storage.json）、知乎（zhihu_state.json）、小红书（xiaohongshu_auth.json）一样，
+把登录后的浏览器状态保存到 wechat_state.json，下次运行直接复用，免去每次扫码。
+
+- 离线预检：读取状态文件中登录 Cookie 的过期时间，已过期的状态不再加载
+- 在线探测：打开后台首页，已登录时会立即跳转到带 token 的 /cgi-bin/home（几秒内完成）
+- 自动刷新：每次确认登录有效后重新保存状态，延长 Cookie 有效期
+- 无人值守模式：登录失效时立即抛出 SessionExpired，而不是等待 2 分钟扫码
+
+用法:
+    context = await new_context(browser)             # 有有效状态文件时自动加载
+    page = await context.new_page()
+    token = await ensure_login(context, page, unattended=True)
+
+    python wechat_session.py check                   # 只做离线预检
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+
+STATE_FILE = Path(__file__).resolve().parent / "wechat_state.json"
+HOME_URL = "https://mp.weixin.qq.com/"
+# 登录成功后后台地址形如 /cgi-bin/home?t=home/index&lang=zh_CN&token=123456
+TOKEN_RE = re.compile(r'/cgi-bin/.*[?&]token=(\d+)')
+# 判断是否登录的关键 Cookie
+SESSION_COOKIES = ("slave_sid", "data_ticket")
+# 状态文件只保存该域名（含子域名）下的 cookies 与 localStorage
+STATE_DOMAIN = "weixin.qq.com"
+# Cookie 剩余有效期不足该秒数时视为即将过期
+EXPIRY_MARGIN = 10 * 60
+PROBE_TIMEOUT = 10000
+LOGIN_TIMEOUT = 120000
+
+
+class SessionExpired(Exception):
+    """登录状态失效（无人值守模式下不等待扫码）"""
+
+
+def check_state_file(state_file: Path = STATE_FILE) -> Tuple[bool, str]:
+    """
+    离线预检状态文件（不启动浏览器）
+
+    Returns:
+        (是否可用, 说明)
+    """
+    state_file = Path(state_file)
+    if not state_file.exists():
+        return False, f"状态文件不存在: {state_file}"
+    try:
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        return False, f"状态文件无法读取: {e}"
+
+    now = time.time()
+    expires = {}
+    for cookie in state.get("cookies", []):
+        if cookie.get("name") in SESSION_COOKIES and "weixin.qq.com" in cookie.get("domain", ""):
+            expires[cookie["name"]] = cookie.get("expires", -1)
+    missing = [name for name in SESSION_COOKIES if name not in expires]
+    if missing:
+        return False, f"状态文件中缺少登录 Cookie: {', '.join(missing)}"
+    # expires 为 -1 表示会话 Cookie，没有明确过期时间，交给在线探测判断
+    dated = [t for t in expires.values() if t and t > 0]
+    if dated and min(dated) - now < EXPIRY_MARGIN:
+        return False, f"登录 Cookie 已于 {time.strftime('%Y-%m-%d %H:%M', time.localtime(min(dated)))} 过期"
+    if dated:
+        return True, f"登录 Cookie 有效至 {time.strftime('%Y-%m-%d %H:%M', time.localtime(min(dated)))}"
+    return True, "登录 Cookie 无明确过期时间，需在线确认"
+
+
+async def new_context(browser, state_file: Path = STATE_FILE, **options):
+    """创建浏览器上下文，状态文件通过离线预检时加载它"""
+    ok, reason = check_state_file(state_file)
+    if ok:
+        print(f"✓ 加载登录状态（{reason}）")
+        return await browser.new_context(storage_state=str(state_file), **options)
+    print(f"未加载登录状态: {reason}")
+    return await browser.new_context(**options)
+
+
+def _in_domain(host: str, domain: str = STATE_DOMAIN) -> bool:
+    host = (host or "").lstrip(".").lower()
+    return host == domain or host.endswith("." + domain)
+
+
+def filter_state(state: dict, domain: str = STATE_DOMAIN) -> dict:
+    """只保留公众号域名下的 cookies 和源"""
+    return {
+        "cookies": [c for c in state.get("cookies", []) if _in_domain(c.get("domain"), domain)],
+        "origins": [o for o in state.get("origins", []) if _in_domain(urlsplit(o.get("origin", "")).hostname, domain)],
+    }
+
+
+async def save_state(context, state_file: Path = STATE_FILE):
+    """
+    保存登录状态（先写临时文件再替换，避免中途退出留下损坏的文件）
+
+    连接常驻浏览器服务时上下文是所有站点共用的默认上下文，只保存 *.weixin.qq.com 的部分，
+    不把 CSDN、知乎、小红书的登录 Cookie 写进 wechat_state.json。
+    """
+    state_file = Path(state_file)
+    tmp = state_file.with_suffix(".tmp")
+    state = filter_state(await context.storage_state())
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    try:
+        os.chmod(tmp, 0o600)  # 含登录 Cookie，只允许本人读写
+    except OSError:
+        pass
+    os.replace(tmp, state_file)
+
+
+def token_from_url(url: str) -> Optional[str]:
+    m = TOKEN_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+async def probe(page, timeout: int = PROBE_TIMEOUT) -> Optional[str]:
+    """
+    在线探测登录是否有效
+
+    Returns:
+        后台 token（已登录），未登录时返回 None
+    """
+    await page.goto(HOME_URL, wait_until="domcontentloaded")
+    token = token_from_url(page.url)
+    if token:
+        return token
+    try:
+        await page.wait_for_url(TOKEN_RE, timeout=timeout)
+    except Exception:
+        return None
+    return token_from_url(page.url)
+
+
+async def ensure_login(context, page, state_file: Path = STATE_FILE, unattended: bool = False,
+                       login_timeout: int = LOGIN_TIMEOUT) -> str:
+    """
+    确保已登录，返回后台 token
+
+    先用已加载的状态在线探测；失效时无人值守模式直接抛出 SessionExpired，
+    否则等待扫码登录。确认登录后刷新保存状态文件。
+    """
+    start = time.monotonic()
+    token = await probe(page)
+    if token:
+        print(f"✓ 登录状态有效（{time.monotonic() - start:.1f} 秒），跳过扫码")
+    else:
+        if unattended:
+            raise SessionExpired(f"登录状态已失效，请先运行一次有人值守模式扫码登录（状态文件: {state_file}）")
+        print("请使用微信扫码登录...")
+        print("等待跳转到主页面...")
+        try:
+            await page.wait_for_url(TOKEN_RE, timeout=login_timeout)
+        except Exception:
+            print("❌ 无法确认登录状态")
+            raise
+        token = token_from_url(page.url)
+        print("✓ 登录成功！")
+
+    try:
+        await save_state(context, state_file)
+        print(f"✓ 登录状态已保存: {Path(state_file).name}")
+    except Exception as e:
+        print(f"⚠️ 保存登录状态失败: {e}")
+    return token
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="微信公众号登录状态管理")
+    parser.add_argument("command", choices=["check", "probe"],
+                        help="check 离线预检状态文件；probe 启动无头浏览器在线确认")
+    parser.add_argument("--state", default=str(STATE_FILE), help="状态文件路径")
+    args = parser.parse_args()
+
+    ok, reason = check_state_file(Path(args.state))
+    print(("✓ " if ok else "❌ ") + reason)
+    if args.command == "check" or not ok:
+        return 0 if ok else 1
+
+    async def run_probe():
+        from playwright.async_api import async_playwright
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            context = await new_context(browser, Path(args.state))
+            page = await context.new_page()
+            token = await probe(page)
+            if token:
+                await save_state(context, Path(args.state))
+            await browser.close()
+            return token
+
+    token = asyncio.run(run_probe())
+    print("✓ 在线确认登录有效" if token else "❌ 登录已失效，需要重新扫码")
+    return 0 if token else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,15 @@
 import time
 import os
+import json
 from pathlib import Path
+from urllib.parse import urlsplit
 from datetime import datetime
 from playwright.sync_api import sync_playwright, Playwright, expect
 
 # 状态文件的保存路径
 STORAGE_STATE_FILE = "xiaohongshu_auth.json"
+# 登录状态文件只保存本站点的 cookies / localStorage（共享浏览器的上下文里有其他站点的登录状态）
+STATE_DOMAIN = "xiaohongshu.com"
 # 目标网页
 TARGET_URL = "https://www.xiaohongshu.com/explore"
 
@@ -75,12 +79,46 @@ def is_logged_in(page, context, avatar_locator=None):
 
     return False, None
 
+def _in_domain(host, domain=STATE_DOMAIN):
+    host = (host or "").lstrip(".").lower()
+    return host == domain or host.endswith("." + domain)
+
+
+def save_storage_state(context, path=STORAGE_STATE_FILE):
+    """保存登录状态，只保留 xiaohongshu.com（含子域名）的 cookies 和 localStorage 源"""
+    state = context.storage_state()
+    state = {
+        "cookies": [c for c in state.get("cookies", []) if _in_domain(c.get("domain"))],
+        "origins": [o for o in state.get("origins", []) if _in_domain(urlsplit(o.get("origin", "")).hostname)],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
 def run(playwright: Playwright):
-    browser = playwright.chromium.launch(headless=False)
     context = None
-    
+    browser = None
+    # 共享浏览器中本次打开的标签页（其他工具同时打开的标签页不能关）
+    own_pages = None
+
+    # 设置了 BROWSER_CDP_ENDPOINT 时复用常驻浏览器服务（见 csdn-blog-auto-publish/browser_service.py），
+    # 服务启动时已加载登录状态文件，直接使用其默认上下文
+    endpoint = os.environ.get("BROWSER_CDP_ENDPOINT")
+    if endpoint:
+        try:
+            browser = playwright.chromium.connect_over_cdp(endpoint)
+            context = browser.contexts[0]
+            own_pages = []
+            print(f"已连接浏览器服务: {endpoint}")
+        except Exception as e:
+            print(f"连接浏览器服务 {endpoint} 失败，改为本地启动: {e}")
+            browser = context = None
+
+    if browser is None:
+        browser = playwright.chromium.launch(headless=False)
+
     # 1. 检查是否存在已保存的登录状态
-    if os.path.exists(STORAGE_STATE_FILE):
+    if not context and os.path.exists(STORAGE_STATE_FILE):
         print(f"检测到登录文件 {STORAGE_STATE_FILE}，正在尝试加载...")
         try:
             context = browser.new_context(storage_state=STORAGE_STATE_FILE)
@@ -93,6 +131,10 @@ def run(playwright: Playwright):
         context = browser.new_context()
 
     page = context.new_page()
+    if own_pages is not None:
+        own_pages.append(page)
+        # 点开帖子可能弹出新标签页，同样属于本次运行
+        page.on("popup", own_pages.append)
     
     try:
         print(f"正在打开: {TARGET_URL}")
@@ -213,7 +255,7 @@ def run(playwright: Playwright):
         # 稍微等待一下，确保 cookies/localStorage 完全写入
         time.sleep(2)
         try:
-            context.storage_state(path=STORAGE_STATE_FILE)
+            save_storage_state(context)
             print("登录状态已保存，下次将自动登录。")
         except Exception as e:
             print(f"保存登录状态失败: {e}")
@@ -237,10 +279,18 @@ def run(playwright: Playwright):
         print(f"脚本执行出错: {e}")
     finally:
         print("脚本运行结束，尝试关闭浏览器/上下文。")
-        try:
-            context.close()
-        except Exception:
-            pass
+        if own_pages is not None:
+            # 共享浏览器只关闭本次打开的标签页，browser.close() 仅断开连接
+            for p in own_pages:
+                try:
+                    p.close()
+                except Exception:
+                    pass
+        else:
+            try:
+                context.close()
+            except Exception:
+                pass
         try:
             browser.close()
         except Exception:
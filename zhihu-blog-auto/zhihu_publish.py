@@ -168,14 +168,30 @@ async def main():
     async with async_playwright() as p:
         # 启动一个非无头的浏览器（这样才能扫码登录）
         # 添加更多反检测参数
-        browser = await p.chromium.launch(
-            headless=False,
-            args=[
-                '--disable-blink-features=AutomationControlled',  # 禁用自动化控制特征
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-            ]
-        )
+        # 设置了 BROWSER_CDP_ENDPOINT 时复用常驻浏览器服务（见 csdn-blog-auto-publish/browser_service.py），
+        # 服务启动时已加载 zhihu_state.json，这里直接使用其默认上下文
+        endpoint = os.environ.get("BROWSER_CDP_ENDPOINT")
+        browser = None
+        # 共享浏览器中本次打开的标签页（其他工具同时打开的标签页不能关）
+        own_pages = None
+        if endpoint:
+            try:
+                browser = await p.chromium.connect_over_cdp(endpoint)
+                own_pages = []
+                print(f"已连接浏览器服务: {endpoint}")
+            except Exception as e:
+                print(f"连接浏览器服务 {endpoint} 失败，改为本地启动: {e}")
+                browser = None
+
+        if browser is None:
+            browser = await p.chromium.launch(
+                headless=False,
+                args=[
+                    '--disable-blink-features=AutomationControlled',  # 禁用自动化控制特征
+                    '--disable-dev-shm-usage',
+                    '--no-sandbox',
+                ]
+            )
         context = None
 
         try:
@@ -187,7 +203,10 @@ async def main():
                 'timezone_id': 'Asia/Shanghai',
             }
             
-            if os.path.exists(STATE_FILE_PATH):
+            if own_pages is not None:
+                context = browser.contexts[0]
+
+            elif os.path.exists(STATE_FILE_PATH):
                 # --- 1. 加载状态 ---
                 print(f"找到状态文件 '{STATE_FILE_PATH}'，正在加载登录状态...")
                 context = await browser.new_context(
@@ -282,6 +301,8 @@ async def main():
                     
                     # 创建新页面并添加反检测脚本
                     page = await context.new_page()
+                    if own_pages is not None:
+                        own_pages.append(page)
                     
                     await page.add_init_script("""
                         // 覆盖 navigator.webdriver
@@ -378,10 +399,18 @@ async def main():
 
         finally:
             # --- 4. 清理 ---
-            if context:
-                await context.close()
-            await browser.close()
-            print("浏览器已关闭。")
+            if own_pages is not None:
+                # 共享浏览器只关闭本次打开的标签页，然后断开连接
+                for page in own_pages:
+                    if not page.is_closed():
+                        await page.close()
+                await browser.close()
+                print("已断开浏览器服务连接。")
+            else:
+                if context:
+                    await context.close()
+                await browser.close()
+                print("浏览器已关闭。")
 
 if __name__ == "__main__":
     asyncio.run(main())